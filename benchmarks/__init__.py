@@ -0,0 +1 @@
+"""CPU micro-benchmarks; run with ``python -m benchmarks.hot_paths``."""
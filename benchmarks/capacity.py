@@ -0,0 +1,513 @@
+"""Open-loop capacity test of the real service against a local fake upstream.
+
+For every requested worker count the harness starts
+``uvicorn src.main:app --workers N`` with ``OPENAI_API_BASE`` pointing at
+:mod:`src.devtools.fake_openai`. It then offers requests at stepped arrival
+rates and reports, per step:
+
+- throughput of successful responses
+- p50/p95/p99 latency
+- error and timeout rates
+- server event-loop lag (from ``event_loop_lag_seconds`` on ``/metrics``)
+
+The knee is the highest rate the service still sustains.
+
+Arrivals are open-loop: requests are sent at Poisson-distributed times
+whether or not earlier ones completed, so queueing inside the service shows up
+as latency instead of silently lowering the offered load.
+
+Usage::
+
+    python -m benchmarks.capacity --workers 1 2 4 --rates 2 4 8 16 32 \\
+        --step-seconds 30 --llm-latency 1.0 -o capacity.json
+
+Response caching, request coalescing and the summary store are disabled by
+default, because the fake catalog is small and would turn most requests into
+cache hits. ``--env KEY=VALUE`` overrides any server setting.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+
+import httpx
+from prometheus_client.parser import text_string_to_metric_families
+
+from src.utils.latency import LatencyWindow
+
+THEMES = ("books", "games", "movies", "anime")
+LOOP_LAG_METRIC = "event_loop_lag_seconds"
+
+MESSAGES = (
+    "想找节奏紧凑、悬念迭起的作品",
+    "最近心情低落，想要温暖治愈一点的",
+    "喜欢宏大世界观和硬核设定",
+    "有没有适合周末一口气看完的",
+    "想要画面精美、配乐出色的",
+)
+
+SERVER_DEFAULTS = {
+    "RESPONSE_CACHE_ENABLED": "false",
+    "REQUEST_COALESCING_ENABLED": "false",
+    "SUMMARY_STORE_BACKEND": "none",
+    "LOG_LEVEL": "WARNING",
+    "TRACING_EXPORTER": "none",
+    "LLM_CASSETTE_MODE": "off",
+    # Callers are told apart by X-Forwarded-For, which only a trusted proxy may set
+    "TRUSTED_PROXIES": '["127.0.0.1"]',
+}
+
+
+@dataclass(slots=True)
+class StepResult:
+    """Outcome of one arrival-rate step."""
+
+    rate: float
+    offered: float  # Arrivals actually sent per second
+    sent: int
+    ok: int
+    errors: int
+    timeouts: int
+    throughput: float  # Successful responses per second
+    p50_ms: float | None
+    p95_ms: float | None
+    p99_ms: float | None
+    client_lag_ms_max: float  # Worst dispatch delay of the load generator itself
+    server_loop_lag_ms_mean: float | None = None
+    server_loop_lag_ms_p99: float | None = None
+    by_theme: dict[str, dict[str, Any]] = field(default_factory=dict)
+
+    @property
+    def error_rate(self) -> float:
+        return self.errors / self.sent if self.sent else 0.0
+
+    @property
+    def timeout_rate(self) -> float:
+        return self.timeouts / self.sent if self.sent else 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            **asdict(self),
+            "error_rate": round(self.error_rate, 4),
+            "timeout_rate": round(self.timeout_rate, 4),
+        }
+
+
+@dataclass(slots=True)
+class _Outcome:
+    theme: str
+    status: str  # ok | error | timeout
+    seconds: float
+
+
+def _percentiles_ms(latencies: list[float]) -> tuple[float | None, float | None, float | None]:
+    window = LatencyWindow(max(1, len(latencies)))
+    for seconds in latencies:
+        window.add(seconds)
+
+    def pct(value: float) -> float | None:
+        result = window.percentile(value)
+        return round(result * 1000, 1) if result is not None else None
+
+    return pct(50), pct(95), pct(99)
+
+
+def _client_address(index: int) -> str:
+    return f"10.{index // 65536 % 256}.{index // 256 % 256}.{index % 256}"
+
+
+async def _send(
+    client: httpx.AsyncClient, theme: str, index: int, caller: int, rng: random.Random
+) -> _Outcome:
+    payload = {
+        # Unique text per request keeps identical-request shortcuts out of the way
+        "user_message": f"{rng.choice(MESSAGES)}（#{index}）",
+        "request_id": f"capacity-{index}",
+    }
+    started = time.perf_counter()
+    try:
+        # The governor shares LLM capacity per caller, identified by forwarded address
+        response = await client.post(
+            f"/api/{theme}/recommend",
+            json=payload,
+            headers={"X-Forwarded-For": _client_address(caller)},
+        )
+        status = "ok" if response.status_code == 200 else "error"
+        if response.status_code == 504:
+            status = "timeout"
+    except httpx.TimeoutException:
+        status = "timeout"
+    except httpx.HTTPError:
+        status = "error"
+    return _Outcome(theme, status, time.perf_counter() - started)
+
+
+async def run_step(
+    client: httpx.AsyncClient,
+    rate: float,
+    duration: float,
+    *,
+    themes: tuple[str, ...] = THEMES,
+    clients: int = 100,
+    seed: int = 0,
+) -> StepResult:
+    """Offer Poisson arrivals at ``rate`` per second for ``duration`` seconds.
+
+    Themes are used round-robin and each request comes from one of
+    ``clients`` simulated callers. The step ends once every request sent
+    during the window has completed or timed out.
+
+    Args:
+        client: Client bound to the service base URL
+        rate: Mean arrivals per second
+        duration: Seconds during which requests are sent
+        themes: Theme endpoints to drive
+        clients: Number of distinct callers
+        seed: Seed for arrival times and messages
+
+    Returns:
+        Step statistics (without server-side lag)
+    """
+    rng = random.Random(seed)
+    loop = asyncio.get_running_loop()
+    tasks: list[asyncio.Task[_Outcome]] = []
+    started = loop.time()
+    next_at = started
+    lag_max = 0.0
+    while next_at < started + duration:
+        delay = next_at - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        lag_max = max(lag_max, loop.time() - next_at)
+        index = len(tasks)
+        theme = themes[index % len(themes)]
+        caller = rng.randrange(max(1, clients))
+        tasks.append(asyncio.create_task(_send(client, theme, index, caller, rng)))
+        next_at += rng.expovariate(rate)
+
+    outcomes = await asyncio.gather(*tasks)
+    elapsed = max(duration, loop.time() - started)
+
+    ok = [o.seconds for o in outcomes if o.status == "ok"]
+    p50, p95, p99 = _percentiles_ms(ok)
+    by_theme: dict[str, dict[str, Any]] = {}
+    for theme in themes:
+        mine = [o for o in outcomes if o.theme == theme]
+        theme_ok = [o.seconds for o in mine if o.status == "ok"]
+        by_theme[theme] = {
+            "sent": len(mine),
+            "ok": len(theme_ok),
+            "p95_ms": _percentiles_ms(theme_ok)[1],
+        }
+    return StepResult(
+        rate=rate,
+        offered=round(len(outcomes) / duration, 3),
+        sent=len(outcomes),
+        ok=len(ok),
+        errors=sum(o.status == "error" for o in outcomes),
+        timeouts=sum(o.status == "timeout" for o in outcomes),
+        throughput=round(len(ok) / elapsed, 3),
+        p50_ms=p50,
+        p95_ms=p95,
+        p99_ms=p99,
+        client_lag_ms_max=round(lag_max * 1000, 1),
+        by_theme=by_theme,
+    )
+
+
+def lag_histogram(metrics_text: str) -> dict[float, float]:
+    """Cumulative bucket counts of the event-loop lag histogram.
+
+    Args:
+        metrics_text: Prometheus text exposition from ``/metrics``
+
+    Returns:
+        Mapping of bucket upper bound (``inf`` included) to cumulative count,
+        plus the observation sum under key ``-1``
+    """
+    buckets: dict[float, float] = {}
+    for family in text_string_to_metric_families(metrics_text):
+        if family.name != LOOP_LAG_METRIC:
+            continue
+        for sample in family.samples:
+            if sample.name.endswith("_bucket"):
+                bound = float(sample.labels["le"])
+                buckets[bound] = buckets.get(bound, 0.0) + sample.value
+            elif sample.name.endswith("_sum"):
+                buckets[-1.0] = buckets.get(-1.0, 0.0) + sample.value
+    return buckets
+
+
+def lag_between(
+    before: dict[float, float], after: dict[float, float]
+) -> tuple[float | None, float | None]:
+    """Mean and p99 event-loop lag, in ms, observed between two scrapes.
+
+    The p99 is the upper bound of the bucket holding the 99th percentile.
+    """
+    count = after.get(float("inf"), 0.0) - before.get(float("inf"), 0.0)
+    if count <= 0:
+        return None, None
+    mean = (after.get(-1.0, 0.0) - before.get(-1.0, 0.0)) / count
+    p99 = None
+    for bound in sorted(b for b in after if b >= 0):
+        if after[bound] - before.get(bound, 0.0) >= 0.99 * count:
+            p99 = bound
+            break
+    return round(mean * 1000, 2), (round(p99 * 1000, 2) if p99 != float("inf") else None)
+
+
+def find_knee(
+    steps: list[StepResult],
+    *,
+    min_throughput_ratio: float = 0.9,
+    max_failure_rate: float = 0.01,
+    latency_factor: float = 2.0,
+) -> StepResult | None:
+    """Return the highest-rate step before the service saturates.
+
+    A step is sustained when throughput keeps up with the offered rate, few
+    requests fail or time out, and p95 latency stays within ``latency_factor``
+    of the first step's. Steps are taken in increasing rate order and the
+    search stops at the first step that is not sustained.
+
+    Args:
+        steps: Step results, lowest rate first
+        min_throughput_ratio: Minimum throughput / arrivals actually sent per second
+        max_failure_rate: Maximum share of errors plus timeouts
+        latency_factor: Maximum p95 growth over the lowest-rate step
+
+    Returns:
+        Last sustained step, or None when even the first step saturates
+    """
+    knee: StepResult | None = None
+    base_p95 = steps[0].p95_ms if steps else None
+    for step in sorted(steps, key=lambda s: s.rate):
+        sustained = (
+            step.throughput >= min_throughput_ratio * step.offered
+            and step.error_rate + step.timeout_rate <= max_failure_rate
+            and step.p95_ms is not None
+            and base_p95 is not None
+            and step.p95_ms <= latency_factor * base_p95
+        )
+        if not sustained:
+            break
+        knee = step
+    return knee
+
+
+async def _wait_ready(url: str, process: subprocess.Popen[bytes], timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"{process.args} exited with status {process.returncode}")
+            try:
+                if (await client.get(url)).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"{url} not ready after {timeout:.0f}s")
+
+
+def _stop(process: subprocess.Popen[bytes]) -> None:
+    process.terminate()
+    try:
+        process.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+async def _scrape_lag(client: httpx.AsyncClient) -> dict[float, float]:
+    try:
+        response = await client.get("/metrics")
+    except httpx.HTTPError:
+        return {}
+    return lag_histogram(response.text) if response.status_code == 200 else {}
+
+
+async def run_workers(args: argparse.Namespace, workers: int, upstream: str) -> dict[str, Any]:
+    """Start the service with ``workers`` processes and run every step."""
+    base_url = f"http://127.0.0.1:{args.port}"
+    with tempfile.TemporaryDirectory(prefix="capacity-metrics-") as multiproc_dir:
+        env = {
+            **os.environ,
+            **SERVER_DEFAULTS,
+            "OPENAI_API_BASE": upstream,
+            "OPENAI_API_KEY": "fake-key",
+            "PROMETHEUS_MULTIPROC_DIR": multiproc_dir,
+            **dict(item.split("=", 1) for item in args.env),
+        }
+        command = [
+            sys.executable, "-m", "uvicorn", "src.main:app",
+            "--host", "127.0.0.1", "--port", str(args.port),
+            "--workers", str(workers), "--log-level", "warning",
+        ]  # fmt: skip
+        server = subprocess.Popen(command, env=env)
+        try:
+            await _wait_ready(f"{base_url}/health", server, args.startup_timeout)
+            limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+            async with httpx.AsyncClient(
+                base_url=base_url, timeout=args.timeout, limits=limits
+            ) as client:
+                if args.warmup > 0:
+                    await run_step(
+                        client,
+                        args.rates[0],
+                        args.warmup,
+                        themes=tuple(args.themes),
+                        clients=args.clients,
+                    )
+                steps: list[StepResult] = []
+                for index, rate in enumerate(args.rates):
+                    before = await _scrape_lag(client)
+                    step = await run_step(
+                        client,
+                        rate,
+                        args.step_seconds,
+                        themes=tuple(args.themes),
+                        clients=args.clients,
+                        seed=args.seed + index,
+                    )
+                    step.server_loop_lag_ms_mean, step.server_loop_lag_ms_p99 = lag_between(
+                        before, await _scrape_lag(client)
+                    )
+                    steps.append(step)
+                    _print_step(workers, step)
+        finally:
+            _stop(server)
+
+    knee = find_knee(
+        steps, latency_factor=args.knee_latency_factor, max_failure_rate=args.max_failure_rate
+    )
+    return {
+        "workers": workers,
+        "knee_rate": knee.rate if knee else None,
+        "knee_p95_ms": knee.p95_ms if knee else None,
+        "steps": [step.to_dict() for step in steps],
+    }
+
+
+def _print_step(workers: int, step: StepResult) -> None:
+    print(
+        f"workers={workers:<2} rate={step.rate:>7.2f}/s  sent={step.sent:>5}  "
+        f"thr={step.throughput:>7.2f}/s  p50={step.p50_ms}ms  p95={step.p95_ms}ms  "
+        f"p99={step.p99_ms}ms  err={step.error_rate:.1%}  timeout={step.timeout_rate:.1%}  "
+        f"loop_lag_p99={step.server_loop_lag_ms_p99}ms",
+        flush=True,
+    )
+
+
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.capacity",
+        description="Open-loop capacity test of the service against a fake LLM upstream.",
+    )
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument(
+        "--rates", type=float, nargs="+", default=[1, 2, 4, 8, 16, 32], help="Requests/second"
+    )
+    parser.add_argument("--step-seconds", type=float, default=30.0, help="Seconds per step")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Unreported first step")
+    parser.add_argument("--themes", nargs="+", choices=THEMES, default=list(THEMES))
+    parser.add_argument("--clients", type=int, default=100, help="Distinct simulated callers")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Client timeout")
+    parser.add_argument("--port", type=int, default=8100, help="Service port")
+    parser.add_argument("--upstream-port", type=int, default=9100, help="Fake upstream port")
+    parser.add_argument(
+        "--upstream", help="Use a running upstream at this /v1 base URL instead of the fake"
+    )
+    parser.add_argument("--llm-latency", type=float, default=1.0, help="Fake mean LLM latency")
+    parser.add_argument("--llm-jitter", type=float, default=0.3, help="Fake lognormal sigma")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--llm-rate-limit-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--env", action="append", default=[], metavar="KEY=VALUE", help="Server setting"
+    )
+    parser.add_argument("--knee-latency-factor", type=float, default=2.0)
+    parser.add_argument("--max-failure-rate", type=float, default=0.01)
+    parser.add_argument("--startup-timeout", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", type=Path, help="Write the JSON report here")
+    args = parser.parse_args(argv)
+    args.rates = sorted(args.rates)
+    return args
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    """Run every worker count against one upstream and build the report."""
+    fake: subprocess.Popen[bytes] | None = None
+    upstream = args.upstream
+    if upstream is None:
+        upstream = f"http://127.0.0.1:{args.upstream_port}/v1"
+        fake = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "src.devtools.fake_openai",
+                "--port",
+                str(args.upstream_port),
+                "--latency",
+                str(args.llm_latency),
+                "--jitter",
+                str(args.llm_jitter),
+                "--error-rate",
+                str(args.llm_error_rate),
+                "--rate-limit-rate",
+                str(args.llm_rate_limit_rate),
+                "--seed",
+                str(args.seed),
+            ]  # fmt: skip
+        )
+    try:
+        if fake is not None:
+            await _wait_ready(f"{upstream}/models", fake, args.startup_timeout)
+        runs = [await run_workers(args, workers, upstream) for workers in args.workers]
+    finally:
+        if fake is not None:
+            _stop(fake)
+
+    return {
+        "config": {
+            key: value
+            for key, value in vars(args).items()
+            if key not in {"output", "startup_timeout"}
+        },
+        "runs": runs,
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Command-line entry point."""
+    args = _parse_args(argv)
+    report = asyncio.run(run(args))
+
+    print("\nworkers  knee rate/s  p95 at knee")
+    for result in report["runs"]:
+        print(
+            f"{result['workers']:>7}  {result['knee_rate']!s:>11}  {result['knee_p95_ms']!s:>9}ms"
+        )
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(
+            json.dumps(report, ensure_ascii=False, indent=2, default=str) + "\n",
+            encoding="utf-8",
+        )
+
+
+if __name__ == "__main__":
+    main()
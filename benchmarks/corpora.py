@@ -0,0 +1,142 @@
+"""Deterministic inputs for the hot-path benchmarks.
+
+Every builder is seeded, so a corpus is identical across runs and machines and
+timings stay comparable with the stored baseline. ``realistic`` inputs mirror
+typical upstream output; ``adversarial`` ones stress the same code paths with
+large metadata, long chatter around fenced JSON, long histories and
+malformed payloads.
+"""
+
+from __future__ import annotations
+
+import json
+import random
+from typing import Any
+
+TITLES = ["三体", "沙丘", "基地", "神经漫游者", "海伯利安", "你一生的故事", "银河帝国", "球状闪电"]
+CREATORS = ["刘慈欣", "弗兰克·赫伯特", "阿西莫夫", "威廉·吉布森", "丹·西蒙斯", "特德·姜"]
+PROSE = "这部作品以宏大的世界观和细腻的人物刻画著称，节奏紧凑，情节层层推进，令人手不释卷。"
+
+
+def _text(rng: random.Random, length: int) -> str:
+    repeats = length // len(PROSE) + 1
+    start = rng.randrange(len(PROSE))
+    return (PROSE * (repeats + 1))[start : start + length]
+
+
+def metadata(rng: random.Random, keys: int, *, nested: bool = False) -> dict[str, Any]:
+    """Candidate metadata with ``keys`` fields, optionally holding lists and dicts."""
+    result: dict[str, Any] = {}
+    for index in range(keys):
+        if nested and index % 3 == 1:
+            result[f"标签{index}"] = [_text(rng, 6) for _ in range(5)]
+        elif nested and index % 3 == 2:
+            result[f"字段{index}"] = {"值": _text(rng, 10), "备注": None}
+        else:
+            result[f"字段{index}"] = _text(rng, 12)
+    return result
+
+
+def candidates(rng: random.Random, count: int, metadata_keys: int) -> list[dict[str, Any]]:
+    """Raw candidate objects as the selector emits them."""
+    return [
+        {
+            "title": TITLES[index % len(TITLES)] + ("" if index < len(TITLES) else str(index)),
+            "creator": CREATORS[index % len(CREATORS)],
+            "metadata": metadata(rng, metadata_keys, nested=metadata_keys > 10),
+        }
+        for index in range(count)
+    ]
+
+
+def fence(payload: Any, style: str, chatter: int = 0, *, seed: int = 0) -> str:
+    """Serialize a payload as an LLM would return it.
+
+    Args:
+        payload: JSON-serializable object
+        style: ``plain`` (bare JSON), ``json`` (```json fence) or ``bare`` (``` fence)
+        chatter: Characters of prose placed around the fence
+        seed: Seed for the prose
+    """
+    rng = random.Random(seed)
+    body = json.dumps(payload, ensure_ascii=False, indent=2)
+    if style == "plain":
+        return body
+    opener = "```json" if style == "json" else "```"
+    return f"{_text(rng, chatter)}\n{opener}\n{body}\n```\n{_text(rng, chatter)}"
+
+
+def selector_output(
+    *, count: int = 3, metadata_keys: int = 4, style: str = "plain", chatter: int = 0, seed: int = 1
+) -> str:
+    """Selector completion with profile, candidates and message."""
+    rng = random.Random(seed)
+    payload = {
+        "user_profile": {
+            "summary": "喜欢硬核科幻与宏大叙事",
+            "attributes": {"类型": ["科幻", "太空歌剧"], "节奏": "紧凑", "篇幅": ["长篇"]},
+        },
+        "candidates": candidates(rng, count, metadata_keys),
+        "message": "根据你的描述，挑选了以下几部作品。",
+    }
+    return fence(payload, style, chatter, seed=seed)
+
+
+def summaries_output(
+    *, count: int = 3, style: str = "plain", wrapped: bool = True, chatter: int = 0, seed: int = 2
+) -> str:
+    """Extractor completion, as a ``summaries`` object or a bare array."""
+    rng = random.Random(seed)
+    entries = [{"title": TITLES[i % len(TITLES)], "summary": _text(rng, 70)} for i in range(count)]
+    return fence({"summaries": entries} if wrapped else entries, style, chatter, seed=seed)
+
+
+def reasons_output(
+    *, count: int = 3, style: str = "plain", wrapped: bool = True, chatter: int = 0, seed: int = 3
+) -> str:
+    """Insight completion, as a ``reasons`` object or a bare array."""
+    rng = random.Random(seed)
+    entries = [
+        {"title": TITLES[i % len(TITLES)], "recommendation_reason": _text(rng, 40)}
+        for i in range(count)
+    ]
+    return fence({"reasons": entries} if wrapped else entries, style, chatter, seed=seed)
+
+
+def truncated(text: str) -> str:
+    """Cut a completion mid-object, like an upstream stopped at its token limit."""
+    return text[: int(len(text) * 0.8)]
+
+
+def history(turns: int, *, message_chars: int = 200, seed: int = 4) -> list[dict[str, str]]:
+    """Alternating user/assistant conversation history."""
+    rng = random.Random(seed)
+    return [
+        {"role": "user" if index % 2 == 0 else "assistant", "content": _text(rng, message_chars)}
+        for index in range(turns * 2)
+    ]
+
+
+def response_payload(*, cards: int = 3, metadata_keys: int = 4, seed: int = 5) -> dict[str, Any]:
+    """Serialized ``RecommendationResponse`` as the API returns it."""
+    rng = random.Random(seed)
+    return {
+        "theme": "books",
+        "user_profile": {
+            "theme": "books",
+            "summary": "喜欢硬核科幻",
+            "attributes": {f"标签{i}": [_text(rng, 6) for _ in range(3)] for i in range(6)},
+        },
+        "recommendations": [
+            {
+                "title": TITLES[i],
+                "creator": CREATORS[i],
+                "metadata": {f"字段{k}": _text(rng, 12) for k in range(metadata_keys)},
+                "summary": _text(rng, 70),
+                "reason": _text(rng, 40),
+            }
+            for i in range(cards)
+        ],
+        "message": "根据你的描述，挑选了以下几部作品。",
+        "request_id": "bench-0001",
+    }
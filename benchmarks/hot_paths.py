@@ -0,0 +1,411 @@
+"""Micro-benchmarks for the CPU-side hot paths of a recommendation request.
+
+Covers selector output parsing (``_extract_json``, ``_build_candidates``,
+``_parse_response``), prompt assembly over long histories, extractor and
+insight parsing, ``AssemblerAgent.process`` and pydantic validation and
+serialization of ``RecommendationResponse``.
+
+Usage::
+
+    # Run everything and write machine-readable results
+    python -m benchmarks.hot_paths -o results.json
+
+    # Fail (exit 1) when a benchmark is 25% slower than the stored baseline
+    python -m benchmarks.hot_paths --compare benchmarks/baseline.json --threshold 1.25
+
+    # Refresh the baseline (on the machine the comparisons run on)
+    python -m benchmarks.hot_paths -o benchmarks/baseline.json
+
+Timings are per call: each benchmark is repeated until one sample takes at
+least ``--min-time`` seconds, and the median over ``--repeat`` samples is
+reported. Logging is disabled while measuring, so malformed-input cases time
+the parsing work rather than log output.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import fnmatch
+import gc
+import json
+import logging
+import platform
+import statistics
+import sys
+import time
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+from benchmarks import corpora
+from src.agents.assembler import AssemblerAgent
+from src.agents.essence_extractor import EssenceExtractorAgent
+from src.agents.insight_provider import InsightProviderAgent
+from src.agents.selector import SelectorAgent
+from src.llm.tokens import count_message_tokens
+from src.models.recommendation import (
+    RecommendationCandidate,
+    RecommendationResponse,
+    UserProfile,
+)
+
+DEFAULT_THRESHOLD = 1.25
+
+
+class BenchmarkError(RuntimeError):
+    """Raised when a benchmark's output fails its sanity check."""
+
+
+@dataclass(slots=True)
+class Benchmark:
+    """One measured call and a check that it still does the real work."""
+
+    name: str
+    func: Callable[[], Any]
+    check: Callable[[Any], bool] | None = None
+
+
+@dataclass(slots=True)
+class BenchmarkResult:
+    """Per-call timings of one benchmark, in microseconds."""
+
+    name: str
+    loops: int
+    repeats: int
+    median_us: float
+    min_us: float
+    max_us: float
+
+
+@dataclass(slots=True)
+class Comparison:
+    """Timing of one benchmark against the baseline."""
+
+    name: str
+    baseline_us: float
+    current_us: float
+
+    @property
+    def ratio(self) -> float:
+        return self.current_us / self.baseline_us if self.baseline_us else float("inf")
+
+
+def build_benchmarks() -> list[Benchmark]:
+    """Create the benchmark cases with their corpora prepared up front."""
+    selector = SelectorAgent(theme="books")
+    extractor = EssenceExtractorAgent(theme="books")
+    insight = InsightProviderAgent(theme="books")
+    assembler = AssemblerAgent(theme="books")
+    loop = asyncio.new_event_loop()
+
+    plain = corpora.selector_output()
+    fenced = corpora.selector_output(style="json", chatter=200)
+    chatty = corpora.selector_output(style="bare", chatter=4000)
+    truncated = corpora.truncated(corpora.selector_output(count=10, metadata_keys=40))
+    raw_candidates = json.loads(plain)["candidates"]
+    big_candidates = json.loads(corpora.selector_output(count=20, metadata_keys=200))["candidates"]
+    short_history = corpora.history(3)
+    long_history = corpora.history(50, message_chars=400)
+    long_messages = selector._build_messages("再推荐几本类似的", long_history)
+    summaries_plain = corpora.summaries_output()
+    summaries_fenced = corpora.summaries_output(style="json", wrapped=False, chatter=300)
+    summaries_truncated = corpora.truncated(corpora.summaries_output(count=30))
+    reasons_plain = corpora.reasons_output()
+    reasons_fenced = corpora.reasons_output(style="bare", wrapped=False, chatter=300)
+
+    payload = corpora.response_payload()
+    big_payload = corpora.response_payload(metadata_keys=200)
+    response = RecommendationResponse.model_validate(payload)
+    profile = response.user_profile
+    candidates = [
+        RecommendationCandidate(title=c.title, creator=c.creator, metadata=c.metadata)
+        for c in response.recommendations
+    ]
+    summaries = {c.title: c.summary for c in response.recommendations}
+    reasons = {c.title: c.reason for c in response.recommendations}
+
+    def assemble(summaries: dict[str, str], reasons: dict[str, str]) -> Callable[[], Any]:
+        def run() -> RecommendationResponse:
+            return loop.run_until_complete(
+                assembler.process(
+                    user_profile=profile,
+                    candidates=candidates,
+                    summaries=summaries,
+                    reasons=reasons,
+                    intro_message="根据你的描述，挑选了以下几部作品。",
+                )
+            )
+
+        return run
+
+    def three(result: Any) -> bool:
+        return len(result) == 3
+
+    return [
+        Benchmark("selector.extract_json/plain", lambda: selector._extract_json(plain), bool),
+        Benchmark("selector.extract_json/fenced", lambda: selector._extract_json(fenced), bool),
+        Benchmark("selector.extract_json/chatter_4k", lambda: selector._extract_json(chatty), bool),
+        Benchmark(
+            "selector.extract_json/truncated",
+            lambda: selector._extract_json(truncated),
+            lambda result: result == {},
+        ),
+        Benchmark(
+            "selector.build_candidates/realistic",
+            lambda: selector._build_candidates(raw_candidates),
+            three,
+        ),
+        Benchmark(
+            "selector.build_candidates/big_metadata",
+            lambda: selector._build_candidates(big_candidates),
+            three,
+        ),
+        Benchmark(
+            "selector.parse_response/realistic",
+            lambda: selector._parse_response(plain),
+            lambda result: len(result[1]) == 3,
+        ),
+        Benchmark(
+            "selector.build_messages/short_history",
+            lambda: selector._build_messages("再推荐几本类似的", short_history),
+        ),
+        Benchmark(
+            "selector.build_messages/long_history",
+            lambda: selector._build_messages("再推荐几本类似的", long_history),
+        ),
+        Benchmark(
+            "tokens.count_messages/long_history",
+            lambda: count_message_tokens(long_messages, selector.model_name),
+        ),
+        Benchmark(
+            "extractor.parse_summaries/plain",
+            lambda: extractor._parse_summaries(summaries_plain),
+            three,
+        ),
+        Benchmark(
+            "extractor.parse_summaries/fenced_array",
+            lambda: extractor._parse_summaries(summaries_fenced),
+            three,
+        ),
+        Benchmark(
+            "extractor.parse_summaries/truncated",
+            lambda: extractor._parse_summaries(summaries_truncated),
+            lambda result: result == {},
+        ),
+        Benchmark(
+            "insight.parse_reasons/plain",
+            lambda: insight._parse_reasons(reasons_plain),
+            three,
+        ),
+        Benchmark(
+            "insight.parse_reasons/fenced_array",
+            lambda: insight._parse_reasons(reasons_fenced),
+            three,
+        ),
+        Benchmark(
+            "assembler.process/realistic",
+            assemble(summaries, reasons),
+            lambda result: not result.degraded and len(result.recommendations) == 3,
+        ),
+        Benchmark(
+            "assembler.process/default_texts",
+            assemble({}, {}),
+            lambda result: len(result.recommendations) == 3,
+        ),
+        Benchmark(
+            "model.validate_response/realistic",
+            lambda: RecommendationResponse.model_validate(payload),
+        ),
+        Benchmark(
+            "model.validate_response/big_metadata",
+            lambda: RecommendationResponse.model_validate(big_payload),
+        ),
+        Benchmark("model.dump_response_json", response.model_dump_json),
+        Benchmark(
+            "model.validate_profile",
+            lambda: UserProfile.model_validate(payload["user_profile"]),
+        ),
+    ]
+
+
+def _time(func: Callable[[], Any], loops: int) -> float:
+    started = time.perf_counter()
+    for _ in range(loops):
+        func()
+    return time.perf_counter() - started
+
+
+def measure(benchmark: Benchmark, *, min_time: float, repeats: int) -> BenchmarkResult:
+    """Time one benchmark.
+
+    Args:
+        benchmark: Benchmark to run
+        min_time: Minimum seconds per sample; decides the loop count
+        repeats: Number of samples
+
+    Returns:
+        Per-call timings
+
+    Raises:
+        BenchmarkError: When the benchmark output fails its check
+    """
+    result = benchmark.func()
+    if benchmark.check is not None and not benchmark.check(result):
+        raise BenchmarkError(f"{benchmark.name} returned an unexpected result: {result!r:.200}")
+
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        loops = 1
+        while (elapsed := _time(benchmark.func, loops)) < min_time:
+            loops = max(loops * 2, int(loops * min_time / max(elapsed, 1e-9) * 1.1))
+        samples = [_time(benchmark.func, loops) / loops * 1e6 for _ in range(repeats)]
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    return BenchmarkResult(
+        name=benchmark.name,
+        loops=loops,
+        repeats=repeats,
+        median_us=round(statistics.median(samples), 3),
+        min_us=round(min(samples), 3),
+        max_us=round(max(samples), 3),
+    )
+
+
+def run(
+    benchmarks: list[Benchmark], *, min_time: float, repeats: int, pattern: str = "*"
+) -> list[BenchmarkResult]:
+    """Run the benchmarks whose name matches a glob pattern."""
+    return [
+        measure(benchmark, min_time=min_time, repeats=repeats)
+        for benchmark in benchmarks
+        if fnmatch.fnmatch(benchmark.name, pattern)
+    ]
+
+
+def to_report(results: list[BenchmarkResult]) -> dict[str, Any]:
+    """Machine-readable report of a run."""
+    return {
+        "meta": {
+            "created_at": datetime.now(UTC).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+            "platform": platform.platform(terse=True),
+        },
+        "results": {result.name: asdict(result) for result in results},
+    }
+
+
+def compare(
+    report: dict[str, Any], baseline: dict[str, Any], threshold: float = DEFAULT_THRESHOLD
+) -> tuple[list[Comparison], list[Comparison]]:
+    """Compare median timings of a run against a baseline report.
+
+    Args:
+        report: Report of the current run
+        baseline: Stored baseline report
+        threshold: Current/baseline ratio above which a benchmark regressed
+
+    Returns:
+        Tuple of (all comparisons, regressions)
+    """
+    comparisons = [
+        Comparison(
+            name=name,
+            baseline_us=baseline["results"][name]["median_us"],
+            current_us=result["median_us"],
+        )
+        for name, result in report["results"].items()
+        if name in baseline["results"]
+    ]
+    return comparisons, [c for c in comparisons if c.ratio > threshold]
+
+
+def _print_results(results: list[BenchmarkResult]) -> None:
+    width = max((len(result.name) for result in results), default=10)
+    print(f"{'benchmark':<{width}}  {'median µs':>12}  {'min µs':>12}  {'loops':>8}")
+    for result in results:
+        print(
+            f"{result.name:<{width}}  {result.median_us:>12.2f}  "
+            f"{result.min_us:>12.2f}  {result.loops:>8}"
+        )
+
+
+def _print_comparison(comparisons: list[Comparison], threshold: float) -> None:
+    width = max((len(c.name) for c in comparisons), default=10)
+    print(f"\n{'benchmark':<{width}}  {'baseline µs':>12}  {'current µs':>12}  {'ratio':>7}")
+    for c in comparisons:
+        flag = "  REGRESSION" if c.ratio > threshold else ""
+        print(
+            f"{c.name:<{width}}  {c.baseline_us:>12.2f}  {c.current_us:>12.2f}  "
+            f"{c.ratio:>6.2f}x{flag}"
+        )
+
+
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.hot_paths",
+        description="Micro-benchmarks for per-request CPU hot paths.",
+    )
+    parser.add_argument("-k", "--filter", default="*", help="Glob of benchmark names to run")
+    parser.add_argument("--min-time", type=float, default=0.05, help="Seconds per sample")
+    parser.add_argument("--repeat", type=int, default=7, help="Samples per benchmark")
+    parser.add_argument("-o", "--output", type=Path, help="Write the JSON report here")
+    parser.add_argument("--compare", type=Path, help="Baseline report to compare against")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help=f"Slowdown ratio counted as a regression (default: {DEFAULT_THRESHOLD})",
+    )
+    parser.add_argument("--list", action="store_true", help="List benchmark names and exit")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Command-line entry point.
+
+    Returns:
+        Exit status: 1 when a benchmark regressed against the baseline
+    """
+    args = _parse_args(argv)
+    logging.disable(logging.CRITICAL)
+    try:
+        benchmarks = build_benchmarks()
+        if args.list:
+            print("\n".join(benchmark.name for benchmark in benchmarks))
+            return 0
+        results = run(benchmarks, min_time=args.min_time, repeats=args.repeat, pattern=args.filter)
+    finally:
+        logging.disable(logging.NOTSET)
+
+    report = to_report(results)
+    _print_results(results)
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(
+            json.dumps(report, ensure_ascii=False, indent=2) + "\n", encoding="utf-8"
+        )
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        comparisons, regressions = compare(report, baseline, args.threshold)
+        _print_comparison(comparisons, args.threshold)
+        if regressions:
+            print(
+                f"\n{len(regressions)} benchmark(s) slower than {args.threshold:g}x baseline",
+                file=sys.stderr,
+            )
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
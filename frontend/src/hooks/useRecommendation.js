@@ -7,10 +7,15 @@ export default function useRecommendation(theme) {
   const [loading, setLoading] = useState(false)
   const [error, setError] = useState(null)
   const conversationRef = useRef([])
+  const sessionRef = useRef(null)
+  // Set when the server lost our session, so the next turn resends the history
+  const resyncRef = useRef(false)
 
   useEffect(() => {
     // Reset state when theme changes
     conversationRef.current = []
+    sessionRef.current = null
+    resyncRef.current = false
     setMessages([])
     setRecommendations(null)
     setError(null)
@@ -29,15 +34,23 @@ export default function useRecommendation(theme) {
 
       try {
         const history = conversationRef.current
-        const data = await getRecommendations(theme, trimmed, history)
+        const sessionId = sessionRef.current
+        const data = await getRecommendations(theme, trimmed, {
+          sessionId,
+          conversationHistory: sessionId && !resyncRef.current ? [] : history,
+        })
         const assistantMessage = { role: 'assistant', content: data.message }
 
-        const nextHistory = [
+        // A different session ID means the server no longer had ours (expired
+        // or unknown); local history is kept so the next turn can re-seed it
+        const returnedId = data.session_id || null
+        resyncRef.current = Boolean(sessionId) && returnedId !== sessionId
+        sessionRef.current = returnedId
+        conversationRef.current = [
           ...history,
           { role: 'user', content: trimmed },
           { role: 'assistant', content: data.message },
         ]
-        conversationRef.current = nextHistory
 
         setMessages((prev) => [...prev, assistantMessage])
         setRecommendations(data)
@@ -56,6 +69,8 @@ export default function useRecommendation(theme) {
 
   const resetSession = useCallback(() => {
     conversationRef.current = []
+    sessionRef.current = null
+    resyncRef.current = false
     setMessages([])
     setRecommendations(null)
     setError(null)
@@ -15,17 +15,20 @@ const apiClient = axios.create({
 export async function getRecommendations(
   theme,
   userMessage,
-  conversationHistory = []
+  { sessionId = null, conversationHistory = [] } = {}
 ) {
   if (!theme) {
     throw new Error('缺少推荐主题')
   }
   const endpoint = `/api/${theme}/recommend`
   try {
-    const response = await apiClient.post(endpoint, {
-      user_message: userMessage,
-      conversation_history: conversationHistory,
-    })
+    // With a session the server keeps the history; it is only sent to seed a
+    // new session after the previous one was lost
+    const payload = { user_message: userMessage, session_id: sessionId }
+    if (conversationHistory.length > 0) {
+      payload.conversation_history = conversationHistory
+    }
+    const response = await apiClient.post(endpoint, payload)
     return response.data
   } catch (error) {
     console.error('API调用失败:', error)
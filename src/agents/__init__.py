@@ -2,12 +2,16 @@
 
 from src.agents.assembler import AssemblerAgent
 from src.agents.essence_extractor import EssenceExtractorAgent
+from src.agents.essence_insight import EssenceInsightAgent
 from src.agents.insight_provider import InsightProviderAgent
 from src.agents.selector import SelectorAgent
+from src.agents.single_shot import SingleShotAgent
 
 __all__ = [
     "SelectorAgent",
     "EssenceExtractorAgent",
     "InsightProviderAgent",
+    "EssenceInsightAgent",
     "AssemblerAgent",
+    "SingleShotAgent",
 ]
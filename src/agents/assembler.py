@@ -5,6 +5,7 @@ from __future__ import annotations
 import logging
 from typing import Any
 
+from src import metrics
 from src.agents.base import BaseAgent
 from src.models.recommendation import (
     RecommendationCandidate,
@@ -27,6 +28,8 @@ THEME_TITLES: dict[ThemeLiteral, str] = {
 class AssemblerAgent(BaseAgent):
     """信息整合者，负责输出标准化推荐卡片。"""
 
+    role = "assembler"
+
     def __init__(self, *, theme: ThemeLiteral, **kwargs: Any) -> None:
         super().__init__(theme=theme, **kwargs)
 
@@ -62,11 +65,13 @@ class AssemblerAgent(BaseAgent):
             summary = summaries.get(candidate.title)
             if not summary:
                 logger.warning("Missing summary for %s", candidate.title)
+                metrics.record_fallback(self.theme, "default_summary")
                 summary = self._default_summary(candidate)
 
             reason = reasons.get(candidate.title)
             if not reason:
                 logger.warning("Missing recommendation reason for %s", candidate.title)
+                metrics.record_fallback(self.theme, "default_reason")
                 reason = self._default_reason()
 
             cards.append(
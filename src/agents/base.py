@@ -3,14 +3,27 @@
 from __future__ import annotations
 
 import logging
+import time
+from collections.abc import AsyncIterator, Sequence
 from pathlib import Path
-from typing import Any
+from typing import Any, ClassVar
 
 from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, BaseMessageChunk
+from langchain_core.messages.ai import UsageMetadata
 from langchain_openai import ChatOpenAI
+from opentelemetry.trace import Span, StatusCode
 
+from src import metrics
 from src.config import settings
+from src.llm.cassette import llm_cassette
+from src.llm.clients import RequestCounter, llm_clients, llm_timeout, request_counter_var
+from src.llm.governor import llm_governor
+from src.llm.hedging import Hedger
+from src.llm.router import llm_router
+from src.llm.tokens import count_message_tokens, count_tokens
 from src.models.recommendation import ThemeLiteral
+from src.tracing import tracer
 
 logger = logging.getLogger(__name__)
 PROMPTS_DIR = Path(__file__).resolve().parents[1] / "prompts"
@@ -19,6 +32,9 @@ PROMPTS_DIR = Path(__file__).resolve().parents[1] / "prompts"
 class BaseAgent:
     """Abstract base class for all agents in the system."""
 
+    # Agent name used in metric labels
+    role: ClassVar[str] = "agent"
+
     # Class-level prompt cache: (theme, role) -> prompt content
     _prompt_cache: dict[tuple[str, str], str] = {}
 
@@ -47,6 +63,7 @@ class BaseAgent:
         self.temperature = temperature or settings.openai_temperature
 
         self.llm = self._create_llm()
+        self.hedger: Hedger[BaseMessage] = Hedger.from_settings()
         logger.info(
             "Initialized %s for theme=%s with model=%s",
             self.__class__.__name__,
@@ -57,16 +74,241 @@ class BaseAgent:
     def _create_llm(self) -> BaseChatModel:
         """Create and configure the LLM instance.
 
+        The HTTP client comes from the process-wide registry, so agents sharing
+        an upstream also share its connection pool. When ``LLM_ENDPOINTS`` is
+        configured, calls are spread across those endpoints by the router.
+
         Returns:
             Configured ChatOpenAI instance
         """
+        if llm_router.enabled:
+            http_client = llm_router.get_async_client(self.api_base, self.model_name)
+        else:
+            http_client = llm_clients.get_async_client(
+                self.api_base, self.api_key, self.model_name
+            )
         return ChatOpenAI(
             api_key=self.api_key,
             base_url=self.api_base,
             model=self.model_name,
             temperature=self.temperature,
+            # Sent with every request, so it must match the pooled client's timeouts
+            timeout=llm_timeout(),
+            http_async_client=http_client,
         )
 
+    async def _ainvoke(self, messages: Sequence[BaseMessage]) -> BaseMessage:
+        """Invoke the LLM while holding a slot from the concurrency governor.
+
+        All agents call the LLM through this method. When hedging is enabled a
+        slow call is duplicated and the first response wins; each attempt
+        holds its own governor slot. The call is traced as an ``agent.<role>``
+        span with one ``llm.attempt`` child per hedge attempt, which records
+        the time spent waiting for a governor slot and the retries the openai
+        SDK made inside the attempt (counted at the HTTP transport).
+
+        Args:
+            messages: Chat messages to send
+
+        Returns:
+            Model response message
+        """
+
+        attempts = 0
+        retries = 0
+
+        async def attempt() -> BaseMessage:
+            nonlocal attempts, retries
+            attempts += 1
+            with tracer.start_as_current_span(
+                "llm.attempt", attributes={"llm.attempt": attempts}
+            ) as span:
+                queued = time.perf_counter()
+                async with llm_governor.slot():
+                    span.set_attribute("llm.queue_seconds", time.perf_counter() - queued)
+                    counter = RequestCounter()
+                    token = request_counter_var.set(counter)
+                    try:
+                        response = await self._call_llm(messages)
+                    finally:
+                        request_counter_var.reset(token)
+                        retries += counter.retries
+                        span.set_attribute("llm.retries", counter.retries)
+                self._record_usage(
+                    span,
+                    messages,
+                    response.content if isinstance(response.content, str) else "",
+                    response.usage_metadata if isinstance(response, AIMessage) else None,
+                )
+                return response
+
+        with tracer.start_as_current_span(
+            f"agent.{self.role}", attributes=self._span_attributes()
+        ) as span:
+            try:
+                return await self.hedger.run(attempt)
+            finally:
+                span.set_attributes({"llm.hedge_attempts": attempts, "llm.retries": retries})
+
+    async def _call_llm(self, messages: Sequence[BaseMessage]) -> BaseMessage:
+        """Send one request to the upstream, or answer it from the LLM cassette.
+
+        Args:
+            messages: Chat messages to send
+
+        Returns:
+            Model response message
+
+        Raises:
+            CassetteMiss: In replay mode, when the prompt was never recorded
+        """
+        if llm_cassette.replaying:
+            record = llm_cassette.lookup(messages)
+            if record is not None:
+                return await llm_cassette.replay(record)
+            if not llm_cassette.passthrough_misses:
+                raise llm_cassette.miss(messages)
+
+        started = time.perf_counter()
+        response = await self.llm.ainvoke(messages)
+        if llm_cassette.recording:
+            llm_cassette.record(
+                messages,
+                response.content if isinstance(response.content, str) else "",
+                time.perf_counter() - started,
+                usage=response.usage_metadata if isinstance(response, AIMessage) else None,
+                model=self.model_name,
+            )
+        return response
+
+    async def _stream_llm(
+        self, messages: Sequence[BaseMessage]
+    ) -> AsyncIterator[BaseMessageChunk]:
+        """Stream one request from the upstream, or replay it from the LLM cassette.
+
+        Args:
+            messages: Chat messages to send
+
+        Yields:
+            Response chunks as they arrive
+
+        Raises:
+            CassetteMiss: In replay mode, when the prompt was never recorded
+        """
+        if llm_cassette.replaying:
+            record = llm_cassette.lookup(messages)
+            if record is not None:
+                async for chunk in llm_cassette.replay_stream(record):
+                    yield chunk
+                return
+            if not llm_cassette.passthrough_misses:
+                raise llm_cassette.miss(messages)
+
+        parts: list[str] = []
+        usage: UsageMetadata | None = None
+        started = time.perf_counter()
+        first_chunk: float | None = None
+        async for chunk in self.llm.astream(messages):
+            if first_chunk is None:
+                first_chunk = time.perf_counter() - started
+            if isinstance(chunk.content, str):
+                parts.append(chunk.content)
+            usage = getattr(chunk, "usage_metadata", None) or usage
+            yield chunk
+        if llm_cassette.recording:
+            llm_cassette.record(
+                messages,
+                "".join(parts),
+                time.perf_counter() - started,
+                first_chunk=first_chunk,
+                usage=usage,
+                model=self.model_name,
+            )
+
+    async def _astream(
+        self, messages: Sequence[BaseMessage]
+    ) -> AsyncIterator[BaseMessageChunk]:
+        """Stream the LLM response while holding a governor slot.
+
+        Args:
+            messages: Chat messages to send
+
+        Yields:
+            Response chunks as they arrive
+        """
+        parts: list[str] = []
+        usage: UsageMetadata | None = None
+        # Not made current: the context would be detached from another task
+        # when the consumer closes the generator early
+        span = tracer.start_span(
+            f"agent.{self.role}", attributes={**self._span_attributes(), "llm.stream": True}
+        )
+        try:
+            queued = time.perf_counter()
+            async with llm_governor.slot():
+                span.set_attribute("llm.queue_seconds", time.perf_counter() - queued)
+                async for chunk in self._stream_llm(messages):
+                    if isinstance(chunk.content, str):
+                        parts.append(chunk.content)
+                    # Upstreams that report streaming usage send it with the last chunk
+                    usage = getattr(chunk, "usage_metadata", None) or usage
+                    yield chunk
+            self._record_usage(span, messages, "".join(parts), usage)
+        except Exception as exc:
+            span.record_exception(exc)
+            span.set_status(StatusCode.ERROR, str(exc))
+            raise
+        finally:
+            span.end()
+
+    def _span_attributes(self) -> dict[str, str]:
+        return {"agent": self.role, "theme": self.theme, "llm.model": self.model_name}
+
+    def _record_usage(
+        self,
+        span: Span,
+        messages: Sequence[BaseMessage],
+        completion: str,
+        usage: UsageMetadata | None,
+    ) -> None:
+        """Count the prompt and completion tokens of one LLM call.
+
+        Uses the usage reported by the upstream when present, otherwise a
+        local token count.
+        """
+        if usage:
+            prompt_tokens, completion_tokens = usage["input_tokens"], usage["output_tokens"]
+        else:
+            prompt_tokens = count_message_tokens(messages, self.model_name)
+            completion_tokens = count_tokens(completion, self.model_name)
+        metrics.record_tokens(self.theme, self.role, prompt_tokens, completion_tokens)
+        span.set_attributes(
+            {
+                "llm.prompt_tokens": prompt_tokens,
+                "llm.completion_tokens": completion_tokens,
+                "llm.usage_reported": bool(usage),
+            }
+        )
+
+    @classmethod
+    def preload_prompts(cls, themes: Sequence[str]) -> int:
+        """Read every prompt file of the given themes into the prompt cache.
+
+        Args:
+            themes: Themes whose prompt directories are loaded
+
+        Returns:
+            Number of prompts now cached for those themes
+        """
+        count = 0
+        for theme in themes:
+            for prompt_path in sorted((PROMPTS_DIR / theme).glob("*.txt")):
+                cls._prompt_cache.setdefault(
+                    (theme, prompt_path.stem), prompt_path.read_text(encoding="utf-8")
+                )
+                count += 1
+        return count
+
     def load_prompt(self, role: str) -> str:
         """Load the system prompt for the given role and theme.
 
@@ -2,30 +2,55 @@
 
 from __future__ import annotations
 
+import hashlib
 import json
 import logging
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 from langchain_core.messages import HumanMessage, SystemMessage
 
+from src import metrics
 from src.agents.base import BaseAgent
 from src.models.recommendation import RecommendationCandidate, ThemeLiteral
 
+if TYPE_CHECKING:
+    from src.services.catalog import ItemCatalog
+    from src.services.summary_store import SummaryStore
+
 logger = logging.getLogger(__name__)
 
 
 class EssenceExtractorAgent(BaseAgent):
     """提炼候选项目精髓的 Agent。"""
 
-    def __init__(self, *, theme: ThemeLiteral, **kwargs: Any) -> None:
+    role = "extractor"
+
+    def __init__(
+        self,
+        *,
+        theme: ThemeLiteral,
+        summary_store: SummaryStore | None = None,
+        catalog: ItemCatalog | None = None,
+        **kwargs: Any,
+    ) -> None:
         super().__init__(theme=theme, **kwargs)
         self.system_prompt = self.load_prompt("extractor")
+        self.summary_store = summary_store
+        self.catalog = catalog
+        # Stored summaries are invalidated whenever the extractor prompt changes
+        self.prompt_digest = hashlib.sha256(
+            self.system_prompt.encode("utf-8")
+        ).hexdigest()[:16]
 
     async def process(
         self, candidates: list[RecommendationCandidate]
     ) -> dict[str, str]:
         """Generate summaries for candidates.
 
+        Precomputed summaries from the theme catalog and summaries already in
+        the summary store are reused; only the remaining candidates are sent
+        to the LLM.
+
         Args:
             candidates: List of candidates
 
@@ -38,6 +63,43 @@ class EssenceExtractorAgent(BaseAgent):
             self.theme,
         )
 
+        stored = self.catalog.summaries(candidates) if self.catalog is not None else {}
+        uncatalogued = [c for c in candidates if c.title not in stored]
+        if self.summary_store is not None and uncatalogued:
+            stored |= await self.summary_store.lookup(
+                self.theme, uncatalogued, self.prompt_digest
+            )
+
+        missing = [c for c in candidates if c.title not in stored]
+        if not missing:
+            logger.info(
+                "EssenceExtractor served all %s summaries from store", len(stored)
+            )
+            return stored
+
+        summaries = await self.generate_summaries(missing)
+        if summaries is None:
+            metrics.record_fallback(self.theme, "default_summary", len(missing))
+            return {**stored, **self._fallback_summaries(missing)}
+
+        if self.summary_store is not None:
+            await self.summary_store.save(
+                self.theme, missing, summaries, self.prompt_digest
+            )
+
+        return {**stored, **summaries}
+
+    async def generate_summaries(
+        self, candidates: list[RecommendationCandidate]
+    ) -> dict[str, str] | None:
+        """Ask the LLM to summarize the given candidates.
+
+        Args:
+            candidates: Candidates without a stored summary
+
+        Returns:
+            Mapping of item title to summary, or None if the output was unusable
+        """
         payload = {
             "theme": self.theme,
             "candidates": [c.model_dump() for c in candidates],
@@ -54,21 +116,25 @@ class EssenceExtractorAgent(BaseAgent):
             ),
         ]
 
-        response = await self.llm.ainvoke(messages)
+        response = await self._ainvoke(messages)
         summaries = self._parse_summaries(response.content)
 
         if not summaries:
             logger.warning(
                 "EssenceExtractor failed to parse output, using fallback summaries"
             )
-            return {
-                c.title: f"{c.title} 由 {c.creator} 创作，是值得一试的优质作品。"
-                for c in candidates
-            }
+            return None
 
         logger.info("EssenceExtractor generated %s summaries", len(summaries))
         return summaries
 
+    @staticmethod
+    def _fallback_summaries(candidates: list[RecommendationCandidate]) -> dict[str, str]:
+        return {
+            c.title: f"{c.title} 由 {c.creator} 创作，是值得一试的优质作品。"
+            for c in candidates
+        }
+
     def _parse_summaries(self, content: Any) -> dict[str, str]:
         if not isinstance(content, str):
             return {}
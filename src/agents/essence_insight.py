@@ -0,0 +1,179 @@
+"""The fused Essence & Insight Agent - summaries and reasons in one LLM call."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+from typing import TYPE_CHECKING, Any
+
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from src import metrics
+from src.agents.base import BaseAgent
+from src.agents.essence_extractor import EssenceExtractorAgent
+from src.agents.insight_provider import InsightProviderAgent
+from src.models.recommendation import (
+    RecommendationCandidate,
+    ThemeLiteral,
+    UserProfile,
+)
+
+if TYPE_CHECKING:
+    from src.services.catalog import ItemCatalog
+    from src.services.summary_store import SummaryStore
+
+logger = logging.getLogger(__name__)
+
+
+class EssenceInsightAgent(BaseAgent):
+    """Generates summaries and recommendation reasons in one structured call.
+
+    Replaces the EssenceExtractor + InsightProvider pair for themes configured
+    in ``settings.fused_agent_themes``: the candidate list is serialized once
+    and only one request is sent upstream.
+    """
+
+    role = "fused"
+
+    def __init__(
+        self,
+        *,
+        theme: ThemeLiteral,
+        summary_store: SummaryStore | None = None,
+        catalog: ItemCatalog | None = None,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(theme=theme, **kwargs)
+        self.system_prompt = self.load_prompt("fused")
+        self.summary_store = summary_store
+        self.catalog = catalog
+        # Stored summaries are invalidated whenever the fused prompt changes
+        self.prompt_digest = hashlib.sha256(
+            self.system_prompt.encode("utf-8")
+        ).hexdigest()[:16]
+
+    async def process(
+        self,
+        candidates: list[RecommendationCandidate],
+        user_profile: UserProfile,
+    ) -> tuple[dict[str, str], dict[str, str]]:
+        """Generate summaries and personalized reasons for candidates.
+
+        Args:
+            candidates: Candidate items
+            user_profile: Structured user profile
+
+        Returns:
+            Tuple of (title -> summary, title -> recommendation reason)
+        """
+        logger.info(
+            "EssenceInsight processing %s candidates for theme=%s",
+            len(candidates),
+            self.theme,
+        )
+
+        stored = self.catalog.summaries(candidates) if self.catalog is not None else {}
+        uncatalogued = [c for c in candidates if c.title not in stored]
+        if self.summary_store is not None and uncatalogued:
+            stored |= await self.summary_store.lookup(
+                self.theme, uncatalogued, self.prompt_digest
+            )
+
+        payload = {
+            "theme": self.theme,
+            "user_profile": user_profile.model_dump(exclude={"theme"}),
+            "candidates": [c.model_dump() for c in candidates],
+            "summaries_needed": [c.title for c in candidates if c.title not in stored],
+        }
+
+        messages = [
+            SystemMessage(content=self.system_prompt),
+            HumanMessage(
+                content=(
+                    "请为以下候选内容生成摘要（50-80字）与个性化推荐理由（30-50字）：\n"
+                    f"{json.dumps(payload, ensure_ascii=False, separators=(',', ':'))}\n\n"
+                    "仅返回包含 items 字段的JSON对象，元素字段为 "
+                    "title、summary 与 recommendation_reason。"
+                )
+            ),
+        ]
+
+        response = await self._ainvoke(messages)
+        generated, reasons = self._parse_items(response.content)
+
+        if not generated and not reasons:
+            logger.warning("EssenceInsight failed to parse output, using fallbacks")
+
+        missing = [c for c in candidates if c.title not in stored]
+        unsummarized = [c for c in missing if c.title not in generated]
+        unreasoned = [c for c in candidates if c.title not in reasons]
+        metrics.record_fallback(self.theme, "default_summary", len(unsummarized))
+        metrics.record_fallback(self.theme, "default_reason", len(unreasoned))
+        summaries = {
+            **EssenceExtractorAgent._fallback_summaries(unsummarized),
+            **{c.title: generated[c.title] for c in missing if c.title in generated},
+            **stored,
+        }
+        reasons = {
+            **InsightProviderAgent._fallback_reasons(unreasoned),
+            **reasons,
+        }
+
+        if self.summary_store is not None and generated:
+            await self.summary_store.save(
+                self.theme, missing, generated, self.prompt_digest
+            )
+
+        logger.info(
+            "EssenceInsight generated %s summaries and %s reasons",
+            len(generated),
+            len(reasons),
+        )
+        return summaries, reasons
+
+    def _parse_items(self, content: Any) -> tuple[dict[str, str], dict[str, str]]:
+        if not isinstance(content, str):
+            return {}, {}
+
+        text = content.strip()
+        if "```json" in text:
+            text = text.split("```json", maxsplit=1)[1].split("```", maxsplit=1)[0]
+        elif "```" in text:
+            text = text.split("```", maxsplit=1)[1].split("```", maxsplit=1)[0]
+
+        try:
+            data = json.loads(text)
+        except json.JSONDecodeError as exc:
+            logger.error("Failed to decode fused JSON: %s", exc)
+            return {}, {}
+
+        entries: list[dict[str, Any]]
+        if isinstance(data, dict) and "items" in data:
+            entries = data["items"]
+        elif isinstance(data, list):
+            entries = data
+        else:
+            return {}, {}
+
+        summaries: dict[str, str] = {}
+        reasons: dict[str, str] = {}
+        for item in entries:
+            if not isinstance(item, dict):
+                continue
+            title = str(item.get("title") or "").strip()
+            if not title:
+                continue
+            summary = str(item.get("summary") or "").strip()
+            reason = (
+                item.get("recommendation_reason")
+                or item.get("reason")
+                or item.get("insight")
+            )
+            reason_str = str(reason).strip() if reason else ""
+            if summary:
+                summaries[title] = summary
+            if reason_str:
+                reasons[title] = reason_str
+
+        return summaries, reasons
@@ -8,6 +8,7 @@ from typing import Any
 
 from langchain_core.messages import HumanMessage, SystemMessage
 
+from src import metrics
 from src.agents.base import BaseAgent
 from src.models.recommendation import (
     RecommendationCandidate,
@@ -21,6 +22,8 @@ logger = logging.getLogger(__name__)
 class InsightProviderAgent(BaseAgent):
     """Theme-aware recommendation reason generator."""
 
+    role = "insight"
+
     def __init__(self, *, theme: ThemeLiteral, **kwargs: Any) -> None:
         super().__init__(theme=theme, **kwargs)
         self.system_prompt = self.load_prompt("insight")
@@ -64,19 +67,24 @@ class InsightProviderAgent(BaseAgent):
             ),
         ]
 
-        response = await self.llm.ainvoke(messages)
+        response = await self._ainvoke(messages)
         reasons = self._parse_reasons(response.content)
 
         if not reasons:
             logger.warning("InsightProvider response empty, using fallback reasons")
-            return {
-                c.title: "这项推荐与您的偏好高度契合，值得体验。"
-                for c in candidates
-            }
+            metrics.record_fallback(self.theme, "default_reason", len(candidates))
+            return self._fallback_reasons(candidates)
 
         logger.info("InsightProvider generated %s recommendation reasons", len(reasons))
         return reasons
 
+    @staticmethod
+    def _fallback_reasons(candidates: list[RecommendationCandidate]) -> dict[str, str]:
+        return {
+            c.title: "这项推荐与您的偏好高度契合，值得体验。"
+            for c in candidates
+        }
+
     def _parse_reasons(self, content: Any) -> dict[str, str]:
         if not isinstance(content, str):
             return {}
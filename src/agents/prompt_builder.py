@@ -0,0 +1,227 @@
+"""Token-budgeted conversation history for the selector prompt."""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+from collections.abc import Awaitable, Callable, Sequence
+from dataclasses import asdict, dataclass
+
+from src.config import settings
+from src.llm.tokens import TOKENS_PER_MESSAGE, count_tokens
+from src.utils.lru import LRUCache
+from src.utils.request_context import session_id_var
+
+logger = logging.getLogger(__name__)
+
+# Latest turns identifying a history prefix within a session; anchoring on them
+# rather than on the whole prefix keeps cached summaries valid after the session
+# store trims the oldest messages
+PREFIX_ANCHOR_TURNS = 4
+
+# (previous summary or None, turns to fold in) -> new summary
+Summarizer = Callable[[str | None, Sequence[dict[str, str]]], Awaitable[str]]
+
+HISTORY_SUMMARY_PROMPT = """你负责压缩推荐对话的早期历史。
+请将给出的已有摘要（如有）与新增对话合并为一段简洁的中文摘要，保留用户明确表达的偏好、
+排斥项、已推荐过的作品及用户反馈，省略寒暄与重复内容。摘要不超过 {max_tokens} 个 token，
+只输出摘要正文。"""
+
+
+@dataclass(slots=True)
+class PromptBudgetStats:
+    """Counters for history compression."""
+
+    fitted: int = 0  # Histories already within the budget
+    compressed: int = 0  # Histories returned with a summary
+    summarized: int = 0  # Summaries generated (cache misses)
+    summary_failures: int = 0  # Summaries replaced by a truncated transcript
+
+
+@dataclass(slots=True)
+class FittedHistory:
+    """History to place in the prompt after budgeting."""
+
+    messages: list[dict[str, str]]  # Recent turns kept verbatim
+    summary: str | None  # Rolling summary of everything older
+    tokens: int  # Estimated tokens of summary plus verbatim turns
+
+
+class SelectorPromptBuilder:
+    """Keep the history part of the selector prompt within a token budget.
+
+    Recent turns are kept verbatim. Once the history exceeds the budget, the
+    older turns are folded into a rolling summary. Summaries are cached by a
+    digest of the history prefix they cover, so later turns of the same
+    conversation extend the cached summary instead of re-reading the whole
+    history. Within a server-side session the digest covers only the last
+    turns of the prefix plus the session ID, which survives the session store
+    dropping the oldest turns; without one it covers the whole prefix, so
+    different conversations never share a summary. Each compression cuts the verbatim part down to half of what is
+    left after the summary, which leaves room for several turns before the
+    next summary is needed.
+    """
+
+    def __init__(
+        self,
+        *,
+        model: str,
+        history_budget: int,
+        summary_max_tokens: int,
+        min_recent_messages: int,
+        cache_entries: int = 2048,
+    ) -> None:
+        """Initialize the builder.
+
+        Args:
+            model: Model name used to pick the tokenizer
+            history_budget: Token budget of the history part; 0 disables compression
+            summary_max_tokens: Upper bound for the rolling summary
+            min_recent_messages: Latest messages always kept verbatim
+            cache_entries: Summaries kept in the in-process LRU cache
+        """
+        self.model = model
+        self.history_budget = history_budget
+        self.summary_max_tokens = summary_max_tokens
+        self.min_recent_messages = min_recent_messages
+        self._summaries: LRUCache[str] = LRUCache(cache_entries)
+        self.stats = PromptBudgetStats()
+
+    @classmethod
+    def from_settings(cls, model: str) -> SelectorPromptBuilder:
+        """Create a builder configured from application settings."""
+        return cls(
+            model=model,
+            history_budget=settings.prompt_history_token_budget,
+            summary_max_tokens=settings.prompt_summary_max_tokens,
+            min_recent_messages=settings.prompt_min_recent_messages,
+            cache_entries=settings.prompt_summary_cache_entries,
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.history_budget > 0
+
+    async def fit(
+        self, history: Sequence[dict[str, str]], summarize: Summarizer
+    ) -> FittedHistory:
+        """Fit a conversation history into the budget.
+
+        Args:
+            history: Conversation messages, oldest first
+            summarize: Produces a summary from the previous one and older turns
+
+        Returns:
+            Verbatim recent turns and the summary of older turns, if any
+        """
+        turns = [msg for msg in history if msg.get("content")]
+        costs = [self._message_tokens(msg) for msg in turns]
+        digests = self._prefix_digests(turns, session_id_var.get())
+
+        # Resume from the longest history prefix that already has a summary
+        start, summary = 0, None
+        for cut in range(len(turns), 0, -1):
+            cached = self._summaries.get(digests[cut])
+            if cached is not None:
+                start, summary = cut, cached
+                break
+
+        tokens = self._summary_tokens(summary) + sum(costs[start:])
+        if tokens <= self.history_budget:
+            if summary is None:
+                self.stats.fitted += 1
+            else:
+                self.stats.compressed += 1
+            return FittedHistory(turns[start:], summary, tokens)
+
+        # Keep the newest turns within half of the room left next to the summary
+        keep_budget = max(0, (self.history_budget - self.summary_max_tokens) // 2)
+        split = max(start, len(turns) - self.min_recent_messages)
+        kept = sum(costs[split:])
+        while split > start and kept + costs[split - 1] <= keep_budget:
+            split -= 1
+            kept += costs[split]
+
+        if split > start:
+            summary = await self._extend_summary(summary, turns[start:split], summarize)
+            if summary is not None:
+                self._summaries.set(digests[split], summary)
+            else:
+                summary = self._fallback_summary(turns[start:split])
+        self.stats.compressed += 1
+        return FittedHistory(turns[split:], summary, self._summary_tokens(summary) + kept)
+
+    async def _extend_summary(
+        self,
+        previous: str | None,
+        turns: Sequence[dict[str, str]],
+        summarize: Summarizer,
+    ) -> str | None:
+        self.stats.summarized += 1
+        try:
+            summary = (await summarize(previous, turns)).strip()
+        except Exception as exc:  # noqa: BLE001
+            self.stats.summary_failures += 1
+            logger.warning("History summarization failed, truncating instead: %s", exc)
+            return None
+        if not summary:
+            self.stats.summary_failures += 1
+            return None
+        return self._truncate(summary)
+
+    def _fallback_summary(self, turns: Sequence[dict[str, str]]) -> str:
+        # Without a model summary, keep the tail of the older transcript (not cached)
+        transcript = format_transcript(turns)
+        budget = self.summary_max_tokens
+        while transcript and count_tokens(transcript, self.model) > budget:
+            transcript = transcript[max(1, len(transcript) // 4) :]
+        return transcript
+
+    def _truncate(self, text: str) -> str:
+        tokens = count_tokens(text, self.model)
+        while tokens > self.summary_max_tokens:
+            text = text[: len(text) * self.summary_max_tokens // tokens]
+            tokens = count_tokens(text, self.model)
+        return text
+
+    def _summary_tokens(self, summary: str | None) -> int:
+        if summary is None:
+            return 0
+        return TOKENS_PER_MESSAGE + count_tokens(summary, self.model)
+
+    def _message_tokens(self, message: dict[str, str]) -> int:
+        return TOKENS_PER_MESSAGE + count_tokens(
+            f"{message.get('role', 'user').upper()}:\n{message['content']}", self.model
+        )
+
+    @staticmethod
+    def _prefix_digests(turns: Sequence[dict[str, str]], session_id: str | None) -> list[str]:
+        # digests[i] identifies turns[:i]: by its last PREFIX_ANCHOR_TURNS turns
+        # within a session, otherwise by all of them
+        turn_digests = [
+            hashlib.sha256(
+                msg.get("role", "user").encode("utf-8") + b"\x00" + msg["content"].encode("utf-8")
+            ).digest()
+            for msg in turns
+        ]
+        seed = b"history\x00" + (session_id or "").encode("utf-8")
+        digests = [hashlib.sha256(seed).hexdigest()]
+        for end in range(1, len(turns) + 1):
+            if session_id is None:
+                digest = hashlib.sha256(digests[-1].encode("ascii"))
+                digest.update(turn_digests[end - 1])
+            else:
+                digest = hashlib.sha256(seed)
+                for turn_digest in turn_digests[max(0, end - PREFIX_ANCHOR_TURNS) : end]:
+                    digest.update(turn_digest)
+            digests.append(digest.hexdigest())
+        return digests
+
+    def snapshot(self) -> dict[str, int]:
+        """Return compression counters for diagnostics endpoints."""
+        return {**asdict(self.stats), "cached_summaries": len(self._summaries)}
+
+
+def format_transcript(turns: Sequence[dict[str, str]]) -> str:
+    """Render conversation turns as plain text for summarization."""
+    return "\n".join(f"{msg.get('role', 'user').upper()}: {msg['content']}" for msg in turns)
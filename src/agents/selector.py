@@ -4,12 +4,24 @@ from __future__ import annotations
 
 import json
 import logging
-from typing import Any
+from collections.abc import Callable, Sequence
+from typing import TYPE_CHECKING, Any
 
 from langchain_core.messages import HumanMessage, SystemMessage
 
+from src import metrics
 from src.agents.base import BaseAgent
+from src.agents.prompt_builder import (
+    HISTORY_SUMMARY_PROMPT,
+    SelectorPromptBuilder,
+    format_transcript,
+)
+from src.llm.tokens import count_message_tokens
 from src.models.recommendation import RecommendationCandidate, ThemeLiteral, UserProfile
+from src.utils.json_stream import StreamingJSONFieldParser
+
+if TYPE_CHECKING:
+    from src.services.catalog import ItemCatalog
 
 logger = logging.getLogger(__name__)
 
@@ -24,30 +36,163 @@ THEME_LABELS: dict[ThemeLiteral, str] = {
 class SelectorAgent(BaseAgent):
     """Theme-aware selector that orchestrates the first step."""
 
-    def __init__(self, *, theme: ThemeLiteral, **kwargs: Any) -> None:
+    role = "selector"
+
+    def __init__(
+        self,
+        *,
+        theme: ThemeLiteral,
+        catalog: ItemCatalog | None = None,
+        **kwargs: Any,
+    ) -> None:
         super().__init__(theme=theme, **kwargs)
-        self.system_prompt = self.load_prompt("selector")
+        # Candidates found in the theme catalog get its curated metadata
+        self.catalog = catalog
+        # The output format is part of the fixed system prefix, sent once per call
+        self.system_prompt = f"{self.load_prompt('selector')}\n\n{self._structure_prompt()}"
+        self.prompt_builder = SelectorPromptBuilder.from_settings(self.model_name)
 
     async def process(
         self,
         user_message: str,
         conversation_history: list[dict[str, str]] | None = None,
+        *,
+        known_profile: UserProfile | None = None,
     ) -> tuple[UserProfile, list[RecommendationCandidate], str]:
         """Process user message and generate profile with candidates.
 
         Args:
             user_message: User's current message
             conversation_history: Previous conversation messages
+            known_profile: Profile from the previous turn of the session, which
+                the model refines instead of deriving it from scratch
 
         Returns:
             Tuple of (user_profile, candidates, message_to_user)
         """
         logger.info("Selector processing user message for theme=%s", self.theme)
 
+        messages = await self._prepare_messages(user_message, conversation_history, known_profile)
+        response = await self._ainvoke(messages)
+        profile, candidates, message = self._parse_response(response.content)
+        return self._merge_profile(profile, known_profile), candidates, message
+
+    async def process_streaming(
+        self,
+        user_message: str,
+        conversation_history: list[dict[str, str]] | None = None,
+        *,
+        known_profile: UserProfile | None = None,
+        on_profile: Callable[[UserProfile], None] | None = None,
+        on_candidate: Callable[[RecommendationCandidate], None] | None = None,
+    ) -> tuple[UserProfile, list[RecommendationCandidate], str]:
+        """Stream the selector output and report results as soon as they close.
+
+        The callbacks fire while the LLM is still generating, which lets the
+        caller start downstream work early. The complete text is then parsed
+        with the regular ``_parse_response`` path, so its fallbacks still apply
+        when the stream turns out to be malformed.
+
+        Args:
+            user_message: User's current message
+            conversation_history: Previous conversation messages
+            known_profile: Profile from the previous turn of the session
+            on_profile: Called once with the user profile when it has streamed in
+            on_candidate: Called with each candidate (up to 3) as it closes
+
+        Returns:
+            Tuple of (user_profile, candidates, message_to_user)
+        """
+        logger.info("Selector streaming user message for theme=%s", self.theme)
+
+        messages = await self._prepare_messages(user_message, conversation_history, known_profile)
+        parser = StreamingJSONFieldParser(
+            object_fields=("user_profile",), array_fields=("candidates",)
+        )
+        streamed = 0
+
+        async for chunk in self._astream(messages):
+            if not isinstance(chunk.content, str) or not chunk.content:
+                continue
+            for field, value in parser.feed(chunk.content):
+                if field == "user_profile" and on_profile is not None:
+                    on_profile(self._merge_profile(self._build_user_profile(value), known_profile))
+                elif field == "candidates" and on_candidate is not None and streamed < 3:
+                    for candidate in self._build_candidates([value]):
+                        streamed += 1
+                        on_candidate(candidate)
+
+        profile, candidates, message = self._parse_response(parser.text)
+        return self._merge_profile(profile, known_profile), candidates, message
+
+    async def _prepare_messages(
+        self,
+        user_message: str,
+        conversation_history: list[dict[str, str]] | None,
+        known_profile: UserProfile | None = None,
+    ) -> list[SystemMessage | HumanMessage]:
+        """Build the prompt with the history fitted into the token budget."""
+        if not conversation_history or not self.prompt_builder.enabled:
+            return self._build_messages(user_message, conversation_history, known_profile)
+
+        fitted = await self.prompt_builder.fit(conversation_history, self._summarize_history)
+        messages = self._build_messages(
+            user_message, fitted.messages, known_profile, history_summary=fitted.summary
+        )
+        if fitted.summary is not None:
+            full = self._build_messages(user_message, conversation_history, known_profile)
+            logger.info(
+                "Selector prompt tokens for theme=%s: %s -> %s (%s of %s history messages summarized)",
+                self.theme,
+                count_message_tokens(full, self.model_name),
+                count_message_tokens(messages, self.model_name),
+                len(conversation_history) - len(fitted.messages),
+                len(conversation_history),
+            )
+        return messages
+
+    async def _summarize_history(
+        self, previous: str | None, turns: Sequence[dict[str, str]]
+    ) -> str:
+        parts = [f"已有摘要：\n{previous}"] if previous else []
+        parts.append(f"新增对话：\n{format_transcript(turns)}")
+        response = await self._ainvoke(
+            [
+                SystemMessage(
+                    content=HISTORY_SUMMARY_PROMPT.format(
+                        max_tokens=self.prompt_builder.summary_max_tokens
+                    )
+                ),
+                HumanMessage(content="\n\n".join(parts)),
+            ]
+        )
+        return response.content if isinstance(response.content, str) else ""
+
+    def _build_messages(
+        self,
+        user_message: str,
+        conversation_history: list[dict[str, str]] | None,
+        known_profile: UserProfile | None = None,
+        *,
+        history_summary: str | None = None,
+    ) -> list[SystemMessage | HumanMessage]:
         messages: list[SystemMessage | HumanMessage] = [
             SystemMessage(content=self.system_prompt)
         ]
 
+        if known_profile is not None:
+            profile_json = json.dumps(
+                known_profile.model_dump(exclude={"theme"}, exclude_none=True),
+                ensure_ascii=False,
+                separators=(",", ":"),
+            )
+            messages.append(
+                HumanMessage(content=f"已知用户画像（请在此基础上更新，而非重新推断）：\n{profile_json}")
+            )
+
+        if history_summary:
+            messages.append(HumanMessage(content=f"此前对话摘要：\n{history_summary}"))
+
         if conversation_history:
             for msg in conversation_history:
                 role = msg.get("role", "user")
@@ -59,10 +204,7 @@ class SelectorAgent(BaseAgent):
                 )
 
         messages.append(HumanMessage(content=user_message))
-        messages.append(HumanMessage(content=self._structure_prompt()))
-
-        response = await self.llm.ainvoke(messages)
-        return self._parse_response(response.content)
+        return messages
 
     def _structure_prompt(self) -> str:
         label = THEME_LABELS.get(self.theme, "推荐")
@@ -113,6 +255,18 @@ class SelectorAgent(BaseAgent):
         )
         return profile, candidates, message
 
+    @staticmethod
+    def _merge_profile(profile: UserProfile, known: UserProfile | None) -> UserProfile:
+        # Attributes from earlier turns persist unless the new profile overrides them
+        if known is None:
+            return profile
+        return profile.model_copy(
+            update={
+                "summary": profile.summary or known.summary,
+                "attributes": {**known.attributes, **profile.attributes},
+            }
+        )
+
     def _build_user_profile(self, payload: Any) -> UserProfile:
         summary = None
         attributes: dict[str, Any] = {}
@@ -188,7 +342,10 @@ class SelectorAgent(BaseAgent):
                 )
             )
 
-        return candidates[:3]  # 最多返回3个推荐
+        candidates = candidates[:3]  # 最多返回3个推荐
+        if self.catalog is not None:
+            candidates = [self.catalog.enrich(candidate) for candidate in candidates]
+        return candidates
 
     def _normalize_value(self, value: Any) -> Any:
         if isinstance(value, list):
@@ -231,6 +388,7 @@ class SelectorAgent(BaseAgent):
 
     def _fallback(self) -> tuple[UserProfile, list[RecommendationCandidate], str]:
         logger.warning("Selector falling back to default data for theme=%s", self.theme)
+        metrics.record_fallback(self.theme, "selector")
         profile = UserProfile(
             theme=self.theme,
             summary=self._default_message(),
@@ -0,0 +1,115 @@
+"""The Single-Shot Agent - whole recommendation in one LLM call."""
+
+from __future__ import annotations
+
+import logging
+from typing import Any
+
+from pydantic import ValidationError
+
+from src.agents.selector import THEME_LABELS, SelectorAgent
+from src.models.recommendation import RecommendationResponse, UserProfile
+
+logger = logging.getLogger(__name__)
+
+
+class SingleShotAgent(SelectorAgent):
+    """Fast-path agent returning profile, candidates, summaries and reasons at once.
+
+    Reuses the selector prompt and message building, but asks for complete
+    recommendation cards. The output is validated straight into
+    ``RecommendationResponse``; callers fall back to the multi-agent workflow
+    when validation fails.
+    """
+
+    role = "single_shot"
+
+    async def process(  # type: ignore[override]
+        self,
+        user_message: str,
+        conversation_history: list[dict[str, str]] | None = None,
+        *,
+        known_profile: UserProfile | None = None,
+    ) -> RecommendationResponse | None:
+        """Generate a complete recommendation response in one call.
+
+        Args:
+            user_message: User's current message
+            conversation_history: Previous conversation messages
+            known_profile: Profile from the previous turn of the session
+
+        Returns:
+            Validated response (request_id left empty), or None when the output
+            does not satisfy the response schema
+        """
+        logger.info("SingleShot processing user message for theme=%s", self.theme)
+
+        messages = await self._prepare_messages(user_message, conversation_history, known_profile)
+        response = await self._ainvoke(messages)
+        result = self._validate_response(response.content)
+        if result is not None and known_profile is not None:
+            result.user_profile = self._merge_profile(result.user_profile, known_profile)
+        return result
+
+    def _structure_prompt(self) -> str:
+        label = THEME_LABELS.get(self.theme, "推荐")
+        return f"""请针对 {label} 推荐以 JSON 格式回复，一次性给出完整推荐卡片，严格包含以下字段：
+{{
+  "user_profile": {{
+    "summary": "一句话总结（可选）",
+    "attributes": {{
+      "标签1": ["值1", "值2"],
+      "标签2": "值"
+    }}
+  }},
+  "recommendations": [
+    {{
+      "title": "作品名称",
+      "creator": "主要创作者（作者/导演/开发商）",
+      "metadata": {{
+        "平台或年份等字段": "值"
+      }},
+      "summary": "50-80字客观摘要",
+      "reason": "30-50字个性化推荐理由"
+    }}
+  ],
+  "message": "给用户的友好回复"
+}}
+recommendations 必须包含 2-3 项。请勿添加额外文本或解释。"""
+
+    def _validate_response(self, content: Any) -> RecommendationResponse | None:
+        data = self._extract_json(content)
+        if not data:
+            return None
+
+        cards = data.get("recommendations")
+        if isinstance(cards, list):
+            for card in cards:
+                if isinstance(card, dict) and isinstance(card.get("metadata"), dict):
+                    card["metadata"] = {
+                        str(key): self._stringify_metadata_value(value)
+                        for key, value in card["metadata"].items()
+                        if value is not None
+                    }
+
+        profile = data.get("user_profile")
+        try:
+            return RecommendationResponse.model_validate(
+                {
+                    "theme": self.theme,
+                    "user_profile": {
+                        **(profile if isinstance(profile, dict) else {}),
+                        "theme": self.theme,
+                    },
+                    "recommendations": cards,
+                    "message": data.get("message") or self._default_message(),
+                    "request_id": "",
+                }
+            )
+        except ValidationError as exc:
+            logger.warning(
+                "SingleShot output failed validation for theme=%s: %s",
+                self.theme,
+                exc.error_count(),
+            )
+            return None
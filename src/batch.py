@@ -0,0 +1,262 @@
+"""Offline bulk runner: stream a JSONL file of requests through the workflow.
+
+Usage::
+
+    python -m src.batch requests.jsonl --theme books --concurrency 8 \\
+        --output results.jsonl
+
+Each input line is a ``RecommendationRequest`` payload (``user_message``,
+optional ``conversation_history``, ``request_id`` and ``theme``). Results are
+appended to the output file as they complete, one JSON object per line. The
+output file doubles as the checkpoint: on restart, request IDs that already
+have a successful result are skipped, and failed ones are retried (the last
+line for a request ID wins).
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import sys
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, TextIO
+
+from pydantic import ValidationError
+
+from src.config import settings, setup_logging
+from src.llm.cassette import llm_cassette
+from src.llm.clients import llm_clients
+from src.llm.router import llm_router
+from src.models.recommendation import RecommendationRequest, ThemeLiteral
+from src.services.recommendation_service import SUPPORTED_THEMES, RecommendationService
+from src.tracing import setup_tracing, shutdown_tracing
+
+logger = logging.getLogger(__name__)
+
+# Completed items between progress log lines
+PROGRESS_EVERY = 50
+
+
+@dataclass(slots=True)
+class BatchRunSummary:
+    """Outcome counters of one bulk run."""
+
+    succeeded: int = 0
+    failed: int = 0
+    skipped: int = 0  # Already completed in a previous run
+    invalid: int = 0  # Lines that are not valid requests
+    elapsed_seconds: float = 0.0
+
+    @property
+    def items_per_second(self) -> float:
+        done = self.succeeded + self.failed
+        return done / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+
+def load_checkpoint(output_path: Path) -> set[str]:
+    """Return request IDs whose latest result in ``output_path`` succeeded.
+
+    Args:
+        output_path: Output JSONL file of a previous run (may not exist)
+
+    Returns:
+        Set of completed request IDs
+    """
+    latest: dict[str, bool] = {}
+    if not output_path.exists():
+        return set()
+    with output_path.open(encoding="utf-8") as handle:
+        for line_no, line in enumerate(handle, start=1):
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A run killed mid-write may leave a truncated last line
+                continue
+            if not isinstance(record, dict) or "request_id" not in record:
+                logger.warning("Ignoring checkpoint line %s without a request_id", line_no)
+                continue
+            latest[str(record["request_id"])] = record.get("status") == "ok"
+    return {request_id for request_id, ok in latest.items() if ok}
+
+
+def _read_requests(
+    input_path: Path, default_theme: ThemeLiteral, summary: BatchRunSummary
+) -> Iterator[tuple[ThemeLiteral, RecommendationRequest]]:
+    with input_path.open(encoding="utf-8") as handle:
+        for line_no, line in enumerate(handle, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                payload: dict[str, Any] = json.loads(line)
+                theme = payload.pop("theme", default_theme)
+                if theme not in SUPPORTED_THEMES:
+                    raise ValueError(f"unsupported theme {theme!r}")
+                # Stable IDs keep lines without request_id resumable
+                payload.setdefault(
+                    "request_id", hashlib.sha256(line.encode("utf-8")).hexdigest()[:16]
+                )
+                yield theme, RecommendationRequest.model_validate(payload)
+            except (json.JSONDecodeError, ValidationError, ValueError) as exc:
+                summary.invalid += 1
+                logger.error("Skipping invalid line %s: %s", line_no, exc)
+
+
+def _write(output: TextIO, record: dict[str, Any]) -> None:
+    output.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+    output.flush()
+
+
+async def run_batch(
+    input_path: Path,
+    output_path: Path,
+    *,
+    theme: ThemeLiteral,
+    concurrency: int,
+    service: RecommendationService | None = None,
+) -> BatchRunSummary:
+    """Process every pending request of ``input_path`` and append results.
+
+    Args:
+        input_path: JSONL file of requests
+        output_path: JSONL file results are appended to (also the checkpoint)
+        theme: Theme for lines that do not name one
+        concurrency: Requests processed at a time
+        service: Recommendation service (a fresh one by default)
+
+    Returns:
+        Run summary
+    """
+    service = service or RecommendationService()
+    summary = BatchRunSummary()
+    completed = load_checkpoint(output_path)
+    if completed:
+        logger.info("Resuming: %s requests already completed", len(completed))
+
+    queue: asyncio.Queue[tuple[ThemeLiteral, RecommendationRequest] | None] = asyncio.Queue(
+        maxsize=concurrency * 2
+    )
+    started = time.perf_counter()
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    with output_path.open("a+", encoding="utf-8") as output:
+        if output.tell() > 0:
+            output.seek(output.tell() - 1)
+            if output.read(1) != "\n":
+                # Terminate a line truncated by an interrupted run
+                output.write("\n")
+
+        async def worker() -> None:
+            while (item := await queue.get()) is not None:
+                item_theme, request = item
+                item_started = time.perf_counter()
+                record: dict[str, Any] = {"request_id": request.request_id, "theme": item_theme}
+                try:
+                    response = await service.get_recommendations(item_theme, request)
+                except Exception as exc:  # noqa: BLE001
+                    summary.failed += 1
+                    record.update(status="error", error=f"{type(exc).__name__}: {exc}")
+                else:
+                    summary.succeeded += 1
+                    record.update(status="ok", response=response.model_dump(mode="json"))
+                record["elapsed_seconds"] = round(time.perf_counter() - item_started, 3)
+                _write(output, record)
+
+                done = summary.succeeded + summary.failed
+                if done % PROGRESS_EVERY == 0:
+                    logger.info(
+                        "Progress: %s done (%s failed), %.2f items/s",
+                        done,
+                        summary.failed,
+                        done / (time.perf_counter() - started),
+                    )
+
+        workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+        try:
+            for item in _read_requests(input_path, theme, summary):
+                if item[1].request_id in completed:
+                    summary.skipped += 1
+                    continue
+                await queue.put(item)
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+        finally:
+            for task in workers:
+                task.cancel()
+
+    summary.elapsed_seconds = time.perf_counter() - started
+    return summary
+
+
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m src.batch",
+        description="Run a JSONL file of recommendation requests without the HTTP server.",
+    )
+    parser.add_argument("input", type=Path, help="JSONL file of requests")
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=Path,
+        help="Result JSONL file, also used to resume (default: <input>.results.jsonl)",
+    )
+    parser.add_argument(
+        "-t",
+        "--theme",
+        choices=SUPPORTED_THEMES,
+        default="books",
+        help="Theme for lines without a 'theme' field (default: books)",
+    )
+    parser.add_argument(
+        "-c",
+        "--concurrency",
+        type=int,
+        default=settings.batch_concurrency,
+        help="Requests processed at a time (default: BATCH_CONCURRENCY)",
+    )
+    return parser.parse_args(argv)
+
+
+async def _main(args: argparse.Namespace) -> int:
+    output = args.output or args.input.with_suffix(".results.jsonl")
+    setup_tracing()
+    try:
+        summary = await run_batch(
+            args.input,
+            output,
+            theme=args.theme,
+            concurrency=max(1, args.concurrency),
+        )
+    finally:
+        await llm_router.aclose()
+        await llm_clients.aclose()
+        llm_cassette.close()
+        shutdown_tracing()
+
+    logger.info(
+        "Finished: succeeded=%s, failed=%s, skipped=%s, invalid=%s, %.2f items/s -> %s",
+        summary.succeeded,
+        summary.failed,
+        summary.skipped,
+        summary.invalid,
+        summary.items_per_second,
+        output,
+    )
+    return 1 if summary.failed or summary.invalid else 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Command-line entry point."""
+    setup_logging(settings.log_level)
+    return asyncio.run(_main(_parse_args(argv)))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
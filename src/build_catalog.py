@@ -0,0 +1,242 @@
+"""Offline catalog builder: turn a JSONL file of items into a theme catalog.
+
+Usage::
+
+    python -m src.build_catalog items.jsonl --theme books --concurrency 4
+
+Each input line is an item with ``title``, ``creator``, optional ``metadata``
+and optional ``summary``. Items without a summary are summarized by the
+theme's extractor agent in batches; summaries of items already in the
+existing catalog file are reused, so a rebuild only pays for new items. The
+catalog is written to ``CATALOG_DIR/{theme}.cat`` unless ``--output`` is
+given, and is picked up by the API on its next start with
+``CATALOG_ENABLED=true``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass
+from pathlib import Path
+
+from src.agents import EssenceExtractorAgent
+from src.config import settings, setup_logging
+from src.llm.cassette import llm_cassette
+from src.llm.clients import llm_clients
+from src.llm.router import llm_router
+from src.models.recommendation import RecommendationCandidate, ThemeLiteral
+from src.services.catalog import (
+    CatalogItem,
+    ItemCatalog,
+    catalog_key,
+    catalog_path,
+    write_catalog,
+)
+from src.services.recommendation_service import SUPPORTED_THEMES
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class CatalogBuildSummary:
+    """Outcome counters of one catalog build."""
+
+    items: int = 0  # Items written to the catalog
+    provided: int = 0  # Summaries given in the input file
+    reused: int = 0  # Summaries taken from the previous catalog file
+    generated: int = 0  # Summaries written by the extractor
+    unsummarized: int = 0  # Items stored without a summary
+    invalid: int = 0  # Lines that are not valid items
+    elapsed_seconds: float = 0.0
+
+
+def _read_items(input_path: Path, summary: CatalogBuildSummary) -> Iterator[CatalogItem]:
+    with input_path.open(encoding="utf-8") as handle:
+        for line_no, line in enumerate(handle, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                payload = json.loads(line)
+                if not isinstance(payload, dict):
+                    raise ValueError("expected a JSON object")
+                yield CatalogItem.from_dict(payload)
+            except (json.JSONDecodeError, ValueError) as exc:
+                summary.invalid += 1
+                logger.error("Skipping invalid line %s: %s", line_no, exc)
+
+
+def _previous_summaries(path: Path) -> dict[tuple[str, str], str]:
+    if not path.exists():
+        return {}
+    try:
+        catalog = ItemCatalog(path)
+    except (OSError, ValueError) as exc:
+        logger.warning("Not reusing summaries of %s: %s", path, exc)
+        return {}
+    try:
+        return {
+            (catalog_key(item.title), catalog_key(item.creator)): item.summary
+            for item in catalog.items()
+            if item.summary
+        }
+    finally:
+        catalog.close()
+
+
+async def build_catalog(
+    input_path: Path,
+    output_path: Path,
+    *,
+    theme: ThemeLiteral,
+    batch_size: int,
+    concurrency: int,
+    summarize: bool = True,
+    extractor: EssenceExtractorAgent | None = None,
+) -> CatalogBuildSummary:
+    """Read items, fill in missing summaries and write the catalog.
+
+    Args:
+        input_path: JSONL file of items
+        output_path: Catalog file to (re)write
+        theme: Theme of the items
+        batch_size: Items summarized per extractor call
+        concurrency: Extractor calls in flight at a time
+        summarize: Ask the extractor for missing summaries
+        extractor: Extractor agent (a fresh one for ``theme`` by default)
+
+    Returns:
+        Build summary
+    """
+    summary = CatalogBuildSummary()
+    started = time.perf_counter()
+    items = list(_read_items(input_path, summary))
+    previous = _previous_summaries(output_path)
+
+    pending: list[CatalogItem] = []
+    for item in items:
+        if item.summary:
+            summary.provided += 1
+        elif reused := previous.get((catalog_key(item.title), catalog_key(item.creator))):
+            item.summary = reused
+            summary.reused += 1
+        else:
+            pending.append(item)
+
+    extractor = extractor or EssenceExtractorAgent(theme=theme)
+    if summarize and pending:
+        semaphore = asyncio.Semaphore(concurrency)
+        batches = [pending[i : i + batch_size] for i in range(0, len(pending), batch_size)]
+        logger.info("Summarizing %s items in %s batches", len(pending), len(batches))
+
+        async def summarize_batch(batch: list[CatalogItem]) -> None:
+            candidates = [
+                RecommendationCandidate(title=i.title, creator=i.creator, metadata=i.metadata)
+                for i in batch
+            ]
+            async with semaphore:
+                try:
+                    generated = await extractor.generate_summaries(candidates)
+                except Exception as exc:  # noqa: BLE001
+                    logger.error("Extractor call failed for %s items: %s", len(batch), exc)
+                    return
+            for item in batch:
+                text = (generated or {}).get(item.title, "")
+                if text:
+                    item.summary = text
+                    summary.generated += 1
+
+        await asyncio.gather(*(summarize_batch(batch) for batch in batches))
+
+    summary.unsummarized = sum(1 for item in items if not item.summary)
+    summary.items = write_catalog(output_path, theme, items, prompt_digest=extractor.prompt_digest)
+    summary.elapsed_seconds = time.perf_counter() - started
+    return summary
+
+
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m src.build_catalog",
+        description="Build a theme catalog with precomputed summaries from a JSONL file of items.",
+    )
+    parser.add_argument("input", type=Path, help="JSONL file of items")
+    parser.add_argument(
+        "-t",
+        "--theme",
+        choices=SUPPORTED_THEMES,
+        default="books",
+        help="Theme of the items (default: books)",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=Path,
+        help="Catalog file to write (default: CATALOG_DIR/<theme>.cat)",
+    )
+    parser.add_argument(
+        "-b",
+        "--batch-size",
+        type=int,
+        default=5,
+        help="Items summarized per LLM call (default: 5)",
+    )
+    parser.add_argument(
+        "-c",
+        "--concurrency",
+        type=int,
+        default=settings.batch_concurrency,
+        help="LLM calls in flight at a time (default: BATCH_CONCURRENCY)",
+    )
+    parser.add_argument(
+        "--no-summaries",
+        action="store_true",
+        help="Only store the given summaries; never call the LLM",
+    )
+    return parser.parse_args(argv)
+
+
+async def _main(args: argparse.Namespace) -> int:
+    output = args.output or catalog_path(args.theme)
+    try:
+        summary = await build_catalog(
+            args.input,
+            output,
+            theme=args.theme,
+            batch_size=max(1, args.batch_size),
+            concurrency=max(1, args.concurrency),
+            summarize=not args.no_summaries,
+        )
+    finally:
+        await llm_router.aclose()
+        await llm_clients.aclose()
+        llm_cassette.close()
+
+    logger.info(
+        "Finished: items=%s, provided=%s, reused=%s, generated=%s, unsummarized=%s, "
+        "invalid=%s in %.1fs -> %s",
+        summary.items,
+        summary.provided,
+        summary.reused,
+        summary.generated,
+        summary.unsummarized,
+        summary.invalid,
+        summary.elapsed_seconds,
+        output,
+    )
+    return 1 if summary.invalid or (summary.unsummarized and not args.no_summaries) else 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Command-line entry point."""
+    setup_logging(settings.log_level)
+    return asyncio.run(_main(_parse_args(argv)))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
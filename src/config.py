@@ -4,12 +4,21 @@ import logging
 from pathlib import Path
 from typing import Literal
 
+from pydantic import BaseModel, Field, IPvAnyNetwork
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 ENV_FILE = BASE_DIR / ".env"
 
 
+class LLMEndpointConfig(BaseModel):
+    """One OpenAI-compatible upstream (base URL + API key) for the LLM router."""
+
+    base_url: str
+    api_key: str
+    weight: float = 1.0  # Relative share of traffic at equal latency
+
+
 class Settings(BaseSettings):
     """Application settings loaded from environment variables."""
 
@@ -26,10 +35,50 @@ class Settings(BaseSettings):
     openai_model: str = "gpt-4"
     openai_temperature: float = 0.7
 
+    # LLM HTTP Connection Pool (shared by agents with the same base/key/model)
+    llm_pool_max_connections: int = 100
+    llm_pool_max_keepalive: int = 20
+    llm_keepalive_expiry: float = 60.0  # Seconds an idle connection is kept open
+    llm_http2: bool = False  # Requires the optional 'h2' package
+    llm_connect_timeout: float = 5.0
+    llm_read_timeout: float = 60.0
+
+    # LLM Concurrency Governor (per worker process)
+    llm_max_concurrency: int = 32  # Simultaneous LLM calls; 0 disables the governor
+    llm_max_queue: int = 256  # Waiting calls before new ones are shed with 503
+    llm_max_queue_per_client: int = 32  # Waiting calls per client before 429
+    # Proxies (addresses or networks) whose X-Forwarded-For names the client;
+    # other callers are identified by their own address
+    trusted_proxies: list[IPvAnyNetwork] = []
+
+    # Hedged LLM Requests (per agent; streaming calls are never hedged)
+    llm_hedging_enabled: bool = False
+    llm_hedge_percentile: float = 95.0  # Hedge calls slower than this latency percentile
+    llm_hedge_budget: float = 0.1  # Hedges per call, capped at 1.0 (at most 2x load)
+    llm_hedge_window: int = 200  # Recent latencies used for the percentile
+    llm_hedge_min_samples: int = 20  # No hedging until this many latencies are known
+    llm_hedge_min_delay: float = 0.5  # Never hedge sooner than this many seconds
+
+    # Multi-endpoint LLM Router (empty: every call goes to OPENAI_API_BASE)
+    # e.g. LLM_ENDPOINTS='[{"base_url": "https://a.example/v1", "api_key": "sk-1"},
+    #                      {"base_url": "https://b.example/v1", "api_key": "sk-2", "weight": 2}]'
+    llm_endpoints: list[LLMEndpointConfig] = []
+    llm_router_ewma_alpha: float = 0.3  # Smoothing for per-endpoint latency/error averages
+    llm_router_eject_after: int = 3  # Consecutive failures before an endpoint is ejected
+    llm_router_eject_seconds: float = 30.0  # Ejection period; doubles after a failed probe
+    llm_router_max_eject_seconds: float = 300.0
+
+    # LLM Cassette (record completions to disk, or replay them instead of calling the upstream)
+    llm_cassette_mode: Literal["off", "record", "replay"] = "off"
+    llm_cassette_path: str = "data/llm_cassette.jsonl"
+    llm_cassette_latency_scale: float = 1.0  # Replayed latency multiplier; 0 replays instantly
+    llm_cassette_passthrough_misses: bool = False  # Replay: call the upstream for unknown prompts
+
     # Redis Configuration
     redis_host: str = "localhost"
     redis_port: int = 6379
     redis_db: int = 0
+    redis_breaker_cooldown: float = 5.0  # Seconds Redis is skipped after a connection failure; 0 disables
 
     # API Configuration
     api_host: str = "0.0.0.0"
@@ -38,6 +87,76 @@ class Settings(BaseSettings):
 
     # Workflow Configuration
     workflow_timeout: float = 60.0  # Timeout in seconds for recommendation workflow
+    request_coalescing_enabled: bool = True  # Share one workflow run across identical requests
+    pipelined_workflow: bool = False  # Start per-candidate work while the selector streams
+    # Themes that use the fused extractor+insight agent (one LLM call instead of two),
+    # e.g. FUSED_AGENT_THEMES='["books", "anime"]'
+    fused_agent_themes: list[Literal["books", "games", "movies", "anime"]] = []
+    # Single-shot fast path: one LLM call, falling back to the multi-agent flow
+    single_shot_default: bool = False
+    single_shot_max_input_chars: int = 200  # Longer messages are not "simple" requests
+    # Batch endpoint
+    batch_max_items: int = 500  # Largest accepted batch
+    batch_concurrency: int = 8  # Requests of one batch processed at a time
+    # Detail-stage deadline: slow summaries/reasons are replaced by default texts
+    stage_deadlines_enabled: bool = True
+    detail_stage_timeout: float = 20.0  # Upper bound for the extractor/insight stage
+    detail_stage_min_timeout: float = 3.0  # Lower bound once the budget adapts
+    stage_budget_percentile: float = 95.0  # Observed stage latency percentile to adapt to
+    stage_budget_multiplier: float = 1.5  # Headroom over that percentile
+    stage_budget_reserve: float = 1.0  # Seconds kept before WORKFLOW_TIMEOUT to assemble
+
+    # Response Cache Configuration
+    response_cache_enabled: bool = True
+    response_cache_ttl: float = 600.0  # Seconds a cached response stays valid
+    response_cache_max_entries: int = 1024  # In-process LRU capacity per worker
+    response_cache_redis_enabled: bool = False  # Share cached responses across workers
+
+    # Semantic Cache (near-duplicate first-turn requests share a cached response)
+    semantic_cache_enabled: bool = False
+    semantic_cache_threshold: float = 0.85  # Cosine similarity needed for a hit
+    semantic_cache_max_entries: int = 2048  # Entries per theme before LRU eviction
+    semantic_cache_ttl: float = 600.0  # Seconds an entry stays valid
+    semantic_cache_dim: int = 512  # Hashed character n-gram dimensions
+    semantic_cache_audit_rate: float = 0.01  # Share of hits re-run to sample false hits
+
+    # Summary Store Configuration (per-item summaries reused across requests)
+    summary_store_backend: Literal["none", "memory", "redis", "file"] = "memory"
+    summary_store_ttl: float = 30 * 24 * 3600.0  # Seconds a stored summary stays valid
+    summary_store_max_entries: int = 20000
+    summary_store_path: str = "data/summaries.sqlite3"  # Used by the file backend
+
+    # Item Catalog (curated items per theme; build with python -m src.build_catalog)
+    catalog_enabled: bool = False
+    catalog_dir: str = "data/catalog"  # Holds one {theme}.cat file per theme
+
+    # Conversation Sessions (server-side history keyed by session_id)
+    # memory is per worker process; use redis when running several workers
+    session_store_backend: Literal["none", "memory", "redis"] = "memory"
+    session_ttl: float = 1800.0  # Seconds an idle session is kept
+    session_max_entries: int = 10000  # Sessions kept before the oldest are evicted
+    session_max_messages: int = 20  # History messages kept per session
+
+    # Selector Prompt Budget (older history is folded into a rolling summary)
+    prompt_history_token_budget: int = 1200  # History tokens per prompt; 0 disables
+    prompt_summary_max_tokens: int = Field(default=300, ge=1)  # Upper bound for the rolling summary
+    prompt_min_recent_messages: int = 2  # Latest messages always kept verbatim
+    prompt_summary_cache_entries: int = 2048  # Cached summaries per agent
+
+    # Startup Warm-up (build agents, cache prompts and open upstream connections; see /ready)
+    warmup_enabled: bool = False
+    warmup_connections: int = 4  # Keep-alive connections opened per LLM upstream
+    warmup_timeout: float = 10.0  # Seconds allowed for opening connections
+
+    # Metrics
+    event_loop_lag_interval: float = 0.5  # Seconds between event-loop lag probes; 0 disables
+
+    # Tracing (needs the optional 'tracing' extra unless disabled)
+    tracing_exporter: Literal["none", "otlp", "jsonl"] = "none"
+    tracing_otlp_endpoint: str = "http://localhost:4318/v1/traces"  # OTLP/HTTP collector
+    tracing_jsonl_path: str = "logs/traces.jsonl"  # Span file for the jsonl exporter
+    tracing_service_name: str = "recommendation-api"
+    tracing_sample_ratio: float = 1.0  # Share of new traces recorded; callers' decisions win
 
 
 def setup_logging(level: str = "INFO") -> None:
@@ -0,0 +1,439 @@
+"""Fake OpenAI-compatible chat completions server for offline load testing.
+
+Usage::
+
+    python -m src.devtools.fake_openai --port 9000 --latency 1.5 \\
+        --latency-dist lognormal --jitter 0.4 --error-rate 0.01 --rate-limit-rate 0.02
+
+    OPENAI_API_BASE=http://localhost:9000/v1 OPENAI_API_KEY=fake \\
+        uv run uvicorn src.main:app --workers 4
+
+``POST /v1/chat/completions`` recognizes the prompts of every agent (selector,
+single-shot, extractor, insight, fused and the history summarizer) and answers
+with theme-shaped JSON the agents parse successfully. Answers depend only on
+the request, so the same prompt always yields the same completion. Latency,
+errors and 429s are drawn from a seeded random generator, and ``stream: true``
+is answered with server-sent chunks spread over the sampled latency.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import random
+import time
+import uuid
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from typing import Any, Literal
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+from src.llm.tokens import count_tokens
+
+LatencyDistribution = Literal["fixed", "uniform", "normal", "lognormal"]
+
+# Share of a streamed response's latency spent before the first chunk
+FIRST_CHUNK_SHARE = 0.3
+STREAM_CHUNK_CHARS = 8
+
+THEME_LABELS = {"书籍": "books", "游戏": "games", "电影": "movies", "动漫": "anime"}
+
+CATALOG: dict[str, list[tuple[str, str, dict[str, str]]]] = {
+    "books": [
+        ("三体", "刘慈欣", {"年份": "2008", "类型": "科幻"}),
+        ("沙丘", "弗兰克·赫伯特", {"年份": "1965", "类型": "科幻"}),
+        ("百年孤独", "加西亚·马尔克斯", {"年份": "1967", "类型": "魔幻现实主义"}),
+        ("白夜行", "东野圭吾", {"年份": "1999", "类型": "推理"}),
+        ("活着", "余华", {"年份": "1993", "类型": "文学"}),
+        ("基地", "艾萨克·阿西莫夫", {"年份": "1951", "类型": "科幻"}),
+    ],
+    "games": [
+        ("塞尔达传说：旷野之息", "任天堂", {"平台": "Switch", "类型": "开放世界"}),
+        ("艾尔登法环", "FromSoftware", {"平台": "多平台", "类型": "动作角色扮演"}),
+        ("星露谷物语", "ConcernedApe", {"平台": "多平台", "类型": "模拟经营"}),
+        ("空洞骑士", "Team Cherry", {"平台": "多平台", "类型": "类银河恶魔城"}),
+        ("极乐迪斯科", "ZA/UM", {"平台": "多平台", "类型": "角色扮演"}),
+        ("哈迪斯", "Supergiant Games", {"平台": "多平台", "类型": "肉鸽"}),
+    ],
+    "movies": [
+        ("盗梦空间", "克里斯托弗·诺兰", {"年份": "2010", "类型": "科幻"}),
+        ("千与千寻", "宫崎骏", {"年份": "2001", "类型": "动画"}),
+        ("肖申克的救赎", "弗兰克·德拉邦特", {"年份": "1994", "类型": "剧情"}),
+        ("记忆碎片", "克里斯托弗·诺兰", {"年份": "2000", "类型": "悬疑"}),
+        ("花样年华", "王家卫", {"年份": "2000", "类型": "爱情"}),
+        ("银翼杀手2049", "丹尼斯·维伦纽瓦", {"年份": "2017", "类型": "科幻"}),
+    ],
+    "anime": [
+        ("星际牛仔", "渡边信一郎", {"年份": "1998", "类型": "科幻"}),
+        ("钢之炼金术师", "水岛精二", {"年份": "2009", "类型": "奇幻"}),
+        ("命运石之门", "浜崎博嗣", {"年份": "2011", "类型": "科幻"}),
+        ("紫罗兰永恒花园", "石立太一", {"年份": "2018", "类型": "剧情"}),
+        ("进击的巨人", "荒木哲郎", {"年份": "2013", "类型": "动作"}),
+        ("虫师", "长滨博史", {"年份": "2005", "类型": "奇幻"}),
+    ],
+}
+
+
+@dataclass(slots=True)
+class FakeLLMConfig:
+    """Behaviour of the fake upstream."""
+
+    latency: float = 1.0  # Mean seconds per completion
+    latency_dist: LatencyDistribution = "lognormal"
+    jitter: float = 0.3  # Spread: half-width (uniform), stddev share (normal), sigma (lognormal)
+    error_rate: float = 0.0  # Share of calls answered with 500
+    rate_limit_rate: float = 0.0  # Share of calls answered with 429
+    retry_after: float = 1.0  # Retry-After seconds sent with 429s
+    seed: int | None = None
+
+
+@dataclass(slots=True)
+class FakeLLMStats:
+    """Counters of answered calls."""
+
+    completions: int = 0
+    streams: int = 0
+    errors: int = 0
+    rate_limited: int = 0
+
+
+class LatencySampler:
+    """Draw per-call latencies from the configured distribution."""
+
+    def __init__(self, config: FakeLLMConfig, rng: random.Random) -> None:
+        self.config = config
+        self.rng = rng
+
+    def sample(self) -> float:
+        mean, jitter = self.config.latency, self.config.jitter
+        if mean <= 0:
+            return 0.0
+        dist = self.config.latency_dist
+        if dist == "uniform":
+            value = self.rng.uniform(mean * (1 - jitter), mean * (1 + jitter))
+        elif dist == "normal":
+            value = self.rng.gauss(mean, mean * jitter)
+        elif dist == "lognormal":
+            # Parameterized so the distribution mean equals ``latency``
+            value = self.rng.lognormvariate(math.log(mean) - jitter**2 / 2, jitter)
+        else:
+            value = mean
+        return max(0.0, value)
+
+
+def _extract_payload(text: str) -> dict[str, Any]:
+    # Agents embed their input as the first JSON object of the message
+    start = text.find("{")
+    if start < 0:
+        return {}
+    try:
+        data, _ = json.JSONDecoder().raw_decode(text[start:])
+    except json.JSONDecodeError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _stable_int(text: str) -> int:
+    return int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+
+
+def _summary(title: str, creator: str) -> str:
+    return f"《{title}》由{creator}创作，以鲜明的风格与扎实的结构著称，是同类作品中口碑出众的代表之作。"
+
+
+def _reason(title: str) -> str:
+    return f"《{title}》契合你提到的偏好，节奏与主题都值得一试。"
+
+
+def _pick_candidates(theme: str, key: str, count: int = 3) -> list[dict[str, Any]]:
+    catalog = CATALOG.get(theme, CATALOG["books"])
+    offset = _stable_int(key) % len(catalog)
+    picked = [catalog[(offset + i) % len(catalog)] for i in range(count)]
+    return [
+        {"title": title, "creator": creator, "metadata": metadata}
+        for title, creator, metadata in picked
+    ]
+
+
+def _theme_of(system: str) -> str:
+    for label, theme in THEME_LABELS.items():
+        if f"针对 {label} 推荐" in system:
+            return theme
+    return "books"
+
+
+def _profile() -> dict[str, Any]:
+    return {"summary": "偏好节奏紧凑、口碑出众的作品", "attributes": {"偏好": ["口碑佳作"]}}
+
+
+def build_completion(messages: list[dict[str, Any]]) -> str:
+    """Return a completion the matching agent can parse.
+
+    Args:
+        messages: OpenAI chat messages of the request
+
+    Returns:
+        Completion text
+    """
+    system = "\n".join(str(m.get("content", "")) for m in messages if m.get("role") == "system")
+    users = [str(m.get("content", "")) for m in messages if m.get("role") == "user"]
+    last = users[-1] if users else ""
+
+    if system.startswith("你负责压缩推荐对话"):
+        return "用户偏好节奏紧凑的作品，已推荐过若干口碑佳作，用户反馈积极。"
+
+    payload = _extract_payload(last)
+    candidates = payload.get("candidates") or []
+    if "summaries_needed" in payload:
+        return json.dumps(
+            {
+                "items": [
+                    {
+                        "title": c["title"],
+                        "summary": _summary(c["title"], c.get("creator", "")),
+                        "recommendation_reason": _reason(c["title"]),
+                    }
+                    for c in candidates
+                ]
+            },
+            ensure_ascii=False,
+        )
+    if "recommendation_reason" in last:
+        return json.dumps(
+            {
+                "reasons": [
+                    {"title": c["title"], "recommendation_reason": _reason(c["title"])}
+                    for c in candidates
+                ]
+            },
+            ensure_ascii=False,
+        )
+    if "summaries" in last and candidates:
+        return json.dumps(
+            {
+                "summaries": [
+                    {"title": c["title"], "summary": _summary(c["title"], c.get("creator", ""))}
+                    for c in candidates
+                ]
+            },
+            ensure_ascii=False,
+        )
+
+    theme = _theme_of(system)
+    picked = _pick_candidates(theme, last)
+    if '"recommendations"' in system:
+        return json.dumps(
+            {
+                "user_profile": _profile(),
+                "recommendations": [
+                    {
+                        **c,
+                        "summary": _summary(c["title"], c["creator"]),
+                        "reason": _reason(c["title"]),
+                    }
+                    for c in picked
+                ],
+                "message": "根据你的描述，挑选了以下几部作品。",
+            },
+            ensure_ascii=False,
+        )
+    return json.dumps(
+        {
+            "user_profile": _profile(),
+            "candidates": picked,
+            "message": "根据你的描述，挑选了以下几部作品。",
+        },
+        ensure_ascii=False,
+    )
+
+
+def _usage(messages: list[dict[str, Any]], completion: str, model: str) -> dict[str, int]:
+    prompt = sum(count_tokens(str(m.get("content", "")), model) + 4 for m in messages)
+    completion_tokens = count_tokens(completion, model)
+    return {
+        "prompt_tokens": prompt,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt + completion_tokens,
+    }
+
+
+def create_app(config: FakeLLMConfig | None = None) -> FastAPI:
+    """Build the fake upstream application.
+
+    Args:
+        config: Latency and failure behaviour (defaults to ``FakeLLMConfig()``)
+
+    Returns:
+        FastAPI application serving ``/v1/chat/completions``
+    """
+    config = config or FakeLLMConfig()
+    rng = random.Random(config.seed)
+    sampler = LatencySampler(config, rng)
+    stats = FakeLLMStats()
+    app = FastAPI(title="Fake OpenAI-compatible API")
+    app.state.config = config
+    app.state.stats = stats
+
+    def _error(status_code: int, message: str, headers: dict[str, str] | None = None) -> Response:
+        return JSONResponse(
+            status_code=status_code,
+            headers=headers,
+            content={
+                "error": {"message": message, "type": "fake_upstream_error", "code": status_code}
+            },
+        )
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request) -> Response:
+        body: dict[str, Any] = await request.json()
+        model = str(body.get("model", "fake-model"))
+        messages: list[dict[str, Any]] = body.get("messages", [])
+        latency = sampler.sample()
+
+        draw = rng.random()
+        if draw < config.rate_limit_rate:
+            stats.rate_limited += 1
+            return _error(
+                429,
+                "Rate limit reached (fake upstream)",
+                {"Retry-After": f"{config.retry_after:g}"},
+            )
+        if draw < config.rate_limit_rate + config.error_rate:
+            stats.errors += 1
+            await asyncio.sleep(latency * rng.random())
+            return _error(500, "Internal error (fake upstream)")
+
+        completion = build_completion(messages)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+
+        if not body.get("stream"):
+            stats.completions += 1
+            await asyncio.sleep(latency)
+            return JSONResponse(
+                {
+                    "id": completion_id,
+                    "object": "chat.completion",
+                    "created": created,
+                    "model": model,
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {"role": "assistant", "content": completion},
+                            "finish_reason": "stop",
+                        }
+                    ],
+                    "usage": _usage(messages, completion, model),
+                }
+            )
+
+        stats.streams += 1
+        include_usage = bool((body.get("stream_options") or {}).get("include_usage"))
+
+        async def stream() -> AsyncIterator[str]:
+            def frame(delta: dict[str, Any], finish: str | None = None, **extra: Any) -> str:
+                chunk = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish}],
+                    **extra,
+                }
+                return f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+
+            pieces = [
+                completion[i : i + STREAM_CHUNK_CHARS]
+                for i in range(0, len(completion), STREAM_CHUNK_CHARS)
+            ]
+            await asyncio.sleep(latency * FIRST_CHUNK_SHARE)
+            yield frame({"role": "assistant", "content": ""})
+            step = latency * (1 - FIRST_CHUNK_SHARE) / max(1, len(pieces))
+            for piece in pieces:
+                yield frame({"content": piece})
+                await asyncio.sleep(step)
+            yield frame({}, "stop")
+            if include_usage:
+                usage_chunk = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [],
+                    "usage": _usage(messages, completion, model),
+                }
+                yield f"data: {json.dumps(usage_chunk)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    @app.get("/v1/models")
+    async def list_models() -> dict[str, Any]:
+        return {
+            "object": "list",
+            "data": [{"id": "fake-model", "object": "model", "owned_by": "fake"}],
+        }
+
+    @app.get("/stats")
+    async def fake_stats() -> dict[str, Any]:
+        return {
+            "completions": stats.completions,
+            "streams": stats.streams,
+            "errors": stats.errors,
+            "rate_limited": stats.rate_limited,
+        }
+
+    return app
+
+
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m src.devtools.fake_openai",
+        description="Serve a fake OpenAI-compatible /v1/chat/completions for offline testing.",
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency", type=float, default=1.0, help="Mean seconds per completion")
+    parser.add_argument(
+        "--latency-dist",
+        choices=["fixed", "uniform", "normal", "lognormal"],
+        default="lognormal",
+        help="Latency distribution (default: lognormal)",
+    )
+    parser.add_argument(
+        "--jitter",
+        type=float,
+        default=0.3,
+        help="Spread: half-width share (uniform), stddev share (normal) or sigma (lognormal)",
+    )
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of 500 responses")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Share of 429 responses")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After sent with 429s")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for latency and failures")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Command-line entry point."""
+    import uvicorn
+
+    args = _parse_args(argv)
+    config = FakeLLMConfig(
+        latency=args.latency,
+        latency_dist=args.latency_dist,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after,
+        seed=args.seed,
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Shared infrastructure at the LLM call boundary."""
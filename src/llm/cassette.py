@@ -0,0 +1,302 @@
+"""Record/replay cassette for LLM calls.
+
+In ``record`` mode every completion an agent receives is appended to a
+JSON-lines cassette together with the prompt hash, the observed latency and
+the reported token usage. In ``replay`` mode agents are answered from the
+cassette instead of the upstream, after sleeping the recorded latency times
+``LLM_CASSETTE_LATENCY_SCALE``, so benchmark runs see identical completions
+without network access or API keys.
+
+A prompt recorded several times is replayed in recording order, cycling when
+the recordings are exhausted. Records are appended with one ``write`` on a
+file opened in append mode, so all workers of a host can record into the same
+cassette.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections.abc import AsyncIterator, Sequence
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Literal
+
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.messages.ai import UsageMetadata
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+CassetteMode = Literal["off", "record", "replay"]
+
+# Characters per chunk when a recorded completion is replayed as a stream
+REPLAY_CHUNK_CHARS = 16
+
+
+class CassetteMiss(LookupError):
+    """Raised in replay mode when a prompt was never recorded."""
+
+
+@dataclass(slots=True)
+class CassetteRecord:
+    """One recorded LLM call."""
+
+    key: str
+    completion: str
+    latency: float  # Seconds until the full completion arrived
+    first_chunk: float | None = None  # Seconds until the first chunk (streamed calls)
+    usage: dict[str, int] | None = None
+    model: str = ""
+
+
+@dataclass(slots=True)
+class CassetteStats:
+    """Counters for the cassette."""
+
+    recorded: int = 0
+    replayed: int = 0
+    misses: int = 0
+
+
+def prompt_key(messages: Sequence[BaseMessage]) -> str:
+    """Hash the role and content of every message of a prompt.
+
+    Args:
+        messages: Chat messages sent to the LLM
+
+    Returns:
+        Hex digest identifying the prompt
+    """
+    payload = json.dumps(
+        [(message.type, message.content) for message in messages],
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+class LLMCassette:
+    """Records LLM completions to disk and serves them back."""
+
+    def __init__(
+        self,
+        *,
+        mode: CassetteMode,
+        path: str | Path,
+        latency_scale: float = 1.0,
+        passthrough_misses: bool = False,
+    ) -> None:
+        """Initialize the cassette.
+
+        Args:
+            mode: ``off``, ``record`` or ``replay``
+            path: JSON-lines cassette file
+            latency_scale: Multiplier for replayed latencies (0 replays instantly)
+            passthrough_misses: In replay mode, send unrecorded prompts to the
+                upstream instead of raising :class:`CassetteMiss`
+        """
+        self.mode = mode
+        self.path = Path(path)
+        self.latency_scale = max(0.0, latency_scale)
+        self.passthrough_misses = passthrough_misses
+        self.stats = CassetteStats()
+        self._records: dict[str, list[CassetteRecord]] | None = None
+        self._cursors: dict[str, int] = {}
+        self._fd: int | None = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls) -> LLMCassette:
+        """Build a cassette configured from application settings."""
+        return cls(
+            mode=settings.llm_cassette_mode,
+            path=settings.llm_cassette_path,
+            latency_scale=settings.llm_cassette_latency_scale,
+            passthrough_misses=settings.llm_cassette_passthrough_misses,
+        )
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == "record"
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    def record(
+        self,
+        messages: Sequence[BaseMessage],
+        completion: str,
+        latency: float,
+        *,
+        first_chunk: float | None = None,
+        usage: UsageMetadata | None = None,
+        model: str = "",
+    ) -> None:
+        """Append one completed call to the cassette.
+
+        Args:
+            messages: Prompt that was sent
+            completion: Completion text received
+            latency: Seconds the call took
+            first_chunk: Seconds until the first streamed chunk, if streamed
+            usage: Token usage reported by the upstream
+            model: Model name, kept for reference
+        """
+        entry = CassetteRecord(
+            key=prompt_key(messages),
+            completion=completion,
+            latency=round(latency, 4),
+            first_chunk=round(first_chunk, 4) if first_chunk is not None else None,
+            usage=(
+                {
+                    "input_tokens": usage["input_tokens"],
+                    "output_tokens": usage["output_tokens"],
+                    "total_tokens": usage["total_tokens"],
+                }
+                if usage
+                else None
+            ),
+            model=model,
+        )
+        line = json.dumps(
+            {k: v for k, v in asdict(entry).items() if v is not None},
+            ensure_ascii=False,
+            separators=(",", ":"),
+        )
+        try:
+            with self._lock:
+                if self._fd is None:
+                    self.path.parent.mkdir(parents=True, exist_ok=True)
+                    self._fd = os.open(
+                        self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644
+                    )
+                os.write(self._fd, (line + "\n").encode("utf-8"))
+            self.stats.recorded += 1
+        except OSError as exc:
+            logger.warning("Writing LLM cassette %s failed: %s", self.path, exc)
+
+    def lookup(self, messages: Sequence[BaseMessage]) -> CassetteRecord | None:
+        """Return the next recording for a prompt.
+
+        Args:
+            messages: Prompt about to be sent
+
+        Returns:
+            Recorded call, or None when the prompt was never recorded
+        """
+        key = prompt_key(messages)
+        recordings = self._load().get(key)
+        if not recordings:
+            self.stats.misses += 1
+            return None
+        cursor = self._cursors.get(key, 0)
+        self._cursors[key] = cursor + 1
+        self.stats.replayed += 1
+        return recordings[cursor % len(recordings)]
+
+    def miss(self, messages: Sequence[BaseMessage]) -> CassetteMiss:
+        """Build the error raised for an unrecorded prompt."""
+        return CassetteMiss(
+            f"Prompt {prompt_key(messages)} is not in LLM cassette {self.path}"
+        )
+
+    async def replay(self, record: CassetteRecord) -> AIMessage:
+        """Answer with a recording after its (scaled) latency.
+
+        Args:
+            record: Recording returned by :meth:`lookup`
+
+        Returns:
+            Message equivalent to the recorded response
+        """
+        await asyncio.sleep(record.latency * self.latency_scale)
+        return AIMessage(content=record.completion, usage_metadata=self._usage(record))
+
+    async def replay_stream(self, record: CassetteRecord) -> AsyncIterator[AIMessageChunk]:
+        """Stream a recording, spreading its chunks over the (scaled) latency.
+
+        Args:
+            record: Recording returned by :meth:`lookup`
+
+        Yields:
+            Chunks of the recorded completion; the last carries the usage
+        """
+        first = record.first_chunk if record.first_chunk is not None else 0.0
+        text = record.completion
+        pieces = [
+            text[i : i + REPLAY_CHUNK_CHARS] for i in range(0, len(text), REPLAY_CHUNK_CHARS)
+        ] or [""]
+        step = max(0.0, record.latency - first) / len(pieces) * self.latency_scale
+        await asyncio.sleep(first * self.latency_scale)
+        for index, piece in enumerate(pieces):
+            if index:
+                await asyncio.sleep(step)
+            last = index == len(pieces) - 1
+            yield AIMessageChunk(
+                content=piece, usage_metadata=self._usage(record) if last else None
+            )
+
+    @staticmethod
+    def _usage(record: CassetteRecord) -> UsageMetadata | None:
+        if not record.usage:
+            return None
+        return UsageMetadata(
+            input_tokens=record.usage["input_tokens"],
+            output_tokens=record.usage["output_tokens"],
+            total_tokens=record.usage["total_tokens"],
+        )
+
+    def _load(self) -> dict[str, list[CassetteRecord]]:
+        if self._records is not None:
+            return self._records
+        records: dict[str, list[CassetteRecord]] = {}
+        try:
+            with self.path.open(encoding="utf-8") as handle:
+                for number, line in enumerate(handle, start=1):
+                    if not line.strip():
+                        continue
+                    try:
+                        entry = CassetteRecord(**json.loads(line))
+                    except (json.JSONDecodeError, TypeError) as exc:
+                        logger.warning(
+                            "Skipping malformed cassette line %s:%s: %s", self.path, number, exc
+                        )
+                        continue
+                    records.setdefault(entry.key, []).append(entry)
+        except FileNotFoundError:
+            logger.warning("LLM cassette %s not found; every prompt will miss", self.path)
+        self._records = records
+        logger.info(
+            "Loaded LLM cassette %s: %s prompts, %s recordings",
+            self.path,
+            len(records),
+            sum(len(entries) for entries in records.values()),
+        )
+        return records
+
+    def snapshot(self) -> dict[str, Any]:
+        """Return cassette counters for diagnostics endpoints."""
+        return {
+            **asdict(self.stats),
+            "mode": self.mode,
+            "path": str(self.path),
+            "latency_scale": self.latency_scale,
+        }
+
+    def close(self) -> None:
+        """Close the recording file."""
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+
+# Global cassette shared by every agent in the process
+llm_cassette = LLMCassette.from_settings()
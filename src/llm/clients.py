@@ -0,0 +1,300 @@
+"""Process-wide registry of pooled HTTP clients for LLM calls.
+
+Every ``ChatOpenAI`` would otherwise build its own HTTP client and connection
+pool. Agents that talk to the same upstream with the same credentials and model
+share one tuned ``httpx.AsyncClient`` from this registry instead.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import importlib.util
+import logging
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any
+
+import httpx
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+ClientKey = tuple[str, str, str]
+
+
+@dataclass(slots=True)
+class PoolStats:
+    """Connection counters for one shared client."""
+
+    requests: int = 0
+    in_flight: int = 0
+    new_connections: int = 0
+    tls_handshakes: int = 0
+
+    @property
+    def reuse_ratio(self) -> float:
+        """Fraction of requests served on an already open connection."""
+        if not self.requests:
+            return 0.0
+        return max(0.0, 1.0 - self.new_connections / self.requests)
+
+
+class _TrackedStream(httpx.AsyncByteStream):
+    """Response body wrapper that reports when the connection is released."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, on_close: Callable[[], None]) -> None:
+        self._stream = stream
+        self._on_close: Callable[[], None] | None = on_close
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            if self._on_close is not None:
+                self._on_close()
+                self._on_close = None
+
+
+@dataclass(slots=True)
+class RequestCounter:
+    """Upstream HTTP requests sent on behalf of one LLM call."""
+
+    requests: int = 0
+
+    @property
+    def retries(self) -> int:
+        """Requests beyond the first, i.e. retries made inside the openai SDK."""
+        return max(0, self.requests - 1)
+
+
+# Set around an LLM call so the transport can count the SDK's hidden retries
+request_counter_var: ContextVar[RequestCounter | None] = ContextVar(
+    "request_counter", default=None
+)
+
+
+class InstrumentedTransport(httpx.AsyncHTTPTransport):
+    """Async transport that counts requests, new connections and TLS handshakes."""
+
+    def __init__(self, stats: PoolStats, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.stats = stats
+        self.max_connections = kwargs["limits"].max_connections
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        stats = self.stats
+        stats.requests += 1
+        stats.in_flight += 1
+        released = False
+        counter = request_counter_var.get()
+        if counter is not None:
+            counter.requests += 1
+
+        def release() -> None:
+            nonlocal released
+            if not released:
+                released = True
+                stats.in_flight -= 1
+
+        upstream_trace: Callable[[str, dict[str, Any]], Awaitable[None]] | None = (
+            request.extensions.get("trace")
+        )
+
+        async def trace(event_name: str, info: dict[str, Any]) -> None:
+            if event_name == "connection.connect_tcp.complete":
+                stats.new_connections += 1
+            elif event_name == "connection.start_tls.complete":
+                stats.tls_handshakes += 1
+            if upstream_trace is not None:
+                await upstream_trace(event_name, info)
+
+        request.extensions["trace"] = trace
+        try:
+            response = await super().handle_async_request(request)
+        except BaseException:
+            release()
+            raise
+
+        assert isinstance(response.stream, httpx.AsyncByteStream)
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_TrackedStream(response.stream, release),
+            extensions=response.extensions,
+        )
+
+    def pool_snapshot(self) -> dict[str, int]:
+        """Return open/active connection counts from the underlying pool."""
+        connections = list(self._pool.connections)
+        active = sum(1 for conn in connections if not conn.is_idle())
+        return {
+            "open_connections": len(connections),
+            "active_connections": active,
+            "waiters": max(0, self.stats.in_flight - self.max_connections),
+        }
+
+
+@dataclass(slots=True)
+class SharedClient:
+    """A pooled async HTTP client and its instrumentation."""
+
+    client: httpx.AsyncClient
+    transport: InstrumentedTransport
+    stats: PoolStats
+
+
+def llm_timeout() -> httpx.Timeout:
+    """Return the timeouts of LLM requests from ``LLM_CONNECT_TIMEOUT``/``LLM_READ_TIMEOUT``.
+
+    The openai SDK sends its own timeout with every request, which overrides
+    the client default, so ChatOpenAI must be given the same value.
+    """
+    return httpx.Timeout(
+        connect=settings.llm_connect_timeout,
+        read=settings.llm_read_timeout,
+        write=settings.llm_connect_timeout,
+        pool=settings.llm_read_timeout,
+    )
+
+
+def _http2_available() -> bool:
+    return importlib.util.find_spec("h2") is not None
+
+
+class LLMClientRegistry:
+    """Hands out one shared async HTTP client per (api_base, api_key, model)."""
+
+    def __init__(self) -> None:
+        self._clients: dict[ClientKey, SharedClient] = {}
+
+    def get_async_client(self, api_base: str, api_key: str, model: str) -> httpx.AsyncClient:
+        """Return the shared client for an upstream, creating it on first use.
+
+        Args:
+            api_base: OpenAI-compatible API base URL
+            api_key: API key used with this upstream
+            model: Model name
+
+        Returns:
+            Pooled ``httpx.AsyncClient`` configured from settings
+        """
+        return self._get_shared(api_base, api_key, model).client
+
+    def get_transport(self, api_base: str, api_key: str, model: str) -> InstrumentedTransport:
+        """Return the pooled transport behind the shared client for an upstream.
+
+        Args:
+            api_base: OpenAI-compatible API base URL
+            api_key: API key used with this upstream
+            model: Model name
+
+        Returns:
+            Instrumented transport owning the upstream's connection pool
+        """
+        return self._get_shared(api_base, api_key, model).transport
+
+    async def prewarm(self, api_base: str, api_key: str, model: str, connections: int) -> int:
+        """Open keep-alive connections to an upstream before the first LLM call.
+
+        Sends ``connections`` concurrent ``GET {api_base}/models`` requests on
+        the shared client. Any HTTP response leaves its connection (with TCP
+        and TLS already set up) idle in the pool, so the status is ignored.
+
+        Args:
+            api_base: OpenAI-compatible API base URL
+            api_key: API key used with this upstream
+            model: Model name
+            connections: Connections to open
+
+        Returns:
+            Number of new connections opened
+        """
+        shared = self._get_shared(api_base, api_key, model)
+        before = shared.stats.new_connections
+        url = api_base.rstrip("/") + "/models"
+        headers = {"Authorization": f"Bearer {api_key}"}
+        results = await asyncio.gather(
+            *(shared.client.get(url, headers=headers) for _ in range(connections)),
+            return_exceptions=True,
+        )
+        failures = [result for result in results if isinstance(result, Exception)]
+        if failures:
+            logger.warning(
+                "Pre-warming %s: %s of %s requests failed: %s",
+                api_base,
+                len(failures),
+                connections,
+                failures[0],
+            )
+        return shared.stats.new_connections - before
+
+    def _get_shared(self, api_base: str, api_key: str, model: str) -> SharedClient:
+        key = (api_base, api_key, model)
+        shared = self._clients.get(key)
+        if shared is None:
+            shared = self._create(api_base, model)
+            self._clients[key] = shared
+        return shared
+
+    def _create(self, api_base: str, model: str) -> SharedClient:
+        http2 = settings.llm_http2
+        if http2 and not _http2_available():
+            logger.warning("LLM_HTTP2 is enabled but the 'h2' package is missing; using HTTP/1.1")
+            http2 = False
+
+        limits = httpx.Limits(
+            max_connections=settings.llm_pool_max_connections,
+            max_keepalive_connections=settings.llm_pool_max_keepalive,
+            keepalive_expiry=settings.llm_keepalive_expiry,
+        )
+        stats = PoolStats()
+        transport = InstrumentedTransport(stats, limits=limits, http2=http2)
+        client = httpx.AsyncClient(
+            transport=transport,
+            timeout=llm_timeout(),
+            follow_redirects=True,
+        )
+        logger.info(
+            "Created shared LLM HTTP client: base=%s, model=%s, max_connections=%s, http2=%s",
+            api_base,
+            model,
+            limits.max_connections,
+            http2,
+        )
+        return SharedClient(client=client, transport=transport, stats=stats)
+
+    def snapshot(self) -> list[dict[str, Any]]:
+        """Return pool statistics for every shared client."""
+        result: list[dict[str, Any]] = []
+        for (api_base, api_key, model), shared in self._clients.items():
+            result.append(
+                {
+                    "api_base": api_base,
+                    "api_key_id": hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:8],
+                    "model": model,
+                    "requests": shared.stats.requests,
+                    "in_flight": shared.stats.in_flight,
+                    "new_connections": shared.stats.new_connections,
+                    "tls_handshakes": shared.stats.tls_handshakes,
+                    "reuse_ratio": round(shared.stats.reuse_ratio, 4),
+                    **shared.transport.pool_snapshot(),
+                }
+            )
+        return result
+
+    async def aclose(self) -> None:
+        """Close every shared client."""
+        for shared in self._clients.values():
+            await shared.client.aclose()
+        self._clients.clear()
+
+
+# Global registry instance
+llm_clients = LLMClientRegistry()
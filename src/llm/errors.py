@@ -0,0 +1,24 @@
+"""Errors raised at the LLM call boundary."""
+
+from __future__ import annotations
+
+import math
+
+
+class OverloadedError(Exception):
+    """Raised when an LLM call is shed instead of queued.
+
+    Attributes:
+        status_code: 429 when the caller exceeded its own share, 503 otherwise
+        retry_after: Suggested seconds before retrying
+    """
+
+    def __init__(self, message: str, *, status_code: int, retry_after: float) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self) -> str:
+        """Retry-After header value in whole seconds."""
+        return str(max(1, math.ceil(self.retry_after)))
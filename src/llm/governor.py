@@ -0,0 +1,238 @@
+"""Global concurrency governor for LLM calls with admission control."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import deque
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass
+from typing import Any
+
+from src import metrics
+from src.config import settings
+from src.llm.errors import OverloadedError
+from src.utils.request_context import client_id_var, remaining_budget
+
+logger = logging.getLogger(__name__)
+
+# Smoothing factor for the moving average of LLM call durations
+SERVICE_TIME_ALPHA = 0.2
+
+
+@dataclass(slots=True)
+class GovernorStats:
+    """Counters for the concurrency governor."""
+
+    admitted: int = 0
+    queued: int = 0
+    rejected_client: int = 0
+    rejected_overload: int = 0
+    wait_seconds_total: float = 0.0
+    max_wait_seconds: float = 0.0
+    max_queue_depth: int = 0
+
+
+class ConcurrencyGovernor:
+    """Caps concurrent LLM calls and queues the rest fairly per client.
+
+    Waiting calls are grouped per client and granted slots round-robin across
+    clients, so one heavy caller cannot starve the others. A call is rejected
+    up front when the queue is full, when its client already has too many
+    queued calls, or when the estimated queue wait exceeds the request's
+    remaining deadline budget.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_concurrency: int,
+        max_queue: int,
+        max_queue_per_client: int,
+    ) -> None:
+        """Initialize the governor.
+
+        Args:
+            max_concurrency: Maximum simultaneous LLM calls (<= 0 disables limiting)
+            max_queue: Maximum number of waiting calls across all clients
+            max_queue_per_client: Maximum waiting calls per client
+        """
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_queue_per_client = max_queue_per_client
+        self._in_use = 0
+        self._queued = 0
+        self._queues: dict[str, deque[asyncio.Future[None]]] = {}
+        self._round_robin: deque[str] = deque()
+        self._service_time: float | None = None
+        self.stats = GovernorStats()
+
+    @classmethod
+    def from_settings(cls) -> ConcurrencyGovernor:
+        """Build a governor configured from application settings."""
+        return cls(
+            max_concurrency=settings.llm_max_concurrency,
+            max_queue=settings.llm_max_queue,
+            max_queue_per_client=settings.llm_max_queue_per_client,
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_concurrency > 0
+
+    @asynccontextmanager
+    async def slot(self, client_id: str | None = None) -> AsyncIterator[None]:
+        """Hold one LLM concurrency slot for the duration of the block.
+
+        Args:
+            client_id: Caller identity; defaults to the request context value
+
+        Raises:
+            OverloadedError: If the call is shed instead of queued
+        """
+        if not self.enabled:
+            yield
+            return
+
+        await self._acquire(client_id or client_id_var.get())
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._observe(time.monotonic() - started)
+            self._release()
+
+    def estimated_wait(self) -> float:
+        """Estimate how long a newly queued call would wait for a slot."""
+        if self._in_use < self.max_concurrency and not self._queued:
+            return 0.0
+        service_time = self._service_time or 0.0
+        return (self._queued // self.max_concurrency + 1) * service_time
+
+    async def _acquire(self, client_id: str) -> None:
+        if self._in_use < self.max_concurrency and not self._queued:
+            self._in_use += 1
+            self.stats.admitted += 1
+            metrics.record_governor_wait(0.0)
+            self._publish()
+            return
+
+        self._admit_or_reject(client_id)
+
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        queue = self._queues.get(client_id)
+        if queue is None:
+            queue = self._queues[client_id] = deque()
+            self._round_robin.append(client_id)
+        queue.append(future)
+        self._queued += 1
+        self.stats.queued += 1
+        self.stats.max_queue_depth = max(self.stats.max_queue_depth, self._queued)
+        self._publish()
+
+        started = time.monotonic()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just as this waiter was cancelled
+                self._release()
+            else:
+                self._discard(client_id, future)
+                self._publish()
+            raise
+
+        waited = time.monotonic() - started
+        self.stats.admitted += 1
+        self.stats.wait_seconds_total += waited
+        self.stats.max_wait_seconds = max(self.stats.max_wait_seconds, waited)
+        metrics.record_governor_wait(waited)
+
+    def _admit_or_reject(self, client_id: str) -> None:
+        estimate = self.estimated_wait()
+        if self._queued >= self.max_queue:
+            self.stats.rejected_overload += 1
+            metrics.record_governor_rejection("queue_full")
+            raise OverloadedError(
+                "LLM queue is full", status_code=503, retry_after=estimate
+            )
+
+        queue = self._queues.get(client_id)
+        if queue is not None and len(queue) >= self.max_queue_per_client:
+            self.stats.rejected_client += 1
+            metrics.record_governor_rejection("client_limit")
+            raise OverloadedError(
+                "Too many concurrent requests from this client",
+                status_code=429,
+                retry_after=estimate,
+            )
+
+        budget = remaining_budget()
+        if budget is not None and estimate > budget:
+            self.stats.rejected_overload += 1
+            metrics.record_governor_rejection("deadline")
+            raise OverloadedError(
+                f"Estimated queue wait {estimate:.1f}s exceeds remaining budget {budget:.1f}s",
+                status_code=503,
+                retry_after=estimate,
+            )
+
+    def _discard(self, client_id: str, future: asyncio.Future[None]) -> None:
+        queue = self._queues.get(client_id)
+        if queue is None or future not in queue:
+            return
+        queue.remove(future)
+        self._queued -= 1
+        if not queue:
+            del self._queues[client_id]
+            self._round_robin.remove(client_id)
+
+    def _release(self) -> None:
+        # Hand the slot directly to the next client in round-robin order
+        while self._round_robin:
+            client_id = self._round_robin.popleft()
+            queue = self._queues[client_id]
+            future = queue.popleft()
+            self._queued -= 1
+            if queue:
+                self._round_robin.append(client_id)
+            else:
+                del self._queues[client_id]
+            if not future.done():
+                future.set_result(None)
+                self._publish()
+                return
+        self._in_use -= 1
+        self._publish()
+
+    def _publish(self) -> None:
+        metrics.set_governor_load(self._in_use, self._queued)
+
+    def _observe(self, duration: float) -> None:
+        if self._service_time is None:
+            self._service_time = duration
+        else:
+            self._service_time += SERVICE_TIME_ALPHA * (duration - self._service_time)
+
+    def snapshot(self) -> dict[str, Any]:
+        """Return governor metrics for diagnostics endpoints."""
+        waits = self.stats.queued
+        return {
+            **asdict(self.stats),
+            "enabled": self.enabled,
+            "max_concurrency": self.max_concurrency,
+            "in_use": self._in_use,
+            "queue_depth": self._queued,
+            "clients_waiting": len(self._queues),
+            "mean_wait_seconds": (
+                round(self.stats.wait_seconds_total / waits, 3) if waits else 0.0
+            ),
+            "mean_service_seconds": round(self._service_time or 0.0, 3),
+            "estimated_wait_seconds": round(self.estimated_wait(), 3),
+        }
+
+
+# Global governor instance shared by every agent in the process
+llm_governor = ConcurrencyGovernor.from_settings()
@@ -0,0 +1,170 @@
+"""Hedged LLM requests: duplicate slow calls and keep whichever finishes first."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any, Generic, TypeVar
+
+from src.config import settings
+from src.utils.latency import LatencyWindow
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Hedge tokens that may accumulate while traffic is fast
+MAX_HEDGE_BURST = 10.0
+
+
+@dataclass(slots=True)
+class HedgeStats:
+    """Counters for hedged calls."""
+
+    calls: int = 0
+    hedged: int = 0  # Calls that sent a duplicate request
+    hedge_wins: int = 0  # Hedged calls where the duplicate finished first
+    skipped_budget: int = 0  # Calls that were slow enough to hedge but over budget
+
+
+class Hedger(Generic[T]):
+    """Sends a duplicate request when a call outlives a latency percentile.
+
+    The hedge delay is the configured percentile of recent successful call
+    latencies. Every call earns ``budget`` hedge tokens and every hedge
+    spends one, so hedges never exceed that fraction of calls; with the
+    budget capped at 1.0 upstream load can at most double.
+    """
+
+    def __init__(
+        self,
+        *,
+        enabled: bool,
+        percentile: float,
+        budget: float,
+        window: int,
+        min_samples: int,
+        min_delay: float,
+    ) -> None:
+        """Initialize the hedger.
+
+        Args:
+            enabled: Whether duplicate requests are sent at all
+            percentile: Latency percentile (0-100) after which a call is hedged
+            budget: Hedges allowed per call, between 0 and 1
+            window: Number of recent latencies used for the percentile
+            min_samples: Latencies needed before hedging starts
+            min_delay: Lower bound for the hedge delay in seconds
+        """
+        self.enabled = enabled
+        self.percentile = percentile
+        self.budget = min(max(budget, 0.0), 1.0)
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self._latencies = LatencyWindow(window)
+        self._tokens = 0.0
+        self.stats = HedgeStats()
+
+    @classmethod
+    def from_settings(cls) -> Hedger[Any]:
+        """Build a hedger configured from application settings."""
+        return cls(
+            enabled=settings.llm_hedging_enabled,
+            percentile=settings.llm_hedge_percentile,
+            budget=settings.llm_hedge_budget,
+            window=settings.llm_hedge_window,
+            min_samples=settings.llm_hedge_min_samples,
+            min_delay=settings.llm_hedge_min_delay,
+        )
+
+    def hedge_delay(self) -> float | None:
+        """Return seconds to wait before hedging, or None while warming up."""
+        if len(self._latencies) < self.min_samples:
+            return None
+        return max(self._latencies.percentile(self.percentile) or 0.0, self.min_delay)
+
+    async def run(self, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run ``fn``, hedging it with a second attempt when it is slow.
+
+        Args:
+            fn: Zero-argument coroutine factory performing one attempt
+
+        Returns:
+            Result of the first attempt to succeed
+
+        Raises:
+            Exception: The primary attempt's error when every attempt fails
+        """
+        if not self.enabled:
+            return await fn()
+
+        self.stats.calls += 1
+        self._tokens = min(self._tokens + self.budget, MAX_HEDGE_BURST)
+        delay = self.hedge_delay()
+
+        started: dict[asyncio.Future[T], float] = {}
+
+        def launch() -> asyncio.Future[T]:
+            task = asyncio.ensure_future(fn())
+            started[task] = time.monotonic()
+            return task
+
+        primary = launch()
+        pending: set[asyncio.Future[T]] = {primary}
+        try:
+            if delay is not None:
+                done, pending = await asyncio.wait(pending, timeout=delay)
+                if not done:
+                    if self._tokens >= 1.0:
+                        self._tokens -= 1.0
+                        self.stats.hedged += 1
+                        logger.debug("Hedging LLM call after %.2fs", delay)
+                        pending.add(launch())
+                    else:
+                        self.stats.skipped_budget += 1
+                else:
+                    pending = done
+
+            failed: list[asyncio.Future[T]] = []
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is not None:
+                        failed.append(task)
+                        continue
+                    self._latencies.add(time.monotonic() - started[task])
+                    if task is not primary:
+                        self.stats.hedge_wins += 1
+                    return task.result()
+
+            error = primary if primary in failed else failed[0]
+            raise error.exception()  # type: ignore[misc]
+        finally:
+            for task in started:
+                if not task.done():
+                    task.cancel()
+
+    def snapshot(self) -> dict[str, float | int | bool | None]:
+        """Return counters plus hedge rate, win rate and the current delay."""
+        delay = self.hedge_delay()
+        return {
+            "enabled": self.enabled,
+            "calls": self.stats.calls,
+            "hedged": self.stats.hedged,
+            "hedge_wins": self.stats.hedge_wins,
+            "skipped_budget": self.stats.skipped_budget,
+            "hedge_rate": (
+                round(self.stats.hedged / self.stats.calls, 4) if self.stats.calls else 0.0
+            ),
+            "hedge_win_rate": (
+                round(self.stats.hedge_wins / self.stats.hedged, 4)
+                if self.stats.hedged
+                else 0.0
+            ),
+            "hedge_delay_seconds": round(delay, 3) if delay is not None else None,
+        }
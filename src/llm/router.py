@@ -0,0 +1,321 @@
+"""Latency-aware routing of LLM calls across several upstreams and API keys.
+
+The router is an ``httpx`` transport: ``ChatOpenAI`` keeps talking to its
+configured base URL, and each request is rewritten to the chosen endpoint's
+base URL and API key. Endpoints are weighted by a moving average of observed
+latency and error rate. After repeated failures an endpoint is ejected, then
+probed with a single request once its ejection period has passed.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import random
+import time
+from dataclasses import dataclass
+from typing import Any
+
+import httpx
+
+from src.config import LLMEndpointConfig, settings
+from src.llm.clients import LLMClientRegistry, _TrackedStream, llm_clients, llm_timeout
+
+logger = logging.getLogger(__name__)
+
+# Weight multiplier applied per unit of EWMA error rate
+ERROR_PENALTY = 10.0
+
+
+@dataclass(slots=True)
+class EndpointStats:
+    """Counters and moving averages for one endpoint."""
+
+    requests: int = 0
+    errors: int = 0
+    in_flight: int = 0
+    ejections: int = 0
+    latency_ewma: float | None = None  # Seconds until response headers arrive
+    error_ewma: float = 0.0
+
+
+class Endpoint:
+    """One OpenAI-compatible upstream plus its health state."""
+
+    def __init__(self, config: LLMEndpointConfig, eject_seconds: float) -> None:
+        self.base_url = httpx.URL(config.base_url.rstrip("/") + "/")
+        self.api_key = config.api_key
+        self.weight = config.weight
+        self.stats = EndpointStats()
+        self.consecutive_failures = 0
+        self.ejected_until: float | None = None
+        self.eject_seconds = eject_seconds
+        self.probing = False
+
+    @property
+    def name(self) -> str:
+        key_id = hashlib.sha256(self.api_key.encode("utf-8")).hexdigest()[:8]
+        return f"{self.base_url}#{key_id}"
+
+    def state(self, now: float) -> str:
+        if self.ejected_until is None:
+            return "healthy"
+        if self.probing:
+            return "probing"
+        return "ejected" if now < self.ejected_until else "probe_ready"
+
+    def score(self, default_latency: float) -> float:
+        """Return the routing weight; higher means more traffic."""
+        latency = self.stats.latency_ewma or default_latency
+        return self.weight / (max(latency, 1e-3) * (1.0 + ERROR_PENALTY * self.stats.error_ewma))
+
+
+class LLMRouter:
+    """Chooses an endpoint per call and tracks endpoint health."""
+
+    def __init__(
+        self,
+        endpoints: list[LLMEndpointConfig],
+        *,
+        alpha: float,
+        eject_after: int,
+        eject_seconds: float,
+        max_eject_seconds: float,
+        registry: LLMClientRegistry | None = None,
+        rng: random.Random | None = None,
+    ) -> None:
+        """Initialize the router.
+
+        Args:
+            endpoints: Upstreams to route across; an empty list disables routing
+            alpha: Smoothing factor for latency and error moving averages
+            eject_after: Consecutive failures before an endpoint is ejected
+            eject_seconds: Initial ejection period in seconds
+            max_eject_seconds: Upper bound for the doubling ejection period
+            registry: Pooled transport registry (defaults to the global one)
+            rng: Random source for weighted choice
+        """
+        self.endpoints = [Endpoint(config, eject_seconds) for config in endpoints]
+        self.alpha = alpha
+        self.eject_after = eject_after
+        self.eject_seconds = eject_seconds
+        self.max_eject_seconds = max_eject_seconds
+        self.registry = registry or llm_clients
+        self._rng = rng or random.Random()
+        self._clients: dict[tuple[str, str], httpx.AsyncClient] = {}
+
+    @classmethod
+    def from_settings(cls) -> LLMRouter:
+        """Build a router configured from application settings."""
+        return cls(
+            settings.llm_endpoints,
+            alpha=settings.llm_router_ewma_alpha,
+            eject_after=settings.llm_router_eject_after,
+            eject_seconds=settings.llm_router_eject_seconds,
+            max_eject_seconds=settings.llm_router_max_eject_seconds,
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.endpoints)
+
+    def get_async_client(self, api_base: str, model: str) -> httpx.AsyncClient:
+        """Return a client whose requests are spread across the endpoints.
+
+        Args:
+            api_base: Base URL the caller is configured with; its path prefix
+                is replaced by the chosen endpoint's base URL
+            model: Model name, used to pick pooled transports
+
+        Returns:
+            ``httpx.AsyncClient`` backed by a routing transport
+        """
+        key = (api_base, model)
+        client = self._clients.get(key)
+        if client is None:
+            transport = RoutingTransport(self, httpx.URL(api_base.rstrip("/") + "/"), model)
+            client = httpx.AsyncClient(
+                transport=transport,
+                timeout=llm_timeout(),
+                follow_redirects=True,
+            )
+            self._clients[key] = client
+        return client
+
+    async def prewarm(self, model: str, connections: int) -> dict[str, int]:
+        """Open keep-alive connections to every endpoint.
+
+        Args:
+            model: Model name, used to pick pooled transports
+            connections: Connections to open per endpoint
+
+        Returns:
+            Mapping of endpoint name to new connections opened
+        """
+        opened = await asyncio.gather(
+            *(
+                self.registry.prewarm(str(endpoint.base_url), endpoint.api_key, model, connections)
+                for endpoint in self.endpoints
+            )
+        )
+        return {
+            endpoint.name: count for endpoint, count in zip(self.endpoints, opened, strict=True)
+        }
+
+    def choose(self) -> Endpoint:
+        """Pick an endpoint by weighted random choice over available ones."""
+        now = time.monotonic()
+        candidates: list[Endpoint] = []
+        for endpoint in self.endpoints:
+            state = endpoint.state(now)
+            if state == "probe_ready":
+                # Half-open: send exactly one probe to an endpoint whose ejection expired
+                endpoint.probing = True
+                logger.info("Probing LLM endpoint %s", endpoint.name)
+                return endpoint
+            if state == "healthy":
+                candidates.append(endpoint)
+
+        if not candidates:
+            # Everything is ejected; fail open to the endpoint that recovers first
+            return min(self.endpoints, key=lambda e: e.ejected_until or 0.0)
+
+        known = [e.stats.latency_ewma for e in candidates if e.stats.latency_ewma is not None]
+        default_latency = sum(known) / len(known) if known else 1.0
+        weights = [endpoint.score(default_latency) for endpoint in candidates]
+        return self._rng.choices(candidates, weights=weights)[0]
+
+    def record(self, endpoint: Endpoint, latency: float, ok: bool) -> None:
+        """Update an endpoint's averages and health after a call."""
+        stats = endpoint.stats
+        if ok:
+            stats.latency_ewma = (
+                latency
+                if stats.latency_ewma is None
+                else stats.latency_ewma + self.alpha * (latency - stats.latency_ewma)
+            )
+        else:
+            stats.errors += 1
+        stats.error_ewma += self.alpha * ((0.0 if ok else 1.0) - stats.error_ewma)
+
+        if ok:
+            if endpoint.ejected_until is not None:
+                logger.info("LLM endpoint %s recovered", endpoint.name)
+            endpoint.consecutive_failures = 0
+            endpoint.ejected_until = None
+            endpoint.probing = False
+            endpoint.eject_seconds = self.eject_seconds
+            return
+
+        endpoint.consecutive_failures += 1
+        if endpoint.probing:
+            endpoint.eject_seconds = min(endpoint.eject_seconds * 2, self.max_eject_seconds)
+        elif endpoint.consecutive_failures < self.eject_after:
+            return
+        endpoint.probing = False
+        endpoint.ejected_until = time.monotonic() + endpoint.eject_seconds
+        stats.ejections += 1
+        logger.warning(
+            "Ejected LLM endpoint %s for %.0fs after %s consecutive failures",
+            endpoint.name,
+            endpoint.eject_seconds,
+            endpoint.consecutive_failures,
+        )
+
+    def release(self, endpoint: Endpoint) -> None:
+        """Clear the probe flag of a call that ended without a verdict."""
+        endpoint.probing = False
+
+    def snapshot(self) -> list[dict[str, Any]]:
+        """Return per-endpoint traffic share, latency and health."""
+        now = time.monotonic()
+        total = sum(endpoint.stats.requests for endpoint in self.endpoints)
+        return [
+            {
+                "endpoint": endpoint.name,
+                "state": endpoint.state(now),
+                "weight": endpoint.weight,
+                "requests": endpoint.stats.requests,
+                "in_flight": endpoint.stats.in_flight,
+                "traffic_share": round(endpoint.stats.requests / total, 4) if total else 0.0,
+                "latency_ewma_seconds": (
+                    round(endpoint.stats.latency_ewma, 3)
+                    if endpoint.stats.latency_ewma is not None
+                    else None
+                ),
+                "error_rate_ewma": round(endpoint.stats.error_ewma, 4),
+                "errors": endpoint.stats.errors,
+                "ejections": endpoint.stats.ejections,
+            }
+            for endpoint in self.endpoints
+        ]
+
+    async def aclose(self) -> None:
+        """Close the routing clients (pooled transports belong to the registry)."""
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
+
+
+class RoutingTransport(httpx.AsyncBaseTransport):
+    """Rewrites each request to a router-chosen endpoint and reports the outcome."""
+
+    def __init__(self, router: LLMRouter, source_base: httpx.URL, model: str) -> None:
+        self.router = router
+        self.source_base = source_base
+        self.model = model
+
+    def _rewrite(self, request: httpx.Request, endpoint: Endpoint) -> httpx.Request:
+        path = request.url.raw_path.decode("ascii")
+        prefix = self.source_base.raw_path.decode("ascii")
+        relative = path[len(prefix) :] if path.startswith(prefix) else path.lstrip("/")
+        headers = httpx.Headers(request.headers)
+        headers["Authorization"] = f"Bearer {endpoint.api_key}"
+        headers["Host"] = endpoint.base_url.netloc.decode("ascii")
+        return httpx.Request(
+            request.method,
+            endpoint.base_url.join(relative),
+            headers=headers,
+            stream=request.stream,
+            extensions=request.extensions,
+        )
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        router = self.router
+        endpoint = router.choose()
+        transport = router.registry.get_transport(
+            str(endpoint.base_url), endpoint.api_key, self.model
+        )
+        stats = endpoint.stats
+        stats.requests += 1
+        stats.in_flight += 1
+        started = time.monotonic()
+
+        def release() -> None:
+            stats.in_flight -= 1
+
+        try:
+            response = await transport.handle_async_request(self._rewrite(request, endpoint))
+        except Exception:
+            release()
+            router.record(endpoint, time.monotonic() - started, ok=False)
+            raise
+        except BaseException:
+            release()
+            router.release(endpoint)
+            raise
+
+        ok = response.status_code < 500 and response.status_code != 429
+        router.record(endpoint, time.monotonic() - started, ok=ok)
+        assert isinstance(response.stream, httpx.AsyncByteStream)
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_TrackedStream(response.stream, release),
+            extensions=response.extensions,
+        )
+
+
+# Global router instance; inactive unless LLM_ENDPOINTS is configured
+llm_router = LLMRouter.from_settings()
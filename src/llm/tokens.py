@@ -0,0 +1,81 @@
+"""Local token counting for prompt budgeting."""
+
+from __future__ import annotations
+
+import logging
+import re
+from collections.abc import Callable, Sequence
+from functools import lru_cache
+
+from langchain_core.messages import BaseMessage
+
+logger = logging.getLogger(__name__)
+
+# Chat formats add a few tokens of framing per message
+TOKENS_PER_MESSAGE = 4
+
+_CJK_RE = re.compile(r"[぀-ヿ㐀-䶿一-鿿가-힯＀-￯]")
+
+
+def _estimate(text: str) -> int:
+    # CJK characters are roughly one token each, other text about four characters
+    cjk = len(_CJK_RE.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+@lru_cache(maxsize=8)
+def _encoder(model: str) -> Callable[[str], int]:
+    try:
+        import tiktoken
+
+        try:
+            encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            encoding = tiktoken.get_encoding("cl100k_base")
+    except Exception as exc:  # noqa: BLE001
+        # tiktoken downloads its BPE files on first use; offline hosts estimate instead
+        logger.warning("Tokenizer unavailable for model=%s, estimating tokens: %s", model, exc)
+        return _estimate
+    return lambda text: len(encoding.encode(text, disallowed_special=()))
+
+
+def preload_encoder(model: str) -> None:
+    """Load the tokenizer of a model ahead of its first use.
+
+    Loading may read or download the BPE files, so call this from a worker
+    thread (``asyncio.to_thread``) rather than on the event loop.
+
+    Args:
+        model: Model name used to pick the tokenizer
+    """
+    _encoder(model)
+
+
+def count_tokens(text: str, model: str) -> int:
+    """Count the tokens of a text for the given model.
+
+    Args:
+        text: Text to count
+        model: Model name used to pick the tokenizer
+
+    Returns:
+        Token count (estimated when the tokenizer cannot be loaded)
+    """
+    return _encoder(model)(text)
+
+
+def count_message_tokens(messages: Sequence[BaseMessage], model: str) -> int:
+    """Count the prompt tokens of a chat message list.
+
+    Args:
+        messages: Chat messages
+        model: Model name used to pick the tokenizer
+
+    Returns:
+        Approximate prompt token count including per-message framing
+    """
+    encode = _encoder(model)
+    return sum(
+        TOKENS_PER_MESSAGE + encode(message.content if isinstance(message.content, str) else str(message.content))
+        for message in messages
+    )
@@ -2,20 +2,42 @@
 
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import ipaddress
 import logging
-from collections.abc import AsyncIterator
+from collections.abc import AsyncIterator, Awaitable, Callable
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from opentelemetry import context, propagate
 
+from src import metrics
 from src.config import settings, setup_logging
-from src.models.recommendation import RecommendationRequest, RecommendationResponse
+from src.llm.cassette import llm_cassette
+from src.llm.clients import llm_clients
+from src.llm.errors import OverloadedError
+from src.llm.governor import llm_governor
+from src.llm.router import llm_router
+from src.llm.tokens import preload_encoder
+from src.models.recommendation import (
+    BatchItemResult,
+    BatchRecommendationRequest,
+    BatchRecommendationResponse,
+    RecommendationRequest,
+    RecommendationResponse,
+    StreamEvent,
+    ThemeLiteral,
+)
 from src.services.recommendation_service import (
     SUPPORTED_THEMES,
     RecommendationService,
 )
+from src.services.redis_client import redis_breaker
+from src.tracing import setup_tracing, shutdown_tracing
+from src.utils.request_context import client_id_var
 
 logger = logging.getLogger(__name__)
 
@@ -43,7 +65,10 @@ def _validate_configuration() -> None:
     missing_prompts = []
 
     for theme in SUPPORTED_THEMES:
-        for role in ["selector", "extractor", "insight", "assembler"]:
+        roles = ["selector", "extractor", "insight", "assembler"]
+        if theme in settings.fused_agent_themes:
+            roles.append("fused")
+        for role in roles:
             prompt_path = prompts_dir / theme / f"{role}.txt"
             if not prompt_path.exists():
                 missing_prompts.append(str(prompt_path))
@@ -53,7 +78,7 @@ def _validate_configuration() -> None:
             "Missing prompt files:\n" + "\n".join(f"  - {p}" for p in missing_prompts)
         )
 
-    logger.info("Prompt files validated: all %d files present", len(SUPPORTED_THEMES) * 4)
+    logger.info("Prompt files validated for themes: %s", ", ".join(SUPPORTED_THEMES))
 
 
 @asynccontextmanager
@@ -69,6 +94,7 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     # Startup
     setup_logging(settings.log_level)
     logger.info("Starting Multi-Theme Recommendation Service")
+    setup_tracing()
 
     # Validate configuration
     try:
@@ -81,11 +107,48 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     logger.info(f"API base: {settings.openai_api_base}")
     logger.info(f"Workflow timeout: {settings.workflow_timeout}s")
     logger.info(f"Supported themes: {', '.join(SUPPORTED_THEMES)}")
+    if settings.fused_agent_themes:
+        logger.info(f"Fused extractor+insight themes: {', '.join(settings.fused_agent_themes)}")
+
+    lag_monitor = (
+        asyncio.create_task(metrics.monitor_event_loop(settings.event_loop_lag_interval))
+        if settings.event_loop_lag_interval > 0
+        else None
+    )
+
+    # Runs in the background so /health answers while /ready waits for it
+    warmup = (
+        asyncio.create_task(
+            recommendation_service.warm_up(
+                connections=min(settings.warmup_connections, settings.llm_pool_max_keepalive),
+                timeout=settings.warmup_timeout,
+            )
+        )
+        if settings.warmup_enabled
+        else None
+    )
+    # The warm-up loads the tokenizers; otherwise load the default one off the event loop
+    tokenizer = (
+        None
+        if settings.warmup_enabled
+        else asyncio.create_task(asyncio.to_thread(preload_encoder, settings.openai_model))
+    )
 
     yield
 
     # Shutdown
     logger.info("Shutting down Multi-Theme Recommendation Service")
+    if lag_monitor is not None:
+        lag_monitor.cancel()
+    if warmup is not None:
+        warmup.cancel()
+    if tokenizer is not None:
+        tokenizer.cancel()
+    await llm_router.aclose()
+    await llm_clients.aclose()
+    llm_cassette.close()
+    metrics.mark_process_dead()
+    shutdown_tracing()
 
 
 app = FastAPI(
@@ -108,6 +171,55 @@ app.add_middleware(
 recommendation_service = RecommendationService()
 
 
+def _is_trusted_proxy(host: str) -> bool:
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return any(address in network for network in settings.trusted_proxies)
+
+
+def _client_identity(request: Request) -> str:
+    """Derive a stable caller identity for fair sharing of LLM capacity.
+
+    X-Forwarded-For is only honored when the peer is a trusted proxy, so
+    direct callers cannot pick an identity to dodge their per-client queue.
+    """
+    api_key = request.headers.get("x-api-key") or request.headers.get("authorization")
+    if api_key:
+        return "key:" + hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+    host = request.client.host if request.client else "unknown"
+    if _is_trusted_proxy(host):
+        # Proxies append to the header: the client is the last hop not added by one of ours
+        for hop in reversed(request.headers.get("x-forwarded-for", "").split(",")):
+            if hop.strip():
+                host = hop.strip()
+                if not _is_trusted_proxy(host):
+                    break
+    return "ip:" + host
+
+
+@app.middleware("http")
+async def bind_client_identity(
+    request: Request, call_next: Callable[[Request], Awaitable[Response]]
+) -> Response:
+    """Expose the caller identity to the LLM concurrency governor."""
+    client_id_var.set(_client_identity(request))
+    return await call_next(request)
+
+
+@app.middleware("http")
+async def propagate_trace_context(
+    request: Request, call_next: Callable[[Request], Awaitable[Response]]
+) -> Response:
+    """Continue the caller's trace when the request carries a ``traceparent`` header."""
+    token = context.attach(propagate.extract(request.headers))
+    try:
+        return await call_next(request)
+    finally:
+        context.detach(token)
+
+
 @app.get("/")
 async def root() -> dict[str, object]:
     """Root endpoint.
@@ -119,10 +231,18 @@ async def root() -> dict[str, object]:
         "message": "Multi-Theme Recommendation API",
         "docs": "/docs",
         "health": "/health",
+        "ready": "/ready",
+        "metrics": "/metrics",
         "themes": list(SUPPORTED_THEMES),
         "endpoints": {
             theme: f"/api/{theme}/recommend" for theme in SUPPORTED_THEMES
         },
+        "stream_endpoints": {
+            theme: f"/api/{theme}/recommend/stream" for theme in SUPPORTED_THEMES
+        },
+        "batch_endpoints": {
+            theme: f"/api/{theme}/recommend/batch" for theme in SUPPORTED_THEMES
+        },
     }
 
 
@@ -136,6 +256,98 @@ async def health() -> dict[str, str]:
     return {"status": "healthy"}
 
 
+@app.get("/ready")
+async def ready() -> JSONResponse:
+    """Readiness endpoint.
+
+    Reports 503 until the startup warm-up has finished (always ready when
+    ``WARMUP_ENABLED`` is off), so load balancers only route to warm workers.
+    A warm-up that failed or timed out still reports 200, as "degraded" with
+    its errors listed, since the worker can serve by building agents lazily.
+
+    Returns:
+        Readiness status and warm-up progress
+    """
+    warmup = recommendation_service.warmup
+    if not settings.warmup_enabled or warmup.state == "ready":
+        status = "ready"
+    elif warmup.state == "degraded":
+        status = "degraded"
+    else:
+        status = "warming_up"
+    return JSONResponse(
+        {
+            "status": status,
+            "warmup": {
+                "state": warmup.state,
+                "seconds": warmup.seconds,
+                "themes": warmup.themes,
+                "errors": warmup.errors,
+            },
+        },
+        status_code=503 if status == "warming_up" else 200,
+    )
+
+
+@app.get("/stats")
+async def stats() -> dict[str, object]:
+    """Runtime statistics endpoint.
+
+    Returns:
+        Counters reported by the recommendation service
+    """
+    return {
+        **recommendation_service.stats(),
+        "llm_pools": llm_clients.snapshot(),
+        "llm_governor": llm_governor.snapshot(),
+        "llm_router": llm_router.snapshot(),
+        "llm_cassette": llm_cassette.snapshot(),
+        "redis_breaker": redis_breaker.snapshot(),
+    }
+
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics() -> Response:
+    """Prometheus scrape endpoint.
+
+    Aggregates all workers when ``PROMETHEUS_MULTIPROC_DIR`` is set.
+    """
+    payload, content_type = metrics.render_latest()
+    return Response(content=payload, media_type=content_type)
+
+
+def _to_http_exception(
+    exc: Exception, theme: str, request: RecommendationRequest
+) -> HTTPException:
+    """Map a workflow failure to the HTTP error returned to the client."""
+    if isinstance(exc, OverloadedError):
+        logger.warning(
+            "Request shed: request_id=%s, theme=%s, status=%s, reason=%s",
+            request.request_id,
+            theme,
+            exc.status_code,
+            exc,
+        )
+        return HTTPException(
+            status_code=exc.status_code,
+            detail=str(exc),
+            headers={"Retry-After": exc.retry_after_header},
+        )
+    if isinstance(exc, TimeoutError):
+        logger.error(
+            "Request timeout: request_id=%s, theme=%s", request.request_id, theme
+        )
+        return HTTPException(
+            status_code=504,
+            detail=f"Request timeout after {settings.workflow_timeout}s",
+        )
+    if isinstance(exc, ValueError):
+        logger.error("Validation error while generating recommendations: %s", exc)
+        return HTTPException(status_code=400, detail=str(exc))
+    logger.error("Failed to generate recommendations: %s", exc, exc_info=exc)
+    return HTTPException(status_code=500, detail="Recommendation generation failed")
+
+
 async def _generate_recommendation(
     theme: str, request: RecommendationRequest
 ) -> RecommendationResponse:
@@ -145,23 +357,11 @@ async def _generate_recommendation(
 
     try:
         return await recommendation_service.get_recommendations(
-            theme,  # type: ignore[arg-type]
+            theme,
             request,
         )
-    except TimeoutError as exc:
-        logger.error(
-            "Request timeout: request_id=%s, theme=%s", request.request_id, theme
-        )
-        raise HTTPException(
-            status_code=504,
-            detail=f"Request timeout after {settings.workflow_timeout}s",
-        ) from exc
-    except ValueError as exc:
-        logger.error("Validation error while generating recommendations: %s", exc)
-        raise HTTPException(status_code=400, detail=str(exc)) from exc
     except Exception as exc:  # noqa: BLE001
-        logger.error("Failed to generate recommendations: %s", exc, exc_info=True)
-        raise HTTPException(status_code=500, detail="Recommendation generation failed") from exc
+        raise _to_http_exception(exc, theme, request) from exc
 
 
 @app.post("/api/books/recommend", response_model=RecommendationResponse)
@@ -188,6 +388,118 @@ async def recommend_anime(request: RecommendationRequest) -> RecommendationRespo
     return await _generate_recommendation("anime", request)
 
 
+async def _stream_recommendation(
+    theme: ThemeLiteral, request: RecommendationRequest
+) -> AsyncIterator[str]:
+    """Format workflow progress as SSE frames, ending with a result or error event."""
+    try:
+        async for event in recommendation_service.stream_recommendations(theme, request):
+            yield event.to_sse()
+    except OverloadedError as exc:
+        yield StreamEvent(
+            event="error",
+            data={
+                "message": str(exc),
+                "status_code": exc.status_code,
+                "retry_after": exc.retry_after_header,
+                "request_id": request.request_id,
+            },
+        ).to_sse()
+    except TimeoutError:
+        logger.error(
+            "Stream timeout: request_id=%s, theme=%s", request.request_id, theme
+        )
+        yield StreamEvent(
+            event="error",
+            data={
+                "message": f"Request timeout after {settings.workflow_timeout}s",
+                "status_code": 504,
+                "request_id": request.request_id,
+            },
+        ).to_sse()
+    except Exception as exc:  # noqa: BLE001
+        logger.error("Failed to stream recommendations: %s", exc, exc_info=True)
+        yield StreamEvent(
+            event="error",
+            data={
+                "message": "Recommendation generation failed",
+                "status_code": 500,
+                "request_id": request.request_id,
+            },
+        ).to_sse()
+
+
+@app.post("/api/{theme}/recommend/stream")
+async def recommend_stream(theme: str, request: RecommendationRequest) -> StreamingResponse:
+    """Streaming recommendation endpoint using Server-Sent Events.
+
+    Emits ``selector``, ``candidates``, ``summary`` and ``reason`` events as the
+    workflow progresses, followed by a ``result`` event with the full response
+    (or an ``error`` event).
+    """
+    if theme not in SUPPORTED_THEMES:
+        raise HTTPException(status_code=404, detail=f"Unsupported theme: {theme}")
+
+    return StreamingResponse(
+        _stream_recommendation(theme, request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/api/{theme}/recommend/batch", response_model=BatchRecommendationResponse)
+async def recommend_batch(
+    theme: str, batch: BatchRecommendationRequest
+) -> BatchRecommendationResponse:
+    """Batch recommendation endpoint.
+
+    Runs the requests under bounded concurrency and summarizes candidates
+    shared by several requests only once. Results are returned in input
+    order; a failed item carries its status code and error instead of
+    failing the whole batch.
+    """
+    if theme not in SUPPORTED_THEMES:
+        raise HTTPException(status_code=404, detail=f"Unsupported theme: {theme}")
+    if len(batch.requests) > settings.batch_max_items:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch exceeds {settings.batch_max_items} items",
+        )
+
+    outcomes, stats = await recommendation_service.get_batch_recommendations(
+        theme,
+        batch.requests,
+    )
+
+    results: list[BatchItemResult] = []
+    for index, (request, outcome) in enumerate(zip(batch.requests, outcomes, strict=True)):
+        if isinstance(outcome, Exception):
+            error = _to_http_exception(outcome, theme, request)
+            results.append(
+                BatchItemResult(
+                    index=index,
+                    request_id=request.request_id,
+                    status_code=error.status_code,
+                    error=str(error.detail),
+                )
+            )
+        else:
+            results.append(
+                BatchItemResult(
+                    index=index,
+                    request_id=request.request_id,
+                    status_code=200,
+                    response=outcome,
+                )
+            )
+
+    return BatchRecommendationResponse(
+        theme=theme,
+        results=results,
+        stats=stats,
+    )
+
+
 @app.exception_handler(HTTPException)
 async def http_exception_handler(
     request: Request, exc: HTTPException
@@ -195,6 +507,7 @@ async def http_exception_handler(
     """Format HTTP exceptions into a standard JSON schema."""
     return JSONResponse(
         status_code=exc.status_code,
+        headers=exc.headers,
         content={
             "error": {
                 "type": "http_error",
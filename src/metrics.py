@@ -0,0 +1,278 @@
+"""Prometheus metrics for the recommendation workflow.
+
+With several uvicorn workers each process keeps its own counters. Set
+``PROMETHEUS_MULTIPROC_DIR`` in the process environment (not in ``.env``; it
+must be present before the first import of ``prometheus_client``) to an empty
+directory shared by the workers; ``/metrics`` then aggregates the values every
+worker has written there, whichever worker serves the scrape.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from collections.abc import Awaitable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import TypeVar
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+from src.llm.errors import OverloadedError
+
+T = TypeVar("T")
+
+MULTIPROC_DIR_ENV = "PROMETHEUS_MULTIPROC_DIR"
+
+# LLM-bound stages take seconds, so the default sub-second buckets are too fine
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 7.5, 10.0, 15.0, 20.0, 30.0, 45.0, 60.0)
+
+WORKFLOW_SECONDS = Histogram(
+    "recommendation_workflow_duration_seconds",
+    "End-to-end recommendation latency",
+    ["theme", "mode", "outcome"],
+    buckets=LATENCY_BUCKETS,
+)
+STAGE_SECONDS = Histogram(
+    "recommendation_stage_duration_seconds",
+    "Latency of one agent stage of the workflow",
+    ["theme", "stage"],
+    buckets=LATENCY_BUCKETS,
+)
+LLM_TOKENS = Counter(
+    "recommendation_llm_tokens_total",
+    "LLM tokens by agent; estimated locally when the upstream reports no usage",
+    ["theme", "agent", "kind"],
+)
+FALLBACKS = Counter(
+    "recommendation_fallbacks_total",
+    "Default outputs used in place of model output",
+    ["theme", "kind"],
+)
+TIMEOUTS = Counter(
+    "recommendation_timeouts_total",
+    "Workflow timeouts and detail stages cut off by their deadline",
+    ["theme", "stage"],
+)
+SEMANTIC_CACHE_LOOKUPS = Counter(
+    "recommendation_semantic_cache_lookups_total",
+    "Semantic cache lookups of first-turn requests",
+    ["theme", "result"],
+)
+SEMANTIC_CACHE_SIMILARITY = Histogram(
+    "recommendation_semantic_cache_similarity",
+    "Best cosine similarity found per semantic cache lookup",
+    ["theme"],
+    buckets=(0.3, 0.5, 0.6, 0.7, 0.75, 0.8, 0.85, 0.9, 0.95, 0.99, 1.0),
+)
+SEMANTIC_CACHE_AUDITS = Counter(
+    "recommendation_semantic_cache_audits_total",
+    "Sampled semantic cache hits compared with a fresh workflow run",
+    ["theme", "verdict"],
+)
+CATALOG_LOOKUPS = Counter(
+    "recommendation_catalog_lookups_total",
+    "Selector candidates matched against the theme catalog",
+    ["theme", "result"],
+)
+
+# Event-loop lag is milliseconds on a healthy worker and seconds on a saturated one
+LOOP_LAG_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+EVENT_LOOP_LAG = Histogram(
+    "event_loop_lag_seconds",
+    "Delay of a periodic event-loop callback beyond its scheduled time",
+    buckets=LOOP_LAG_BUCKETS,
+)
+# Governor waits range from zero (free slot) to most of the request deadline
+QUEUE_WAIT_BUCKETS = (0.0, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 30.0, 60.0)
+
+LLM_GOVERNOR_IN_USE = Gauge(
+    "llm_governor_slots_in_use",
+    "LLM calls currently holding a governor slot",
+    multiprocess_mode="livesum",
+)
+LLM_GOVERNOR_QUEUE_DEPTH = Gauge(
+    "llm_governor_queue_depth",
+    "LLM calls waiting for a governor slot",
+    multiprocess_mode="livesum",
+)
+LLM_GOVERNOR_WAIT_SECONDS = Histogram(
+    "llm_governor_wait_seconds",
+    "Time an admitted LLM call waited for a governor slot",
+    buckets=QUEUE_WAIT_BUCKETS,
+)
+LLM_GOVERNOR_REJECTIONS = Counter(
+    "llm_governor_rejections_total",
+    "LLM calls shed by the governor instead of queued",
+    ["reason"],
+)
+IN_FLIGHT = Gauge(
+    "recommendation_workflows_in_flight",
+    "Recommendation requests currently being processed",
+    ["theme"],
+    multiprocess_mode="livesum",
+)
+
+
+@dataclass(slots=True)
+class WorkflowOutcome:
+    """Outcome label of one request, set by the caller before it returns."""
+
+    label: str = "ok"  # ok | degraded | cached | timeout | shed | error | cancelled
+
+
+def multiprocess_enabled() -> bool:
+    """Return whether metrics are shared between worker processes."""
+    return bool(os.environ.get(MULTIPROC_DIR_ENV))
+
+
+def render_latest() -> tuple[bytes, str]:
+    """Render all metrics in the Prometheus text format.
+
+    Returns:
+        Tuple of (payload, content type)
+    """
+    if multiprocess_enabled():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)  # type: ignore[no-untyped-call]
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead() -> None:
+    """Drop the live gauges of the current worker at shutdown."""
+    if multiprocess_enabled():
+        multiprocess.mark_process_dead(os.getpid())  # type: ignore[no-untyped-call]
+
+
+@contextmanager
+def track_workflow(theme: str, mode: str) -> Iterator[WorkflowOutcome]:
+    """Count a request as in flight and observe its end-to-end latency.
+
+    Args:
+        theme: Requested theme
+        mode: ``json`` or ``stream``
+
+    Yields:
+        Outcome holder; exceptions set the label automatically
+    """
+    outcome = WorkflowOutcome()
+    started = time.perf_counter()
+    gauge = IN_FLIGHT.labels(theme)
+    gauge.inc()
+    try:
+        yield outcome
+    except TimeoutError:
+        outcome.label = "timeout"
+        record_timeout(theme, "workflow")
+        raise
+    except OverloadedError:
+        outcome.label = "shed"
+        raise
+    except Exception:
+        outcome.label = "error"
+        raise
+    except BaseException:
+        # Client disconnects cancel the request or close the stream
+        outcome.label = "cancelled"
+        raise
+    finally:
+        gauge.dec()
+        WORKFLOW_SECONDS.labels(theme, mode, outcome.label).observe(
+            time.perf_counter() - started
+        )
+
+
+@contextmanager
+def stage_timer(theme: str, stage: str) -> Iterator[None]:
+    """Observe the duration of a workflow stage.
+
+    Stages cancelled by a deadline are not observed; they are counted as
+    timeouts by the caller instead.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_SECONDS.labels(theme, stage).observe(time.perf_counter() - started)
+        raise
+    STAGE_SECONDS.labels(theme, stage).observe(time.perf_counter() - started)
+
+
+async def timed_stage(awaitable: Awaitable[T], theme: str, stage: str) -> T:
+    """Await ``awaitable`` inside :func:`stage_timer`."""
+    with stage_timer(theme, stage):
+        return await awaitable
+
+
+def record_tokens(theme: str, agent: str, prompt_tokens: int, completion_tokens: int) -> None:
+    """Count the tokens of one LLM call."""
+    LLM_TOKENS.labels(theme, agent, "prompt").inc(prompt_tokens)
+    LLM_TOKENS.labels(theme, agent, "completion").inc(completion_tokens)
+
+
+def record_fallback(theme: str, kind: str, count: int = 1) -> None:
+    """Count default outputs, e.g. ``selector`` or ``default_summary``."""
+    if count > 0:
+        FALLBACKS.labels(theme, kind).inc(count)
+
+
+def record_timeout(theme: str, stage: str) -> None:
+    """Count a workflow timeout or a detail stage cut off by its deadline."""
+    TIMEOUTS.labels(theme, stage).inc()
+
+
+def record_semantic_lookup(theme: str, hit: bool, similarity: float) -> None:
+    """Count a semantic cache lookup and its best similarity."""
+    SEMANTIC_CACHE_LOOKUPS.labels(theme, "hit" if hit else "miss").inc()
+    SEMANTIC_CACHE_SIMILARITY.labels(theme).observe(max(0.0, similarity))
+
+
+def record_semantic_audit(theme: str, verdict: str) -> None:
+    """Count an audited semantic hit: ``agree``, ``disagree`` or ``error``."""
+    SEMANTIC_CACHE_AUDITS.labels(theme, verdict).inc()
+
+
+def record_catalog_lookup(theme: str, hit: bool) -> None:
+    """Count a selector candidate looked up in the theme catalog."""
+    CATALOG_LOOKUPS.labels(theme, "hit" if hit else "miss").inc()
+
+
+def set_governor_load(in_use: int, queued: int) -> None:
+    """Publish the current governor slot usage and queue depth."""
+    LLM_GOVERNOR_IN_USE.set(in_use)
+    LLM_GOVERNOR_QUEUE_DEPTH.set(queued)
+
+
+def record_governor_wait(seconds: float) -> None:
+    """Observe how long an admitted LLM call waited for its slot."""
+    LLM_GOVERNOR_WAIT_SECONDS.observe(seconds)
+
+
+def record_governor_rejection(reason: str) -> None:
+    """Count a shed LLM call: ``queue_full``, ``client_limit`` or ``deadline``."""
+    LLM_GOVERNOR_REJECTIONS.labels(reason).inc()
+
+
+async def monitor_event_loop(interval: float) -> None:
+    """Observe the lag of the running event loop until cancelled.
+
+    Args:
+        interval: Seconds between probes
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        scheduled = loop.time() + interval
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG.observe(max(0.0, loop.time() - scheduled))
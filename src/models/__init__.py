@@ -1,21 +1,31 @@
 """Data models for the recommendation system."""
 
 from src.models.recommendation import (
+    BatchItemResult,
+    BatchRecommendationRequest,
+    BatchRecommendationResponse,
+    BatchStats,
     ConversationMessage,
     RecommendationCandidate,
     RecommendationCard,
     RecommendationRequest,
     RecommendationResponse,
+    StreamEvent,
     ThemeLiteral,
     UserProfile,
 )
 
 __all__ = [
+    "BatchItemResult",
+    "BatchRecommendationRequest",
+    "BatchRecommendationResponse",
+    "BatchStats",
     "ConversationMessage",
     "RecommendationCard",
     "RecommendationCandidate",
     "RecommendationRequest",
     "RecommendationResponse",
+    "StreamEvent",
     "ThemeLiteral",
     "UserProfile",
 ]
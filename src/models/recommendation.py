@@ -2,13 +2,15 @@
 
 from __future__ import annotations
 
+import json
 import uuid
-from typing import Literal
+from typing import Any, Literal
 
 from pydantic import BaseModel, ConfigDict, Field
 
 ThemeLiteral = Literal["books", "games", "movies", "anime"]
 ProfileValue = str | list[str] | dict[str, str]
+StreamEventType = Literal["selector", "candidates", "summary", "reason", "result", "error"]
 
 
 class ConversationMessage(BaseModel):
@@ -34,6 +36,20 @@ class RecommendationRequest(BaseModel):
         default_factory=lambda: str(uuid.uuid4()),
         description="Unique identifier for tracking this request",
     )
+    fast_path: bool | None = Field(
+        default=None,
+        description=(
+            "Try the single-shot workflow first (true), never (false), "
+            "or follow the server default (null)"
+        ),
+    )
+    session_id: str | None = Field(
+        default=None,
+        description=(
+            "Session returned by a previous response; the server then supplies "
+            "the conversation history, so only the new message needs to be sent"
+        ),
+    )
 
     model_config = ConfigDict(populate_by_name=True)
 
@@ -94,3 +110,69 @@ class RecommendationResponse(BaseModel):
     )
     message: str = Field(..., description="Friendly assistant message to the user")
     request_id: str = Field(..., description="Request ID for tracking")
+    degraded: bool = Field(
+        False,
+        description="True when some summaries or reasons are default texts "
+        "because their stage missed its deadline",
+    )
+    session_id: str | None = Field(
+        default=None,
+        description="Session to send with the next turn of this conversation",
+    )
+
+
+class StreamEvent(BaseModel):
+    """Progress event emitted by the streaming recommendation endpoint."""
+
+    event: StreamEventType = Field(..., description="Event type")
+    data: dict[str, Any] = Field(default_factory=dict, description="Event payload")
+
+    def to_sse(self) -> str:
+        """Serialize the event as a Server-Sent Events frame."""
+        payload = json.dumps(self.data, ensure_ascii=False, separators=(",", ":"))
+        return f"event: {self.event}\ndata: {payload}\n\n"
+
+
+class BatchRecommendationRequest(BaseModel):
+    """Request payload for the batch recommendation endpoint."""
+
+    requests: list[RecommendationRequest] = Field(
+        ...,
+        min_length=1,
+        description="Recommendation requests processed together",
+    )
+
+
+class BatchItemResult(BaseModel):
+    """Outcome of one request within a batch."""
+
+    index: int = Field(..., description="Position of the request in the batch")
+    request_id: str = Field(..., description="Request ID of the item")
+    status_code: int = Field(..., description="HTTP-equivalent status of the item")
+    response: RecommendationResponse | None = Field(
+        default=None, description="Recommendation response on success"
+    )
+    error: str | None = Field(default=None, description="Error message on failure")
+
+
+class BatchStats(BaseModel):
+    """Throughput and deduplication figures for one batch."""
+
+    items: int = Field(..., description="Number of requests in the batch")
+    succeeded: int = Field(..., description="Requests that produced a response")
+    elapsed_seconds: float = Field(..., description="Wall-clock time of the batch")
+    items_per_second: float = Field(..., description="Batch throughput")
+    summaries_deduplicated: int = Field(
+        ..., description="Candidate summaries reused from another request in the batch"
+    )
+    llm_calls_saved: int = Field(
+        ..., description="Extractor calls avoided because every summary was shared"
+    )
+
+
+class BatchRecommendationResponse(BaseModel):
+    """Response model for the batch recommendation endpoint."""
+
+    theme: ThemeLiteral = Field(..., description="Theme identifier")
+    results: list[BatchItemResult] = Field(..., description="Per-item results in input order")
+    stats: BatchStats = Field(..., description="Batch throughput and deduplication")
@@ -0,0 +1,120 @@
+"""Batch-scoped sharing of candidate summaries across recommendation requests."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from src.models.recommendation import RecommendationCandidate, ThemeLiteral
+from src.services.summary_store import summary_key
+
+if TYPE_CHECKING:
+    from src.agents import EssenceExtractorAgent
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class CoalescerStats:
+    """Counters for summaries shared within a batch."""
+
+    requested: int = 0  # Candidate summaries asked for across the batch
+    deduplicated: int = 0  # Summaries served from another request's call
+    extractor_calls: int = 0
+    calls_saved: int = 0  # Extractor calls skipped because every summary was shared
+
+
+class SummaryCoalescer:
+    """Summarizes each unique candidate once across the requests of a batch.
+
+    Candidate summaries do not depend on the user profile, so when several
+    selector outputs in a batch name the same item only the first request
+    asks the extractor for it; the others await that result. If the owning
+    call fails or is cancelled, waiters summarize the item themselves.
+    """
+
+    def __init__(self, theme: ThemeLiteral) -> None:
+        self.theme = theme
+        self._summaries: dict[str, asyncio.Future[str | None]] = {}
+        self.stats = CoalescerStats()
+
+    async def summarize(
+        self,
+        extractor: EssenceExtractorAgent,
+        candidates: list[RecommendationCandidate],
+    ) -> dict[str, str]:
+        """Return title -> summary, calling the extractor only for unseen items.
+
+        Args:
+            extractor: Extractor agent of the batch's theme
+            candidates: Candidates of one request
+
+        Returns:
+            Title -> summary map for the candidates
+        """
+        loop = asyncio.get_running_loop()
+        owned: dict[str, RecommendationCandidate] = {}
+        shared: dict[str, asyncio.Future[str | None]] = {}
+        for candidate in candidates:
+            key = summary_key(self.theme, candidate, extractor.prompt_digest)
+            future = self._summaries.get(key)
+            if future is None:
+                self._summaries[key] = loop.create_future()
+                owned[key] = candidate
+            elif key not in owned:
+                shared[candidate.title] = future
+
+        self.stats.requested += len(candidates)
+        self.stats.deduplicated += len(shared)
+
+        summaries: dict[str, str] = {}
+        if owned:
+            summaries.update(await self._generate(extractor, owned))
+        elif shared:
+            self.stats.calls_saved += 1
+
+        retry: list[RecommendationCandidate] = []
+        for candidate in candidates:
+            future = shared.get(candidate.title)
+            if future is None:
+                continue
+            # Shield so one waiter's cancellation does not cancel the shared result
+            text = await asyncio.shield(future)
+            if text:
+                summaries[candidate.title] = text
+            else:
+                retry.append(candidate)
+
+        if retry:
+            logger.debug("Shared summaries unavailable, summarizing %s items directly", len(retry))
+            self.stats.extractor_calls += 1
+            summaries.update(await extractor.process(retry))
+        return summaries
+
+    async def _generate(
+        self,
+        extractor: EssenceExtractorAgent,
+        owned: dict[str, RecommendationCandidate],
+    ) -> dict[str, str]:
+        self.stats.extractor_calls += 1
+        result: dict[str, str] = {}
+        try:
+            result = await extractor.process(list(owned.values()))
+            return result
+        finally:
+            for key, candidate in owned.items():
+                future = self._summaries[key]
+                if not future.done():
+                    future.set_result(result.get(candidate.title))
+                if not result.get(candidate.title):
+                    # Let later requests try again instead of inheriting the failure
+                    del self._summaries[key]
+
+
+# Coalescer of the batch the current request belongs to, if any
+batch_summaries_var: ContextVar[SummaryCoalescer | None] = ContextVar(
+    "batch_summaries", default=None
+)
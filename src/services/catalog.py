@@ -0,0 +1,384 @@
+"""Per-theme item catalog stored in a compact memory-mapped file.
+
+A catalog holds curated items (title, creator, metadata and a precomputed
+summary) for one theme. Selector candidates are matched against it by
+normalized title and creator, so their metadata can be filled in and their
+summary served without an LLM call.
+
+File layout (little-endian, sections aligned to 8 bytes)::
+
+    header   magic, item count, index entry count, meta length
+    meta     JSON: theme, build time, extractor prompt digest
+    index    (key hash u64, item id u32, field u32) sorted by key hash
+    offsets  item count + 1 record offsets (u64) into the records section
+    records  one compact JSON object per item
+
+The index is the inverted index: every item contributes one entry for its
+normalized title and one for its normalized creator. Lookups binary-search
+the mapped index, so opening a catalog costs no parsing and workers share
+the pages through the OS page cache. Catalog files are written by
+``python -m src.build_catalog``.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import mmap
+import os
+import re
+import struct
+import tempfile
+import time
+from collections.abc import Iterable
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from src import metrics
+from src.config import BASE_DIR, settings
+from src.models.recommendation import RecommendationCandidate, ThemeLiteral
+from src.utils.text import normalize_text
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"RECCAT01"
+HEADER = struct.Struct("<8sIII4x")
+INDEX_DTYPE = np.dtype([("key", "<u8"), ("item", "<u4"), ("field", "<u4")])
+OFFSET_DTYPE = np.dtype("<u8")
+
+FIELD_TITLE = 0
+FIELD_CREATOR = 1
+
+# Creators the selector reports when it does not know one
+UNKNOWN_CREATORS = frozenset({"", "未知创作者", "未知", "unknown"})
+
+_QUOTES_RE = re.compile(r"[《》〈〉「」『』“”\"'‘’]")
+
+
+def catalog_key(text: str) -> str:
+    """Normalize a title or creator for catalog matching.
+
+    Extends ``normalize_text`` by dropping title brackets and quotes, so
+    《三体》 and 三体 match.
+
+    Args:
+        text: Raw title or creator
+
+    Returns:
+        Normalized key
+    """
+    return normalize_text(_QUOTES_RE.sub("", text))
+
+
+def _key_hash(field_id: int, key: str) -> int:
+    digest = hashlib.blake2b(f"{field_id}:{key}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def _aligned(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+@dataclass(slots=True)
+class CatalogItem:
+    """One curated item of a theme catalog."""
+
+    title: str
+    creator: str
+    metadata: dict[str, str] = field(default_factory=dict)
+    summary: str = ""
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> CatalogItem:
+        """Build an item from a JSON object, stringifying metadata values.
+
+        Raises:
+            ValueError: If the title is missing
+        """
+        title = str(data.get("title") or "").strip()
+        if not title:
+            raise ValueError("catalog item needs a title")
+        metadata = data.get("metadata") or {}
+        if not isinstance(metadata, dict):
+            raise ValueError(f"metadata of {title!r} must be an object")
+        return cls(
+            title=title,
+            creator=str(data.get("creator") or "").strip(),
+            metadata={
+                str(key): ", ".join(map(str, value)) if isinstance(value, list) else str(value)
+                for key, value in metadata.items()
+                if value is not None
+            },
+            summary=str(data.get("summary") or "").strip(),
+        )
+
+
+def write_catalog(
+    path: Path,
+    theme: ThemeLiteral,
+    items: Iterable[CatalogItem],
+    *,
+    prompt_digest: str = "",
+) -> int:
+    """Write a catalog file, replacing any existing one atomically.
+
+    Later items with the same normalized title and creator replace earlier
+    ones. Running processes keep serving the file they mapped until they
+    reopen the catalog.
+
+    Args:
+        path: Destination file
+        theme: Theme of the items
+        items: Items to store
+        prompt_digest: Digest of the extractor prompt the summaries came from
+
+    Returns:
+        Number of items written
+    """
+    unique: dict[tuple[str, str], CatalogItem] = {}
+    for item in items:
+        unique[(catalog_key(item.title), catalog_key(item.creator))] = item
+    records = [
+        json.dumps(asdict(item), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        for item in unique.values()
+    ]
+
+    index = np.array(
+        [
+            entry
+            for item_id, (title, creator) in enumerate(unique)
+            for entry in (
+                (_key_hash(FIELD_TITLE, title), item_id, FIELD_TITLE),
+                (_key_hash(FIELD_CREATOR, creator), item_id, FIELD_CREATOR),
+            )
+            if entry[2] == FIELD_TITLE or creator
+        ],
+        dtype=INDEX_DTYPE,
+    )
+    index.sort(order=["key", "item"])
+    offsets = np.zeros(len(records) + 1, dtype=OFFSET_DTYPE)
+    offsets[1:] = np.cumsum([len(record) for record in records], dtype=OFFSET_DTYPE)
+    meta = json.dumps(
+        {"theme": theme, "built_at": time.time(), "prompt_digest": prompt_digest}
+    ).encode("utf-8")
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(HEADER.pack(MAGIC, len(records), len(index), len(meta)))
+            for section in (meta, index.tobytes(), offsets.tobytes()):
+                handle.write(section)
+                handle.write(b"\0" * (_aligned(handle.tell()) - handle.tell()))
+            for record in records:
+                handle.write(record)
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+    return len(records)
+
+
+@dataclass(slots=True)
+class CatalogStats:
+    """Lookup counters for one theme catalog."""
+
+    hits: int = 0
+    misses: int = 0
+    summaries_served: int = 0
+
+
+class ItemCatalog:
+    """Read-only view over a memory-mapped catalog file."""
+
+    def __init__(self, path: Path) -> None:
+        """Map a catalog file.
+
+        Args:
+            path: Catalog file written by ``write_catalog``
+
+        Raises:
+            ValueError: If the file is not a catalog
+        """
+        self.path = path
+        with path.open("rb") as handle:
+            self._mm = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, count, index_count, meta_len = HEADER.unpack_from(self._mm)
+        if magic != MAGIC:
+            self._mm.close()
+            raise ValueError(f"{path} is not a catalog file")
+        self.meta: dict[str, Any] = json.loads(self._mm[HEADER.size : HEADER.size + meta_len])
+        index_at = _aligned(HEADER.size + meta_len)
+        offsets_at = _aligned(index_at + index_count * INDEX_DTYPE.itemsize)
+        self._index = np.frombuffer(self._mm, INDEX_DTYPE, index_count, index_at)
+        self._keys = self._index["key"]
+        self._offsets = np.frombuffer(self._mm, OFFSET_DTYPE, count + 1, offsets_at)
+        self._records_at = _aligned(offsets_at + (count + 1) * OFFSET_DTYPE.itemsize)
+        self.stats = CatalogStats()
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    @property
+    def theme(self) -> str:
+        return str(self.meta.get("theme", ""))
+
+    def item(self, item_id: int) -> CatalogItem:
+        """Decode one item by id."""
+        start = self._records_at + int(self._offsets[item_id])
+        end = self._records_at + int(self._offsets[item_id + 1])
+        return CatalogItem(**json.loads(self._mm[start:end]))
+
+    def items(self) -> Iterable[CatalogItem]:
+        """Iterate over all items in file order."""
+        return (self.item(item_id) for item_id in range(len(self)))
+
+    def _posting(self, field_id: int, key: str) -> list[int]:
+        target = np.uint64(_key_hash(field_id, key))
+        lo = int(np.searchsorted(self._keys, target, side="left"))
+        hi = int(np.searchsorted(self._keys, target, side="right"))
+        return [int(entry["item"]) for entry in self._index[lo:hi] if entry["field"] == field_id]
+
+    def by_title(self, title: str) -> list[CatalogItem]:
+        """Return the items whose normalized title matches."""
+        key = catalog_key(title)
+        items = (self.item(item_id) for item_id in self._posting(FIELD_TITLE, key))
+        # Guards against 64-bit hash collisions
+        return [item for item in items if catalog_key(item.title) == key]
+
+    def by_creator(self, creator: str) -> list[CatalogItem]:
+        """Return the items whose normalized creator matches."""
+        key = catalog_key(creator)
+        items = (self.item(item_id) for item_id in self._posting(FIELD_CREATOR, key))
+        return [item for item in items if catalog_key(item.creator) == key]
+
+    def match(self, candidate: RecommendationCandidate) -> CatalogItem | None:
+        """Find the catalog item a selector candidate refers to.
+
+        The title must match exactly after normalization. When the candidate
+        names a creator, it must also match, or be contained in the catalog
+        creator (or the other way round), since different works share titles.
+
+        Args:
+            candidate: Selector candidate
+
+        Returns:
+            Matching item, or None
+        """
+        found = self._match(candidate)
+        if found is None:
+            self.stats.misses += 1
+        else:
+            self.stats.hits += 1
+        metrics.record_catalog_lookup(self.theme, found is not None)
+        return found
+
+    def _match(self, candidate: RecommendationCandidate) -> CatalogItem | None:
+        items = self.by_title(candidate.title)
+        creator = catalog_key(candidate.creator)
+        if not items or creator in UNKNOWN_CREATORS:
+            return items[0] if items else None
+        for item in items:
+            known = catalog_key(item.creator)
+            if known and (creator == known or creator in known or known in creator):
+                return item
+        return None
+
+    def enrich(self, candidate: RecommendationCandidate) -> RecommendationCandidate:
+        """Fill in a candidate's metadata from its catalog item.
+
+        Catalog values take precedence over what the selector produced.
+
+        Args:
+            candidate: Selector candidate
+
+        Returns:
+            The enriched candidate, or the candidate unchanged on a miss
+        """
+        item = self.match(candidate)
+        if item is None:
+            return candidate
+        return candidate.model_copy(
+            update={
+                "creator": candidate.creator
+                if catalog_key(candidate.creator) not in UNKNOWN_CREATORS
+                else item.creator,
+                "metadata": {**candidate.metadata, **item.metadata},
+            }
+        )
+
+    def summaries(self, candidates: list[RecommendationCandidate]) -> dict[str, str]:
+        """Return precomputed summaries for the candidates found in the catalog.
+
+        Args:
+            candidates: Candidates to look up
+
+        Returns:
+            Mapping of candidate title to catalog summary
+        """
+        found: dict[str, str] = {}
+        for candidate in candidates:
+            item = self._match(candidate)
+            if item is not None and item.summary:
+                found[candidate.title] = item.summary
+        self.stats.summaries_served += len(found)
+        return found
+
+    def snapshot(self) -> dict[str, int]:
+        """Return catalog counters for diagnostics endpoints."""
+        return {**asdict(self.stats), "items": len(self)}
+
+    def close(self) -> None:
+        """Unmap the file; the catalog must not be used afterwards."""
+        # Views into the map must be released before it can be closed
+        del self._index, self._keys, self._offsets
+        self._mm.close()
+
+
+def catalog_path(theme: ThemeLiteral, directory: str | Path | None = None) -> Path:
+    """Return the catalog file of a theme.
+
+    Args:
+        theme: Recommendation theme
+        directory: Catalog directory; ``CATALOG_DIR`` when omitted, resolved
+            against the project root when relative
+
+    Returns:
+        Path of ``{theme}.cat``
+    """
+    base = Path(directory if directory is not None else settings.catalog_dir)
+    if not base.is_absolute():
+        base = BASE_DIR / base
+    return base / f"{theme}.cat"
+
+
+def load_catalogs(themes: Iterable[ThemeLiteral]) -> dict[ThemeLiteral, ItemCatalog]:
+    """Open the catalogs selected by settings.
+
+    Themes without a catalog file are skipped, as are unreadable files.
+
+    Args:
+        themes: Themes to load
+
+    Returns:
+        Mapping of theme to catalog (empty when catalogs are disabled)
+    """
+    if not settings.catalog_enabled:
+        return {}
+    catalogs: dict[ThemeLiteral, ItemCatalog] = {}
+    for theme in themes:
+        path = catalog_path(theme)
+        if not path.exists():
+            continue
+        try:
+            catalogs[theme] = ItemCatalog(path)
+        except (OSError, ValueError, struct.error) as exc:
+            logger.warning("Ignoring catalog %s: %s", path, exc)
+            continue
+        logger.info("Catalog loaded: theme=%s, items=%s", theme, len(catalogs[theme]))
+    return catalogs
@@ -0,0 +1,107 @@
+"""Adaptive deadline budgets for the per-candidate detail stage."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any
+
+from src.config import settings
+from src.utils.latency import LatencyWindow
+from src.utils.request_context import remaining_budget
+
+# Detail-stage durations needed before the budget adapts to observed latency
+MIN_SAMPLES = 10
+
+
+@dataclass(slots=True)
+class StageBudgetStats:
+    """Counters for detail-stage deadlines."""
+
+    completed: int = 0
+    degraded: int = 0  # Requests answered with default summaries/reasons
+    summary_timeouts: int = 0
+    reason_timeouts: int = 0
+
+
+class StageBudgets:
+    """Computes how long the extractor/insight stage may run for a request.
+
+    The budget is a multiple of a recent latency percentile of the stage,
+    clamped to ``[min_timeout, max_timeout]``, and never extends past the
+    request's overall deadline minus a reserve kept for assembling the answer.
+    """
+
+    def __init__(
+        self,
+        *,
+        enabled: bool,
+        max_timeout: float,
+        min_timeout: float,
+        percentile: float,
+        multiplier: float,
+        reserve: float,
+        window: int = 200,
+    ) -> None:
+        """Initialize the budgets.
+
+        Args:
+            enabled: Whether the detail stage gets its own deadline
+            max_timeout: Upper bound for the stage budget in seconds
+            min_timeout: Lower bound for the adaptive budget in seconds
+            percentile: Latency percentile the budget is derived from
+            multiplier: Headroom applied to the percentile
+            reserve: Seconds kept free before the overall request deadline
+            window: Number of recent stage durations tracked
+        """
+        self.enabled = enabled
+        self.max_timeout = max_timeout
+        self.min_timeout = min_timeout
+        self.percentile = percentile
+        self.multiplier = multiplier
+        self.reserve = reserve
+        self._durations = LatencyWindow(window)
+        self.stats = StageBudgetStats()
+
+    @classmethod
+    def from_settings(cls) -> StageBudgets:
+        """Build stage budgets configured from application settings."""
+        return cls(
+            enabled=settings.stage_deadlines_enabled,
+            max_timeout=settings.detail_stage_timeout,
+            min_timeout=settings.detail_stage_min_timeout,
+            percentile=settings.stage_budget_percentile,
+            multiplier=settings.stage_budget_multiplier,
+            reserve=settings.stage_budget_reserve,
+        )
+
+    def detail_budget(self) -> float | None:
+        """Return seconds the detail stage may run, or None for no limit."""
+        if not self.enabled:
+            return None
+
+        budget = self.max_timeout
+        if len(self._durations) >= MIN_SAMPLES:
+            observed = self._durations.percentile(self.percentile) or 0.0
+            budget = min(budget, max(observed * self.multiplier, self.min_timeout))
+
+        remaining = remaining_budget()
+        if remaining is not None:
+            budget = min(budget, remaining - self.reserve)
+        return max(budget, 0.0)
+
+    def observe(self, seconds: float) -> None:
+        """Record the duration of a detail stage that finished in time."""
+        self._durations.add(seconds)
+        self.stats.completed += 1
+
+    def snapshot(self) -> dict[str, Any]:
+        """Return counters plus the budget a new request would get."""
+        budget = self.detail_budget()
+        return {
+            "enabled": self.enabled,
+            "completed": self.stats.completed,
+            "degraded": self.stats.degraded,
+            "summary_timeouts": self.stats.summary_timeouts,
+            "reason_timeouts": self.stats.reason_timeouts,
+            "detail_budget_seconds": round(budget, 3) if budget is not None else None,
+        }
@@ -4,24 +4,56 @@ from __future__ import annotations
 
 import asyncio
 import logging
-from dataclasses import dataclass
+import threading
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from dataclasses import asdict, dataclass, field
+from typing import Literal
 
+from opentelemetry import trace
+from opentelemetry.trace import StatusCode
+
+from src import metrics
 from src.agents import (
     AssemblerAgent,
     EssenceExtractorAgent,
+    EssenceInsightAgent,
     InsightProviderAgent,
     SelectorAgent,
+    SingleShotAgent,
 )
+from src.agents.base import BaseAgent
 from src.config import settings
+from src.llm.clients import llm_clients
+from src.llm.errors import OverloadedError
+from src.llm.router import llm_router
+from src.llm.tokens import preload_encoder
 from src.models.recommendation import (
+    BatchStats,
+    RecommendationCandidate,
     RecommendationRequest,
     RecommendationResponse,
+    StreamEvent,
+    StreamEventType,
     ThemeLiteral,
+    UserProfile,
 )
+from src.services.batch import SummaryCoalescer, batch_summaries_var
+from src.services.catalog import ItemCatalog, load_catalogs
+from src.services.deadlines import StageBudgets
+from src.services.response_cache import ResponseCache, request_cache_key
+from src.services.semantic_cache import SemanticCache, SemanticMatch
+from src.services.session_store import Session, SessionStore, build_session_store
+from src.services.singleflight import SingleFlight
+from src.services.summary_store import SummaryStore, build_summary_store
+from src.tracing import tracer
+from src.utils.request_context import deadline_var, session_id_var
 
 logger = logging.getLogger(__name__)
 SUPPORTED_THEMES: tuple[ThemeLiteral, ...] = ("books", "games", "movies", "anime")
 
+EventSink = Callable[[StreamEvent], Awaitable[None]]
+
 
 @dataclass(slots=True)
 class AgentBundle:
@@ -31,6 +63,74 @@ class AgentBundle:
     extractor: EssenceExtractorAgent
     insight: InsightProviderAgent
     assembler: AssemblerAgent
+    fused: EssenceInsightAgent | None = None
+    single_shot: SingleShotAgent | None = None
+
+
+@dataclass(slots=True)
+class FastPathStats:
+    """Counters for the single-shot fast path."""
+
+    attempts: int = 0
+    successes: int = 0
+    fallbacks: int = 0
+    errors: int = 0
+    success_seconds: float = 0.0  # Total latency of requests served by the fast path
+    fallback_seconds: float = 0.0  # Total latency of requests that fell back
+
+    def snapshot(self) -> dict[str, float | int]:
+        """Return counters plus success rate and mean latencies."""
+
+        def mean(total: float, count: int) -> float:
+            return round(total / count, 3) if count else 0.0
+
+        return {
+            "attempts": self.attempts,
+            "successes": self.successes,
+            "fallbacks": self.fallbacks,
+            "errors": self.errors,
+            "success_rate": round(self.successes / self.attempts, 4) if self.attempts else 0.0,
+            "mean_success_seconds": mean(self.success_seconds, self.successes),
+            "mean_fallback_seconds": mean(self.fallback_seconds, self.fallbacks),
+        }
+
+
+@dataclass(slots=True)
+class BatchTotals:
+    """Cumulative counters for batch requests."""
+
+    batches: int = 0
+    items: int = 0
+    failed: int = 0
+    elapsed_seconds: float = 0.0
+    summaries_deduplicated: int = 0
+    llm_calls_saved: int = 0
+
+    def snapshot(self) -> dict[str, float | int]:
+        """Return counters plus overall batch throughput."""
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "failed": self.failed,
+            "items_per_second": (
+                round(self.items / self.elapsed_seconds, 3) if self.elapsed_seconds else 0.0
+            ),
+            "summaries_deduplicated": self.summaries_deduplicated,
+            "llm_calls_saved": self.llm_calls_saved,
+        }
+
+
+@dataclass(slots=True)
+class WarmupStatus:
+    """Progress and outcome of the startup warm-up."""
+
+    # Terminal states: "ready", or "degraded" when a step failed or timed out
+    state: Literal["cold", "warming", "ready", "degraded"] = "cold"
+    seconds: float = 0.0
+    themes: int = 0  # Agent bundles built
+    prompts: int = 0  # Prompt files cached
+    connections: dict[str, int] = field(default_factory=dict)  # Upstream -> opened
+    errors: list[str] = field(default_factory=list)
 
 
 class RecommendationService:
@@ -41,16 +141,55 @@ class RecommendationService:
         api_key: str | None = None,
         api_base: str | None = None,
         model: str | None = None,
+        response_cache: ResponseCache | None = None,
+        summary_store: SummaryStore | None = None,
+        session_store: SessionStore | None = None,
+        semantic_cache: SemanticCache | None = None,
+        catalogs: dict[ThemeLiteral, ItemCatalog] | None = None,
     ) -> None:
         """Initialize the recommendation service with lazy-loaded agents.
 
         Agents are created on-demand for better resource utilization.
+
+        Args:
+            api_key: OpenAI API key override for all agents
+            api_base: OpenAI API base URL override for all agents
+            model: Model name override for all agents
+            response_cache: Response cache to use; built from settings when omitted
+            summary_store: Per-item summary store; built from settings when omitted
+            session_store: Conversation session store; built from settings when omitted
+            semantic_cache: Near-duplicate response cache; built from settings when omitted
+            catalogs: Item catalog per theme; loaded from settings when omitted
         """
         self.agents: dict[ThemeLiteral, AgentBundle | None] = dict.fromkeys(SUPPORTED_THEMES)
+        # Bundles are also built from worker threads during warm-up
+        self._agents_lock = threading.Lock()
+        self.warmup = WarmupStatus()
         self._api_key = api_key
         self._api_base = api_base
         self._model = model
 
+        if response_cache is None and settings.response_cache_enabled:
+            response_cache = ResponseCache.from_settings()
+        self.response_cache = response_cache
+        if semantic_cache is None and settings.semantic_cache_enabled:
+            semantic_cache = SemanticCache.from_settings()
+        self.semantic_cache = semantic_cache
+        self._audits: set[asyncio.Task[None]] = set()
+        self.summary_store = (
+            summary_store if summary_store is not None else build_summary_store()
+        )
+        self.catalogs = catalogs if catalogs is not None else load_catalogs(SUPPORTED_THEMES)
+        self.fast_path_stats = FastPathStats()
+        self.session_store = (
+            session_store if session_store is not None else build_session_store()
+        )
+        self.stage_budgets = StageBudgets.from_settings()
+        self.batch_stats = BatchTotals()
+        self.inflight: SingleFlight[RecommendationResponse] | None = (
+            SingleFlight() if settings.request_coalescing_enabled else None
+        )
+
         logger.info(
             "RecommendationService initialized (lazy-load mode) for themes: %s",
             ", ".join(SUPPORTED_THEMES),
@@ -65,44 +204,156 @@ class RecommendationService:
         Returns:
             AgentBundle for the theme
         """
-        if self.agents[theme] is None:
-            logger.info("Creating agents for theme=%s (first use)", theme)
-            self.agents[theme] = AgentBundle(
-                selector=SelectorAgent(
-                    theme=theme,
-                    api_key=self._api_key,
-                    api_base=self._api_base,
-                    model=self._model,
-                ),
-                extractor=EssenceExtractorAgent(
-                    theme=theme,
-                    api_key=self._api_key,
-                    api_base=self._api_base,
-                    model=self._model,
-                ),
-                insight=InsightProviderAgent(
-                    theme=theme,
-                    api_key=self._api_key,
-                    api_base=self._api_base,
-                    model=self._model,
-                ),
-                assembler=AssemblerAgent(
+        bundle = self.agents[theme]
+        if bundle is not None:
+            return bundle
+        with self._agents_lock:
+            if self.agents[theme] is None:
+                self.agents[theme] = self._create_agents(theme)
+        return self.agents[theme]  # type: ignore[return-value]
+
+    def _create_agents(self, theme: ThemeLiteral) -> AgentBundle:
+        """Build the agent bundle of a theme."""
+        logger.info("Creating agents for theme=%s", theme)
+        catalog = self.catalogs.get(theme)
+        return AgentBundle(
+            selector=SelectorAgent(
+                theme=theme,
+                catalog=catalog,
+                api_key=self._api_key,
+                api_base=self._api_base,
+                model=self._model,
+            ),
+            extractor=EssenceExtractorAgent(
+                theme=theme,
+                summary_store=self.summary_store,
+                catalog=catalog,
+                api_key=self._api_key,
+                api_base=self._api_base,
+                model=self._model,
+            ),
+            insight=InsightProviderAgent(
+                theme=theme,
+                api_key=self._api_key,
+                api_base=self._api_base,
+                model=self._model,
+            ),
+            assembler=AssemblerAgent(
+                theme=theme,
+                api_key=self._api_key,
+                api_base=self._api_base,
+                model=self._model,
+            ),
+            fused=(
+                EssenceInsightAgent(
                     theme=theme,
+                    summary_store=self.summary_store,
+                    catalog=catalog,
                     api_key=self._api_key,
                     api_base=self._api_base,
                     model=self._model,
-                ),
-            )
-        return self.agents[theme]  # type: ignore[return-value]
+                )
+                if theme in settings.fused_agent_themes
+                else None
+            ),
+            single_shot=SingleShotAgent(
+                theme=theme,
+                api_key=self._api_key,
+                api_base=self._api_base,
+                model=self._model,
+            ),
+        )
+
+    async def warm_up(self, *, connections: int, timeout: float) -> WarmupStatus:
+        """Prepare the worker so the first request of each theme is not cold.
+
+        Caches every prompt file, builds the agent bundles of all themes and
+        loads their tokenizers in a worker thread (ChatOpenAI construction and
+        tokenizer loading are synchronous), and opens
+        keep-alive connections to each LLM upstream. Failures and timeouts are
+        logged and listed in ``errors`` and end the warm-up as "degraded"
+        rather than blocking readiness: anything not prepared here is still
+        built on first use, and the upstream may recover later.
+
+        Args:
+            connections: Keep-alive connections to open per upstream
+            timeout: Seconds allowed for opening connections
+
+        Returns:
+            Final warm-up status, also kept in ``self.warmup``
+        """
+        status = self.warmup = WarmupStatus(state="warming")
+        started = time.perf_counter()
+
+        try:
+            status.prompts = await asyncio.to_thread(BaseAgent.preload_prompts, SUPPORTED_THEMES)
+            for theme in SUPPORTED_THEMES:
+                await asyncio.to_thread(self._get_or_create_agents, theme)
+                status.themes += 1
+            models = {b.selector.model_name for b in self.agents.values() if b is not None}
+            for model in sorted(models):
+                await asyncio.to_thread(preload_encoder, model)
+
+            if connections > 0:
+                try:
+                    status.connections = await asyncio.wait_for(
+                        self._prewarm_upstreams(connections), timeout
+                    )
+                except TimeoutError:
+                    status.errors.append(f"opening connections timed out after {timeout}s")
+                for upstream, opened in status.connections.items():
+                    if not opened:
+                        status.errors.append(f"no connection opened to {upstream}")
+        except Exception as exc:
+            logger.exception("Warm-up failed, remaining work is left to first use")
+            status.errors.append(f"warm-up failed: {type(exc).__name__}: {exc}")
+
+        status.seconds = round(time.perf_counter() - started, 3)
+        status.state = "degraded" if status.errors else "ready"
+        logger.info(
+            "Warm-up %s in %.2fs: themes=%s, prompts=%s, connections=%s, errors=%s",
+            status.state,
+            status.seconds,
+            status.themes,
+            status.prompts,
+            status.connections,
+            status.errors,
+        )
+        return status
+
+    async def _prewarm_upstreams(self, connections: int) -> dict[str, int]:
+        """Open connections to every upstream the agents call."""
+        agents = [bundle.selector for bundle in self.agents.values() if bundle is not None]
+        if llm_router.enabled:
+            models = {agent.model_name for agent in agents}
+            opened: dict[str, int] = {}
+            for model in sorted(models):
+                opened |= await llm_router.prewarm(model, connections)
+            return opened
+
+        upstreams = sorted({(a.api_base, a.api_key, a.model_name) for a in agents})
+        counts = await asyncio.gather(
+            *(llm_clients.prewarm(*upstream, connections) for upstream in upstreams)
+        )
+        return {
+            f"{api_base}#{model}": count
+            for (api_base, _, model), count in zip(upstreams, counts, strict=True)
+        }
 
     async def _process_workflow(
-        self, theme: ThemeLiteral, request: RecommendationRequest
+        self,
+        theme: ThemeLiteral,
+        request: RecommendationRequest,
+        emit: EventSink | None = None,
+        known_profile: UserProfile | None = None,
     ) -> RecommendationResponse:
         """Internal method to process the recommendation workflow.
 
         Args:
             theme: Requested recommendation theme
             request: User's recommendation request
+            emit: Optional sink receiving progress events as stages complete
+            known_profile: Profile from the previous turn of the session
 
         Returns:
             Complete recommendation response
@@ -112,12 +363,65 @@ class RecommendationService:
 
         agents = self._get_or_create_agents(theme)
 
-        user_profile, candidates, selector_message = await agents.selector.process(
-            user_message=request.user_input,
-            conversation_history=[
-                msg.model_dump() for msg in request.conversation_history
-            ],
-        )
+        with tracer.start_as_current_span(
+            "workflow", attributes={"request_id": request.request_id, "theme": theme}
+        ) as span:
+            multi_agent_path = "pipelined" if settings.pipelined_workflow else "multi_agent"
+            if agents.single_shot is not None and self._use_fast_path(request):
+                started = time.perf_counter()
+                fast_response = await self._try_single_shot(
+                    agents.single_shot, theme, request, known_profile
+                )
+                if fast_response is not None:
+                    span.set_attribute("workflow.path", "single_shot")
+                    self.fast_path_stats.success_seconds += time.perf_counter() - started
+                    return fast_response
+                span.set_attribute("workflow.path", f"single_shot_fallback.{multi_agent_path}")
+                try:
+                    return await self._run_multi_agent(
+                        agents, theme, request, emit, known_profile
+                    )
+                finally:
+                    self.fast_path_stats.fallback_seconds += time.perf_counter() - started
+
+            span.set_attribute("workflow.path", multi_agent_path)
+            return await self._run_multi_agent(agents, theme, request, emit, known_profile)
+
+    async def _run_multi_agent(
+        self,
+        agents: AgentBundle,
+        theme: ThemeLiteral,
+        request: RecommendationRequest,
+        emit: EventSink | None = None,
+        known_profile: UserProfile | None = None,
+    ) -> RecommendationResponse:
+        """Run the selector -> extractor/insight -> assembler workflow.
+
+        Args:
+            agents: Agent bundle for the theme
+            theme: Requested recommendation theme
+            request: User's recommendation request
+            emit: Optional sink receiving progress events
+            known_profile: Profile from the previous turn of the session
+
+        Returns:
+            Complete recommendation response
+        """
+        if settings.pipelined_workflow:
+            return await self._process_workflow_pipelined(
+                agents, theme, request, emit, known_profile
+            )
+
+        with metrics.stage_timer(theme, "selector"), tracer.start_as_current_span(
+            "stage.selector"
+        ):
+            user_profile, candidates, selector_message = await agents.selector.process(
+                user_message=request.user_input,
+                conversation_history=[
+                    msg.model_dump() for msg in request.conversation_history
+                ],
+                known_profile=known_profile,
+            )
 
         logger.info(
             "Selector completed: request_id=%s, candidates=%s",
@@ -125,30 +429,529 @@ class RecommendationService:
             len(candidates),
         )
 
-        summaries_task = agents.extractor.process(candidates)
-        reasons_task = agents.insight.process(candidates, user_profile)
+        if emit is not None:
+            await self._emit_selector(emit, user_profile, candidates, selector_message)
 
-        summaries, reasons = await asyncio.gather(summaries_task, reasons_task)
+        summary_stage, reason_stage = self._detail_stages(
+            agents, theme, candidates, user_profile, emit
+        )
+
+        summaries, reasons, degraded = await self._collect_details(
+            [summary_stage], [reason_stage], request, theme
+        )
 
         logger.info(
-            "Extractor and Insight completed: request_id=%s, theme=%s",
+            "Extractor and Insight completed: request_id=%s, theme=%s, degraded=%s",
             request.request_id,
             theme,
+            degraded,
         )
 
-        recommendation_response = await agents.assembler.process(
-            user_profile=user_profile,
-            candidates=candidates,
-            summaries=summaries,
-            reasons=reasons,
-            intro_message=selector_message,
-        )
+        with metrics.stage_timer(theme, "assembler"), tracer.start_as_current_span(
+            "stage.assembler"
+        ):
+            recommendation_response = await agents.assembler.process(
+                user_profile=user_profile,
+                candidates=candidates,
+                summaries=summaries,
+                reasons=reasons,
+                intro_message=selector_message,
+            )
 
         # Add request_id to response
         recommendation_response.request_id = request.request_id
+        recommendation_response.degraded = degraded
 
         return recommendation_response
 
+    async def _process_workflow_pipelined(
+        self,
+        agents: AgentBundle,
+        theme: ThemeLiteral,
+        request: RecommendationRequest,
+        emit: EventSink | None = None,
+        known_profile: UserProfile | None = None,
+    ) -> RecommendationResponse:
+        """Run the workflow with summary/reason generation overlapping the selector.
+
+        Each candidate gets its own extractor and insight task as soon as the
+        streamed selector output closes it. Candidates the final parse does not
+        keep (e.g. after a selector fallback) are cancelled, and any final
+        candidate that was not streamed is processed in one batch afterwards.
+        Item events of early tasks are held until the selector and candidates
+        events are out, and dropped for titles the final parse did not keep.
+
+        Args:
+            agents: Agent bundle for the theme
+            theme: Requested recommendation theme
+            request: User's recommendation request
+            emit: Optional sink receiving progress events
+            known_profile: Profile from the previous turn of the session
+
+        Returns:
+            Complete recommendation response
+        """
+        profile_ready: asyncio.Future[UserProfile] = (
+            asyncio.get_running_loop().create_future()
+        )
+        summary_tasks: dict[str, asyncio.Task[dict[str, str]]] = {}
+        reason_tasks: dict[str, asyncio.Task[dict[str, str]]] = {}
+        selector_emitted = asyncio.Event()
+        final_titles: set[str] = set()
+
+        async def emit_after_selector(event: StreamEvent) -> None:
+            await selector_emitted.wait()
+            if emit is not None and event.data.get("title") in final_titles:
+                await emit(event)
+
+        early_emit = emit_after_selector if emit is not None else None
+
+        def on_profile(profile: UserProfile) -> None:
+            if not profile_ready.done():
+                profile_ready.set_result(profile)
+
+        def on_candidate(candidate: RecommendationCandidate) -> None:
+            if candidate.title in summary_tasks:
+                return
+            summary_stage, reason_stage = self._detail_stages(
+                agents, theme, [candidate], profile_ready, early_emit
+            )
+            summary_tasks[candidate.title] = asyncio.ensure_future(summary_stage)
+            reason_tasks[candidate.title] = asyncio.ensure_future(reason_stage)
+
+        try:
+            with metrics.stage_timer(theme, "selector"), tracer.start_as_current_span(
+                "stage.selector", attributes={"llm.stream": True}
+            ):
+                user_profile, candidates, selector_message = (
+                    await agents.selector.process_streaming(
+                        user_message=request.user_input,
+                        conversation_history=[
+                            msg.model_dump() for msg in request.conversation_history
+                        ],
+                        known_profile=known_profile,
+                        on_profile=on_profile,
+                        on_candidate=on_candidate,
+                    )
+                )
+            on_profile(user_profile)
+
+            logger.info(
+                "Selector stream completed: request_id=%s, candidates=%s, started_early=%s",
+                request.request_id,
+                len(candidates),
+                len(summary_tasks),
+            )
+
+            if emit is not None:
+                await self._emit_selector(emit, user_profile, candidates, selector_message)
+            final_titles.update(c.title for c in candidates)
+            selector_emitted.set()
+
+            for title in set(summary_tasks) - final_titles:
+                summary_tasks.pop(title).cancel()
+                reason_tasks.pop(title).cancel()
+
+            summary_parts: list[Awaitable[dict[str, str]]] = list(summary_tasks.values())
+            reason_parts: list[Awaitable[dict[str, str]]] = list(reason_tasks.values())
+            late = [c for c in candidates if c.title not in summary_tasks]
+            if late:
+                summary_stage, reason_stage = self._detail_stages(
+                    agents, theme, late, user_profile, emit
+                )
+                summary_parts.append(summary_stage)
+                reason_parts.append(reason_stage)
+
+            summaries, reasons, degraded = await self._collect_details(
+                summary_parts, reason_parts, request, theme
+            )
+        except BaseException:
+            for task in (*summary_tasks.values(), *reason_tasks.values()):
+                task.cancel()
+            raise
+
+        logger.info(
+            "Pipelined Extractor and Insight completed: request_id=%s, theme=%s, degraded=%s",
+            request.request_id,
+            theme,
+            degraded,
+        )
+
+        with metrics.stage_timer(theme, "assembler"), tracer.start_as_current_span(
+            "stage.assembler"
+        ):
+            recommendation_response = await agents.assembler.process(
+                user_profile=user_profile,
+                candidates=candidates,
+                summaries=summaries,
+                reasons=reasons,
+                intro_message=selector_message,
+            )
+        recommendation_response.request_id = request.request_id
+        recommendation_response.degraded = degraded
+        return recommendation_response
+
+    async def _collect_details(
+        self,
+        summary_parts: list[Awaitable[dict[str, str]]],
+        reason_parts: list[Awaitable[dict[str, str]]],
+        request: RecommendationRequest,
+        theme: ThemeLiteral,
+    ) -> tuple[dict[str, str], dict[str, str], bool]:
+        """Await the summary and reason stages within the detail-stage budget.
+
+        Parts still running when the budget runs out are cancelled; their
+        candidates are left out of the maps so the assembler falls back to
+        its default summary and reason texts.
+
+        Args:
+            summary_parts: Awaitables resolving to title -> summary
+            reason_parts: Awaitables resolving to title -> reason
+            request: User's recommendation request (for logging)
+            theme: Requested recommendation theme (for metrics)
+
+        Returns:
+            Tuple of (summaries, reasons, degraded)
+        """
+        # Current while the tasks are created, so the agent spans nest under it
+        with tracer.start_as_current_span("stage.details") as span:
+            summary_tasks = [asyncio.ensure_future(part) for part in summary_parts]
+            reason_tasks = [asyncio.ensure_future(part) for part in reason_parts]
+            tasks = [*summary_tasks, *reason_tasks]
+            budget = self.stage_budgets.detail_budget()
+            span.set_attribute("stage.budget_seconds", budget or 0.0)
+            started = time.perf_counter()
+
+            try:
+                # Returns when everything finished, a stage failed, or the budget ran out
+                done, pending = await asyncio.wait(
+                    tasks, timeout=budget, return_when=asyncio.FIRST_EXCEPTION
+                )
+                summaries = {
+                    title: text
+                    for task in summary_tasks
+                    if task in done
+                    for title, text in task.result().items()
+                }
+                reasons = {
+                    title: text
+                    for task in reason_tasks
+                    if task in done
+                    for title, text in task.result().items()
+                }
+            finally:
+                for task in tasks:
+                    task.cancel()
+
+            span.set_attribute("stage.degraded", bool(pending))
+            if not pending:
+                self.stage_budgets.observe(time.perf_counter() - started)
+                return summaries, reasons, False
+
+            stats = self.stage_budgets.stats
+            stats.degraded += 1
+            if any(task in pending for task in summary_tasks):
+                stats.summary_timeouts += 1
+                metrics.record_timeout(theme, "summary")
+            if any(task in pending for task in reason_tasks):
+                stats.reason_timeouts += 1
+                metrics.record_timeout(theme, "reason")
+            logger.warning(
+                "Detail stage missed its %.1fs budget, using default texts: request_id=%s, "
+                "summaries=%s/%s, reasons=%s/%s",
+                budget or 0.0,
+                request.request_id,
+                sum(task in done for task in summary_tasks),
+                len(summary_tasks),
+                sum(task in done for task in reason_tasks),
+                len(reason_tasks),
+            )
+            return summaries, reasons, True
+
+    def _use_fast_path(self, request: RecommendationRequest) -> bool:
+        """Decide whether a request should try the single-shot workflow first.
+
+        An explicit per-request choice wins; otherwise the server default applies
+        to simple requests: a short, single-line message without history.
+        """
+        if request.fast_path is not None:
+            return request.fast_path
+        if not settings.single_shot_default:
+            return False
+        text = request.user_input.strip()
+        return (
+            not request.conversation_history
+            and "\n" not in text
+            and len(text) <= settings.single_shot_max_input_chars
+        )
+
+    async def _try_single_shot(
+        self,
+        agent: SingleShotAgent,
+        theme: ThemeLiteral,
+        request: RecommendationRequest,
+        known_profile: UserProfile | None = None,
+    ) -> RecommendationResponse | None:
+        """Run the single-shot agent, returning None when the caller should fall back.
+
+        Args:
+            agent: Single-shot agent for the theme
+            theme: Requested recommendation theme
+            request: User's recommendation request
+            known_profile: Profile from the previous turn of the session
+
+        Returns:
+            Validated response, or None on validation failure or upstream error
+        """
+        self.fast_path_stats.attempts += 1
+        try:
+            with metrics.stage_timer(theme, "single_shot"), tracer.start_as_current_span(
+                "stage.single_shot"
+            ):
+                response = await agent.process(
+                    user_message=request.user_input,
+                    conversation_history=[
+                        msg.model_dump() for msg in request.conversation_history
+                    ],
+                    known_profile=known_profile,
+                )
+        except OverloadedError:
+            raise
+        except Exception as exc:  # noqa: BLE001
+            self.fast_path_stats.errors += 1
+            self.fast_path_stats.fallbacks += 1
+            metrics.record_fallback(theme, "single_shot")
+            logger.warning(
+                "Single-shot call failed, falling back: request_id=%s, error=%s",
+                request.request_id,
+                exc,
+            )
+            return None
+
+        if response is None:
+            self.fast_path_stats.fallbacks += 1
+            metrics.record_fallback(theme, "single_shot")
+            logger.info(
+                "Single-shot validation failed, falling back: request_id=%s",
+                request.request_id,
+            )
+            return None
+
+        self.fast_path_stats.successes += 1
+        response.request_id = request.request_id
+        logger.info("Single-shot succeeded: request_id=%s", request.request_id)
+        return response
+
+    def _detail_stages(
+        self,
+        agents: AgentBundle,
+        theme: ThemeLiteral,
+        candidates: list[RecommendationCandidate],
+        user_profile: UserProfile | Awaitable[UserProfile],
+        emit: EventSink | None,
+    ) -> tuple[Awaitable[dict[str, str]], Awaitable[dict[str, str]]]:
+        """Build the summary and reason stages for a set of candidates.
+
+        With a fused agent configured for the theme both stages share a single
+        LLM call; otherwise they map to the extractor and insight agents.
+
+        Args:
+            agents: Agent bundle for the theme
+            theme: Requested recommendation theme
+            candidates: Candidates to describe
+            user_profile: User profile, or an awaitable resolving to it when the
+                profile is still being streamed
+            emit: Optional event sink
+
+        Returns:
+            Tuple of (summary stage, reason stage), each resolving to title -> text
+        """
+
+        async def resolve_profile() -> UserProfile:
+            if isinstance(user_profile, UserProfile):
+                return user_profile
+            return await user_profile
+
+        if agents.fused is not None:
+            fused = agents.fused
+
+            async def run_fused() -> tuple[dict[str, str], dict[str, str]]:
+                profile = await resolve_profile()
+                with metrics.stage_timer(theme, "fused"):
+                    return await fused.process(candidates, profile)
+
+            # Started by the first stage to run and cancelled once no stage waits on it,
+            # so a deadline or failure never leaves the fused call running unowned
+            shared: asyncio.Future[tuple[dict[str, str], dict[str, str]]] | None = None
+            waiting = 0
+
+            async def pick(index: int) -> dict[str, str]:
+                nonlocal shared, waiting
+                if shared is None:
+                    shared = asyncio.ensure_future(run_fused())
+                call = shared
+                waiting += 1
+                try:
+                    return (await asyncio.shield(call))[index]
+                finally:
+                    waiting -= 1
+                    if not waiting and not call.done():
+                        call.cancel()
+
+            return (
+                self._emit_items(pick(0), emit, "summary"),
+                self._emit_items(pick(1), emit, "reason"),
+            )
+
+        async def run_insight() -> dict[str, str]:
+            profile = await resolve_profile()
+            with metrics.stage_timer(theme, "insight"):
+                return await agents.insight.process(candidates, profile)
+
+        coalescer = batch_summaries_var.get()
+        summary_call = (
+            coalescer.summarize(agents.extractor, candidates)
+            if coalescer is not None
+            else agents.extractor.process(candidates)
+        )
+        return (
+            self._emit_items(
+                metrics.timed_stage(summary_call, theme, "extractor"),
+                emit,
+                "summary",
+            ),
+            self._emit_items(run_insight(), emit, "reason"),
+        )
+
+    @staticmethod
+    async def _emit_selector(
+        emit: EventSink,
+        user_profile: UserProfile,
+        candidates: list[RecommendationCandidate],
+        message: str,
+    ) -> None:
+        """Emit the selector and candidates events."""
+        await emit(
+            StreamEvent(
+                event="selector",
+                data={
+                    "message": message,
+                    "user_profile": user_profile.model_dump(mode="json"),
+                },
+            )
+        )
+        await emit(
+            StreamEvent(
+                event="candidates",
+                data={"candidates": [c.model_dump(mode="json") for c in candidates]},
+            )
+        )
+
+    @staticmethod
+    async def _emit_items(
+        stage: Awaitable[dict[str, str]],
+        emit: EventSink | None,
+        event: StreamEventType,
+    ) -> dict[str, str]:
+        """Await a per-title stage and emit one event per item when it finishes.
+
+        Args:
+            stage: Extractor or insight coroutine returning title -> text
+            emit: Optional event sink
+            event: Event type, also used as the payload field name
+
+        Returns:
+            The stage result unchanged
+        """
+        result = await stage
+        if emit is not None:
+            for title, text in result.items():
+                await emit(StreamEvent(event=event, data={"title": title, event: text}))
+        return result
+
+    async def stream_recommendations(
+        self, theme: ThemeLiteral, request: RecommendationRequest
+    ) -> AsyncIterator[StreamEvent]:
+        """Run the workflow and yield progress events as each stage completes.
+
+        The final event is ``result`` carrying the full recommendation response.
+        Errors propagate to the caller after the events emitted so far.
+
+        Args:
+            theme: Requested recommendation theme
+            request: User's recommendation request
+
+        Yields:
+            Stream events in workflow order
+        """
+        if theme not in SUPPORTED_THEMES:
+            raise ValueError(f"Unsupported theme: {theme}")
+
+        # Only made current inside the workflow task: an async generator may be
+        # closed from another context than the one it ran in
+        span = tracer.start_span(
+            "recommendation",
+            attributes={"request_id": request.request_id, "theme": theme, "mode": "stream"},
+        )
+        try:
+            with metrics.track_workflow(theme, "stream") as outcome:
+                request, session = await self._open_session(theme, request)
+
+                cached = await self._cached_response(theme, request, span)
+                if cached is not None:
+                    outcome.label = "cached"
+                    cached = await self._close_session(session, request, cached)
+                    yield StreamEvent(event="result", data=cached.model_dump(mode="json"))
+                    return
+
+                queue: asyncio.Queue[StreamEvent | None] = asyncio.Queue()
+
+                async def run() -> RecommendationResponse:
+                    deadline_var.set(time.monotonic() + settings.workflow_timeout)
+                    try:
+                        with trace.use_span(span):
+                            return await asyncio.wait_for(
+                                self._process_workflow(
+                                    theme,
+                                    request,
+                                    emit=queue.put,
+                                    known_profile=session.profile if session else None,
+                                ),
+                                timeout=settings.workflow_timeout,
+                            )
+                    finally:
+                        queue.put_nowait(None)
+
+                logger.info(
+                    "Starting streaming workflow: request_id=%s, theme=%s",
+                    request.request_id,
+                    theme,
+                )
+                task = asyncio.create_task(run())
+                try:
+                    while (event := await queue.get()) is not None:
+                        yield event
+                    response = await task
+                finally:
+                    # Client went away mid-stream: stop paying for the remaining stages
+                    if not task.done():
+                        task.cancel()
+
+                span.set_attribute("degraded", response.degraded)
+                if response.degraded:
+                    outcome.label = "degraded"
+                else:
+                    await self._store_response(theme, request, response)
+
+                response = await self._close_session(session, request, response)
+                yield StreamEvent(event="result", data=response.model_dump(mode="json"))
+        except Exception as exc:
+            span.record_exception(exc)
+            span.set_status(StatusCode.ERROR, str(exc))
+            raise
+        finally:
+            span.end()
+
     async def get_recommendations(
         self, theme: ThemeLiteral, request: RecommendationRequest
     ) -> RecommendationResponse:
@@ -177,25 +980,300 @@ class RecommendationService:
             settings.workflow_timeout,
         )
 
+        if theme not in SUPPORTED_THEMES:
+            raise ValueError(f"Unsupported theme: {theme}")
+
+        with tracer.start_as_current_span(
+            "recommendation",
+            attributes={"request_id": request.request_id, "theme": theme, "mode": "json"},
+        ) as span, metrics.track_workflow(theme, "json") as outcome:
+            request, session = await self._open_session(theme, request)
+
+            cached = await self._cached_response(theme, request, span)
+            if cached is not None:
+                logger.info(
+                    "Response cache hit: request_id=%s, theme=%s",
+                    request.request_id,
+                    theme,
+                )
+                outcome.label = "cached"
+                return await self._close_session(session, request, cached)
+
+            async def run_workflow() -> RecommendationResponse:
+                deadline_var.set(time.monotonic() + settings.workflow_timeout)
+                response = await asyncio.wait_for(
+                    self._process_workflow(
+                        theme, request, known_profile=session.profile if session else None
+                    ),
+                    timeout=settings.workflow_timeout,
+                )
+                if not response.degraded:
+                    await self._store_response(theme, request, response)
+                return response
+
+            try:
+                if self.inflight is not None:
+                    # Identical concurrent requests await one shared workflow run
+                    shared = await self.inflight.do(
+                        request_cache_key(theme, request), run_workflow
+                    )
+                    recommendation_response = shared.model_copy(
+                        update={"request_id": request.request_id}, deep=True
+                    )
+                else:
+                    recommendation_response = await run_workflow()
+
+                logger.info(
+                    "Workflow completed: request_id=%s, theme=%s, recommendations=%s",
+                    request.request_id,
+                    theme,
+                    len(recommendation_response.recommendations),
+                )
+                if recommendation_response.degraded:
+                    outcome.label = "degraded"
+                span.set_attribute("degraded", recommendation_response.degraded)
+                return await self._close_session(session, request, recommendation_response)
+
+            except TimeoutError:
+                logger.error(
+                    "Workflow timeout: request_id=%s, theme=%s, timeout=%ss",
+                    request.request_id,
+                    theme,
+                    settings.workflow_timeout,
+                )
+                raise
+
+    async def _open_session(
+        self, theme: ThemeLiteral, request: RecommendationRequest
+    ) -> tuple[RecommendationRequest, Session | None]:
+        """Resolve the request's session and fill in the stored history.
+
+        Clients normally send only the new message. History sent by the client
+        takes precedence and replaces the stored one, so a client resending the
+        conversation after its session was lost (expired, or kept by another
+        worker's memory backend) re-seeds the session for later turns.
+
+        Args:
+            theme: Requested recommendation theme
+            request: User's recommendation request
+
+        Returns:
+            Tuple of (request with effective history, session or None when disabled)
+        """
+        if self.session_store is None:
+            return request, None
+
+        session = await self.session_store.open(request.session_id, theme)
+        session_id_var.set(session.session_id)
+        if request.conversation_history:
+            # Replaced rather than merged, so the turn is not appended to stale history
+            session.history = request.conversation_history[-self.session_store.max_messages :]
+        elif session.history:
+            request = request.model_copy(
+                update={"conversation_history": list(session.history)}
+            )
+        return request, session
+
+    async def _cached_response(
+        self, theme: ThemeLiteral, request: RecommendationRequest, span: trace.Span
+    ) -> RecommendationResponse | None:
+        """Look the request up in the exact, then the semantic response cache.
+
+        A sampled share of semantic hits is re-run in the background to
+        measure how often a near-duplicate gets a wrong answer.
+        """
+        if self.response_cache is not None:
+            cached = await self.response_cache.get(theme, request)
+            if cached is not None:
+                span.set_attribute("cache_hit", True)
+                return cached
+
+        if self.semantic_cache is not None:
+            match = self.semantic_cache.get(theme, request)
+            if match is not None:
+                span.set_attributes({"cache_hit": True, "semantic_similarity": match.similarity})
+                if self.semantic_cache.should_audit():
+                    task = asyncio.create_task(
+                        self._audit_semantic_hit(self.semantic_cache, theme, request, match)
+                    )
+                    self._audits.add(task)
+                    task.add_done_callback(self._audits.discard)
+                return match.response
+        return None
+
+    async def _store_response(
+        self,
+        theme: ThemeLiteral,
+        request: RecommendationRequest,
+        response: RecommendationResponse,
+    ) -> None:
+        """Remember a complete response in every configured response cache."""
+        if self.response_cache is not None:
+            await self.response_cache.set(theme, request, response)
+        if self.semantic_cache is not None:
+            self.semantic_cache.set(theme, request, response)
+
+    async def _audit_semantic_hit(
+        self,
+        cache: SemanticCache,
+        theme: ThemeLiteral,
+        request: RecommendationRequest,
+        match: SemanticMatch,
+    ) -> None:
+        """Re-run a request answered by similarity and compare the results."""
+        audit_request = request.model_copy(update={"request_id": f"{request.request_id}:audit"})
+        deadline_var.set(time.monotonic() + settings.workflow_timeout)
         try:
-            recommendation_response = await asyncio.wait_for(
-                self._process_workflow(theme, request),
+            fresh = await asyncio.wait_for(
+                self._process_workflow(theme, audit_request),
                 timeout=settings.workflow_timeout,
             )
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("Semantic cache audit failed: theme=%s, error=%s", theme, exc)
+            fresh = None
+        cache.record_audit(theme, request, match, fresh)
 
-            logger.info(
-                "Workflow completed: request_id=%s, theme=%s, recommendations=%s",
-                request.request_id,
-                theme,
-                len(recommendation_response.recommendations),
-            )
-            return recommendation_response
+    async def _close_session(
+        self,
+        session: Session | None,
+        request: RecommendationRequest,
+        response: RecommendationResponse,
+    ) -> RecommendationResponse:
+        """Record the completed turn and attach the session ID to the response."""
+        store = self.session_store
+        if session is None or store is None:
+            return response
 
-        except TimeoutError:
-            logger.error(
-                "Workflow timeout: request_id=%s, theme=%s, timeout=%ss",
-                request.request_id,
-                theme,
-                settings.workflow_timeout,
-            )
-            raise
+        session.append_turn(request.user_input, response.message, store.max_messages)
+        session.profile = response.user_profile
+        await store.save(session)
+        return response.model_copy(update={"session_id": session.session_id})
+
+    async def get_batch_recommendations(
+        self, theme: ThemeLiteral, requests: list[RecommendationRequest]
+    ) -> tuple[list[RecommendationResponse | Exception], BatchStats]:
+        """Process several requests under bounded concurrency.
+
+        Requests run through ``get_recommendations`` (so they still use the
+        response cache and coalescing). Candidates named by several requests
+        are summarized once for the whole batch.
+
+        Args:
+            theme: Requested recommendation theme
+            requests: Requests of the batch
+
+        Returns:
+            Tuple of (response or exception per request in input order, batch stats)
+
+        Raises:
+            ValueError: If theme is not supported
+        """
+        if theme not in SUPPORTED_THEMES:
+            raise ValueError(f"Unsupported theme: {theme}")
+
+        semaphore = asyncio.Semaphore(max(1, settings.batch_concurrency))
+        coalescer = SummaryCoalescer(theme)
+
+        async def run_item(request: RecommendationRequest) -> RecommendationResponse | Exception:
+            async with semaphore:
+                try:
+                    return await self.get_recommendations(theme, request)
+                except Exception as exc:  # noqa: BLE001
+                    return exc
+
+        logger.info(
+            "Starting batch: theme=%s, items=%s, concurrency=%s",
+            theme,
+            len(requests),
+            settings.batch_concurrency,
+        )
+        started = time.perf_counter()
+        token = batch_summaries_var.set(coalescer)
+        try:
+            results = await asyncio.gather(*(run_item(request) for request in requests))
+        finally:
+            batch_summaries_var.reset(token)
+        elapsed = time.perf_counter() - started
+
+        succeeded = sum(not isinstance(result, Exception) for result in results)
+        batch_stats = BatchStats(
+            items=len(requests),
+            succeeded=succeeded,
+            elapsed_seconds=round(elapsed, 3),
+            items_per_second=round(len(requests) / elapsed, 3) if elapsed > 0 else 0.0,
+            summaries_deduplicated=coalescer.stats.deduplicated,
+            llm_calls_saved=coalescer.stats.calls_saved,
+        )
+
+        totals = self.batch_stats
+        totals.batches += 1
+        totals.items += len(requests)
+        totals.failed += len(requests) - succeeded
+        totals.elapsed_seconds += elapsed
+        totals.summaries_deduplicated += coalescer.stats.deduplicated
+        totals.llm_calls_saved += coalescer.stats.calls_saved
+
+        logger.info(
+            "Batch completed: theme=%s, items=%s, succeeded=%s, items_per_second=%s, "
+            "llm_calls_saved=%s",
+            theme,
+            batch_stats.items,
+            succeeded,
+            batch_stats.items_per_second,
+            batch_stats.llm_calls_saved,
+        )
+        return list(results), batch_stats
+
+    def _hedging_stats(self) -> dict[str, dict[str, object]]:
+        stats: dict[str, dict[str, object]] = {}
+        for theme, bundle in self.agents.items():
+            if bundle is None:
+                continue
+            for role in ("selector", "extractor", "insight", "fused", "single_shot"):
+                agent = getattr(bundle, role)
+                hedger = getattr(agent, "hedger", None)
+                if hedger is not None:
+                    stats[f"{theme}.{role}"] = hedger.snapshot()
+        return stats
+
+    def _prompt_budget_stats(self) -> dict[str, dict[str, int]]:
+        stats: dict[str, dict[str, int]] = {}
+        for theme, bundle in self.agents.items():
+            if bundle is None:
+                continue
+            for role in ("selector", "single_shot"):
+                builder = getattr(getattr(bundle, role), "prompt_builder", None)
+                if builder is not None:
+                    stats[f"{theme}.{role}"] = builder.snapshot()
+        return stats
+
+    def stats(self) -> dict[str, object]:
+        """Return runtime counters for diagnostics.
+
+        Returns:
+            Mapping of component name to its counters
+        """
+        return {
+            "response_cache": (
+                self.response_cache.snapshot() if self.response_cache else None
+            ),
+            "semantic_cache": (
+                self.semantic_cache.snapshot() if self.semantic_cache else None
+            ),
+            "summary_store": (
+                self.summary_store.snapshot() if self.summary_store else None
+            ),
+            "catalog": {theme: catalog.snapshot() for theme, catalog in self.catalogs.items()},
+            "sessions": self.session_store.snapshot() if self.session_store else None,
+            "warmup": asdict(self.warmup),
+            "fast_path": self.fast_path_stats.snapshot(),
+            "stage_budgets": self.stage_budgets.snapshot(),
+            "batch": self.batch_stats.snapshot(),
+            "hedging": self._hedging_stats(),
+            "prompt_budget": self._prompt_budget_stats(),
+            "coalescing": (
+                {**asdict(self.inflight.stats), "in_flight": len(self.inflight)}
+                if self.inflight
+                else None
+            ),
+        }
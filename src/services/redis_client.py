@@ -0,0 +1,125 @@
+"""Shared asyncio Redis client used by the caching layers."""
+
+from __future__ import annotations
+
+import logging
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+
+from redis.asyncio import Redis
+from redis.exceptions import ConnectionError as RedisConnectionError
+from redis.exceptions import TimeoutError as RedisTimeoutError
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Short socket timeouts keep a missing Redis from stalling the request path
+REDIS_SOCKET_TIMEOUT = 0.5
+
+_client: Redis[bytes] | None = None
+
+
+def get_redis_client() -> Redis[bytes]:
+    """Return the process-wide Redis client, creating it on first use.
+
+    The client connects lazily, so calling this does not require Redis to be up.
+
+    Returns:
+        Shared Redis client configured from settings
+    """
+    global _client
+    if _client is None:
+        logger.info(
+            "Creating Redis client: host=%s, port=%s, db=%s",
+            settings.redis_host,
+            settings.redis_port,
+            settings.redis_db,
+        )
+        _client = Redis(
+            host=settings.redis_host,
+            port=settings.redis_port,
+            db=settings.redis_db,
+            socket_connect_timeout=REDIS_SOCKET_TIMEOUT,
+            socket_timeout=REDIS_SOCKET_TIMEOUT,
+        )
+    return _client
+
+
+@dataclass(slots=True)
+class BreakerStats:
+    """Counters for the Redis circuit breaker."""
+
+    trips: int = 0
+    skipped: int = 0
+
+
+class RedisCircuitBreaker:
+    """Skips Redis for a short window after a connection failure.
+
+    While the breaker is open, callers treat Redis as a miss (or skip the
+    write) right away instead of paying the socket timeout on every request.
+    Once the window has passed, one call is let through as a probe; its
+    outcome closes the breaker or opens a new window.
+    """
+
+    def __init__(self, cooldown: float) -> None:
+        """Initialize the breaker.
+
+        Args:
+            cooldown: Seconds Redis is skipped after a failure (<= 0 disables)
+        """
+        self.cooldown = cooldown
+        self._open_until: float | None = None
+        self.stats = BreakerStats()
+
+    @property
+    def is_open(self) -> bool:
+        return self._open_until is not None and time.monotonic() < self._open_until
+
+    def allow(self) -> bool:
+        """Return whether a Redis call should be attempted now."""
+        if self._open_until is None:
+            return True
+        now = time.monotonic()
+        if now < self._open_until:
+            self.stats.skipped += 1
+            return False
+        # Let this call probe; others keep skipping until it reports back
+        self._open_until = now + self.cooldown
+        return True
+
+    @contextmanager
+    def guard(self) -> Iterator[None]:
+        """Record the outcome of the Redis calls made inside the block.
+
+        Connection failures and timeouts open the breaker; any other result,
+        including command errors, means Redis answered and closes it.
+        """
+        try:
+            yield
+        except (RedisConnectionError, RedisTimeoutError, OSError) as exc:
+            self._trip(exc)
+            raise
+        except Exception:
+            self._open_until = None
+            raise
+        self._open_until = None
+
+    def _trip(self, exc: BaseException) -> None:
+        if self.cooldown <= 0:
+            return
+        if self._open_until is None:
+            self.stats.trips += 1
+            logger.warning("Redis unreachable (%s), skipping it for %.1fs", exc, self.cooldown)
+        self._open_until = time.monotonic() + self.cooldown
+
+    def snapshot(self) -> dict[str, bool | int]:
+        """Return breaker state for diagnostics endpoints."""
+        return {**asdict(self.stats), "open": self.is_open}
+
+
+# Shared by every user of the process-wide client, since they fail together
+redis_breaker = RedisCircuitBreaker(settings.redis_breaker_cooldown)
@@ -0,0 +1,189 @@
+"""Two-tier cache for complete recommendation responses."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+from dataclasses import asdict, dataclass
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from src.config import settings
+from src.models.recommendation import (
+    RecommendationRequest,
+    RecommendationResponse,
+    ThemeLiteral,
+)
+from src.services.redis_client import RedisCircuitBreaker, get_redis_client, redis_breaker
+from src.utils.lru import LRUCache
+from src.utils.text import normalize_text
+
+logger = logging.getLogger(__name__)
+
+
+def request_cache_key(theme: ThemeLiteral, request: RecommendationRequest) -> str:
+    """Build the cache key for a request.
+
+    The key covers the theme, the normalized user input and a hash of the
+    conversation history, so the same message in a different conversation
+    never collides.
+
+    Args:
+        theme: Requested recommendation theme
+        request: Incoming recommendation request
+
+    Returns:
+        Stable hexadecimal cache key
+    """
+    history = json.dumps(
+        [[msg.role, msg.content] for msg in request.conversation_history],
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    history_hash = hashlib.sha256(history.encode("utf-8")).hexdigest()
+    input_hash = hashlib.sha256(
+        normalize_text(request.user_input).encode("utf-8")
+    ).hexdigest()
+    return f"{theme}:{input_hash[:32]}:{history_hash[:32]}"
+
+
+@dataclass(slots=True)
+class CacheStats:
+    """Hit/miss counters for the response cache."""
+
+    local_hits: int = 0
+    redis_hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    redis_errors: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.local_hits + self.redis_hits + self.misses
+        return (self.local_hits + self.redis_hits) / lookups if lookups else 0.0
+
+
+class ResponseCache:
+    """In-process LRU tier in front of an optional shared Redis tier."""
+
+    def __init__(
+        self,
+        *,
+        max_entries: int,
+        ttl: float,
+        redis_client: Redis[bytes] | None = None,
+        namespace: str = "rec:response",
+        breaker: RedisCircuitBreaker | None = None,
+    ) -> None:
+        """Initialize the cache.
+
+        Args:
+            max_entries: Capacity of the in-process LRU tier
+            ttl: Seconds a cached response stays valid in both tiers
+            redis_client: Optional Redis client for the shared tier
+            namespace: Prefix for Redis keys
+            breaker: Circuit breaker for the Redis tier; defaults to the
+                process-wide one
+        """
+        self.ttl = ttl
+        self.namespace = namespace
+        self._local: LRUCache[RecommendationResponse] = LRUCache(max_entries, ttl)
+        self._redis = redis_client
+        self._breaker = breaker or redis_breaker
+        self.stats = CacheStats()
+
+    @classmethod
+    def from_settings(cls) -> ResponseCache:
+        """Build a response cache configured from application settings."""
+        return cls(
+            max_entries=settings.response_cache_max_entries,
+            ttl=settings.response_cache_ttl,
+            redis_client=(
+                get_redis_client() if settings.response_cache_redis_enabled else None
+            ),
+        )
+
+    async def get(
+        self, theme: ThemeLiteral, request: RecommendationRequest
+    ) -> RecommendationResponse | None:
+        """Look up a cached response for the request.
+
+        Args:
+            theme: Requested recommendation theme
+            request: Incoming recommendation request
+
+        Returns:
+            Copy of the cached response carrying the request's request_id,
+            or None on a miss
+        """
+        key = request_cache_key(theme, request)
+
+        cached = self._local.get(key)
+        if cached is not None:
+            self.stats.local_hits += 1
+            return cached.model_copy(update={"request_id": request.request_id}, deep=True)
+
+        if self._redis is not None and self._breaker.allow():
+            try:
+                with self._breaker.guard():
+                    raw = await self._redis.get(f"{self.namespace}:{key}")
+            except (RedisError, OSError) as exc:
+                self.stats.redis_errors += 1
+                logger.warning("Response cache Redis lookup failed: %s", exc)
+                raw = None
+
+            if raw is not None:
+                try:
+                    response = RecommendationResponse.model_validate_json(raw)
+                except ValueError as exc:
+                    logger.warning("Discarding undecodable cached response: %s", exc)
+                else:
+                    self.stats.redis_hits += 1
+                    self._local.set(key, response)
+                    return response.model_copy(
+                        update={"request_id": request.request_id}, deep=True
+                    )
+
+        self.stats.misses += 1
+        return None
+
+    async def set(
+        self,
+        theme: ThemeLiteral,
+        request: RecommendationRequest,
+        response: RecommendationResponse,
+    ) -> None:
+        """Store a freshly generated response in both tiers.
+
+        Args:
+            theme: Requested recommendation theme
+            request: Request the response was generated for
+            response: Response to cache
+        """
+        key = request_cache_key(theme, request)
+        stored = response.model_copy(update={"request_id": ""}, deep=True)
+        self._local.set(key, stored)
+        self.stats.stores += 1
+
+        if self._redis is not None and self._breaker.allow():
+            try:
+                with self._breaker.guard():
+                    await self._redis.set(
+                        f"{self.namespace}:{key}",
+                        stored.model_dump_json(),
+                        ex=max(1, int(self.ttl)),
+                    )
+            except (RedisError, OSError) as exc:
+                self.stats.redis_errors += 1
+                logger.warning("Response cache Redis store failed: %s", exc)
+
+    def snapshot(self) -> dict[str, float | int]:
+        """Return cache counters for diagnostics endpoints."""
+        return {
+            **asdict(self.stats),
+            "hit_ratio": round(self.stats.hit_ratio, 4),
+            "local_entries": len(self._local),
+            "local_evictions": self._local.evictions,
+        }
@@ -0,0 +1,398 @@
+"""Semantic near-duplicate cache for first-turn recommendation requests.
+
+The exact-match response cache only helps when a user types the same text
+again. This cache embeds the normalized user input with a local hashing
+encoder over character n-grams (no model download, CPU only) and returns the
+cached response of the most similar recent request of the same theme when
+the cosine similarity clears a threshold.
+
+Only requests without conversation history are eligible: earlier turns
+change what a message means. A sampled share of hits is re-run through the
+workflow in the background so the false-hit rate can be watched.
+"""
+
+from __future__ import annotations
+
+import logging
+import random
+import re
+import time
+import zlib
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+
+import numpy as np
+import numpy.typing as npt
+
+from src import metrics
+from src.config import settings
+from src.models.recommendation import (
+    RecommendationRequest,
+    RecommendationResponse,
+    ThemeLiteral,
+)
+from src.utils.text import normalize_text
+
+logger = logging.getLogger(__name__)
+
+Vector = npt.NDArray[np.float32]
+
+# Request phrasing that says nothing about what is wanted; theme nouns are
+# implied by the endpoint
+FILLER_PHRASES = (
+    "推荐", "想读", "想看", "想玩", "想要", "想找", "类似", "一样", "几本", "几部",
+    "几款", "几个", "一些", "有没有", "给我", "帮我", "一下", "那种", "一点", "什么",
+    "以及", "还有", "小说", "书籍", "电影", "影片", "片子", "游戏", "动漫", "动画",
+    "番剧", "作品", "导演", "作者", "的", "吗", "呢",
+)  # fmt: skip
+# Dropped only when they stand alone, since they also occur inside words (像素, 书店)
+FILLER_CHARS = frozenset("请像我来点书番系和或")
+NEGATION_RE = re.compile(r"[不别没非]")
+_FILLER_RE = re.compile("|".join(map(re.escape, sorted(FILLER_PHRASES, key=len, reverse=True))))
+_SEPARATOR_RE = re.compile(r"[\W_]+")
+
+# Bigrams carry most of the meaning of Chinese text; single characters are ambiguous
+NGRAM_WEIGHTS = {1: 0.4, 2: 1.0, 3: 0.8}
+# A negation flips the request ("不像三体"), so it outweighs any shared n-gram
+NEGATION_WEIGHT = 3.0
+
+# An audited hit agrees with a fresh run when at least this share of titles overlaps
+AUDIT_MIN_OVERLAP = 1 / 3
+
+
+class NGramHashingEncoder:
+    """Embeds short texts as signed hashed character n-gram counts."""
+
+    def __init__(self, dim: int = 512) -> None:
+        """Initialize the encoder.
+
+        Args:
+            dim: Number of hashed feature dimensions
+        """
+        self.dim = dim
+
+    def tokens(self, text: str) -> list[str]:
+        """Return the content-bearing fragments of a request text."""
+        stripped = _FILLER_RE.sub(" ", normalize_text(text))
+        return [
+            token for token in _SEPARATOR_RE.split(stripped) if token and token not in FILLER_CHARS
+        ]
+
+    def encode(self, text: str) -> Vector:
+        """Embed a text as a unit vector (all zeros when nothing is left).
+
+        Args:
+            text: Raw user input
+
+        Returns:
+            Float32 vector of length ``dim``
+        """
+        indices: list[int] = []
+        weights: list[float] = []
+
+        def add(feature: str, weight: float) -> None:
+            digest = zlib.crc32(feature.encode("utf-8"))
+            indices.append(digest % self.dim)
+            # The sign bit keeps colliding features from inflating similarity
+            weights.append(weight if (digest >> 31) & 1 == 0 else -weight)
+
+        tokens = self.tokens(text)
+        # Checked after stripping filler, so "有没有" does not count as a negation
+        if any(NEGATION_RE.search(token) for token in tokens):
+            add("\x00negation", NEGATION_WEIGHT)
+        for token in tokens:
+            for size, weight in NGRAM_WEIGHTS.items():
+                for start in range(len(token) - size + 1):
+                    add(token[start : start + size], weight)
+
+        vector = np.zeros(self.dim, dtype=np.float32)
+        if indices:
+            np.add.at(vector, np.asarray(indices, dtype=np.intp), np.asarray(weights, np.float32))
+            norm = float(np.linalg.norm(vector))
+            if norm > 0:
+                vector /= norm
+        return vector
+
+
+@dataclass(slots=True)
+class SemanticMatch:
+    """Cached response of the most similar earlier request."""
+
+    response: RecommendationResponse
+    similarity: float
+    matched_text: str
+
+
+@dataclass(slots=True)
+class SemanticCacheStats:
+    """Counters for the semantic cache."""
+
+    hits: int = 0
+    misses: int = 0
+    ineligible: int = 0
+    stores: int = 0
+    evictions: int = 0
+    audits_agree: int = 0
+    audits_disagree: int = 0
+    audit_errors: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    @property
+    def false_hit_ratio(self) -> float:
+        audits = self.audits_agree + self.audits_disagree
+        return self.audits_disagree / audits if audits else 0.0
+
+
+class _ThemeIndex:
+    """Vectors, responses and recency of one theme's cached requests.
+
+    Rows grow by doubling up to ``max_entries``; after that the least
+    recently used (or any expired) row is overwritten.
+    """
+
+    def __init__(self, dim: int, max_entries: int) -> None:
+        self.max_entries = max_entries
+        capacity = min(max_entries, 64)
+        self.vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self.last_used = np.zeros(capacity, dtype=np.int64)
+        self.expires_at = np.zeros(capacity, dtype=np.float64)
+        self.texts: list[str] = []
+        self.responses: list[RecommendationResponse] = []
+        self.slots: dict[str, int] = {}
+
+    @property
+    def size(self) -> int:
+        return len(self.texts)
+
+    def search(self, query: Vector, now: float) -> tuple[int, float] | None:
+        if not self.size:
+            return None
+        scores = self.vectors[: self.size] @ query
+        scores[self.expires_at[: self.size] <= now] = -1.0
+        best = int(np.argmax(scores))
+        return best, float(scores[best])
+
+    def put(
+        self,
+        text: str,
+        vector: Vector,
+        response: RecommendationResponse,
+        *,
+        expires_at: float,
+        tick: int,
+        now: float,
+    ) -> bool:
+        """Store an entry; returns True when another entry was evicted."""
+        evicted = False
+        slot = self.slots.get(text)
+        if slot is None:
+            if self.size < self.max_entries:
+                slot = self.size
+                if slot == len(self.vectors):
+                    self._grow()
+                self.texts.append(text)
+                self.responses.append(response)
+            else:
+                recency = np.where(self.expires_at <= now, -1, self.last_used)
+                slot = int(np.argmin(recency))
+                evicted = self.expires_at[slot] > now
+                del self.slots[self.texts[slot]]
+                self.texts[slot] = text
+            self.slots[text] = slot
+        self.responses[slot] = response
+        self.vectors[slot] = vector
+        self.expires_at[slot] = expires_at
+        self.last_used[slot] = tick
+        return evicted
+
+    def _grow(self) -> None:
+        capacity = min(self.max_entries, len(self.vectors) * 2)
+        extra = capacity - len(self.vectors)
+        self.vectors = np.vstack(
+            [self.vectors, np.zeros((extra, self.vectors.shape[1]), np.float32)]
+        )
+        self.last_used = np.concatenate([self.last_used, np.zeros(extra, np.int64)])
+        self.expires_at = np.concatenate([self.expires_at, np.zeros(extra, np.float64)])
+
+
+class SemanticCache:
+    """Per-theme near-duplicate lookup of complete responses (in-process)."""
+
+    def __init__(
+        self,
+        *,
+        threshold: float,
+        max_entries: int,
+        ttl: float,
+        dim: int = 512,
+        audit_rate: float = 0.0,
+        clock: Callable[[], float] = time.monotonic,
+        rng: random.Random | None = None,
+    ) -> None:
+        """Initialize the cache.
+
+        Args:
+            threshold: Minimum cosine similarity for a hit
+            max_entries: Entries kept per theme before LRU eviction
+            ttl: Seconds an entry stays valid
+            dim: Encoder dimensions
+            audit_rate: Share of hits re-run to sample false hits
+            clock: Monotonic time source, overridable for tests
+            rng: Random source for audit sampling
+        """
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.audit_rate = audit_rate
+        self.encoder = NGramHashingEncoder(dim)
+        self.stats = SemanticCacheStats()
+        self._clock = clock
+        self._rng = rng or random.Random()
+        self._indexes: dict[ThemeLiteral, _ThemeIndex] = {}
+        self._tick = 0
+
+    @classmethod
+    def from_settings(cls) -> SemanticCache:
+        """Build a semantic cache configured from application settings."""
+        return cls(
+            threshold=settings.semantic_cache_threshold,
+            max_entries=settings.semantic_cache_max_entries,
+            ttl=settings.semantic_cache_ttl,
+            dim=settings.semantic_cache_dim,
+            audit_rate=settings.semantic_cache_audit_rate,
+        )
+
+    @staticmethod
+    def eligible(request: RecommendationRequest) -> bool:
+        """Return whether a request may be answered by similarity."""
+        return not request.conversation_history
+
+    def get(self, theme: ThemeLiteral, request: RecommendationRequest) -> SemanticMatch | None:
+        """Find the cached response of the most similar earlier request.
+
+        Args:
+            theme: Requested recommendation theme
+            request: Incoming first-turn request
+
+        Returns:
+            Match carrying a copy of the response with the request's
+            request_id, or None when nothing clears the threshold
+        """
+        if not self.eligible(request):
+            self.stats.ineligible += 1
+            return None
+
+        index = self._indexes.get(theme)
+        query = self.encoder.encode(request.user_input)
+        found = index.search(query, self._clock()) if index is not None else None
+        similarity = found[1] if found is not None else 0.0
+        hit = bool(found is not None and similarity >= self.threshold and query.any())
+        metrics.record_semantic_lookup(theme, hit, similarity)
+        if not hit or index is None or found is None:
+            self.stats.misses += 1
+            return None
+
+        slot = found[0]
+        self._tick += 1
+        index.last_used[slot] = self._tick
+        self.stats.hits += 1
+        return SemanticMatch(
+            response=index.responses[slot].model_copy(
+                update={"request_id": request.request_id}, deep=True
+            ),
+            similarity=similarity,
+            matched_text=index.texts[slot],
+        )
+
+    def set(
+        self,
+        theme: ThemeLiteral,
+        request: RecommendationRequest,
+        response: RecommendationResponse,
+    ) -> None:
+        """Store a freshly generated response for an eligible request.
+
+        Args:
+            theme: Requested recommendation theme
+            request: Request the response was generated for
+            response: Response to cache
+        """
+        if not self.eligible(request):
+            return
+        vector = self.encoder.encode(request.user_input)
+        if not vector.any():
+            return
+
+        index = self._indexes.get(theme)
+        if index is None:
+            index = self._indexes[theme] = _ThemeIndex(self.encoder.dim, self.max_entries)
+        now = self._clock()
+        self._tick += 1
+        evicted = index.put(
+            normalize_text(request.user_input),
+            vector,
+            response.model_copy(update={"request_id": ""}, deep=True),
+            expires_at=now + self.ttl,
+            tick=self._tick,
+            now=now,
+        )
+        self.stats.stores += 1
+        self.stats.evictions += int(evicted)
+
+    def should_audit(self) -> bool:
+        """Decide whether to re-run the current hit to check it."""
+        return self.audit_rate > 0 and self._rng.random() < self.audit_rate
+
+    def record_audit(
+        self,
+        theme: ThemeLiteral,
+        request: RecommendationRequest,
+        match: SemanticMatch,
+        fresh: RecommendationResponse | None,
+    ) -> None:
+        """Compare an audited hit with a fresh workflow run.
+
+        Args:
+            theme: Requested recommendation theme
+            request: Request that was answered from the cache
+            match: The hit that was served
+            fresh: Response of the re-run, or None when it failed
+        """
+        if fresh is None:
+            self.stats.audit_errors += 1
+            metrics.record_semantic_audit(theme, "error")
+            return
+
+        served = {card.title for card in match.response.recommendations}
+        titles = {card.title for card in fresh.recommendations}
+        overlap = len(served & titles) / max(1, min(len(served), len(titles)))
+        if overlap >= AUDIT_MIN_OVERLAP:
+            self.stats.audits_agree += 1
+            metrics.record_semantic_audit(theme, "agree")
+            return
+
+        self.stats.audits_disagree += 1
+        metrics.record_semantic_audit(theme, "disagree")
+        logger.info(
+            "Semantic cache false hit: theme=%s, similarity=%.3f, input=%r, matched=%r",
+            theme,
+            match.similarity,
+            normalize_text(request.user_input),
+            match.matched_text,
+        )
+
+    def snapshot(self) -> dict[str, float | int]:
+        """Return cache counters for diagnostics endpoints."""
+        return {
+            **asdict(self.stats),
+            "hit_ratio": round(self.stats.hit_ratio, 4),
+            "false_hit_ratio": round(self.stats.false_hit_ratio, 4),
+            "threshold": self.threshold,
+            "entries": sum(index.size for index in self._indexes.values()),
+        }
@@ -0,0 +1,224 @@
+"""Server-side conversation sessions (history plus last user profile)."""
+
+from __future__ import annotations
+
+import logging
+import secrets
+import time
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING, Protocol
+
+from pydantic import BaseModel, Field, ValidationError
+from redis.exceptions import RedisError
+
+from src.config import settings
+from src.models.recommendation import ConversationMessage, ThemeLiteral, UserProfile
+from src.services.redis_client import RedisCircuitBreaker, get_redis_client, redis_breaker
+from src.utils.lru import LRUCache
+
+if TYPE_CHECKING:
+    from redis.asyncio import Redis
+
+logger = logging.getLogger(__name__)
+
+
+class Session(BaseModel):
+    """Conversation state kept between turns of one client."""
+
+    session_id: str
+    theme: ThemeLiteral
+    history: list[ConversationMessage] = Field(default_factory=list)
+    profile: UserProfile | None = None
+
+    def append_turn(self, user_message: str, assistant_message: str, max_messages: int) -> None:
+        """Record one exchange, keeping only the most recent messages."""
+        self.history.extend(
+            [
+                ConversationMessage(role="user", content=user_message),
+                ConversationMessage(role="assistant", content=assistant_message),
+            ]
+        )
+        if len(self.history) > max_messages:
+            del self.history[: len(self.history) - max_messages]
+
+
+class SessionBackend(Protocol):
+    """Storage backend for serialized sessions."""
+
+    async def get(self, session_id: str) -> str | None:
+        """Return the serialized session, or None when missing or expired."""
+        ...
+
+    async def set(self, session_id: str, payload: str) -> None:
+        """Store a serialized session and refresh its TTL."""
+        ...
+
+    def __len__(self) -> int:
+        """Return the number of stored sessions, or -1 when unknown."""
+        ...
+
+
+class MemorySessionBackend:
+    """Per-process LRU backend; sessions do not survive restarts."""
+
+    def __init__(self, *, max_entries: int, ttl: float) -> None:
+        self._cache: LRUCache[str] = LRUCache(max_entries, ttl)
+
+    async def get(self, session_id: str) -> str | None:
+        return self._cache.get(session_id)
+
+    async def set(self, session_id: str, payload: str) -> None:
+        self._cache.set(session_id, payload)
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+
+class RedisSessionBackend:
+    """Shared Redis backend; a sorted-set index bounds the number of sessions."""
+
+    def __init__(
+        self,
+        client: Redis[bytes],
+        *,
+        max_entries: int,
+        ttl: float,
+        namespace: str = "rec:session",
+        breaker: RedisCircuitBreaker | None = None,
+    ) -> None:
+        self._client = client
+        self._breaker = breaker or redis_breaker
+        self._max_entries = max_entries
+        self._ttl = max(1, int(ttl))
+        self._namespace = namespace
+        self._index_key = f"{namespace}:index"
+
+    async def get(self, session_id: str) -> str | None:
+        if not self._breaker.allow():
+            return None
+        with self._breaker.guard():
+            value = await self._client.get(f"{self._namespace}:{session_id}")
+        if value is None:
+            return None
+        return value.decode("utf-8") if isinstance(value, bytes) else str(value)
+
+    async def set(self, session_id: str, payload: str) -> None:
+        if not self._breaker.allow():
+            return
+        with self._breaker.guard():
+            await self._store(session_id, payload)
+
+    async def _store(self, session_id: str, payload: str) -> None:
+        async with self._client.pipeline(transaction=False) as pipe:
+            pipe.set(f"{self._namespace}:{session_id}", payload, ex=self._ttl)
+            pipe.zadd(self._index_key, {session_id: time.time()})
+            pipe.zcard(self._index_key)
+            *_, size = await pipe.execute()
+
+        overflow = int(size) - self._max_entries
+        if overflow > 0:
+            # Drop the least recently updated sessions
+            stale = await self._client.zpopmin(self._index_key, overflow)
+            if stale:
+                await self._client.delete(
+                    *(f"{self._namespace}:{self._decode(member)}" for member, _ in stale)
+                )
+
+    @staticmethod
+    def _decode(member: bytes | str) -> str:
+        return member.decode("utf-8") if isinstance(member, bytes) else member
+
+    def __len__(self) -> int:
+        return -1
+
+
+@dataclass(slots=True)
+class SessionStats:
+    """Counters for session lookups."""
+
+    resumed: int = 0
+    created: int = 0
+    expired: int = 0  # Unknown, expired or other-theme session IDs
+    errors: int = 0
+
+
+class SessionStore:
+    """Front-end over a session backend that tolerates backend failures."""
+
+    def __init__(self, backend: SessionBackend, *, max_messages: int) -> None:
+        self.backend = backend
+        self.max_messages = max_messages
+        self.stats = SessionStats()
+
+    async def open(self, session_id: str | None, theme: ThemeLiteral) -> Session:
+        """Load a session, or start a new one with a fresh ID.
+
+        A new ID is issued when the requested session is unknown, expired or
+        belongs to another theme, so clients can tell the history was reset.
+
+        Args:
+            session_id: Session ID sent by the client, if any
+            theme: Theme of the current request
+
+        Returns:
+            Existing or newly created session
+        """
+        if session_id:
+            session = await self._load(session_id)
+            if session is not None and session.theme == theme:
+                self.stats.resumed += 1
+                return session
+            self.stats.expired += 1
+            logger.info("Session %s not resumable for theme=%s, starting a new one", session_id, theme)
+
+        self.stats.created += 1
+        return Session(session_id=secrets.token_urlsafe(16), theme=theme)
+
+    async def save(self, session: Session) -> None:
+        """Persist a session after a completed turn."""
+        try:
+            await self.backend.set(session.session_id, session.model_dump_json())
+        except (RedisError, OSError) as exc:
+            self.stats.errors += 1
+            logger.warning("Session write failed: %s", exc)
+
+    async def _load(self, session_id: str) -> Session | None:
+        try:
+            payload = await self.backend.get(session_id)
+        except (RedisError, OSError) as exc:
+            self.stats.errors += 1
+            logger.warning("Session lookup failed: %s", exc)
+            return None
+        if payload is None:
+            return None
+        try:
+            return Session.model_validate_json(payload)
+        except ValidationError:
+            logger.warning("Discarding unreadable session %s", session_id)
+            return None
+
+    def snapshot(self) -> dict[str, int]:
+        """Return session counters for diagnostics endpoints."""
+        return {**asdict(self.stats), "entries": len(self.backend)}
+
+
+def build_session_store() -> SessionStore | None:
+    """Create the session store selected by settings.
+
+    Returns:
+        Configured session store, or None when disabled
+    """
+    backend_name = settings.session_store_backend
+    max_entries = settings.session_max_entries
+    ttl = settings.session_ttl
+
+    backend: SessionBackend
+    if backend_name == "none":
+        return None
+    if backend_name == "redis":
+        backend = RedisSessionBackend(get_redis_client(), max_entries=max_entries, ttl=ttl)
+    else:
+        backend = MemorySessionBackend(max_entries=max_entries, ttl=ttl)
+
+    logger.info("Session store enabled: backend=%s, ttl=%ss", backend_name, ttl)
+    return SessionStore(backend, max_messages=settings.session_max_messages)
@@ -0,0 +1,80 @@
+"""In-flight request coalescing ("singleflight") for identical work."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Generic, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass(slots=True)
+class _Call(Generic[T]):
+    task: asyncio.Future[T]
+    waiters: int = 0
+
+
+@dataclass(slots=True)
+class SingleFlightStats:
+    """Counters for coalesced calls."""
+
+    leaders: int = 0
+    joined: int = 0
+    abandoned: int = 0  # Shared calls cancelled because every waiter left
+
+
+class SingleFlight(Generic[T]):
+    """Run at most one call per key at a time; concurrent callers share its result.
+
+    Callers await the shared task through ``asyncio.shield``, so cancelling one
+    waiter does not cancel the work while other waiters still depend on it.
+    The task is cancelled only when its last waiter goes away.
+    """
+
+    def __init__(self) -> None:
+        self._calls: dict[str, _Call[T]] = {}
+        self.stats = SingleFlightStats()
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run ``fn`` for ``key`` unless an identical call is already in flight.
+
+        Args:
+            key: Deduplication key
+            fn: Zero-argument coroutine factory producing the result
+
+        Returns:
+            Result of the (possibly shared) call
+        """
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(task=asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+            self.stats.leaders += 1
+        else:
+            self.stats.joined += 1
+            logger.debug("Joining in-flight call: key=%s, waiters=%s", key, call.waiters)
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                self.stats.abandoned += 1
+                # Forget it now: the cancelled task only finishes on a later loop turn,
+                # and a caller arriving before then must start a fresh call
+                self._forget(key, call)
+                call.task.cancel()
+
+    def _forget(self, key: str, call: _Call[T]) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    def __len__(self) -> int:
+        return len(self._calls)
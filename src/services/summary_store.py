@@ -0,0 +1,345 @@
+"""Content-addressed store for per-item summaries.
+
+Summaries produced by the EssenceExtractor depend only on the theme, the
+item title and its creator, so they can be reused across users and requests.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Protocol
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from src.config import BASE_DIR, settings
+from src.models.recommendation import RecommendationCandidate, ThemeLiteral
+from src.services.redis_client import RedisCircuitBreaker, get_redis_client, redis_breaker
+from src.utils.lru import LRUCache
+from src.utils.text import normalize_text
+
+logger = logging.getLogger(__name__)
+
+
+def summary_key(
+    theme: ThemeLiteral, candidate: RecommendationCandidate, prompt_digest: str = ""
+) -> str:
+    """Build the content address of a candidate's summary.
+
+    Args:
+        theme: Recommendation theme
+        candidate: Candidate item
+        prompt_digest: Digest of the extractor prompt, so prompt edits
+            invalidate previously stored summaries
+
+    Returns:
+        Hexadecimal content hash
+    """
+    identity = json.dumps(
+        [
+            theme,
+            normalize_text(candidate.title),
+            normalize_text(candidate.creator),
+            prompt_digest,
+        ],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(identity.encode("utf-8")).hexdigest()
+
+
+class SummaryBackend(Protocol):
+    """Storage backend for summaries keyed by content hash."""
+
+    async def get_many(self, keys: list[str]) -> dict[str, str]:
+        """Return stored summaries for the given keys, skipping misses."""
+        ...
+
+    async def set_many(self, items: dict[str, str]) -> None:
+        """Store summaries keyed by content hash."""
+        ...
+
+    def __len__(self) -> int:
+        """Return the number of stored summaries, or -1 when unknown."""
+        ...
+
+
+class MemorySummaryBackend:
+    """Per-process LRU backend."""
+
+    def __init__(self, *, max_entries: int, ttl: float) -> None:
+        self._cache: LRUCache[str] = LRUCache(max_entries, ttl)
+
+    async def get_many(self, keys: list[str]) -> dict[str, str]:
+        result: dict[str, str] = {}
+        for key in keys:
+            value = self._cache.get(key)
+            if value is not None:
+                result[key] = value
+        return result
+
+    async def set_many(self, items: dict[str, str]) -> None:
+        for key, value in items.items():
+            self._cache.set(key, value)
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+
+class RedisSummaryBackend:
+    """Shared Redis backend; a sorted-set index bounds the number of entries."""
+
+    def __init__(
+        self,
+        client: Redis[bytes],
+        *,
+        max_entries: int,
+        ttl: float,
+        namespace: str = "rec:summary",
+        breaker: RedisCircuitBreaker | None = None,
+    ) -> None:
+        self._client = client
+        self._breaker = breaker or redis_breaker
+        self._max_entries = max_entries
+        self._ttl = max(1, int(ttl))
+        self._namespace = namespace
+        self._index_key = f"{namespace}:index"
+
+    async def get_many(self, keys: list[str]) -> dict[str, str]:
+        if not keys or not self._breaker.allow():
+            return {}
+        with self._breaker.guard():
+            values = await self._client.mget([f"{self._namespace}:{key}" for key in keys])
+            found = {
+                key: value.decode("utf-8") if isinstance(value, bytes) else str(value)
+                for key, value in zip(keys, values, strict=True)
+                if value is not None
+            }
+            if found:
+                await self._touch(list(found))
+        return found
+
+    async def _touch(self, keys: list[str]) -> None:
+        # Refresh hits in the index and their TTL, so eviction drops the least
+        # recently used entries rather than the least recently stored ones
+        async with self._client.pipeline(transaction=False) as pipe:
+            pipe.zadd(self._index_key, dict.fromkeys(keys, time.time()), xx=True)
+            for key in keys:
+                pipe.expire(f"{self._namespace}:{key}", self._ttl)
+            await pipe.execute()
+
+    async def set_many(self, items: dict[str, str]) -> None:
+        if not items or not self._breaker.allow():
+            return
+        with self._breaker.guard():
+            await self._store(items)
+
+    async def _store(self, items: dict[str, str]) -> None:
+        now = time.time()
+        async with self._client.pipeline(transaction=False) as pipe:
+            for key, value in items.items():
+                pipe.set(f"{self._namespace}:{key}", value, ex=self._ttl)
+                pipe.zadd(self._index_key, {key: now})
+            pipe.zcard(self._index_key)
+            results = await pipe.execute()
+
+        overflow = int(results[-1]) - self._max_entries
+        if overflow > 0:
+            stale = await self._client.zrange(self._index_key, 0, overflow - 1)
+            if stale:
+                names = [
+                    s.decode("utf-8") if isinstance(s, bytes) else str(s) for s in stale
+                ]
+                await self._client.delete(*(f"{self._namespace}:{n}" for n in names))
+                await self._client.zrem(self._index_key, *names)
+
+    def __len__(self) -> int:
+        return -1
+
+
+class FileSummaryBackend:
+    """Local SQLite file backend for single-host deployments."""
+
+    def __init__(self, path: Path, *, max_entries: int, ttl: float) -> None:
+        self._path = path
+        self._max_entries = max_entries
+        self._ttl = ttl
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self._path, check_same_thread=False)
+        self._lock = asyncio.Lock()
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS summaries ("
+            "key TEXT PRIMARY KEY, summary TEXT NOT NULL, "
+            "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_summaries_accessed ON summaries(accessed_at)"
+        )
+        self._conn.commit()
+        # Row count as of the last write, so __len__ never queries on the event loop
+        self._count = self._count_sync()
+
+    async def get_many(self, keys: list[str]) -> dict[str, str]:
+        if not keys:
+            return {}
+        async with self._lock:
+            return await asyncio.to_thread(self._get_many_sync, keys)
+
+    async def set_many(self, items: dict[str, str]) -> None:
+        if not items:
+            return
+        async with self._lock:
+            await asyncio.to_thread(self._set_many_sync, items)
+
+    def _get_many_sync(self, keys: list[str]) -> dict[str, str]:
+        now = time.time()
+        placeholders = ",".join("?" for _ in keys)
+        rows = self._conn.execute(
+            f"SELECT key, summary FROM summaries "
+            f"WHERE key IN ({placeholders}) AND expires_at > ?",
+            (*keys, now),
+        ).fetchall()
+        if rows:
+            self._conn.executemany(
+                "UPDATE summaries SET accessed_at = ? WHERE key = ?",
+                [(now, key) for key, _ in rows],
+            )
+            self._conn.commit()
+        return dict(rows)
+
+    def _set_many_sync(self, items: dict[str, str]) -> None:
+        now = time.time()
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO summaries (key, summary, expires_at, accessed_at) "
+            "VALUES (?, ?, ?, ?)",
+            [(key, value, now + self._ttl, now) for key, value in items.items()],
+        )
+        self._conn.execute("DELETE FROM summaries WHERE expires_at <= ?", (now,))
+        self._conn.execute(
+            "DELETE FROM summaries WHERE key IN ("
+            "SELECT key FROM summaries ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self._max_entries,),
+        )
+        self._conn.commit()
+        self._count = self._count_sync()
+
+    def _count_sync(self) -> int:
+        row = self._conn.execute("SELECT COUNT(*) FROM summaries").fetchone()
+        return int(row[0])
+
+    def __len__(self) -> int:
+        return self._count
+
+
+@dataclass(slots=True)
+class SummaryStoreStats:
+    """Hit/miss counters for the summary store."""
+
+    hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    errors: int = 0
+
+
+class SummaryStore:
+    """Front-end over a summary backend that tolerates backend failures."""
+
+    def __init__(self, backend: SummaryBackend) -> None:
+        self.backend = backend
+        self.stats = SummaryStoreStats()
+
+    async def lookup(
+        self,
+        theme: ThemeLiteral,
+        candidates: list[RecommendationCandidate],
+        prompt_digest: str = "",
+    ) -> dict[str, str]:
+        """Return stored summaries for the candidates that have one.
+
+        Args:
+            theme: Recommendation theme
+            candidates: Candidates to look up
+            prompt_digest: Digest of the extractor prompt
+
+        Returns:
+            Mapping of candidate title to stored summary
+        """
+        keys = {summary_key(theme, c, prompt_digest): c.title for c in candidates}
+        try:
+            found = await self.backend.get_many(list(keys))
+        except (RedisError, OSError, sqlite3.Error) as exc:
+            self.stats.errors += 1
+            logger.warning("Summary store lookup failed: %s", exc)
+            found = {}
+
+        self.stats.hits += len(found)
+        self.stats.misses += len(keys) - len(found)
+        return {keys[key]: summary for key, summary in found.items()}
+
+    async def save(
+        self,
+        theme: ThemeLiteral,
+        candidates: list[RecommendationCandidate],
+        summaries: dict[str, str],
+        prompt_digest: str = "",
+    ) -> None:
+        """Persist generated summaries for the given candidates.
+
+        Args:
+            theme: Recommendation theme
+            candidates: Candidates the summaries were generated for
+            summaries: Mapping of candidate title to summary
+            prompt_digest: Digest of the extractor prompt
+        """
+        items = {
+            summary_key(theme, c, prompt_digest): summaries[c.title]
+            for c in candidates
+            if summaries.get(c.title)
+        }
+        if not items:
+            return
+        try:
+            await self.backend.set_many(items)
+            self.stats.stores += len(items)
+        except (RedisError, OSError, sqlite3.Error) as exc:
+            self.stats.errors += 1
+            logger.warning("Summary store write failed: %s", exc)
+
+    def snapshot(self) -> dict[str, int]:
+        """Return store counters for diagnostics endpoints."""
+        return {**asdict(self.stats), "entries": len(self.backend)}
+
+
+def build_summary_store() -> SummaryStore | None:
+    """Create the summary store selected by settings.
+
+    Returns:
+        Configured summary store, or None when disabled
+    """
+    backend_name = settings.summary_store_backend
+    max_entries = settings.summary_store_max_entries
+    ttl = settings.summary_store_ttl
+
+    backend: SummaryBackend
+    if backend_name == "none":
+        return None
+    if backend_name == "redis":
+        backend = RedisSummaryBackend(
+            get_redis_client(), max_entries=max_entries, ttl=ttl
+        )
+    elif backend_name == "file":
+        path = Path(settings.summary_store_path)
+        if not path.is_absolute():
+            path = BASE_DIR / path
+        backend = FileSummaryBackend(path, max_entries=max_entries, ttl=ttl)
+    else:
+        backend = MemorySummaryBackend(max_entries=max_entries, ttl=ttl)
+
+    logger.info("Summary store enabled: backend=%s, ttl=%ss", backend_name, ttl)
+    return SummaryStore(backend)
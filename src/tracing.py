@@ -0,0 +1,149 @@
+"""Distributed tracing for the recommendation workflow.
+
+Code is instrumented through the OpenTelemetry API, which is a no-op until
+:func:`setup_tracing` installs an SDK tracer provider. Exporting needs the
+optional ``tracing`` extra (``opentelemetry-sdk`` and the OTLP/HTTP exporter):
+
+- ``TRACING_EXPORTER=otlp`` sends spans to a collector at ``TRACING_OTLP_ENDPOINT``
+- ``TRACING_EXPORTER=jsonl`` appends one JSON object per span to
+  ``TRACING_JSONL_PATH``, for machines without a collector
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+from collections.abc import Sequence
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from opentelemetry import trace
+
+from src.config import settings
+
+if TYPE_CHECKING:
+    from opentelemetry.sdk.trace import ReadableSpan, TracerProvider
+    from opentelemetry.sdk.trace.export import SpanExporter
+
+logger = logging.getLogger(__name__)
+
+tracer = trace.get_tracer("recommendation")
+
+_provider: TracerProvider | None = None
+
+
+def _format_id(value: int, width: int) -> str:
+    return format(value, f"0{width}x")
+
+
+def span_to_dict(span: ReadableSpan) -> dict[str, Any]:
+    """Convert a finished span to a JSON-serializable mapping."""
+    context = span.get_span_context()
+    start = span.start_time or 0
+    end = span.end_time or start
+    return {
+        "name": span.name,
+        "trace_id": _format_id(context.trace_id, 32) if context else None,
+        "span_id": _format_id(context.span_id, 16) if context else None,
+        "parent_id": _format_id(span.parent.span_id, 16) if span.parent else None,
+        "start_time_unix_nano": start,
+        "duration_ms": round((end - start) / 1e6, 3),
+        "status": span.status.status_code.name,
+        "attributes": dict(span.attributes or {}),
+        "events": [
+            {"name": event.name, "attributes": dict(event.attributes or {})}
+            for event in span.events
+        ],
+    }
+
+
+def _jsonl_exporter(path: Path) -> SpanExporter:
+    from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+
+    class JsonLinesSpanExporter(SpanExporter):
+        """Append finished spans to a JSON-lines file.
+
+        Each span is written with a single ``write`` on a file opened in
+        append mode, so the workers of one host can share the file.
+        """
+
+        def __init__(self, path: Path) -> None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+            self._lock = threading.Lock()
+
+        def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+            try:
+                with self._lock:
+                    for span in spans:
+                        line = json.dumps(span_to_dict(span), ensure_ascii=False, default=str)
+                        os.write(self._fd, (line + "\n").encode("utf-8"))
+            except OSError as exc:
+                logger.warning("Writing trace spans failed: %s", exc)
+                return SpanExportResult.FAILURE
+            return SpanExportResult.SUCCESS
+
+        def shutdown(self) -> None:
+            with self._lock:
+                os.close(self._fd)
+
+    return JsonLinesSpanExporter(path)
+
+
+def _otlp_exporter(endpoint: str) -> SpanExporter:
+    from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+
+    return OTLPSpanExporter(endpoint=endpoint)
+
+
+def setup_tracing() -> None:
+    """Install the tracer provider selected by settings.
+
+    Does nothing when tracing is disabled; logs a warning and keeps the no-op
+    tracer when the optional SDK packages are missing.
+    """
+    global _provider
+    exporter_name = settings.tracing_exporter
+    if exporter_name == "none" or _provider is not None:
+        return
+
+    try:
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+        from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+
+        if exporter_name == "otlp":
+            exporter = _otlp_exporter(settings.tracing_otlp_endpoint)
+        else:
+            exporter = _jsonl_exporter(Path(settings.tracing_jsonl_path))
+    except ImportError as exc:
+        logger.warning(
+            "TRACING_EXPORTER=%s needs the 'tracing' extra (%s); tracing disabled",
+            exporter_name,
+            exc,
+        )
+        return
+
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": settings.tracing_service_name}),
+        sampler=ParentBased(TraceIdRatioBased(settings.tracing_sample_ratio)),
+    )
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+    _provider = provider
+    logger.info(
+        "Tracing enabled: exporter=%s, sample_ratio=%s",
+        exporter_name,
+        settings.tracing_sample_ratio,
+    )
+
+
+def shutdown_tracing() -> None:
+    """Flush pending spans and stop the exporter."""
+    global _provider
+    if _provider is not None:
+        _provider.shutdown()
+        _provider = None
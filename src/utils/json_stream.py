@@ -0,0 +1,163 @@
+"""Incremental parser for JSON objects that arrive in streamed chunks."""
+
+from __future__ import annotations
+
+import json
+import logging
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+class StreamingJSONFieldParser:
+    """Emit selected fields of a top-level JSON object as soon as they close.
+
+    Object fields (e.g. ``user_profile``) are emitted once their closing brace
+    arrives. Array fields (e.g. ``candidates``) emit each object element as soon
+    as that element closes, before the rest of the array has been streamed.
+    Text before the first ``{`` (such as a Markdown code fence or prose with
+    brackets) is ignored.
+
+    The parser never raises on malformed input; it simply stops emitting, and
+    the accumulated :attr:`text` can be handed to a regular parser afterwards.
+    """
+
+    def __init__(
+        self,
+        *,
+        object_fields: tuple[str, ...] = (),
+        array_fields: tuple[str, ...] = (),
+    ) -> None:
+        """Initialize the parser.
+
+        Args:
+            object_fields: Top-level keys whose object values should be emitted
+            array_fields: Top-level keys whose array elements should be emitted
+        """
+        self.object_fields = object_fields
+        self.array_fields = array_fields
+        self._chunks: list[str] = []
+        self._buffer = ""
+        self._pos = 0
+        self._stack: list[str] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = -1
+        self._last_string: str | None = None
+        self._current_key: str | None = None
+        self._capture_start = -1
+        self._capture_depth = 0
+        self._capture_field: str | None = None
+        self._done = False
+
+    @property
+    def text(self) -> str:
+        """Full text received so far."""
+        return "".join(self._chunks)
+
+    def feed(self, chunk: str) -> list[tuple[str, Any]]:
+        """Consume a chunk and return values that completed within it.
+
+        Args:
+            chunk: Next piece of streamed text
+
+        Returns:
+            List of (field name, decoded value) pairs in arrival order
+        """
+        self._chunks.append(chunk)
+        if self._done:
+            return []
+        self._buffer += chunk
+
+        emitted: list[tuple[str, Any]] = []
+        buffer = self._buffer
+        pos = self._pos
+        while pos < len(buffer):
+            char = buffer[pos]
+
+            if not self._stack and char != "{":
+                # Prose before the object may hold brackets or quotes of its own
+                pos += 1
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if len(self._stack) == 1:
+                        self._last_string = self._decode_string(
+                            buffer[self._string_start : pos + 1]
+                        )
+                pos += 1
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = pos
+            elif char in "{[":
+                self._open(char, pos)
+            elif char in "}]":
+                value = self._close(buffer, pos)
+                if value is not None:
+                    emitted.append(value)
+                if not self._stack and self._done:
+                    pos += 1
+                    break
+            elif len(self._stack) == 1:
+                if char == ":":
+                    self._current_key = self._last_string
+                elif char == ",":
+                    self._current_key = None
+            pos += 1
+
+        self._pos = pos
+        return emitted
+
+    def _open(self, char: str, pos: int) -> None:
+        self._stack.append(char)
+        depth = len(self._stack)
+        if char != "{" or self._capture_start >= 0:
+            return
+
+        key = self._current_key
+        if depth == 2 and key in self.object_fields:
+            self._begin_capture(pos, key)
+        elif depth == 3 and self._stack[1] == "[" and key in self.array_fields:
+            self._begin_capture(pos, key)
+
+    def _begin_capture(self, pos: int, field: str | None) -> None:
+        self._capture_start = pos
+        self._capture_depth = len(self._stack)
+        self._capture_field = field
+
+    def _close(self, buffer: str, pos: int) -> tuple[str, Any] | None:
+        if not self._stack:
+            return None
+        depth = len(self._stack)
+        self._stack.pop()
+        if not self._stack:
+            self._done = True
+
+        if self._capture_start < 0 or depth != self._capture_depth:
+            return None
+
+        raw = buffer[self._capture_start : pos + 1]
+        field = self._capture_field
+        self._capture_start = -1
+        self._capture_field = None
+        try:
+            return str(field), json.loads(raw)
+        except json.JSONDecodeError as exc:
+            logger.debug("Skipping undecodable streamed value for %s: %s", field, exc)
+            return None
+
+    @staticmethod
+    def _decode_string(raw: str) -> str | None:
+        try:
+            value = json.loads(raw)
+        except json.JSONDecodeError:
+            return None
+        return value if isinstance(value, str) else None
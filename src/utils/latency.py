@@ -0,0 +1,44 @@
+"""Sliding window of recent latencies with percentile lookup."""
+
+from __future__ import annotations
+
+import math
+from collections import deque
+
+
+class LatencyWindow:
+    """Keeps the most recent latency samples and reports percentiles."""
+
+    def __init__(self, size: int) -> None:
+        """Initialize the window.
+
+        Args:
+            size: Maximum number of samples kept
+        """
+        self._samples: deque[float] = deque(maxlen=size)
+
+    def add(self, seconds: float) -> None:
+        """Record one latency sample."""
+        self._samples.append(seconds)
+
+    def clear(self) -> None:
+        """Drop all samples."""
+        self._samples.clear()
+
+    def percentile(self, pct: float) -> float | None:
+        """Return the nearest-rank percentile, or None when empty.
+
+        Args:
+            pct: Percentile between 0 and 100
+
+        Returns:
+            Latency in seconds at the given percentile
+        """
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        rank = math.ceil(pct / 100 * len(ordered)) - 1
+        return ordered[min(max(rank, 0), len(ordered) - 1)]
+
+    def __len__(self) -> int:
+        return len(self._samples)
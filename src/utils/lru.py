@@ -0,0 +1,96 @@
+"""Bounded in-process LRU cache with per-entry expiry."""
+
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Generic, TypeVar
+
+V = TypeVar("V")
+
+
+class LRUCache(Generic[V]):
+    """Least-recently-used cache with a fixed capacity and a TTL.
+
+    Not thread-safe; intended for use from a single asyncio event loop.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl: float | None = None,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of entries kept before evicting the oldest
+            ttl: Seconds an entry stays valid, or None to never expire
+            clock: Monotonic time source, overridable for tests
+        """
+        if max_entries <= 0:
+            raise ValueError("max_entries must be positive")
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._data: OrderedDict[str, tuple[float, V]] = OrderedDict()
+        self.evictions = 0
+
+    def get(self, key: str) -> V | None:
+        """Return the cached value and mark it as recently used.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Cached value, or None when missing or expired
+        """
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at <= self._clock():
+            del self._data[key]
+            return None
+
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: V, ttl: float | None = None) -> None:
+        """Store a value, evicting the least recently used entry when full.
+
+        Args:
+            key: Cache key
+            value: Value to cache
+            ttl: Optional per-entry TTL overriding the cache default
+        """
+        effective_ttl = ttl if ttl is not None else self.ttl
+        expires_at = (
+            self._clock() + effective_ttl if effective_ttl is not None else float("inf")
+        )
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key: str) -> V | None:
+        """Remove an entry and return its value if it was still valid."""
+        entry = self._data.pop(key, None)
+        if entry is None or entry[0] <= self._clock():
+            return None
+        return entry[1]
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        self._data.clear()
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and self.get(key) is not None
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -0,0 +1,27 @@
+"""Request-scoped context shared between the API layer and LLM calls."""
+
+from __future__ import annotations
+
+import time
+from contextvars import ContextVar
+
+# Identifies the caller for fair sharing (API key hash or client address)
+client_id_var: ContextVar[str] = ContextVar("client_id", default="anonymous")
+
+# Server-side conversation session of the current request, if any
+session_id_var: ContextVar[str | None] = ContextVar("session_id", default=None)
+
+# Absolute time.monotonic() deadline of the current request, if any
+deadline_var: ContextVar[float | None] = ContextVar("deadline", default=None)
+
+
+def remaining_budget() -> float | None:
+    """Return seconds left before the current request's deadline.
+
+    Returns:
+        Remaining seconds (may be negative), or None when no deadline is set
+    """
+    deadline = deadline_var.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
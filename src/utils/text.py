@@ -0,0 +1,24 @@
+"""Text normalization helpers shared by cache keys and indexes."""
+
+from __future__ import annotations
+
+import re
+import unicodedata
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text so trivially different spellings compare equal.
+
+    Applies NFKC folding (full-width to half-width), lower-casing and
+    whitespace collapsing.
+
+    Args:
+        text: Raw text
+
+    Returns:
+        Normalized text
+    """
+    folded = unicodedata.normalize("NFKC", text).lower()
+    return _WHITESPACE_RE.sub(" ", folded).strip()
@@ -1,7 +1,19 @@
 """Integration tests for API endpoints."""
 
+import json
+import uuid
+from typing import Any
+
 import pytest
+from fastapi import Request
 from fastapi.testclient import TestClient
+from pydantic import IPvAnyNetwork, TypeAdapter
+
+from src.agents import AssemblerAgent
+from src.config import settings
+from src.main import _client_identity, recommendation_service
+from src.models.recommendation import RecommendationCandidate, UserProfile
+from src.services.recommendation_service import AgentBundle, WarmupStatus
 
 
 class TestHealthEndpoint:
@@ -14,6 +26,55 @@ class TestHealthEndpoint:
         assert response.json() == {"status": "healthy"}
 
 
+class TestReadyEndpoint:
+    """Tests for the readiness endpoint."""
+
+    def test_ready_follows_warmup(
+        self, client: TestClient, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """503 while warm-up is pending; 200 once done, degraded, or disabled."""
+        assert client.get("/ready").json()["status"] == "ready"
+
+        monkeypatch.setattr(settings, "warmup_enabled", True)
+        monkeypatch.setattr(recommendation_service, "warmup", WarmupStatus(state="warming"))
+        response = client.get("/ready")
+        assert response.status_code == 503
+        assert response.json()["status"] == "warming_up"
+
+        recommendation_service.warmup.state = "ready"
+        assert client.get("/ready").status_code == 200
+
+        recommendation_service.warmup.state = "degraded"
+        recommendation_service.warmup.errors = ["opening connections timed out after 10.0s"]
+        response = client.get("/ready")
+        assert response.status_code == 200
+        assert response.json()["status"] == "degraded"
+        assert response.json()["warmup"]["errors"] == recommendation_service.warmup.errors
+
+
+def _peer_request(host: str, forwarded: str | None = None) -> Request:
+    headers = [(b"x-forwarded-for", forwarded.encode())] if forwarded else []
+    return Request({"type": "http", "headers": headers, "client": (host, 40000)})
+
+
+class TestClientIdentity:
+    """Tests for the caller identity used by the LLM governor."""
+
+    def test_forwarded_header_needs_trusted_proxy(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Direct callers cannot choose an identity; trusted proxies name the client."""
+        networks = TypeAdapter(list[IPvAnyNetwork]).validate_python(["10.0.0.0/8"])
+        monkeypatch.setattr(settings, "trusted_proxies", networks)
+
+        assert _client_identity(_peer_request("203.0.113.7", "198.51.100.1")) == "ip:203.0.113.7"
+        assert _client_identity(_peer_request("10.0.0.2", "198.51.100.1")) == "ip:198.51.100.1"
+        # A spoofed first hop is ignored; the last hop outside our proxies wins
+        assert (
+            _client_identity(_peer_request("10.0.0.2", "1.2.3.4, 198.51.100.1, 10.0.0.3"))
+            == "ip:198.51.100.1"
+        )
+        assert _client_identity(_peer_request("10.0.0.2")) == "ip:10.0.0.2"
+
+
 class TestRootEndpoint:
     """Tests for root endpoint."""
 
@@ -75,3 +136,141 @@ class TestRecommendationEndpoint:
             json={},  # Missing required fields
         )
         assert response.status_code == 422  # Validation error
+
+
+class _FakeSelector:
+    async def process(self, **kwargs: Any) -> tuple[UserProfile, list[RecommendationCandidate], str]:
+        if "失败" in kwargs["user_message"]:
+            raise ValueError("selector rejected the request")
+        profile = UserProfile(theme="books", summary="偏好硬核科幻", attributes={"类型": "科幻"})
+        candidates = [
+            RecommendationCandidate(title="球状闪电", creator="刘慈欣"),
+            RecommendationCandidate(title="沙丘", creator="弗兰克·赫伯特"),
+        ]
+        return profile, candidates, "为你挑选了几本科幻小说。"
+
+
+class _FakeTextAgent:
+    prompt_digest = ""
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.calls = 0
+
+    async def process(self, candidates: list[RecommendationCandidate], *args: Any) -> dict[str, str]:
+        self.calls += 1
+        return {c.title: f"{c.title}{self.text}" for c in candidates}
+
+
+@pytest.fixture
+def fake_agents(monkeypatch: pytest.MonkeyPatch) -> AgentBundle:
+    """Replace the books agent bundle with deterministic fakes."""
+    bundle = AgentBundle(
+        selector=_FakeSelector(),  # type: ignore[arg-type]
+        extractor=_FakeTextAgent("：宏大世界观下的科幻叙事作品。"),  # type: ignore[arg-type]
+        insight=_FakeTextAgent("：契合你对硬核科幻的偏好。"),  # type: ignore[arg-type]
+        assembler=AssemblerAgent(theme="books"),
+    )
+    monkeypatch.setattr(recommendation_service, "_get_or_create_agents", lambda theme: bundle)
+    return bundle
+
+
+def _parse_sse(body: str) -> list[tuple[str, dict[str, Any]]]:
+    events = []
+    for frame in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in frame.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+class TestRecommendationStreamEndpoint:
+    """Tests for the SSE streaming endpoint."""
+
+    def test_stream_emits_progress_then_result(
+        self, client: TestClient, fake_agents: AgentBundle
+    ) -> None:
+        """Selector, candidates, per-item and result events arrive in order."""
+        response = client.post(
+            "/api/books/recommend/stream",
+            json={"user_message": f"流式测试 {uuid.uuid4()}"},
+        )
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+
+        events = _parse_sse(response.text)
+        names = [name for name, _ in events]
+        assert names[:2] == ["selector", "candidates"]
+        assert names.count("summary") == 2
+        assert names.count("reason") == 2
+        assert names[-1] == "result"
+        assert events[0][1]["message"] == "为你挑选了几本科幻小说。"
+        assert len(events[-1][1]["recommendations"]) == 2
+
+    def test_stream_unknown_theme(self, client: TestClient) -> None:
+        """Unsupported themes are rejected before streaming starts."""
+        response = client.post(
+            "/api/music/recommend/stream", json={"user_message": "推荐"}
+        )
+        assert response.status_code == 404
+
+
+class TestBatchRecommendationEndpoint:
+    """Tests for the batch endpoint."""
+
+    def test_batch_dedupes_summaries_and_keeps_order(
+        self, client: TestClient, fake_agents: AgentBundle
+    ) -> None:
+        """Shared candidates are summarized once; failures stay per item."""
+        tag = uuid.uuid4()
+        messages = [f"批量 {tag} {i}" for i in range(3)] + [f"失败 {tag}"]
+        response = client.post(
+            "/api/books/recommend/batch",
+            json={"requests": [{"user_message": m, "request_id": m} for m in messages]},
+        )
+        assert response.status_code == 200
+        data = response.json()
+
+        assert [item["request_id"] for item in data["results"]] == messages
+        assert [item["status_code"] for item in data["results"]] == [200, 200, 200, 400]
+        assert data["results"][3]["error"] == "selector rejected the request"
+        assert data["results"][0]["response"]["request_id"] == messages[0]
+        assert fake_agents.extractor.calls == 1  # type: ignore[attr-defined]
+        assert data["stats"]["llm_calls_saved"] == 2
+        assert data["stats"]["summaries_deduplicated"] == 4
+        assert data["stats"]["succeeded"] == 3
+
+    def test_batch_size_limit(
+        self, client: TestClient, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Batches larger than the configured limit are rejected."""
+        monkeypatch.setattr(settings, "batch_max_items", 1)
+        response = client.post(
+            "/api/books/recommend/batch",
+            json={"requests": [{"user_message": "a"}, {"user_message": "b"}]},
+        )
+        assert response.status_code == 413
+
+
+class TestMetricsEndpoint:
+    """Tests for the Prometheus scrape endpoint."""
+
+    def test_metrics_report_workflow_and_stages(
+        self, client: TestClient, fake_agents: AgentBundle
+    ) -> None:
+        """A completed request shows up in the workflow and stage histograms."""
+        response = client.post(
+            "/api/books/recommend", json={"user_message": f"指标测试 {uuid.uuid4()}"}
+        )
+        assert response.status_code == 200
+
+        scrape = client.get("/metrics")
+        assert scrape.status_code == 200
+        assert scrape.headers["content-type"].startswith("text/plain")
+        body = scrape.text
+        assert (
+            'recommendation_workflow_duration_seconds_count{mode="json",outcome="ok",theme="books"}'
+            in body
+        )
+        for stage in ("selector", "extractor", "insight", "assembler"):
+            assert f'recommendation_stage_duration_seconds_count{{stage="{stage}",theme="books"}}' in body
+        assert 'recommendation_workflows_in_flight{theme="books"} 0.0' in body
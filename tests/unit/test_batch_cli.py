@@ -0,0 +1,109 @@
+"""Unit tests for the offline bulk-run CLI."""
+
+import json
+from pathlib import Path
+
+from src.batch import load_checkpoint, run_batch
+from src.models.recommendation import (
+    RecommendationCard,
+    RecommendationRequest,
+    RecommendationResponse,
+    UserProfile,
+)
+
+
+class FakeService:
+    """Service stand-in failing requests whose message contains '失败'."""
+
+    def __init__(self) -> None:
+        self.seen: list[str] = []
+
+    async def get_recommendations(
+        self, theme: str, request: RecommendationRequest
+    ) -> RecommendationResponse:
+        self.seen.append(request.request_id)
+        if "失败" in request.user_input:
+            raise TimeoutError("upstream too slow")
+        card = RecommendationCard(
+            title="三体",
+            creator="刘慈欣",
+            summary="文明之间的黑暗森林博弈与宇宙史诗。",
+            reason="宏大硬核的设定契合你对科幻的期待。",
+        )
+        return RecommendationResponse(
+            theme=theme,  # type: ignore[arg-type]
+            user_profile=UserProfile(theme=theme),  # type: ignore[arg-type]
+            recommendations=[card, card],
+            message="为你挑选了科幻小说。",
+            request_id=request.request_id,
+        )
+
+
+def _write_input(path: Path, lines: list[dict[str, str]]) -> None:
+    path.write_text(
+        "\n".join(json.dumps(line, ensure_ascii=False) for line in lines) + "\n",
+        encoding="utf-8",
+    )
+
+
+class TestBatchCLI:
+    """Tests for run_batch and its checkpointing."""
+
+    async def test_results_written_and_resume_skips_completed(self, tmp_path: Path) -> None:
+        """A second run only retries failed requests."""
+        input_path = tmp_path / "in.jsonl"
+        output_path = tmp_path / "out.jsonl"
+        _write_input(
+            input_path,
+            [
+                {"request_id": "a", "user_message": "推荐科幻"},
+                {"request_id": "b", "user_message": "失败的请求"},
+                {"request_id": "c", "user_message": "推荐动画", "theme": "anime"},
+                {"request_id": "d", "user_message": "x", "theme": "music"},
+            ],
+        )
+
+        service = FakeService()
+        first = await run_batch(
+            input_path, output_path, theme="books", concurrency=2, service=service  # type: ignore[arg-type]
+        )
+        assert (first.succeeded, first.failed, first.invalid) == (2, 1, 1)
+        records = [json.loads(line) for line in output_path.read_text("utf-8").splitlines()]
+        assert {r["request_id"]: r["status"] for r in records} == {
+            "a": "ok",
+            "b": "error",
+            "c": "ok",
+        }
+        assert next(r for r in records if r["request_id"] == "c")["theme"] == "anime"
+        assert load_checkpoint(output_path) == {"a", "c"}
+
+        retry = FakeService()
+        second = await run_batch(
+            input_path, output_path, theme="books", concurrency=2, service=retry  # type: ignore[arg-type]
+        )
+        assert retry.seen == ["b"]
+        assert second.skipped == 2
+
+    async def test_truncated_checkpoint_line_is_ignored(self, tmp_path: Path) -> None:
+        """A partial last line from a killed run does not break resuming."""
+        input_path = tmp_path / "in.jsonl"
+        output_path = tmp_path / "out.jsonl"
+        _write_input(input_path, [{"user_message": "推荐科幻"}])
+        output_path.write_text('{"request_id": "zz", "sta', encoding="utf-8")
+
+        summary = await run_batch(
+            input_path, output_path, theme="books", concurrency=1, service=FakeService()  # type: ignore[arg-type]
+        )
+
+        assert summary.succeeded == 1
+        assert len(load_checkpoint(output_path)) == 1
+
+    def test_malformed_checkpoint_records_are_skipped(self, tmp_path: Path) -> None:
+        """Valid JSON lines that are not result records do not abort resuming."""
+        output_path = tmp_path / "out.jsonl"
+        output_path.write_text(
+            '[1, 2]\n{"status": "ok"}\n"text"\n{"request_id": "a", "status": "ok"}\n',
+            encoding="utf-8",
+        )
+
+        assert load_checkpoint(output_path) == {"a"}
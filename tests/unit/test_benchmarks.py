@@ -0,0 +1,53 @@
+"""Unit tests for the hot-path benchmark harness."""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from benchmarks import hot_paths
+
+BASELINE = Path(__file__).resolve().parents[2] / "benchmarks" / "baseline.json"
+
+
+class TestHotPathBenchmarks:
+    """Tests for the benchmark cases and the baseline comparison."""
+
+    def test_every_case_passes_its_check(self) -> None:
+        """Each case runs and still exercises the code path it names."""
+        results = hot_paths.run(hot_paths.build_benchmarks(), min_time=0, repeats=1)
+        assert results
+        assert all(result.median_us > 0 for result in results)
+
+    def test_baseline_covers_every_case(self) -> None:
+        """The stored baseline has an entry for every benchmark."""
+        baseline = json.loads(BASELINE.read_text(encoding="utf-8"))
+        names = {benchmark.name for benchmark in hot_paths.build_benchmarks()}
+        assert names == set(baseline["results"])
+
+    def test_compare_flags_slowdowns_beyond_threshold(self) -> None:
+        """Only benchmarks slower than the threshold ratio are regressions."""
+
+        def report(**medians: float) -> dict[str, object]:
+            return {"results": {name: {"median_us": value} for name, value in medians.items()}}
+
+        comparisons, regressions = hot_paths.compare(
+            report(fast=10.0, slow=20.0, new=5.0),
+            report(fast=10.0, slow=10.0),
+            threshold=1.25,
+        )
+        assert {c.name for c in comparisons} == {"fast", "slow"}
+        assert [c.name for c in regressions] == ["slow"]
+        assert regressions[0].ratio == pytest.approx(2.0)
+
+    def test_cli_exit_status_reports_regressions(self, tmp_path: Path) -> None:
+        """The CLI writes a JSON report and exits 1 on a regression."""
+        name = "model.validate_profile"
+        output = tmp_path / "results.json"
+        baseline = tmp_path / "baseline.json"
+        baseline.write_text(json.dumps({"results": {name: {"median_us": 1e-6}}}))
+
+        args = ["-k", name, "--min-time", "0", "--repeat", "1", "-o", str(output)]
+        assert hot_paths.main(args) == 0
+        assert set(json.loads(output.read_text())["results"]) == {name}
+        assert hot_paths.main([*args, "--compare", str(baseline)]) == 1
@@ -0,0 +1,95 @@
+"""Unit tests for the open-loop capacity harness."""
+
+import asyncio
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from prometheus_client import CollectorRegistry, Histogram, generate_latest
+
+from benchmarks.capacity import StepResult, find_knee, lag_between, lag_histogram, run_step
+from src.metrics import LOOP_LAG_BUCKETS
+
+
+def _step(
+    rate: float, p95: float, *, throughput: float | None = None, errors: int = 0
+) -> StepResult:
+    return StepResult(
+        rate=rate,
+        offered=rate,
+        sent=100,
+        ok=100 - errors,
+        errors=errors,
+        timeouts=0,
+        throughput=rate if throughput is None else throughput,
+        p50_ms=p95 / 2,
+        p95_ms=p95,
+        p99_ms=p95,
+        client_lag_ms_max=0.0,
+    )
+
+
+class TestRunStep:
+    """Tests for one open-loop step."""
+
+    async def test_counts_outcomes_per_status(self) -> None:
+        """Successes, errors and 504 timeouts are counted separately, per theme."""
+        app = FastAPI()
+        callers: set[str] = set()
+
+        @app.post("/api/{theme}/recommend")
+        async def recommend(theme: str, request: Request) -> JSONResponse:
+            callers.add(request.headers["x-forwarded-for"])
+            await asyncio.sleep(0.01)
+            status = {"books": 200, "games": 500, "anime": 504}[theme]
+            return JSONResponse({}, status_code=status)
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            step = await run_step(
+                client, 200, 0.2, themes=("books", "games", "anime"), clients=5, seed=1
+            )
+
+        assert step.sent == step.ok + step.errors + step.timeouts
+        assert step.ok == step.by_theme["books"]["sent"]
+        assert step.errors == step.by_theme["games"]["sent"]
+        assert step.timeouts == step.by_theme["anime"]["sent"]
+        assert step.p50_ms is not None and step.p50_ms >= 10
+        assert 1 < len(callers) <= 5
+
+
+class TestKnee:
+    """Tests for locating the saturation point."""
+
+    def test_knee_is_last_step_before_latency_blows_up(self) -> None:
+        """Steps after the first p95 blow-up are ignored even if they recover."""
+        steps = [_step(1, 500), _step(2, 520), _step(4, 700), _step(8, 1500), _step(16, 900)]
+        assert find_knee(steps, latency_factor=2.0).rate == 4
+
+    def test_throughput_shortfall_or_failures_end_the_curve(self) -> None:
+        """Falling behind the offered rate or failing requests marks saturation."""
+        assert find_knee([_step(1, 500), _step(2, 500, throughput=1.5)]).rate == 1
+        assert find_knee([_step(1, 500), _step(2, 500, errors=5)]).rate == 1
+        assert find_knee([_step(1, 500, errors=50)]) is None
+
+
+class TestLoopLag:
+    """Tests for reading server event-loop lag from /metrics."""
+
+    def test_lag_between_two_scrapes(self) -> None:
+        """Only observations made between the scrapes are counted."""
+        registry = CollectorRegistry()
+        histogram = Histogram(
+            "event_loop_lag_seconds", "lag", buckets=LOOP_LAG_BUCKETS, registry=registry
+        )
+        histogram.observe(2.0)
+        before = lag_histogram(generate_latest(registry).decode())
+        for _ in range(99):
+            histogram.observe(0.002)
+        histogram.observe(0.2)
+        after = lag_histogram(generate_latest(registry).decode())
+
+        mean, p99 = lag_between(before, after)
+        assert mean == round((99 * 0.002 + 0.2) / 100 * 1000, 2)
+        assert p99 == 2.5
+        assert lag_between(after, after) == (None, None)
@@ -0,0 +1,146 @@
+"""Unit tests for the per-theme item catalog and its build command."""
+
+import json
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from src.agents.essence_extractor import EssenceExtractorAgent
+from src.agents.selector import SelectorAgent
+from src.build_catalog import build_catalog
+from src.models.recommendation import RecommendationCandidate
+from src.services.catalog import CatalogItem, ItemCatalog, write_catalog
+
+ITEMS = [
+    CatalogItem(
+        "三体", "刘慈欣", {"年份": "2006", "页数": "302"}, "三体文明入侵与人类的生存博弈。"
+    ),
+    CatalogItem("球状闪电", "刘慈欣", {"年份": "2004"}, "一道球状闪电引出的物理奇想。"),
+    CatalogItem("三体", "Tom Lin", {"类型": "剧集改编"}, ""),
+    CatalogItem("沙丘", "弗兰克·赫伯特", {"年份": "1965"}, ""),
+]
+
+
+class RecordingLLM:
+    """Stand-in chat model that records every call."""
+
+    def __init__(self, content: str) -> None:
+        self.content = content
+        self.calls: list[Any] = []
+
+    async def ainvoke(self, messages: Any, **kwargs: Any) -> Any:
+        self.calls.append(messages)
+        return type("Message", (), {"content": self.content})()
+
+
+@pytest.fixture
+def catalog(tmp_path: Path) -> ItemCatalog:
+    path = tmp_path / "books.cat"
+    write_catalog(path, "books", ITEMS)
+    return ItemCatalog(path)
+
+
+class TestItemCatalog:
+    """Tests for the mapped file and its inverted index."""
+
+    def test_round_trip_and_index_lookups(self, catalog: ItemCatalog) -> None:
+        """Items survive the file format and both index fields find them."""
+        assert len(catalog) == 4
+        assert catalog.theme == "books"
+        assert list(catalog.items()) == ITEMS
+        assert {item.creator for item in catalog.by_title("《三体》")} == {"刘慈欣", "Tom Lin"}
+        assert [item.title for item in catalog.by_creator(" 刘慈欣")] == ["三体", "球状闪电"]
+        assert catalog.by_title("三体II") == []
+
+    def test_creator_disambiguates_shared_titles(self, catalog: ItemCatalog) -> None:
+        """A named creator must match; an unknown one takes the first title match."""
+        match = catalog.match(RecommendationCandidate(title="三体", creator="Tom Lin"))
+        assert match is not None and match.metadata == {"类型": "剧集改编"}
+        assert catalog.match(RecommendationCandidate(title="三体", creator="大刘")) is None
+        unknown = catalog.match(RecommendationCandidate(title="三体", creator="未知创作者"))
+        assert unknown is not None and unknown.creator == "刘慈欣"
+        assert catalog.stats.hits == 2 and catalog.stats.misses == 1
+
+    def test_enrich_prefers_catalog_metadata(self, catalog: ItemCatalog) -> None:
+        """Catalog metadata overrides the selector's and fills in missing keys."""
+        candidate = RecommendationCandidate(
+            title="球状闪电", creator="刘慈欣", metadata={"年份": "2005", "类型": "科幻"}
+        )
+        enriched = catalog.enrich(candidate)
+        assert enriched.metadata == {"年份": "2004", "类型": "科幻"}
+        missing = RecommendationCandidate(title="基地", creator="阿西莫夫")
+        assert catalog.enrich(missing) is missing
+
+    def test_rejects_other_files(self, tmp_path: Path) -> None:
+        """Files without the catalog header are refused."""
+        path = tmp_path / "books.cat"
+        path.write_bytes(b"not a catalog at all, just text")
+        with pytest.raises(ValueError):
+            ItemCatalog(path)
+
+
+class TestAgentsWithCatalog:
+    """Tests for the selector and extractor reading the catalog."""
+
+    def test_selector_enriches_candidates(self, catalog: ItemCatalog) -> None:
+        """Parsed candidates carry the catalog metadata and creator."""
+        agent = SelectorAgent(theme="books", catalog=catalog)
+        candidates = agent._build_candidates(
+            [{"title": "三体", "author": "刘慈欣", "year": "2008"}, {"title": "沙丘"}]
+        )
+        assert candidates[0].metadata == {"year": "2008", "年份": "2006", "页数": "302"}
+        assert candidates[1].creator == "弗兰克·赫伯特"
+
+    async def test_catalog_summaries_skip_the_llm(self, catalog: ItemCatalog) -> None:
+        """Only candidates without a catalog summary are sent to the extractor."""
+        agent = EssenceExtractorAgent(theme="books", catalog=catalog)
+        llm = RecordingLLM('[{"title": "沙丘", "summary": "沙漠星球上的权力斗争与生态寓言。"}]')
+        agent.llm = llm  # type: ignore[assignment]
+        candidates = [
+            RecommendationCandidate(title="三体", creator="刘慈欣"),
+            RecommendationCandidate(title="沙丘", creator="弗兰克·赫伯特"),
+        ]
+
+        summaries = await agent.process(candidates)
+        assert summaries["三体"] == "三体文明入侵与人类的生存博弈。"
+        assert len(llm.calls) == 1
+        assert "三体" not in llm.calls[0][1].content
+
+        llm.calls.clear()
+        assert await agent.process(candidates[:1]) == {"三体": "三体文明入侵与人类的生存博弈。"}
+        assert llm.calls == []
+
+
+class TestBuildCatalog:
+    """Tests for the offline build command."""
+
+    async def test_build_summarizes_only_new_items(self, tmp_path: Path) -> None:
+        """Given and previously built summaries are kept; the rest are generated."""
+        source = tmp_path / "items.jsonl"
+        output = tmp_path / "books.cat"
+        rows = [
+            {"title": "三体", "creator": "刘慈欣", "summary": "三体文明入侵与人类的生存博弈。"},
+            {"title": "沙丘", "creator": "弗兰克·赫伯特", "metadata": {"年份": 1965}},
+            {"creator": "无名"},
+        ]
+        source.write_text("\n".join(json.dumps(row, ensure_ascii=False) for row in rows))
+        extractor = EssenceExtractorAgent(theme="books")
+        llm = RecordingLLM('[{"title": "沙丘", "summary": "沙漠星球上的权力斗争与生态寓言。"}]')
+        extractor.llm = llm  # type: ignore[assignment]
+
+        summary = await build_catalog(
+            source, output, theme="books", batch_size=5, concurrency=2, extractor=extractor
+        )
+        assert (summary.items, summary.provided, summary.generated) == (2, 1, 1)
+        assert summary.invalid == 1 and summary.unsummarized == 0
+        built = ItemCatalog(output)
+        assert built.by_title("沙丘")[0].metadata == {"年份": "1965"}
+        assert built.meta["prompt_digest"] == extractor.prompt_digest
+        built.close()
+
+        rebuilt = await build_catalog(
+            source, output, theme="books", batch_size=5, concurrency=2, extractor=extractor
+        )
+        assert (rebuilt.reused, rebuilt.generated) == (1, 0)
+        assert len(llm.calls) == 1
@@ -0,0 +1,105 @@
+"""Unit tests for the fused essence + insight agent."""
+
+import json
+from typing import Any
+
+from src.agents import AssemblerAgent, EssenceInsightAgent
+from src.models.recommendation import (
+    RecommendationCandidate,
+    RecommendationRequest,
+    UserProfile,
+)
+from src.services.recommendation_service import AgentBundle, RecommendationService
+
+CANDIDATES = [
+    RecommendationCandidate(title="盗梦空间", creator="克里斯托弗·诺兰"),
+    RecommendationCandidate(title="银翼杀手2049", creator="丹尼斯·维伦纽瓦"),
+]
+PROFILE = UserProfile(theme="movies", attributes={"风格": "烧脑"})
+
+
+class RecordingLLM:
+    """Stand-in chat model that records every call."""
+
+    def __init__(self, content: str) -> None:
+        self.content = content
+        self.calls: list[Any] = []
+
+    async def ainvoke(self, messages: Any, **kwargs: Any) -> Any:
+        self.calls.append(messages)
+        return type("Message", (), {"content": self.content})()
+
+
+class FailingAgent:
+    """Agent that must not be called when the fused agent is active."""
+
+    async def process(self, *args: Any, **kwargs: Any) -> Any:
+        raise AssertionError("separate extractor/insight agent should not be called")
+
+
+class StaticSelector:
+    """Selector returning fixed candidates."""
+
+    async def process(self, **kwargs: Any) -> Any:
+        return PROFILE, CANDIDATES, "为你挑选了两部烧脑电影。"
+
+
+class TestEssenceInsightAgent:
+    """Tests for the fused agent."""
+
+    async def test_single_call_with_per_title_fallbacks(self) -> None:
+        """One LLM call yields both maps; missing titles get the default texts."""
+        agent = EssenceInsightAgent(theme="movies")
+        llm = RecordingLLM(
+            json.dumps(
+                {
+                    "items": [
+                        {
+                            "title": "盗梦空间",
+                            "summary": "多层梦境交错推进的科幻悬疑片。",
+                            "recommendation_reason": "复杂叙事契合你对烧脑体验的偏好。",
+                        }
+                    ]
+                },
+                ensure_ascii=False,
+            )
+        )
+        agent.llm = llm  # type: ignore[assignment]
+
+        summaries, reasons = await agent.process(CANDIDATES, PROFILE)
+
+        assert len(llm.calls) == 1
+        assert summaries["盗梦空间"] == "多层梦境交错推进的科幻悬疑片。"
+        assert reasons["盗梦空间"] == "复杂叙事契合你对烧脑体验的偏好。"
+        assert summaries["银翼杀手2049"].startswith("银翼杀手2049 由 丹尼斯·维伦纽瓦 创作")
+        assert reasons["银翼杀手2049"] == "这项推荐与您的偏好高度契合，值得体验。"
+
+    async def test_service_routes_through_fused_agent(self) -> None:
+        """A bundle with a fused agent skips the separate extractor/insight calls."""
+        fused = EssenceInsightAgent(theme="movies")
+        fused.llm = RecordingLLM(  # type: ignore[assignment]
+            json.dumps(
+                [
+                    {
+                        "title": c.title,
+                        "summary": f"{c.title}：冷峻视觉下的身份与现实拷问。",
+                        "reason": f"{c.title}：思辨深度满足你对烧脑叙事的期待。",
+                    }
+                    for c in CANDIDATES
+                ],
+                ensure_ascii=False,
+            )
+        )
+        service = RecommendationService(response_cache=None)
+        service.agents["movies"] = AgentBundle(
+            selector=StaticSelector(),  # type: ignore[arg-type]
+            extractor=FailingAgent(),  # type: ignore[arg-type]
+            insight=FailingAgent(),  # type: ignore[arg-type]
+            assembler=AssemblerAgent(theme="movies"),
+            fused=fused,
+        )
+
+        response = await service._process_workflow(
+            "movies", RecommendationRequest(user_message="推荐烧脑电影")
+        )
+        assert response.recommendations[0].reason == "盗梦空间：思辨深度满足你对烧脑叙事的期待。"
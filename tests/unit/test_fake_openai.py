@@ -0,0 +1,119 @@
+"""Unit tests for the fake OpenAI-compatible server."""
+
+import json
+import random
+
+import httpx
+import pytest
+
+from src.devtools.fake_openai import CATALOG, FakeLLMConfig, LatencySampler, create_app
+from src.llm.clients import llm_clients
+from src.models.recommendation import RecommendationRequest
+from src.services.recommendation_service import RecommendationService
+
+
+def _client(config: FakeLLMConfig) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=create_app(config)), base_url="http://fake/v1"
+    )
+
+
+def _chat(system: str, user: str, **extra: object) -> dict[str, object]:
+    return {
+        "model": "fake-model",
+        "messages": [{"role": "system", "content": system}, {"role": "user", "content": user}],
+        **extra,
+    }
+
+
+class TestFakeCompletions:
+    """Tests for the chat completions endpoint."""
+
+    async def test_selector_prompt_gets_theme_candidates(self) -> None:
+        """Selector prompts are answered with candidates of the requested theme."""
+        async with _client(FakeLLMConfig(latency=0, seed=1)) as client:
+            response = await client.post(
+                "/chat/completions",
+                json=_chat('请针对 游戏 推荐以 JSON 格式回复 "candidates"', "想玩开放世界"),
+            )
+        assert response.status_code == 200
+        body = response.json()
+        data = json.loads(body["choices"][0]["message"]["content"])
+        assert len(data["candidates"]) == 3
+        assert {c["title"] for c in data["candidates"]} <= {title for title, *_ in CATALOG["games"]}
+        assert body["usage"]["total_tokens"] > 0
+
+    async def test_same_prompt_same_answer(self) -> None:
+        """Completions depend only on the request."""
+        request = _chat('请针对 电影 推荐 "candidates"', "想看悬疑片")
+        async with _client(FakeLLMConfig(latency=0)) as client:
+            first = (await client.post("/chat/completions", json=request)).json()
+            second = (await client.post("/chat/completions", json=request)).json()
+        assert first["choices"][0]["message"] == second["choices"][0]["message"]
+
+    async def test_streaming_sends_chunks_and_usage(self) -> None:
+        """Streamed answers reassemble into the completion and end with usage."""
+        request = _chat(
+            '请针对 书籍 推荐 "candidates"',
+            "推荐科幻",
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        async with _client(FakeLLMConfig(latency=0)) as client:
+            response = await client.post("/chat/completions", json=request)
+        frames = [
+            line.removeprefix("data: ")
+            for line in response.text.splitlines()
+            if line.startswith("data: ")
+        ]
+        assert frames[-1] == "[DONE]"
+        chunks = [json.loads(frame) for frame in frames[:-1]]
+        text = "".join(
+            choice["delta"].get("content", "") for chunk in chunks for choice in chunk["choices"]
+        )
+        assert json.loads(text)["candidates"]
+        assert chunks[-1]["usage"]["completion_tokens"] > 0
+
+    async def test_failure_rates(self) -> None:
+        """Configured shares of calls fail with 429 (with Retry-After) or 500."""
+        config = FakeLLMConfig(latency=0, rate_limit_rate=1.0, retry_after=2)
+        async with _client(config) as client:
+            limited = await client.post("/chat/completions", json=_chat("s", "u"))
+        assert limited.status_code == 429
+        assert limited.headers["retry-after"] == "2"
+
+        async with _client(FakeLLMConfig(latency=0, error_rate=1.0)) as client:
+            failed = await client.post("/chat/completions", json=_chat("s", "u"))
+        assert failed.status_code == 500
+
+    def test_latency_distributions_center_on_mean(self) -> None:
+        """Every distribution averages close to the configured latency."""
+        for dist in ("fixed", "uniform", "normal", "lognormal"):
+            config = FakeLLMConfig(latency=1.0, latency_dist=dist, jitter=0.3)  # type: ignore[arg-type]
+            sampler = LatencySampler(config, random.Random(7))
+            samples = [sampler.sample() for _ in range(4000)]
+            assert min(samples) >= 0
+            assert sum(samples) / len(samples) == pytest.approx(1.0, rel=0.05)
+
+
+class TestWorkflowAgainstFake:
+    """Runs the real agents and workflow against the fake upstream."""
+
+    @pytest.mark.parametrize("theme", ["books", "anime"])
+    async def test_full_workflow(self, theme: str, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Every agent parses the fake answers without falling back."""
+        client = _client(FakeLLMConfig(latency=0, seed=3))
+        monkeypatch.setattr(llm_clients, "get_async_client", lambda *args: client)
+        service = RecommendationService(response_cache=None, session_store=None)
+        service.inflight = None
+
+        response = await service.get_recommendations(
+            theme,  # type: ignore[arg-type]
+            RecommendationRequest(user_message="想要节奏紧凑的作品", request_id="fake-1"),
+        )
+        await client.aclose()
+
+        assert 2 <= len(response.recommendations) <= 3
+        for card in response.recommendations:
+            assert "值得一试的优质作品" not in card.summary
+            assert card.reason != "这项推荐与您的偏好高度契合，值得体验。"
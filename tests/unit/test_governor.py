@@ -0,0 +1,142 @@
+"""Unit tests for the LLM concurrency governor."""
+
+import asyncio
+import time
+
+import pytest
+from prometheus_client import REGISTRY
+
+from src.llm.errors import OverloadedError
+from src.llm.governor import ConcurrencyGovernor
+from src.utils.request_context import deadline_var
+
+
+async def _hold(
+    governor: ConcurrencyGovernor,
+    client_id: str,
+    order: list[str],
+    release: asyncio.Event,
+) -> None:
+    async with governor.slot(client_id):
+        order.append(client_id)
+        await release.wait()
+
+
+class TestConcurrencyGovernor:
+    """Tests for admission, fairness and shedding."""
+
+    async def test_caps_concurrency_and_round_robins_clients(self) -> None:
+        """Queued calls are granted slots alternately across clients."""
+        governor = ConcurrencyGovernor(
+            max_concurrency=1, max_queue=10, max_queue_per_client=10
+        )
+        order: list[str] = []
+        release = asyncio.Event()
+        tasks = [
+            asyncio.create_task(_hold(governor, client_id, order, release))
+            for client_id in ["first", "heavy", "heavy", "heavy", "light"]
+        ]
+        await asyncio.sleep(0)
+
+        assert order == ["first"]
+        assert governor.snapshot()["queue_depth"] == 4
+
+        release.set()
+        await asyncio.gather(*tasks)
+
+        assert order == ["first", "heavy", "light", "heavy", "heavy"]
+        assert governor.snapshot()["in_use"] == 0
+
+    async def test_per_client_queue_limit_returns_429(self) -> None:
+        """A client exceeding its queue share is rejected with 429."""
+        governor = ConcurrencyGovernor(
+            max_concurrency=1, max_queue=10, max_queue_per_client=1
+        )
+        release = asyncio.Event()
+        tasks = [
+            asyncio.create_task(_hold(governor, "greedy", [], release)) for _ in range(2)
+        ]
+        await asyncio.sleep(0)
+
+        with pytest.raises(OverloadedError) as exc_info:
+            async with governor.slot("greedy"):
+                pass
+        assert exc_info.value.status_code == 429
+        assert exc_info.value.retry_after_header == "1"
+
+        release.set()
+        await asyncio.gather(*tasks)
+        assert governor.stats.rejected_client == 1
+
+    async def test_estimated_wait_beyond_deadline_returns_503(self) -> None:
+        """Calls that cannot start before the request deadline are shed."""
+        governor = ConcurrencyGovernor(
+            max_concurrency=1, max_queue=10, max_queue_per_client=10
+        )
+        governor._observe(5.0)
+        release = asyncio.Event()
+        holder = asyncio.create_task(_hold(governor, "a", [], release))
+        await asyncio.sleep(0)
+
+        token = deadline_var.set(time.monotonic() + 1.0)
+        try:
+            with pytest.raises(OverloadedError) as exc_info:
+                async with governor.slot("b"):
+                    pass
+        finally:
+            deadline_var.reset(token)
+        assert exc_info.value.status_code == 503
+        assert exc_info.value.retry_after_header == "5"
+
+        release.set()
+        await holder
+
+    async def test_cancelled_waiter_leaves_queue(self) -> None:
+        """Cancelling a queued call frees its queue entry without leaking a slot."""
+        governor = ConcurrencyGovernor(
+            max_concurrency=1, max_queue=10, max_queue_per_client=10
+        )
+        release = asyncio.Event()
+        holder = asyncio.create_task(_hold(governor, "a", [], release))
+        waiter = asyncio.create_task(_hold(governor, "b", [], release))
+        await asyncio.sleep(0)
+
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert governor.snapshot()["queue_depth"] == 0
+
+        release.set()
+        await holder
+        assert governor.snapshot()["in_use"] == 0
+
+    async def test_load_and_rejections_are_exported(self) -> None:
+        """Queue depth, waits and shed calls are published as Prometheus metrics."""
+        governor = ConcurrencyGovernor(
+            max_concurrency=1, max_queue=1, max_queue_per_client=10
+        )
+        rejected = REGISTRY.get_sample_value(
+            "llm_governor_rejections_total", {"reason": "queue_full"}
+        ) or 0.0
+        waits = REGISTRY.get_sample_value("llm_governor_wait_seconds_count") or 0.0
+        release = asyncio.Event()
+        tasks = [
+            asyncio.create_task(_hold(governor, "client", [], release)) for _ in range(2)
+        ]
+        await asyncio.sleep(0)
+
+        assert REGISTRY.get_sample_value("llm_governor_slots_in_use") == 1
+        assert REGISTRY.get_sample_value("llm_governor_queue_depth") == 1
+        with pytest.raises(OverloadedError):
+            async with governor.slot("other"):
+                pass
+        assert REGISTRY.get_sample_value(
+            "llm_governor_rejections_total", {"reason": "queue_full"}
+        ) == rejected + 1
+
+        release.set()
+        await asyncio.gather(*tasks)
+
+        assert REGISTRY.get_sample_value("llm_governor_slots_in_use") == 0
+        assert REGISTRY.get_sample_value("llm_governor_queue_depth") == 0
+        assert REGISTRY.get_sample_value("llm_governor_wait_seconds_count") == waits + 2
@@ -0,0 +1,90 @@
+"""Unit tests for hedged LLM requests."""
+
+import asyncio
+
+import pytest
+
+from src.llm.hedging import Hedger
+
+
+def _hedger(budget: float = 1.0) -> Hedger[str]:
+    hedger: Hedger[str] = Hedger(
+        enabled=True,
+        percentile=90.0,
+        budget=budget,
+        window=10,
+        min_samples=3,
+        min_delay=0.01,
+    )
+    for _ in range(3):
+        hedger._latencies.add(0.01)
+    return hedger
+
+
+class SlowThenFast:
+    """Attempt factory whose first call hangs and later calls answer quickly."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.cancelled = 0
+
+    async def __call__(self) -> str:
+        self.calls += 1
+        attempt = self.calls
+        try:
+            await asyncio.sleep(10 if attempt == 1 else 0)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return f"attempt-{attempt}"
+
+
+class TestHedger:
+    """Tests for hedge triggering, budget and error handling."""
+
+    async def test_slow_call_is_hedged_and_loser_cancelled(self) -> None:
+        """The duplicate wins and the hung primary attempt is cancelled."""
+        hedger = _hedger()
+        attempts = SlowThenFast()
+
+        assert await hedger.run(attempts) == "attempt-2"
+        await asyncio.sleep(0)
+
+        assert attempts.cancelled == 1
+        snapshot = hedger.snapshot()
+        assert snapshot["hedge_rate"] == 1.0
+        assert snapshot["hedge_win_rate"] == 1.0
+
+    async def test_budget_limits_hedges(self) -> None:
+        """Without hedge tokens the call waits for the primary attempt."""
+        hedger = _hedger(budget=0.5)
+        attempts = SlowThenFast()
+
+        with pytest.raises(TimeoutError):
+            await asyncio.wait_for(hedger.run(attempts), timeout=0.1)
+
+        assert attempts.calls == 1
+        assert hedger.stats.skipped_budget == 1
+
+    async def test_no_hedging_while_warming_up(self) -> None:
+        """Fewer than min_samples latencies means no hedge delay yet."""
+        hedger = _hedger()
+        hedger._latencies.clear()
+        assert hedger.hedge_delay() is None
+
+    async def test_primary_error_falls_back_to_hedge(self) -> None:
+        """A failed primary does not fail the call while the hedge is pending."""
+        hedger = _hedger()
+        calls = 0
+
+        async def attempt() -> str:
+            nonlocal calls
+            calls += 1
+            if calls == 1:
+                await asyncio.sleep(0.05)
+                raise RuntimeError("upstream reset")
+            await asyncio.sleep(0.1)
+            return "hedge"
+
+        assert await hedger.run(attempt) == "hedge"
+        assert hedger.stats.hedge_wins == 1
@@ -0,0 +1,129 @@
+"""Unit tests for the LLM record/replay cassette."""
+
+import json
+import time
+from collections.abc import AsyncIterator
+from pathlib import Path
+from typing import Any
+
+import pytest
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage, SystemMessage
+
+from src.agents import base
+from src.agents.selector import SelectorAgent
+from src.llm.cassette import CassetteMiss, LLMCassette, prompt_key
+
+PROMPT = [SystemMessage(content="系统提示"), HumanMessage(content="推荐科幻")]
+
+
+class ScriptedLLM:
+    """Chat model stand-in answering with numbered replies after a delay."""
+
+    def __init__(self, delay: float = 0.05) -> None:
+        self.delay = delay
+        self.calls = 0
+
+    async def ainvoke(self, messages: Any, **kwargs: Any) -> AIMessage:
+        self.calls += 1
+        time.sleep(self.delay)
+        return AIMessage(
+            content=f"回复{self.calls}",
+            usage_metadata={"input_tokens": 50, "output_tokens": 10, "total_tokens": 60},
+        )
+
+    async def astream(self, messages: Any, **kwargs: Any) -> AsyncIterator[AIMessageChunk]:
+        self.calls += 1
+        for piece in ("流式", "回复"):
+            time.sleep(self.delay)
+            yield AIMessageChunk(content=piece)
+
+
+class OfflineLLM:
+    """Chat model stand-in that fails if the upstream is reached."""
+
+    async def ainvoke(self, messages: Any, **kwargs: Any) -> AIMessage:
+        raise AssertionError("upstream called during replay")
+
+
+def _agent(llm: Any) -> SelectorAgent:
+    agent = SelectorAgent(theme="books")
+    agent.llm = llm
+    return agent
+
+
+def _use(monkeypatch: pytest.MonkeyPatch, cassette: LLMCassette) -> LLMCassette:
+    monkeypatch.setattr(base, "llm_cassette", cassette)
+    return cassette
+
+
+class TestCassette:
+    """Tests for recording and replaying agent LLM calls."""
+
+    async def test_replay_returns_recorded_completions_in_order(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Repeated prompts replay their recordings in order, with usage."""
+        path = tmp_path / "cassette.jsonl"
+        recorder = _use(monkeypatch, LLMCassette(mode="record", path=path))
+        agent = _agent(ScriptedLLM())
+        await agent._ainvoke(PROMPT)
+        await agent._ainvoke(PROMPT)
+        recorder.close()
+
+        lines = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+        assert [line["completion"] for line in lines] == ["回复1", "回复2"]
+        assert {line["key"] for line in lines} == {prompt_key(PROMPT)}
+        assert lines[0]["latency"] >= 0.05
+
+        player = _use(monkeypatch, LLMCassette(mode="replay", path=path, latency_scale=0))
+        agent = _agent(OfflineLLM())
+        replies = [await agent._ainvoke(PROMPT) for _ in range(3)]
+        assert [reply.content for reply in replies] == ["回复1", "回复2", "回复1"]
+        assert replies[0].usage_metadata["input_tokens"] == 50
+        assert player.stats.replayed == 3
+
+    async def test_replay_sleeps_scaled_latency(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Replayed calls take the recorded latency times the scale."""
+        path = tmp_path / "cassette.jsonl"
+        path.write_text(
+            json.dumps({"key": prompt_key(PROMPT), "completion": "好", "latency": 0.4}) + "\n",
+            encoding="utf-8",
+        )
+        _use(monkeypatch, LLMCassette(mode="replay", path=path, latency_scale=0.25))
+
+        started = time.perf_counter()
+        reply = await _agent(OfflineLLM())._ainvoke(PROMPT)
+        elapsed = time.perf_counter() - started
+        assert reply.content == "好"
+        assert 0.09 <= elapsed < 0.3
+
+    async def test_unknown_prompt_misses(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Unrecorded prompts raise unless misses pass through to the upstream."""
+        path = tmp_path / "missing.jsonl"
+        _use(monkeypatch, LLMCassette(mode="replay", path=path))
+        with pytest.raises(CassetteMiss):
+            await _agent(OfflineLLM())._ainvoke(PROMPT)
+
+        _use(monkeypatch, LLMCassette(mode="replay", path=path, passthrough_misses=True))
+        reply = await _agent(ScriptedLLM(delay=0))._ainvoke(PROMPT)
+        assert reply.content == "回复1"
+
+    async def test_streamed_calls_round_trip(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Streamed completions are recorded whole and replayed as chunks."""
+        path = tmp_path / "cassette.jsonl"
+        recorder = _use(monkeypatch, LLMCassette(mode="record", path=path))
+        recorded = [chunk.content async for chunk in _agent(ScriptedLLM())._astream(PROMPT)]
+        recorder.close()
+        line = json.loads(path.read_text(encoding="utf-8"))
+        assert line["completion"] == "".join(recorded) == "流式回复"
+        assert 0 < line["first_chunk"] <= line["latency"]
+
+        _use(monkeypatch, LLMCassette(mode="replay", path=path, latency_scale=0))
+        replayed = [chunk.content async for chunk in _agent(OfflineLLM())._astream(PROMPT)]
+        assert "".join(replayed) == "流式回复"
@@ -0,0 +1,74 @@
+"""Unit tests for the shared LLM HTTP client registry."""
+
+import asyncio
+import time
+from collections.abc import AsyncIterator
+
+import openai
+import pytest
+
+from src.agents import EssenceExtractorAgent, SelectorAgent
+from src.config import settings
+from src.llm.clients import LLMClientRegistry, llm_clients
+
+
+@pytest.fixture
+async def stalled_upstream() -> AsyncIterator[str]:
+    """Accept requests but never answer until the test is over."""
+    release = asyncio.Event()
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        await release.wait()
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    async with server:
+        yield f"http://127.0.0.1:{port}/v1"
+        release.set()
+
+
+class TestLLMClientRegistry:
+    """Tests for client sharing and statistics."""
+
+    def test_same_upstream_shares_client(self) -> None:
+        """Identical (api_base, api_key, model) map to one client."""
+        registry = LLMClientRegistry()
+        first = registry.get_async_client("https://a.example/v1", "key", "gpt-4")
+        second = registry.get_async_client("https://a.example/v1", "key", "gpt-4")
+        other = registry.get_async_client("https://a.example/v1", "key", "gpt-4o")
+        assert first is second
+        assert first is not other
+        assert len(registry.snapshot()) == 2
+
+    def test_agents_share_pool(self) -> None:
+        """Agents for different roles and themes reuse the global client."""
+        selector = SelectorAgent(theme="books", api_base="https://shared.example/v1")
+        extractor = EssenceExtractorAgent(theme="games", api_base="https://shared.example/v1")
+        client = llm_clients.get_async_client(
+            "https://shared.example/v1", selector.api_key, selector.model_name
+        )
+        assert selector.llm.http_async_client is client  # type: ignore[attr-defined]
+        assert extractor.llm.http_async_client is client  # type: ignore[attr-defined]
+
+    def test_snapshot_hides_api_key(self) -> None:
+        """Statistics identify keys by hash only."""
+        registry = LLMClientRegistry()
+        registry.get_async_client("https://a.example/v1", "secret-key", "gpt-4")
+        snapshot = registry.snapshot()[0]
+        assert "secret-key" not in str(snapshot)
+        assert snapshot["reuse_ratio"] == 0.0
+
+
+    async def test_read_timeout_applies_to_agent_calls(
+        self, stalled_upstream: str, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """LLM_READ_TIMEOUT bounds each attempt instead of the SDK's unlimited default."""
+        monkeypatch.setattr(settings, "llm_read_timeout", 0.2)
+        agent = SelectorAgent(theme="books", api_base=stalled_upstream)
+
+        started = time.perf_counter()
+        with pytest.raises(openai.APITimeoutError):
+            await agent.llm.ainvoke("你好")
+        # Three attempts of 0.2s plus the SDK's backoff between retries
+        assert time.perf_counter() - started < 5
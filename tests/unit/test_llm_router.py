@@ -0,0 +1,94 @@
+"""Unit tests for the multi-endpoint LLM router."""
+
+import random
+
+import httpx
+
+from src.config import LLMEndpointConfig
+from src.llm.router import LLMRouter
+
+
+class MockRegistry:
+    """Registry handing out mock transports that answer per upstream host."""
+
+    def __init__(self, statuses: dict[str, int]) -> None:
+        self.statuses = statuses
+        self.seen: list[tuple[str, str]] = []
+
+    def get_transport(self, api_base: str, api_key: str, model: str) -> httpx.MockTransport:
+        def handler(request: httpx.Request) -> httpx.Response:
+            self.seen.append((str(request.url), request.headers["Authorization"]))
+            return httpx.Response(self.statuses[request.url.host], json={"ok": True})
+
+        return httpx.MockTransport(handler)
+
+
+def _router(registry: MockRegistry) -> LLMRouter:
+    return LLMRouter(
+        [
+            LLMEndpointConfig(base_url="https://a.example/v1", api_key="key-a"),
+            LLMEndpointConfig(base_url="https://b.example/openai/v1", api_key="key-b"),
+        ],
+        alpha=0.5,
+        eject_after=2,
+        eject_seconds=30.0,
+        max_eject_seconds=60.0,
+        registry=registry,  # type: ignore[arg-type]
+        rng=random.Random(7),
+    )
+
+
+class TestLLMRouter:
+    """Tests for request rewriting, weighting and ejection."""
+
+    async def test_rewrites_url_and_key(self) -> None:
+        """Requests keep their relative path but use the endpoint's base and key."""
+        registry = MockRegistry({"a.example": 200, "b.example": 200})
+        router = _router(registry)
+        client = router.get_async_client("https://primary.example/v1", "gpt-4")
+
+        for _ in range(10):
+            response = await client.post("https://primary.example/v1/chat/completions")
+            await response.aread()
+
+        targets = {url for url, _ in registry.seen}
+        assert targets == {
+            "https://a.example/v1/chat/completions",
+            "https://b.example/openai/v1/chat/completions",
+        }
+        assert ("https://a.example/v1/chat/completions", "Bearer key-a") in registry.seen
+        snapshot = router.snapshot()
+        assert sum(entry["requests"] for entry in snapshot) == 10
+        assert all(entry["in_flight"] == 0 for entry in snapshot)
+
+    async def test_failing_endpoint_is_ejected_and_probed(self) -> None:
+        """Consecutive 5xx responses eject an endpoint until a probe succeeds."""
+        registry = MockRegistry({"a.example": 200, "b.example": 503})
+        router = _router(registry)
+        client = router.get_async_client("https://primary.example/v1", "gpt-4")
+        failing = router.endpoints[1]
+
+        while failing.stats.ejections == 0:
+            await client.post("https://primary.example/v1/chat/completions")
+        assert router.snapshot()[1]["state"] == "ejected"
+
+        before = failing.stats.requests
+        for _ in range(5):
+            await client.post("https://primary.example/v1/chat/completions")
+        assert failing.stats.requests == before
+
+        registry.statuses["b.example"] = 200
+        failing.ejected_until = 0.0
+        await client.post("https://primary.example/v1/chat/completions")
+        assert failing.stats.requests == before + 1
+        assert router.snapshot()[1]["state"] == "healthy"
+
+    def test_weights_favor_faster_endpoint(self) -> None:
+        """Lower EWMA latency earns a proportionally larger traffic share."""
+        router = _router(MockRegistry({}))
+        fast, slow = router.endpoints
+        router.record(fast, 0.5, ok=True)
+        router.record(slow, 5.0, ok=True)
+
+        picks = [router.choose() for _ in range(500)]
+        assert picks.count(fast) > 400
@@ -0,0 +1,183 @@
+"""Unit tests for the streamed selector and the pipelined workflow."""
+
+import asyncio
+import json
+from collections.abc import AsyncIterator
+from typing import Any
+
+import pytest
+
+from src.agents import AssemblerAgent, SelectorAgent
+from src.config import settings
+from src.models.recommendation import RecommendationCandidate, RecommendationRequest, UserProfile
+from src.services.recommendation_service import AgentBundle, RecommendationService
+from src.utils.json_stream import StreamingJSONFieldParser
+
+SELECTOR_OUTPUT = json.dumps(
+    {
+        "user_profile": {"summary": "喜欢硬核科幻", "attributes": {"类型": ["科幻"]}},
+        "candidates": [
+            {"title": "球状闪电", "creator": "刘慈欣", "metadata": {"年份": "2004"}},
+            {"title": "沙丘", "creator": "弗兰克·赫伯特", "metadata": {"年份": "1965"}},
+        ],
+        "message": "为你挑选了两本科幻小说。",
+    },
+    ensure_ascii=False,
+)
+
+
+class StreamingLLM:
+    """Stand-in chat model that streams fixed text in small chunks."""
+
+    def __init__(self, text: str, chunk_size: int = 7) -> None:
+        self.text = text
+        self.chunk_size = chunk_size
+
+    async def astream(self, messages: Any, **kwargs: Any) -> AsyncIterator[Any]:
+        for start in range(0, len(self.text), self.chunk_size):
+            await asyncio.sleep(0)
+            yield type("Chunk", (), {"content": self.text[start : start + self.chunk_size]})()
+
+
+class RecordingAgent:
+    """Fake extractor/insight agent recording when each call starts."""
+
+    def __init__(self, suffix: str, log: list[str]) -> None:
+        self.suffix = suffix
+        self.log = log
+
+    async def process(
+        self, candidates: list[RecommendationCandidate], *args: Any
+    ) -> dict[str, str]:
+        self.log.extend(c.title for c in candidates)
+        return {c.title: f"{c.title}{self.suffix}" for c in candidates}
+
+
+class TestStreamingJSONFieldParser:
+    """Tests for the incremental JSON field parser."""
+
+    def test_emits_elements_as_they_close(self) -> None:
+        """Profile and each candidate are emitted before the document ends."""
+        parser = StreamingJSONFieldParser(
+            object_fields=("user_profile",), array_fields=("candidates",)
+        )
+        first_candidate_end = SELECTOR_OUTPUT.index("}}", SELECTOR_OUTPUT.index("球状闪电")) + 2
+        early = parser.feed("```json\n" + SELECTOR_OUTPUT[:first_candidate_end])
+        assert [field for field, _ in early] == ["user_profile", "candidates"]
+        assert early[1][1]["title"] == "球状闪电"
+
+        rest = parser.feed(SELECTOR_OUTPUT[first_candidate_end:] + "\n```")
+        assert [value["title"] for _, value in rest] == ["沙丘"]
+
+    def test_braces_inside_strings_are_ignored(self) -> None:
+        """Structural characters inside string values do not confuse the scanner."""
+        parser = StreamingJSONFieldParser(array_fields=("candidates",))
+        values = parser.feed('{"candidates": [{"title": "A}]\\"{"}, {"title": "B"}]}')
+        assert [value["title"] for _, value in values] == ['A}]"{', "B"]
+
+
+    def test_brackets_in_leading_prose_are_ignored(self) -> None:
+        """Prose before the object does not end parsing early."""
+        parser = StreamingJSONFieldParser(array_fields=("candidates",))
+        values = parser.feed('推荐如下 [共2项] "注意" ]：\n{"candidates": [{"title": "A"}, {"title": "B"}]}')
+        assert [value["title"] for _, value in values] == ["A", "B"]
+
+
+class TestSelectorStreaming:
+    """Tests for SelectorAgent.process_streaming."""
+
+    async def test_malformed_stream_uses_fallback(self) -> None:
+        """A truncated stream still goes through the regular fallback path."""
+        agent = SelectorAgent(theme="books")
+        agent.llm = StreamingLLM(SELECTOR_OUTPUT[:60])  # type: ignore[assignment]
+        streamed: list[UserProfile] = []
+
+        profile, candidates, _ = await agent.process_streaming(
+            "推荐科幻", on_profile=streamed.append
+        )
+        assert [c.title for c in candidates] == ["默认推荐 A", "默认推荐 B"]
+        assert profile.attributes["偏好"] == ["多样化体验"]
+
+
+class TestPipelinedWorkflow:
+    """Tests for the pipelined recommendation workflow."""
+
+    async def test_candidates_processed_individually(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Each streamed candidate gets its own summary and reason call."""
+        monkeypatch.setattr(settings, "pipelined_workflow", True)
+        selector = SelectorAgent(theme="books")
+        selector.llm = StreamingLLM(SELECTOR_OUTPUT)  # type: ignore[assignment]
+        summary_log: list[str] = []
+        reason_log: list[str] = []
+        bundle = AgentBundle(
+            selector=selector,
+            extractor=RecordingAgent("：宏大世界观下的科幻叙事。", summary_log),  # type: ignore[arg-type]
+            insight=RecordingAgent("：契合你对硬核科幻的偏好。", reason_log),  # type: ignore[arg-type]
+            assembler=AssemblerAgent(theme="books"),
+        )
+        service = RecommendationService(response_cache=None)
+        service.agents["books"] = bundle
+
+        response = await service._process_workflow(
+            "books", RecommendationRequest(user_message="推荐科幻", request_id="r1")
+        )
+
+        assert summary_log == ["球状闪电", "沙丘"]
+        assert sorted(reason_log) == ["沙丘", "球状闪电"]
+        assert [card.title for card in response.recommendations] == ["球状闪电", "沙丘"]
+        assert response.recommendations[1].summary == "沙丘：宏大世界观下的科幻叙事。"
+        assert response.request_id == "r1"
+
+    @staticmethod
+    def _streaming_service(selector_output: str) -> RecommendationService:
+        selector = SelectorAgent(theme="books")
+        selector.llm = StreamingLLM(selector_output)  # type: ignore[assignment]
+        service = RecommendationService(response_cache=None, session_store=None)
+        service.inflight = None
+        service.agents["books"] = AgentBundle(
+            selector=selector,
+            extractor=RecordingAgent("：宏大世界观下的科幻叙事。", []),  # type: ignore[arg-type]
+            insight=RecordingAgent("：契合你对硬核科幻的偏好。", []),  # type: ignore[arg-type]
+            assembler=AssemblerAgent(theme="books"),
+        )
+        return service
+
+    async def test_item_events_follow_selector_events(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Early summaries and reasons are streamed only after the candidates event."""
+        monkeypatch.setattr(settings, "pipelined_workflow", True)
+        service = self._streaming_service(SELECTOR_OUTPUT)
+
+        events = [
+            event
+            async for event in service.stream_recommendations(
+                "books", RecommendationRequest(user_message="推荐科幻")
+            )
+        ]
+
+        kinds = [event.event for event in events]
+        first_item = min(kinds.index("summary"), kinds.index("reason"))
+        assert kinds.index("selector") < kinds.index("candidates") < first_item
+        assert kinds.count("summary") == kinds.count("reason") == 2
+        assert kinds[-1] == "result"
+
+    async def test_dropped_candidates_emit_no_items(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """A streamed candidate the final parse discards never reaches the client."""
+        monkeypatch.setattr(settings, "pipelined_workflow", True)
+        first_candidate_end = SELECTOR_OUTPUT.index("}}", SELECTOR_OUTPUT.index("球状闪电")) + 2
+        service = self._streaming_service(SELECTOR_OUTPUT[:first_candidate_end] + "<truncated")
+
+        events = [
+            event
+            async for event in service.stream_recommendations(
+                "books", RecommendationRequest(user_message="推荐科幻")
+            )
+        ]
+
+        titles = {event.data["title"] for event in events if event.event in ("summary", "reason")}
+        assert titles == {"默认推荐 A", "默认推荐 B"}
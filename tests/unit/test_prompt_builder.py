@@ -0,0 +1,145 @@
+"""Unit tests for the token-budgeted selector prompt builder."""
+
+from collections.abc import Sequence
+
+from src.agents.prompt_builder import SelectorPromptBuilder
+from src.utils.request_context import session_id_var
+
+
+class CountingSummarizer:
+    """Summarizer stand-in recording how many turns each call folds in."""
+
+    def __init__(self) -> None:
+        self.calls: list[tuple[str | None, int]] = []
+
+    async def __call__(self, previous: str | None, turns: Sequence[dict[str, str]]) -> str:
+        self.calls.append((previous, len(turns)))
+        return f"摘要{len(self.calls)}"
+
+
+def _history(turns: int) -> list[dict[str, str]]:
+    history: list[dict[str, str]] = []
+    for turn in range(turns):
+        history.append({"role": "user", "content": f"第{turn}轮：我想找节奏紧凑的科幻悬疑作品" * 3})
+        history.append({"role": "assistant", "content": f"第{turn}轮推荐：三部硬科幻与一部悬疑" * 3})
+    return history
+
+
+def _builder() -> SelectorPromptBuilder:
+    return SelectorPromptBuilder(
+        model="gpt-4o-mini",
+        history_budget=600,
+        summary_max_tokens=100,
+        min_recent_messages=2,
+        cache_entries=16,
+    )
+
+
+class TestSelectorPromptBuilder:
+    """Tests for history compression and the rolling summary cache."""
+
+    async def test_short_history_is_kept_verbatim(self) -> None:
+        """Histories within the budget are not summarized."""
+        builder = _builder()
+        summarizer = CountingSummarizer()
+
+        fitted = await builder.fit(_history(2), summarizer)
+
+        assert fitted.summary is None
+        assert len(fitted.messages) == 4
+        assert summarizer.calls == []
+
+    async def test_history_tokens_stay_bounded(self) -> None:
+        """Prompt size stays within the budget however long the conversation gets."""
+        builder = _builder()
+        summarizer = CountingSummarizer()
+
+        for turns in range(1, 30):
+            fitted = await builder.fit(_history(turns), summarizer)
+            assert fitted.tokens <= builder.history_budget
+            assert fitted.messages[-2:] == _history(turns)[-2:]
+
+        # Compression leaves headroom, so summaries are not rebuilt every turn
+        assert 0 < len(summarizer.calls) < 15
+        assert builder.stats.compressed > 0
+
+    async def test_summary_rolls_forward_from_cache(self) -> None:
+        """Later turns extend the cached summary instead of re-reading old turns."""
+        builder = _builder()
+        summarizer = CountingSummarizer()
+        history = _history(12)
+
+        first = await builder.fit(history, summarizer)
+        repeated = await builder.fit(history, summarizer)
+        assert repeated == first
+        assert len(summarizer.calls) == 1
+
+        for turns in range(13, 20):
+            await builder.fit(_history(turns), summarizer)
+        previous, folded = summarizer.calls[-1]
+        assert previous is not None
+        assert folded < len(_history(19)) - len(first.messages)
+
+    async def test_cached_summary_survives_trimmed_history(self) -> None:
+        """Within a session, dropping the oldest turns keeps the cache hit."""
+        builder = _builder()
+        summarizer = CountingSummarizer()
+        history = _history(12)
+
+        token = session_id_var.set("session-a")
+        try:
+            first = await builder.fit(history, summarizer)
+            trimmed = await builder.fit(history[4:], summarizer)
+        finally:
+            session_id_var.reset(token)
+
+        assert trimmed == first
+        assert len(summarizer.calls) == 1
+
+    async def test_summaries_are_not_shared_across_conversations(self) -> None:
+        """Other sessions, or histories differing only in older turns, get their own summary."""
+        builder = _builder()
+        summarizer = CountingSummarizer()
+        history = _history(12)
+        other = [{"role": "user", "content": "完全不同的开场白"}, *history[2:]]
+
+        await builder.fit(history, summarizer)
+        await builder.fit(other, summarizer)
+        token = session_id_var.set("session-b")
+        try:
+            await builder.fit(history, summarizer)
+        finally:
+            session_id_var.reset(token)
+
+        assert len(summarizer.calls) == 3
+
+    async def test_failed_summary_falls_back_to_truncated_transcript(self) -> None:
+        """Summarizer errors still produce a bounded, uncached summary."""
+        builder = _builder()
+
+        async def failing(previous: str | None, turns: Sequence[dict[str, str]]) -> str:
+            raise RuntimeError("upstream down")
+
+        fitted = await builder.fit(_history(12), failing)
+
+        assert fitted.summary
+        assert fitted.tokens <= builder.history_budget
+        assert builder.stats.summary_failures == 1
+        assert builder.snapshot()["cached_summaries"] == 0
+
+    async def test_fallback_fits_a_tiny_summary_budget(self) -> None:
+        """Truncation keeps shrinking short transcripts until they fit."""
+        builder = SelectorPromptBuilder(
+            model="gpt-4o-mini",
+            history_budget=200,
+            summary_max_tokens=1,
+            min_recent_messages=2,
+        )
+
+        async def failing(previous: str | None, turns: Sequence[dict[str, str]]) -> str:
+            raise RuntimeError("upstream down")
+
+        fitted = await builder.fit(_history(6), failing)
+
+        assert fitted.summary is not None
+        assert 0 < len(fitted.summary) <= 1
@@ -0,0 +1,161 @@
+"""Unit tests for the recommendation response cache."""
+
+import asyncio
+from typing import Any
+
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from src.models.recommendation import (
+    RecommendationCard,
+    RecommendationRequest,
+    RecommendationResponse,
+    UserProfile,
+)
+from src.services.recommendation_service import RecommendationService
+from src.services.redis_client import RedisCircuitBreaker
+from src.services.response_cache import ResponseCache, request_cache_key
+from src.utils.lru import LRUCache
+
+
+def _make_response(request_id: str = "") -> RecommendationResponse:
+    cards = [
+        RecommendationCard(
+            title=title,
+            creator="刘慈欣",
+            metadata={},
+            summary="宏大叙事下的文明博弈与宇宙社会学思考。",
+            reason="延续你对硬核科幻与宏大世界观的偏好。",
+        )
+        for title in ("球状闪电", "超新星纪元")
+    ]
+    return RecommendationResponse(
+        theme="books",
+        user_profile=UserProfile(theme="books", attributes={"类型": ["科幻"]}),
+        recommendations=cards,
+        message="祝阅读愉快！",
+        request_id=request_id,
+    )
+
+
+class TestLRUCache:
+    """Tests for the in-process LRU tier."""
+
+    def test_evicts_least_recently_used(self) -> None:
+        """Oldest untouched entry is evicted first."""
+        cache: LRUCache[int] = LRUCache(2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        assert cache.get("a") == 1
+        cache.set("c", 3)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.evictions == 1
+
+    def test_entries_expire(self) -> None:
+        """Entries older than the TTL are treated as missing."""
+        now = [0.0]
+        cache: LRUCache[int] = LRUCache(4, ttl=10, clock=lambda: now[0])
+        cache.set("a", 1)
+        now[0] = 11.0
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+
+class TestRequestCacheKey:
+    """Tests for cache key derivation."""
+
+    def test_normalizes_user_input(self) -> None:
+        """Whitespace and full-width differences share one key."""
+        first = RecommendationRequest(user_message="  推荐 科幻小说 ")
+        second = RecommendationRequest(user_message="推荐　科幻小说")
+        assert request_cache_key("books", first) == request_cache_key("books", second)
+
+    def test_history_and_theme_change_key(self) -> None:
+        """Theme and conversation history are part of the key."""
+        plain = RecommendationRequest(user_message="推荐科幻")
+        with_history = RecommendationRequest(
+            user_message="推荐科幻",
+            conversation_history=[{"role": "user", "content": "你好"}],
+        )
+        assert request_cache_key("books", plain) != request_cache_key("books", with_history)
+        assert request_cache_key("books", plain) != request_cache_key("movies", plain)
+
+
+class UnreachableRedis:
+    """Redis client stand-in whose every command fails to connect."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def get(self, key: str) -> bytes | None:
+        self.calls += 1
+        raise RedisConnectionError("Connection refused")
+
+    async def set(self, key: str, value: str, ex: int) -> None:
+        self.calls += 1
+        raise RedisConnectionError("Connection refused")
+
+
+class TestResponseCache:
+    """Tests for the response cache and its service integration."""
+
+    async def test_hit_returns_fresh_request_id(self) -> None:
+        """Cached responses carry the request_id of the new request."""
+        cache = ResponseCache(max_entries=8, ttl=60)
+        first = RecommendationRequest(user_message="推荐科幻", request_id="first")
+        await cache.set("books", first, _make_response("first"))
+
+        second = RecommendationRequest(user_message="推荐科幻", request_id="second")
+        cached = await cache.get("books", second)
+        assert cached is not None
+        assert cached.request_id == "second"
+        assert cache.stats.local_hits == 1
+
+    async def test_service_skips_workflow_on_hit(self) -> None:
+        """Second identical request is served without running the workflow."""
+        service = RecommendationService(
+            response_cache=ResponseCache(max_entries=8, ttl=60)
+        )
+        calls: list[str] = []
+
+        async def fake_workflow(
+            theme: str, request: RecommendationRequest, **kwargs: Any
+        ) -> RecommendationResponse:
+            calls.append(request.request_id)
+            return _make_response(request.request_id)
+
+        service._process_workflow = fake_workflow  # type: ignore[method-assign,assignment]
+
+        await service.get_recommendations(
+            "books", RecommendationRequest(user_message="推荐科幻", request_id="a")
+        )
+        response = await service.get_recommendations(
+            "books", RecommendationRequest(user_message="推荐科幻", request_id="b")
+        )
+
+        assert calls == ["a"]
+        assert response.request_id == "b"
+        assert service.stats()["response_cache"]["local_hits"] == 1  # type: ignore[index]
+
+    async def test_redis_is_skipped_after_connection_failure(self) -> None:
+        """An open breaker makes lookups miss without touching Redis until it cools down."""
+        redis = UnreachableRedis()
+        breaker = RedisCircuitBreaker(cooldown=0.05)
+        cache = ResponseCache(
+            max_entries=8,
+            ttl=60,
+            redis_client=redis,  # type: ignore[arg-type]
+            breaker=breaker,
+        )
+        request = RecommendationRequest(user_message="推荐科幻")
+
+        assert await cache.get("books", request) is None
+        assert await cache.get("books", request) is None
+        await cache.set("books", request, _make_response())
+        assert redis.calls == 1
+        assert breaker.snapshot() == {"trips": 1, "skipped": 2, "open": True}
+
+        await asyncio.sleep(0.06)
+        assert await cache.get("other", request) is None
+        assert redis.calls == 2
+        assert cache.stats.misses == 3
@@ -0,0 +1,179 @@
+"""Unit tests for the semantic near-duplicate response cache."""
+
+import asyncio
+import random
+from typing import Any
+
+import numpy as np
+
+from src.models.recommendation import (
+    RecommendationCard,
+    RecommendationRequest,
+    RecommendationResponse,
+    UserProfile,
+)
+from src.services.recommendation_service import RecommendationService
+from src.services.semantic_cache import NGramHashingEncoder, SemanticCache
+
+THRESHOLD = 0.85
+
+
+def _make_response(*titles: str, request_id: str = "") -> RecommendationResponse:
+    cards = [
+        RecommendationCard(
+            title=title,
+            creator="刘慈欣",
+            metadata={},
+            summary="宏大叙事下的文明博弈与宇宙社会学思考。",
+            reason="延续你对硬核科幻与宏大世界观的偏好。",
+        )
+        for title in titles or ("球状闪电", "超新星纪元")
+    ]
+    return RecommendationResponse(
+        theme="books",
+        user_profile=UserProfile(theme="books", attributes={"类型": ["科幻"]}),
+        recommendations=cards,
+        message="祝阅读愉快！",
+        request_id=request_id,
+    )
+
+
+def _request(text: str, request_id: str = "", **kwargs: Any) -> RecommendationRequest:
+    return RecommendationRequest(user_message=text, request_id=request_id, **kwargs)
+
+
+def _cache(**kwargs: Any) -> SemanticCache:
+    return SemanticCache(
+        threshold=THRESHOLD, max_entries=kwargs.pop("max_entries", 16), ttl=60, **kwargs
+    )
+
+
+class TestEncoder:
+    """Tests for the hashed n-gram encoder."""
+
+    def test_paraphrases_clear_threshold(self) -> None:
+        """Rephrasings of one request embed almost identically."""
+        encoder = NGramHashingEncoder()
+        for first, second in [
+            ("想读类似三体的科幻", "推荐几本像《三体》一样的科幻小说"),
+            ("想玩开放世界游戏", "有没有开放世界的游戏"),
+            ("诺兰的电影", "诺兰导演的电影推荐"),
+        ]:
+            assert float(encoder.encode(first) @ encoder.encode(second)) >= THRESHOLD
+
+    def test_different_requests_stay_apart(self) -> None:
+        """Other titles, extra constraints and negations do not match."""
+        encoder = NGramHashingEncoder()
+        for first, second in [
+            ("想读类似三体的科幻", "想读类似沙丘的科幻"),
+            ("想玩开放世界游戏", "想玩开放世界恐怖游戏"),
+            ("像三体的科幻", "不像三体的科幻"),
+            ("推荐治愈系动漫", "推荐热血战斗动漫"),
+        ]:
+            assert float(encoder.encode(first) @ encoder.encode(second)) < THRESHOLD
+
+    def test_vectors_are_unit_length(self) -> None:
+        """Encoded texts are normalized; filler-only texts encode to zeros."""
+        encoder = NGramHashingEncoder(dim=256)
+        assert np.linalg.norm(encoder.encode("科幻小说推荐")) == np.float32(1.0)
+        assert not encoder.encode("推荐一些").any()
+
+
+class TestSemanticCache:
+    """Tests for lookups, eviction and audits."""
+
+    def test_near_duplicate_hits_within_theme(self) -> None:
+        """A paraphrase hits with the new request_id; other themes miss."""
+        cache = _cache()
+        cache.set("books", _request("想读类似三体的科幻"), _make_response(request_id="a"))
+
+        match = cache.get("books", _request("推荐几本像《三体》一样的科幻小说", "b"))
+        assert match is not None
+        assert match.response.request_id == "b"
+        assert match.similarity >= THRESHOLD
+        assert cache.get("movies", _request("想读类似三体的科幻")) is None
+        assert cache.stats.hits == 1 and cache.stats.misses == 1
+
+    def test_requests_with_history_are_ineligible(self) -> None:
+        """Follow-up turns are neither stored nor answered by similarity."""
+        cache = _cache()
+        history = [{"role": "user", "content": "你好"}]
+        cache.set("books", _request("想读科幻", conversation_history=history), _make_response())
+        assert cache.snapshot()["entries"] == 0
+
+        cache.set("books", _request("想读科幻"), _make_response())
+        assert cache.get("books", _request("想读科幻", conversation_history=history)) is None
+        assert cache.stats.ineligible == 1
+
+    def test_least_recently_used_entry_is_evicted(self) -> None:
+        """Full themes overwrite the entry that was used longest ago."""
+        cache = _cache(max_entries=2)
+        cache.set("books", _request("三体科幻"), _make_response("三体", "球状闪电"))
+        cache.set("books", _request("东野圭吾推理"), _make_response("白夜行", "嫌疑人X的献身"))
+        assert cache.get("books", _request("三体科幻")) is not None
+        cache.set(
+            "books", _request("马尔克斯魔幻现实"), _make_response("百年孤独", "霍乱时期的爱情")
+        )
+
+        assert cache.get("books", _request("东野圭吾推理")) is None
+        assert cache.get("books", _request("三体科幻")) is not None
+        assert cache.stats.evictions == 1
+
+    def test_entries_expire(self) -> None:
+        """Entries older than the TTL are ignored."""
+        now = [0.0]
+        cache = _cache(clock=lambda: now[0])
+        cache.set("books", _request("三体科幻"), _make_response())
+        now[0] = 61.0
+        assert cache.get("books", _request("三体科幻")) is None
+
+    def test_audit_counts_false_hits(self) -> None:
+        """Audits disagree when the fresh run shares too few titles."""
+        cache = _cache()
+        cache.set("books", _request("三体 科幻"), _make_response("三体", "球状闪电", "流浪地球"))
+        request = _request("想读类似三体的科幻")
+        match = cache.get("books", request)
+        assert match is not None
+
+        cache.record_audit("books", request, match, _make_response("球状闪电", "沙丘"))
+        cache.record_audit("books", request, match, _make_response("沙丘", "基地"))
+        cache.record_audit("books", request, match, None)
+        assert cache.stats.audits_agree == 1
+        assert cache.stats.audits_disagree == 1
+        assert cache.stats.audit_errors == 1
+        assert cache.snapshot()["false_hit_ratio"] == 0.5
+
+
+class TestServiceIntegration:
+    """Tests for the semantic cache in front of the workflow."""
+
+    async def test_paraphrase_skips_workflow_and_is_audited(self) -> None:
+        """A near-duplicate is answered from the cache; sampled hits re-run in the background."""
+        service = RecommendationService(
+            response_cache=None,
+            session_store=None,
+            semantic_cache=_cache(audit_rate=1.0, rng=random.Random(0)),
+        )
+        service.inflight = None
+        calls: list[str] = []
+
+        async def fake_workflow(
+            theme: str, request: RecommendationRequest, **kwargs: Any
+        ) -> RecommendationResponse:
+            calls.append(request.request_id)
+            return _make_response(request_id=request.request_id)
+
+        service._process_workflow = fake_workflow  # type: ignore[method-assign,assignment]
+
+        await service.get_recommendations("books", _request("想读类似三体的科幻", "a"))
+        response = await service.get_recommendations(
+            "books", _request("推荐几本像《三体》一样的科幻小说", "b")
+        )
+        assert response.request_id == "b"
+        assert calls == ["a"]
+
+        await asyncio.gather(*service._audits)
+        assert calls == ["a", "b:audit"]
+        stats = service.stats()["semantic_cache"]
+        assert stats["hits"] == 1  # type: ignore[index]
+        assert stats["audits_agree"] == 1  # type: ignore[index]
@@ -0,0 +1,164 @@
+"""Unit tests for server-side conversation sessions."""
+
+from typing import Any
+
+from src.agents import AssemblerAgent
+from src.models.recommendation import (
+    RecommendationCandidate,
+    RecommendationRequest,
+    UserProfile,
+)
+from src.services.recommendation_service import AgentBundle, RecommendationService
+from src.services.session_store import MemorySessionBackend, SessionStore
+
+
+class RecordingSelector:
+    """Selector recording the history and profile it receives."""
+
+    def __init__(self) -> None:
+        self.calls: list[dict[str, Any]] = []
+
+    async def process(self, **kwargs: Any) -> Any:
+        self.calls.append(kwargs)
+        profile = UserProfile(theme="movies", attributes={"题材": "悬疑"})
+        if kwargs["known_profile"] is not None:
+            profile = profile.model_copy(
+                update={"attributes": {**kwargs["known_profile"].attributes, "题材": "悬疑"}}
+            )
+        candidates = [
+            RecommendationCandidate(title="禁闭岛", creator="马丁·斯科塞斯"),
+            RecommendationCandidate(title="记忆碎片", creator="克里斯托弗·诺兰"),
+        ]
+        return profile, candidates, f"第{len(self.calls)}轮推荐。"
+
+
+class TextAgent:
+    """Extractor/insight stand-in returning fixed texts."""
+
+    prompt_digest = ""
+
+    async def process(
+        self, candidates: list[RecommendationCandidate], *args: Any
+    ) -> dict[str, str]:
+        return {c.title: f"{c.title}：反转迭起的心理悬疑佳作。" for c in candidates}
+
+
+def _store(max_messages: int = 20) -> SessionStore:
+    return SessionStore(
+        MemorySessionBackend(max_entries=10, ttl=60.0), max_messages=max_messages
+    )
+
+
+def _service(selector: RecordingSelector, store: SessionStore) -> RecommendationService:
+    service = RecommendationService(response_cache=None, session_store=store)
+    service.inflight = None
+    service.agents["movies"] = AgentBundle(
+        selector=selector,  # type: ignore[arg-type]
+        extractor=TextAgent(),  # type: ignore[arg-type]
+        insight=TextAgent(),  # type: ignore[arg-type]
+        assembler=AssemblerAgent(theme="movies"),
+    )
+    return service
+
+
+class TestSessions:
+    """Tests for session creation, resumption and trimming."""
+
+    async def test_follow_up_turn_uses_stored_history_and_profile(self) -> None:
+        """The second turn sends only a message; the server fills in the rest."""
+        selector = RecordingSelector()
+        service = _service(selector, _store())
+
+        first = await service.get_recommendations(
+            "movies", RecommendationRequest(user_message="推荐悬疑片")
+        )
+        assert first.session_id
+
+        second = await service.get_recommendations(
+            "movies",
+            RecommendationRequest(user_message="要更烧脑的", session_id=first.session_id),
+        )
+
+        assert second.session_id == first.session_id
+        history = selector.calls[1]["conversation_history"]
+        assert [m["content"] for m in history] == ["推荐悬疑片", first.message]
+        assert selector.calls[1]["known_profile"].attributes == {"题材": "悬疑"}
+
+    async def test_unknown_session_gets_new_id(self) -> None:
+        """Expired or foreign session IDs start a fresh conversation."""
+        store = _store()
+        session = await store.open("missing", "movies")
+        assert session.session_id != "missing"
+        assert store.stats.expired == 1 and store.stats.created == 1
+
+        await store.save(session)
+        assert (await store.open(session.session_id, "books")).session_id != session.session_id
+
+    async def test_history_is_trimmed(self) -> None:
+        """Only the most recent messages are kept per session."""
+        store = _store(max_messages=4)
+        session = await store.open(None, "movies")
+        for turn in range(3):
+            session.append_turn(f"问{turn}", f"答{turn}", store.max_messages)
+        await store.save(session)
+
+        restored = await store.open(session.session_id, "movies")
+        assert [m.content for m in restored.history] == ["问1", "答1", "问2", "答2"]
+
+    async def test_missed_session_is_seeded_from_client_history(self) -> None:
+        """A turn on a worker without the session still keeps the resent history."""
+        selector = RecordingSelector()
+        service = _service(selector, _store())
+        history = [
+            {"role": "user", "content": "推荐悬疑片"},
+            {"role": "assistant", "content": "第1轮推荐。"},
+        ]
+
+        response = await service.get_recommendations(
+            "movies",
+            RecommendationRequest(
+                user_message="要更烧脑的", session_id="other-worker", conversation_history=history
+            ),
+        )
+        assert response.session_id != "other-worker"
+        assert [m["content"] for m in selector.calls[0]["conversation_history"]] == [
+            "推荐悬疑片",
+            "第1轮推荐。",
+        ]
+
+        third = await service.get_recommendations(
+            "movies", RecommendationRequest(user_message="再来一部", session_id=response.session_id)
+        )
+        assert third.session_id == response.session_id
+        assert [m["content"] for m in selector.calls[1]["conversation_history"]] == [
+            "推荐悬疑片",
+            "第1轮推荐。",
+            "要更烧脑的",
+            response.message,
+        ]
+
+    async def test_client_history_replaces_stored_history(self) -> None:
+        """Resent history becomes the session's history instead of being merged."""
+        selector = RecordingSelector()
+        store = _store()
+        service = _service(selector, store)
+        first = await service.get_recommendations(
+            "movies", RecommendationRequest(user_message="推荐悬疑片")
+        )
+        history = [
+            {"role": "user", "content": "推荐科幻片"},
+            {"role": "assistant", "content": "科幻推荐。"},
+        ]
+
+        await service.get_recommendations(
+            "movies",
+            RecommendationRequest(
+                user_message="要更烧脑的",
+                session_id=first.session_id,
+                conversation_history=history,
+            ),
+        )
+
+        session = await store.open(first.session_id, "movies")
+        assert [m.content for m in session.history][:3] == ["推荐科幻片", "科幻推荐。", "要更烧脑的"]
+        assert len(session.history) == 4
@@ -0,0 +1,112 @@
+"""Unit tests for the single-shot fast path."""
+
+import json
+from typing import Any
+
+import pytest
+
+from src.agents import SingleShotAgent
+from src.config import settings
+from src.models.recommendation import RecommendationRequest, RecommendationResponse
+from src.services.recommendation_service import AgentBundle, RecommendationService
+
+
+def _card(title: str) -> dict[str, Any]:
+    return {
+        "title": title,
+        "creator": "宫崎骏",
+        "metadata": {"年份": 2001},
+        "summary": f"{title}：少女在奇幻世界中成长与自我找寻的故事。",
+        "reason": "温暖治愈的基调契合你想放松心情的需求。",
+    }
+
+
+class StaticLLM:
+    """Stand-in chat model returning fixed content."""
+
+    def __init__(self, payload: dict[str, Any]) -> None:
+        self.content = json.dumps(payload, ensure_ascii=False)
+
+    async def ainvoke(self, messages: Any, **kwargs: Any) -> Any:
+        return type("Message", (), {"content": self.content})()
+
+
+def _service_with(single_shot: SingleShotAgent) -> tuple[RecommendationService, list[str]]:
+    service = RecommendationService(response_cache=None)
+    fallback_calls: list[str] = []
+
+    async def multi_agent(*args: Any, **kwargs: Any) -> RecommendationResponse:
+        request = args[2]
+        fallback_calls.append(request.request_id)
+        raise RuntimeError("multi-agent workflow reached")
+
+    service._run_multi_agent = multi_agent  # type: ignore[method-assign]
+    service.agents["anime"] = AgentBundle(
+        selector=None,  # type: ignore[arg-type]
+        extractor=None,  # type: ignore[arg-type]
+        insight=None,  # type: ignore[arg-type]
+        assembler=None,  # type: ignore[arg-type]
+        single_shot=single_shot,
+    )
+    return service, fallback_calls
+
+
+class TestSingleShotFastPath:
+    """Tests for the single-shot workflow and its fallback."""
+
+    async def test_valid_output_skips_multi_agent(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """A schema-valid single-shot answer is returned directly."""
+        monkeypatch.setattr(settings, "single_shot_default", True)
+        agent = SingleShotAgent(theme="anime")
+        agent.llm = StaticLLM(  # type: ignore[assignment]
+            {
+                "user_profile": {"summary": "想看治愈系", "attributes": {"风格": "治愈"}},
+                "recommendations": [_card("千与千寻"), _card("龙猫")],
+                "message": "为你挑选了两部治愈动画。",
+            }
+        )
+        service, fallback_calls = _service_with(agent)
+
+        response = await service._process_workflow(
+            "anime", RecommendationRequest(user_message="推荐治愈动画", request_id="fast")
+        )
+
+        assert response.request_id == "fast"
+        assert response.recommendations[0].metadata["年份"] == "2001"
+        assert fallback_calls == []
+        assert service.fast_path_stats.successes == 1
+
+    async def test_invalid_output_falls_back(self) -> None:
+        """Too few cards fails validation and runs the multi-agent workflow."""
+        agent = SingleShotAgent(theme="anime")
+        agent.llm = StaticLLM(  # type: ignore[assignment]
+            {"user_profile": {}, "recommendations": [_card("千与千寻")], "message": "hi"}
+        )
+        service, fallback_calls = _service_with(agent)
+
+        with pytest.raises(RuntimeError):
+            await service._process_workflow(
+                "anime",
+                RecommendationRequest(
+                    user_message="推荐治愈动画", request_id="slow", fast_path=True
+                ),
+            )
+
+        assert fallback_calls == ["slow"]
+        stats = service.fast_path_stats.snapshot()
+        assert stats["attempts"] == 1 and stats["fallbacks"] == 1
+
+    def test_history_disables_default_fast_path(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Multi-turn requests are not eligible for the default fast path."""
+        monkeypatch.setattr(settings, "single_shot_default", True)
+        service = RecommendationService(response_cache=None)
+        request = RecommendationRequest(
+            user_message="再推荐一些",
+            conversation_history=[{"role": "user", "content": "推荐治愈动画"}],
+        )
+        assert service._use_fast_path(request) is False
+        assert service._use_fast_path(request.model_copy(update={"fast_path": True}))
@@ -0,0 +1,95 @@
+"""Unit tests for in-flight request coalescing."""
+
+import asyncio
+
+import pytest
+
+from src.services.singleflight import SingleFlight
+
+
+class TestSingleFlight:
+    """Tests for the singleflight helper."""
+
+    async def test_concurrent_callers_share_one_call(self) -> None:
+        """Concurrent calls with the same key run the function once."""
+        flight: SingleFlight[int] = SingleFlight()
+        calls = 0
+        release = asyncio.Event()
+
+        async def work() -> int:
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return 42
+
+        waiters = [asyncio.create_task(flight.do("k", work)) for _ in range(5)]
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await asyncio.gather(*waiters) == [42] * 5
+        assert calls == 1
+        assert flight.stats.leaders == 1 and flight.stats.joined == 4
+        assert len(flight) == 0
+
+    async def test_cancelled_waiter_does_not_cancel_shared_call(self) -> None:
+        """Other waiters still receive the result after one is cancelled."""
+        flight: SingleFlight[str] = SingleFlight()
+        release = asyncio.Event()
+
+        async def work() -> str:
+            await release.wait()
+            return "done"
+
+        first = asyncio.create_task(flight.do("k", work))
+        second = asyncio.create_task(flight.do("k", work))
+        await asyncio.sleep(0)
+
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        release.set()
+
+        assert await second == "done"
+        assert flight.stats.abandoned == 0
+
+    async def test_last_waiter_leaving_cancels_call(self) -> None:
+        """The shared call is cancelled once nobody is waiting for it."""
+        flight: SingleFlight[str] = SingleFlight()
+        started = asyncio.Event()
+        cancelled = asyncio.Event()
+
+        async def work() -> str:
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+            return "unreachable"
+
+        waiter = asyncio.create_task(flight.do("k", work))
+        await started.wait()
+        waiter.cancel()
+        await asyncio.wait_for(cancelled.wait(), timeout=1)
+        assert flight.stats.abandoned == 1
+
+    async def test_caller_after_abandonment_starts_fresh_call(self) -> None:
+        """A caller arriving right after the last waiter left does not join the cancelled call."""
+        flight: SingleFlight[str] = SingleFlight()
+        calls = 0
+
+        async def work() -> str:
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return "done"
+
+        waiter = asyncio.create_task(flight.do("k", work))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+        assert await flight.do("k", work) == "done"
+        assert calls == 2
+        assert flight.stats.leaders == 2 and flight.stats.joined == 0
@@ -0,0 +1,160 @@
+"""Unit tests for detail-stage deadlines and degraded responses."""
+
+import asyncio
+from typing import Any
+
+from src.agents import AssemblerAgent
+from src.models.recommendation import (
+    RecommendationCandidate,
+    RecommendationRequest,
+    UserProfile,
+)
+from src.services.deadlines import StageBudgets
+from src.services.recommendation_service import AgentBundle, RecommendationService
+from src.services.response_cache import ResponseCache
+
+CANDIDATES = [
+    RecommendationCandidate(title="星露谷物语", creator="ConcernedApe"),
+    RecommendationCandidate(title="空洞骑士", creator="Team Cherry"),
+]
+PROFILE = UserProfile(theme="games", attributes={"风格": "独立"})
+
+
+class StaticSelector:
+    """Selector returning fixed candidates."""
+
+    async def process(self, **kwargs: Any) -> Any:
+        return PROFILE, CANDIDATES, "为你挑选了两款独立游戏。"
+
+
+class DelayedAgent:
+    """Extractor/insight stand-in answering after a fixed delay."""
+
+    def __init__(self, delay: float, suffix: str) -> None:
+        self.delay = delay
+        self.suffix = suffix
+        self.cancelled = False
+
+    async def process(
+        self, candidates: list[RecommendationCandidate], *args: Any
+    ) -> dict[str, str]:
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        return {c.title: f"{c.title}{self.suffix}" for c in candidates}
+
+
+class DelayedFusedAgent(DelayedAgent):
+    """Fused-agent stand-in returning both maps after a fixed delay."""
+
+    def __init__(self, delay: float) -> None:
+        super().__init__(delay, "：佳作。")
+        self.calls = 0
+
+    async def process(  # type: ignore[override]
+        self, candidates: list[RecommendationCandidate], *args: Any
+    ) -> tuple[dict[str, str], dict[str, str]]:
+        self.calls += 1
+        summaries = await super().process(candidates)
+        return summaries, summaries
+
+
+def _budgets(max_timeout: float) -> StageBudgets:
+    return StageBudgets(
+        enabled=True,
+        max_timeout=max_timeout,
+        min_timeout=0.0,
+        percentile=95.0,
+        multiplier=1.5,
+        reserve=0.0,
+    )
+
+
+class TestStageDeadlines:
+    """Tests for the detail-stage budget."""
+
+    async def test_late_insight_degrades_instead_of_failing(self) -> None:
+        """A slow insight stage is cancelled and defaults fill the reasons."""
+        insight = DelayedAgent(10.0, "：理由")
+        cache = ResponseCache(max_entries=8, ttl=60.0)
+        service = RecommendationService(response_cache=cache)
+        service.stage_budgets = _budgets(0.05)
+        service.agents["games"] = AgentBundle(
+            selector=StaticSelector(),  # type: ignore[arg-type]
+            extractor=DelayedAgent(0.0, "：独立游戏佳作。"),  # type: ignore[arg-type]
+            insight=insight,  # type: ignore[arg-type]
+            assembler=AssemblerAgent(theme="games"),
+        )
+        request = RecommendationRequest(user_message="推荐独立游戏")
+
+        response = await service.get_recommendations("games", request)
+
+        assert response.degraded is True
+        assert insight.cancelled
+        assert response.recommendations[0].summary == "星露谷物语：独立游戏佳作。"
+        assert response.recommendations[0].reason == AssemblerAgent(theme="games")._default_reason()
+        assert await cache.get("games", request) is None
+        snapshot = service.stage_budgets.snapshot()
+        assert snapshot["degraded"] == 1 and snapshot["reason_timeouts"] == 1
+
+    async def test_late_fused_call_is_cancelled(self) -> None:
+        """The shared fused call stops with its stages when the budget runs out."""
+        fused = DelayedFusedAgent(10.0)
+        service = RecommendationService(response_cache=None)
+        service.stage_budgets = _budgets(0.05)
+        service.agents["games"] = AgentBundle(
+            selector=StaticSelector(),  # type: ignore[arg-type]
+            extractor=DelayedAgent(0.0, ""),  # type: ignore[arg-type]
+            insight=DelayedAgent(0.0, ""),  # type: ignore[arg-type]
+            assembler=AssemblerAgent(theme="games"),
+            fused=fused,  # type: ignore[arg-type]
+        )
+
+        response = await service.get_recommendations(
+            "games", RecommendationRequest(user_message="推荐独立游戏")
+        )
+        await asyncio.sleep(0)
+
+        assert response.degraded is True
+        assert fused.calls == 1 and fused.cancelled
+        snapshot = service.stage_budgets.snapshot()
+        assert snapshot["summary_timeouts"] == 1 and snapshot["reason_timeouts"] == 1
+
+    async def test_fused_call_outlives_one_cancelled_stage(self) -> None:
+        """Cancelling one stage leaves the call to the other; cancelling both stops it."""
+        fused = DelayedFusedAgent(0.05)
+        service = RecommendationService(response_cache=None)
+        bundle = AgentBundle(
+            selector=StaticSelector(),  # type: ignore[arg-type]
+            extractor=DelayedAgent(0.0, ""),  # type: ignore[arg-type]
+            insight=DelayedAgent(0.0, ""),  # type: ignore[arg-type]
+            assembler=AssemblerAgent(theme="games"),
+            fused=fused,  # type: ignore[arg-type]
+        )
+
+        summary, reason = service._detail_stages(bundle, "games", CANDIDATES, PROFILE, None)
+        summary_task = asyncio.ensure_future(summary)
+        reason_task = asyncio.ensure_future(reason)
+        await asyncio.sleep(0)
+        summary_task.cancel()
+        assert (await reason_task)["空洞骑士"] == "空洞骑士：佳作。"
+        assert fused.calls == 1 and not fused.cancelled
+
+        summary, reason = service._detail_stages(bundle, "games", CANDIDATES, PROFILE, None)
+        tasks = [asyncio.ensure_future(summary), asyncio.ensure_future(reason)]
+        await asyncio.sleep(0)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await asyncio.sleep(0)
+        assert fused.calls == 2 and fused.cancelled
+
+    def test_budget_adapts_to_observed_latency(self) -> None:
+        """Once enough samples exist the budget follows the latency percentile."""
+        budgets = _budgets(20.0)
+        assert budgets.detail_budget() == 20.0
+        for _ in range(20):
+            budgets.observe(2.0)
+        assert budgets.detail_budget() == 3.0
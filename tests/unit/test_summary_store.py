@@ -0,0 +1,176 @@
+"""Unit tests for the per-item summary store."""
+
+import itertools
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+
+from src.agents.essence_extractor import EssenceExtractorAgent
+from src.models.recommendation import RecommendationCandidate
+from src.services import summary_store
+from src.services.redis_client import RedisCircuitBreaker
+from src.services.summary_store import (
+    FileSummaryBackend,
+    MemorySummaryBackend,
+    RedisSummaryBackend,
+    SummaryStore,
+    summary_key,
+)
+
+CANDIDATES = [
+    RecommendationCandidate(title="球状闪电", creator="刘慈欣"),
+    RecommendationCandidate(title="沙丘", creator="弗兰克·赫伯特"),
+]
+
+
+class RecordingLLM:
+    """Stand-in chat model that records every call."""
+
+    def __init__(self, content: str) -> None:
+        self.content = content
+        self.calls: list[Any] = []
+
+    async def ainvoke(self, messages: Any, **kwargs: Any) -> Any:
+        self.calls.append(messages)
+        return type("Message", (), {"content": self.content})()
+
+
+class FakeRedis:
+    """In-memory stand-in for the Redis commands used by the summary backend."""
+
+    def __init__(self) -> None:
+        self.values: dict[str, str] = {}
+        self.index: dict[str, float] = {}
+
+    def pipeline(self, transaction: bool = True) -> "FakePipeline":
+        return FakePipeline(self)
+
+    async def mget(self, keys: list[str]) -> list[bytes | None]:
+        return [self.values[k].encode() if k in self.values else None for k in keys]
+
+    async def zrange(self, name: str, start: int, end: int) -> list[bytes]:
+        ranked = sorted(self.index, key=self.index.__getitem__)
+        return [member.encode() for member in ranked[start : end + 1]]
+
+    async def zrem(self, name: str, *members: str) -> None:
+        for member in members:
+            self.index.pop(member, None)
+
+    async def delete(self, *names: str) -> None:
+        for name in names:
+            self.values.pop(name, None)
+
+
+class FakePipeline:
+    """Buffers commands and applies them to a FakeRedis on execute."""
+
+    def __init__(self, redis: FakeRedis) -> None:
+        self.redis = redis
+        self.commands: list[Any] = []
+
+    async def __aenter__(self) -> "FakePipeline":
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        return None
+
+    def set(self, name: str, value: str, ex: int) -> None:
+        self.commands.append(lambda: self.redis.values.__setitem__(name, value))
+
+    def expire(self, name: str, seconds: int) -> None:
+        self.commands.append(lambda: None)
+
+    def zadd(self, name: str, mapping: dict[str, float], xx: bool = False) -> None:
+        def apply() -> None:
+            for member, score in mapping.items():
+                if not xx or member in self.redis.index:
+                    self.redis.index[member] = score
+
+        self.commands.append(apply)
+
+    def zcard(self, name: str) -> None:
+        self.commands.append(lambda: len(self.redis.index))
+
+    async def execute(self) -> list[Any]:
+        return [command() for command in self.commands]
+
+
+class TestSummaryKey:
+    """Tests for content addressing."""
+
+    def test_key_ignores_case_and_spacing(self) -> None:
+        """Equivalent titles map to the same address."""
+        first = RecommendationCandidate(title="Dune ", creator="Frank Herbert")
+        second = RecommendationCandidate(title="dune", creator="frank  herbert")
+        assert summary_key("books", first) == summary_key("books", second)
+        assert summary_key("books", first) != summary_key("movies", first)
+
+
+class TestFileSummaryBackend:
+    """Tests for the SQLite file backend."""
+
+    async def test_persists_and_bounds_entries(self, tmp_path: Path) -> None:
+        """Entries survive reopening and the oldest are evicted past capacity."""
+        path = tmp_path / "summaries.sqlite3"
+        backend = FileSummaryBackend(path, max_entries=2, ttl=3600)
+        await backend.set_many({"a": "摘要A"})
+        await backend.set_many({"b": "摘要B"})
+        await backend.set_many({"c": "摘要C"})
+        assert len(backend) == 2
+
+        reopened = FileSummaryBackend(path, max_entries=2, ttl=3600)
+        assert len(reopened) == 2
+        assert await reopened.get_many(["a", "b", "c"]) == {"b": "摘要B", "c": "摘要C"}
+
+
+class TestRedisSummaryBackend:
+    """Tests for the Redis backend's index."""
+
+    async def test_hits_are_evicted_last(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """A looked-up entry outlives entries stored after it but never read."""
+        clock = itertools.count()
+        monkeypatch.setattr(summary_store, "time", SimpleNamespace(time=lambda: next(clock)))
+        redis = FakeRedis()
+        backend = RedisSummaryBackend(
+            redis,  # type: ignore[arg-type]
+            max_entries=2,
+            ttl=3600,
+            breaker=RedisCircuitBreaker(cooldown=5.0),
+        )
+        await backend.set_many({"a": "摘要A"})
+        await backend.set_many({"b": "摘要B"})
+        assert await backend.get_many(["a", "missing"]) == {"a": "摘要A"}
+
+        await backend.set_many({"c": "摘要C"})
+
+        assert await backend.get_many(["a", "b", "c"]) == {"a": "摘要A", "c": "摘要C"}
+        assert sorted(redis.index) == ["a", "c"]
+
+
+class TestExtractorWithStore:
+    """Tests for the extractor's use of the summary store."""
+
+    async def test_only_misses_reach_llm(self) -> None:
+        """Stored summaries are reused and only new candidates are generated."""
+        store = SummaryStore(MemorySummaryBackend(max_entries=16, ttl=3600))
+        agent = EssenceExtractorAgent(theme="books", summary_store=store)
+        llm = RecordingLLM(
+            '[{"title": "沙丘", "summary": "沙漠星球上的权力斗争与生态寓言。"}]'
+        )
+        agent.llm = llm  # type: ignore[assignment]
+        await store.save(
+            "books", CANDIDATES[:1], {"球状闪电": "一道球状闪电引出的物理奇想。"},
+            agent.prompt_digest,
+        )
+
+        summaries = await agent.process(CANDIDATES)
+        assert summaries["球状闪电"] == "一道球状闪电引出的物理奇想。"
+        assert summaries["沙丘"] == "沙漠星球上的权力斗争与生态寓言。"
+        assert len(llm.calls) == 1
+        assert "球状闪电" not in llm.calls[0][1].content
+
+        again = await agent.process(CANDIDATES)
+        assert again == summaries
+        assert len(llm.calls) == 1
@@ -0,0 +1,232 @@
+"""Unit tests for workflow tracing."""
+
+import asyncio
+import json
+from collections.abc import AsyncIterator
+from pathlib import Path
+from typing import Any
+
+import pytest
+from fastapi.testclient import TestClient
+from langchain_core.messages import AIMessage, HumanMessage
+from opentelemetry import trace
+
+from src.agents import AssemblerAgent, SelectorAgent
+from src.models.recommendation import RecommendationCandidate, RecommendationRequest
+from src.services.recommendation_service import AgentBundle, RecommendationService
+from src.tracing import _jsonl_exporter
+
+pytest.importorskip("opentelemetry.sdk")
+
+from opentelemetry.sdk.trace import ReadableSpan, TracerProvider  # noqa: E402
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor  # noqa: E402
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (  # noqa: E402
+    InMemorySpanExporter,
+)
+
+SELECTOR_OUTPUT = json.dumps(
+    {
+        "user_profile": {"summary": "喜欢硬核科幻", "attributes": {"类型": ["科幻"]}},
+        "candidates": [
+            {"title": "沙丘", "creator": "弗兰克·赫伯特"},
+            {"title": "球状闪电", "creator": "刘慈欣"},
+        ],
+        "message": "为你挑选了两本科幻小说。",
+    },
+    ensure_ascii=False,
+)
+
+
+class ReplyLLM:
+    """Stand-in chat model answering with fixed text and reported usage."""
+
+    async def ainvoke(self, messages: Any, **kwargs: Any) -> AIMessage:
+        return AIMessage(
+            content=SELECTOR_OUTPUT,
+            usage_metadata={"input_tokens": 120, "output_tokens": 40, "total_tokens": 160},
+        )
+
+
+class TextAgent:
+    """Extractor/insight stand-in returning fixed texts."""
+
+    prompt_digest = ""
+
+    async def process(
+        self, candidates: list[RecommendationCandidate], *args: Any
+    ) -> dict[str, str]:
+        return {c.title: f"{c.title}：宏大世界观下的科幻叙事作品。" for c in candidates}
+
+
+@pytest.fixture(scope="module")
+def exporter() -> InMemorySpanExporter:
+    """Install an in-memory tracer provider (the global provider can be set only once)."""
+    memory = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(memory))
+    trace.set_tracer_provider(provider)
+    return memory
+
+
+@pytest.fixture
+def spans(exporter: InMemorySpanExporter) -> InMemorySpanExporter:
+    exporter.clear()
+    return exporter
+
+
+def _service() -> RecommendationService:
+    selector = SelectorAgent(theme="books")
+    selector.llm = ReplyLLM()  # type: ignore[assignment]
+    service = RecommendationService(response_cache=None, session_store=None)
+    service.inflight = None
+    service.agents["books"] = AgentBundle(
+        selector=selector,
+        extractor=TextAgent(),  # type: ignore[arg-type]
+        insight=TextAgent(),  # type: ignore[arg-type]
+        assembler=AssemblerAgent(theme="books"),
+    )
+    return service
+
+
+@pytest.fixture
+async def flaky_upstream() -> AsyncIterator[str]:
+    """Answer the first chat completion with a 500 and the retry with a reply."""
+    completion = json.dumps(
+        {
+            "id": "chatcmpl-1",
+            "object": "chat.completion",
+            "created": 0,
+            "model": "gpt-4",
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": "好的"},
+                    "finish_reason": "stop",
+                }
+            ],
+        }
+    ).encode()
+    served = 0
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        nonlocal served
+        try:
+            while head := await reader.readuntil(b"\r\n\r\n"):
+                length = next(
+                    int(line.split(b":")[1])
+                    for line in head.lower().split(b"\r\n")
+                    if line.startswith(b"content-length:")
+                )
+                await reader.readexactly(length)
+                served += 1
+                status, body = b"200 OK", completion
+                if served == 1:
+                    status, body = b"500 Internal Server Error", b"{}"
+                writer.write(
+                    b"HTTP/1.1 " + status + b"\r\ncontent-type: application/json\r\n"
+                    b"content-length: " + str(len(body)).encode() + b"\r\n\r\n" + body
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    async with server:
+        yield f"http://127.0.0.1:{port}/v1"
+
+
+def _by_name(finished: tuple[ReadableSpan, ...]) -> dict[str, ReadableSpan]:
+    return {span.name: span for span in finished}
+
+
+class TestWorkflowTracing:
+    """Tests for the spans recorded around the workflow."""
+
+    async def test_request_produces_one_trace_with_stage_and_agent_spans(
+        self, spans: InMemorySpanExporter
+    ) -> None:
+        """Root, workflow, stage and agent spans share one trace and nest properly."""
+        await _service().get_recommendations(
+            "books", RecommendationRequest(user_message="推荐科幻", request_id="trace-1")
+        )
+
+        named = _by_name(spans.get_finished_spans())
+        root = named["recommendation"]
+        assert root.attributes["request_id"] == "trace-1"
+        assert root.attributes["theme"] == "books"
+        assert {span.context.trace_id for span in named.values()} == {root.context.trace_id}
+
+        assert named["workflow"].parent.span_id == root.context.span_id
+        for stage in ("stage.selector", "stage.details", "stage.assembler"):
+            assert named[stage].parent.span_id == named["workflow"].context.span_id
+
+        agent = named["agent.selector"]
+        assert agent.parent.span_id == named["stage.selector"].context.span_id
+        assert agent.attributes["llm.model"]
+        assert agent.attributes["llm.hedge_attempts"] == 1
+        assert agent.attributes["llm.retries"] == 0
+        attempt = named["llm.attempt"]
+        assert attempt.parent.span_id == agent.context.span_id
+        assert attempt.attributes["llm.prompt_tokens"] == 120
+        assert attempt.attributes["llm.completion_tokens"] == 40
+        assert attempt.attributes["llm.queue_seconds"] >= 0
+
+    async def test_sdk_retries_are_recorded(
+        self, spans: InMemorySpanExporter, flaky_upstream: str
+    ) -> None:
+        """Retries made inside the openai SDK show up on the attempt and agent spans."""
+        agent = SelectorAgent(theme="books", api_base=flaky_upstream)
+
+        response = await agent._ainvoke([HumanMessage(content="你好")])
+
+        assert response.content == "好的"
+        named = _by_name(spans.get_finished_spans())
+        assert named["llm.attempt"].attributes["llm.retries"] == 1
+        assert named["agent.selector"].attributes["llm.retries"] == 1
+        assert named["agent.selector"].attributes["llm.hedge_attempts"] == 1
+
+    def test_incoming_traceparent_is_continued(
+        self, spans: InMemorySpanExporter, client: TestClient, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Spans of a request join the caller's trace."""
+        from src import main
+
+        service = _service()
+        monkeypatch.setattr(main.recommendation_service, "agents", service.agents)
+        monkeypatch.setattr(main.recommendation_service, "response_cache", None)
+        trace_id = "4bf92f3577b34da6a3ce929d0e0e4736"
+
+        response = client.post(
+            "/api/books/recommend",
+            json={"user_message": "推荐科幻", "request_id": "trace-2"},
+            headers={"traceparent": f"00-{trace_id}-00f067aa0ba902b7-01"},
+        )
+        assert response.status_code == 200
+
+        root = _by_name(spans.get_finished_spans())["recommendation"]
+        assert format(root.context.trace_id, "032x") == trace_id
+        assert format(root.parent.span_id, "016x") == "00f067aa0ba902b7"
+
+
+class TestJsonLinesExporter:
+    """Tests for the collector-less span file."""
+
+    async def test_spans_written_one_per_line(
+        self, spans: InMemorySpanExporter, tmp_path: Path
+    ) -> None:
+        """Each span becomes one JSON object with its IDs and attributes."""
+        await _service().get_recommendations(
+            "books", RecommendationRequest(user_message="推荐科幻", request_id="trace-3")
+        )
+        path = tmp_path / "traces" / "spans.jsonl"
+        sink = _jsonl_exporter(path)
+        sink.export(spans.get_finished_spans())
+        sink.shutdown()
+
+        records = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+        assert len(records) == len(spans.get_finished_spans())
+        root = next(r for r in records if r["name"] == "recommendation")
+        assert root["attributes"]["request_id"] == "trace-3"
+        assert root["parent_id"] is None
+        assert all(r["trace_id"] == root["trace_id"] for r in records)
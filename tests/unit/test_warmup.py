@@ -0,0 +1,107 @@
+"""Unit tests for the startup warm-up."""
+
+import asyncio
+from collections.abc import AsyncIterator
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+import pytest
+
+from src.agents.base import BaseAgent
+from src.llm import clients
+from src.llm.clients import LLMClientRegistry
+from src.services.recommendation_service import SUPPORTED_THEMES, RecommendationService
+
+
+@pytest.fixture
+async def upstream() -> AsyncIterator[tuple[str, list[str]]]:
+    """Serve ``GET /v1/models`` over keep-alive HTTP/1.1, slowly enough to overlap."""
+    accepted: list[str] = []
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        accepted.append(str(writer.get_extra_info("peername")))
+        try:
+            while await reader.readuntil(b"\r\n\r\n"):
+                await asyncio.sleep(0.05)
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\ncontent-type: application/json\r\n"
+                    b'content-length: 11\r\n\r\n{"data":[]}'
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    async with server:
+        yield f"http://127.0.0.1:{port}/v1", accepted
+
+
+class TestPrewarm:
+    """Tests for opening upstream connections ahead of time."""
+
+    async def test_opens_reusable_connections(self, upstream: tuple[str, list[str]]) -> None:
+        """Concurrent probes open one connection each; later calls reuse them."""
+        base, accepted = upstream
+        registry = LLMClientRegistry()
+        try:
+            assert await registry.prewarm(base, "key", "gpt-4", 3) == 3
+            client = registry.get_async_client(base, "key", "gpt-4")
+            await asyncio.gather(*(client.get(f"{base}/models") for _ in range(3)))
+            assert len(accepted) == 3
+            assert registry.snapshot()[0]["open_connections"] == 3
+        finally:
+            await registry.aclose()
+
+    async def test_unreachable_upstream_opens_nothing(self) -> None:
+        """Connection errors are logged, not raised."""
+        registry = LLMClientRegistry()
+        try:
+            assert await registry.prewarm("http://127.0.0.1:9/v1", "key", "gpt-4", 2) == 0
+        finally:
+            await registry.aclose()
+
+
+class TestServiceWarmup:
+    """Tests for RecommendationService.warm_up."""
+
+    async def test_builds_every_theme_and_prewarms(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """All bundles and prompts are ready and each upstream is pre-warmed once."""
+        calls: list[tuple[Any, ...]] = []
+
+        async def fake_prewarm(*args: Any) -> int:
+            calls.append(args)
+            return 0 if "unreachable" in args[0] else args[-1]
+
+        monkeypatch.setattr(clients.llm_clients, "prewarm", fake_prewarm)
+        BaseAgent._prompt_cache.clear()
+        service = RecommendationService(api_base="https://unreachable.example/v1")
+        assert service.warmup.state == "cold"
+
+        status = await service.warm_up(connections=2, timeout=5)
+        assert status is service.warmup
+        assert status.state == "degraded" and status.themes == len(SUPPORTED_THEMES)
+        assert all(bundle is not None for bundle in service.agents.values())
+        assert status.prompts == len(BaseAgent._prompt_cache) >= 4 * len(SUPPORTED_THEMES)
+        assert len(calls) == 1 and calls[0][0] == "https://unreachable.example/v1"
+        assert status.errors == [f"no connection opened to {next(iter(status.connections))}"]
+
+    async def test_failed_step_ends_degraded(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """An exception is recorded instead of leaving the warm-up stuck in "warming"."""
+
+        def broken_build(theme: str) -> None:
+            raise RuntimeError("bad prompt")
+
+        service = RecommendationService()
+        monkeypatch.setattr(service, "_get_or_create_agents", broken_build)
+
+        status = await service.warm_up(connections=0, timeout=5)
+        assert status.state == "degraded" and status.themes == 0
+        assert status.errors == ["warm-up failed: RuntimeError: bad prompt"]
+
+    def test_concurrent_first_use_builds_one_bundle(self) -> None:
+        """Threads racing on a cold theme share a single bundle."""
+        service = RecommendationService()
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            bundles = list(pool.map(lambda _: service._get_or_create_agents("games"), range(8)))
+        assert all(bundle is bundles[0] for bundle in bundles)